@@ -1,6 +1,7 @@
 import httpx
 from fastapi import APIRouter
 
+from chat.app.core.admission import get_admission_controller
 from config import config as _cfg
 
 router = APIRouter()
@@ -20,3 +21,8 @@ async def health():
         status['document_server_reachable'] = False
         status['document_server_error'] = str(e)
     return status
+
+
+@router.get('/api/metrics/admission', summary='Chat admission queue metrics')
+async def admission_metrics():
+    return get_admission_controller().metrics()
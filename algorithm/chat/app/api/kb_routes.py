@@ -0,0 +1,36 @@
+"""kb_routes: Knowledge-base configuration API.
+
+The backend calls this endpoint after a dataset is updated (e.g. rebound to another
+algo) or deleted, so kb_search drops the search pipelines it compiled for that
+dataset and rebuilds them against the new settings on the next call.
+
+POST /api/kb/invalidate
+    Body: {"kb_id": "kb_001"}  (omit or leave empty to drop every dataset)
+    Response: {"status": "ok", "kb_id": "<str>", "removed": <int>}
+"""
+from __future__ import annotations
+
+from fastapi import APIRouter
+from lazyllm import LOG
+from pydantic import BaseModel
+
+from chat.tools.kb import invalidate_search_ppl_cache
+
+router = APIRouter()
+
+
+class KbInvalidateRequest(BaseModel):
+    kb_id: str = ''
+
+
+@router.post('/api/kb/invalidate', summary='Drop compiled search pipelines of a dataset')
+async def invalidate_kb(body: KbInvalidateRequest | None = None):
+    """Drop the kb_search pipelines compiled for a dataset after its configuration changed.
+
+    - **kb_id**: Dataset (kb) id; empty drops every cached pipeline.
+    """
+    body = body or KbInvalidateRequest()
+    kb_id = body.kb_id.strip()
+    removed = invalidate_search_ppl_cache(kb_id=kb_id or None)
+    LOG.info(f'[KbRoutes] invalidate kb_id={kb_id or "<all>"!r} removed={removed}')
+    return {'status': 'ok', 'kb_id': kb_id, 'removed': removed}
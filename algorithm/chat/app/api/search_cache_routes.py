@@ -0,0 +1,47 @@
+"""search_cache_routes: Search result cache API.
+
+The backend calls this endpoint after documents are added to or deleted from a
+dataset, so cached search results of that dataset are not served any more.
+
+POST /api/search_cache/invalidate
+    Body: {"dataset": "kb_001"}  (omit or leave empty to drop every dataset)
+    Response: {"status": "ok", "dataset": "<str>", "removed": <int>}
+
+GET /api/search_cache/stats
+    Response: {"enabled": <bool>, "entries": <int>, "hits": <int>, ...}
+"""
+from __future__ import annotations
+
+from fastapi import APIRouter
+from lazyllm import LOG
+from pydantic import BaseModel
+
+from chat.pipelines.builders.search_cache import get_search_cache
+
+router = APIRouter()
+
+
+class SearchCacheInvalidateRequest(BaseModel):
+    dataset: str = ''
+
+
+@router.post('/api/search_cache/invalidate', summary='Drop cached search results of a dataset')
+async def invalidate_search_cache(body: SearchCacheInvalidateRequest | None = None):
+    """Invalidate cached search results after the documents of a dataset changed.
+
+    - **dataset**: Dataset (kb) id; empty drops all cached results.
+    """
+    body = body or SearchCacheInvalidateRequest()
+    dataset = body.dataset.strip()
+    cache = get_search_cache()
+    removed = cache.invalidate_dataset(dataset or None) if cache is not None else 0
+    LOG.info(f'[SearchCacheRoutes] invalidate dataset={dataset or "<all>"!r} removed={removed}')
+    return {'status': 'ok', 'dataset': dataset, 'removed': removed}
+
+
+@router.get('/api/search_cache/stats', summary='Search result cache statistics')
+async def search_cache_stats():
+    cache = get_search_cache()
+    if cache is None:
+        return {'enabled': False}
+    return {'enabled': True, 'entries': len(cache), **cache.stats.as_dict()}
@@ -0,0 +1,308 @@
+"""Admission control for chat requests.
+
+Replaces the single global ``asyncio.Semaphore`` in front of the chat
+pipelines.  Requests are admitted when a global slot is free and the caller's
+user and dataset are under their quotas; otherwise they wait in a per-tenant
+queue.  Tenants are served with start-time weighted fair queuing, so one busy
+user cannot starve the others, and within a tenant higher ``priority``
+requests go first.  Requests that cannot be queued, or wait past the queue
+deadline, are shed with :class:`AdmissionRejected` (429 / 503).
+
+Usage:
+    ticket = await get_admission_controller().acquire(user='u1', dataset='algo', priority=0)
+    try:
+        ...
+    finally:
+        ticket.release()
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from lazyllm import LOG
+
+from config import config as _cfg
+
+_WAIT_SAMPLE_SIZE = 1024
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of admitted.
+
+    ``status_code`` is 429 when the tenant itself is over its queue quota and
+    503 when the service is saturated (queue full or queue deadline exceeded).
+    """
+
+    def __init__(self, status_code: int, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """Handle for an admitted request; ``release`` is idempotent."""
+
+    __slots__ = ('_controller', 'user', 'dataset', 'wait_time', '_released')
+
+    def __init__(self, controller: 'AdmissionController', user: str, dataset: str, wait_time: float):
+        self._controller = controller
+        self.user = user
+        self.dataset = dataset
+        self.wait_time = wait_time
+        self._released = False
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._controller._release(self)
+
+
+class _Waiter:
+    __slots__ = ('user', 'dataset', 'priority', 'enqueued_at', 'future')
+
+    def __init__(self, user: str, dataset: str, priority: int, future: asyncio.Future):
+        self.user = user
+        self.dataset = dataset
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.future = future
+
+
+def parse_tenant_weights(spec: Optional[str]) -> Dict[str, float]:
+    """Parse ``"user_a:2,user_b:0.5"`` into a weight map; malformed items are skipped."""
+    weights: Dict[str, float] = {}
+    for item in (spec or '').split(','):
+        name, sep, value = item.strip().rpartition(':')
+        if not sep or not name:
+            continue
+        try:
+            weight = float(value)
+        except ValueError:
+            continue
+        if weight > 0:
+            weights[name] = weight
+    return weights
+
+
+class AdmissionController:
+    """Per-user / per-dataset quotas with weighted fair queuing between tenants.
+
+    Args:
+        max_concurrency: Global number of requests running at once.
+        user_max_concurrency: Running requests allowed per user (0 = no cap).
+        dataset_max_concurrency: Running requests allowed per dataset (0 = no cap).
+        queue_timeout: Seconds a request may wait before it is shed with 503.
+        max_queue_depth: Total queued requests; beyond it new ones get 503.
+        user_max_queued: Queued requests per user; beyond it new ones get 429.
+        tenant_weights: Fair-share weight per user (default 1.0).
+    """
+
+    def __init__(self, max_concurrency: int, *, user_max_concurrency: int = 0, dataset_max_concurrency: int = 0,
+                 queue_timeout: float = 30.0, max_queue_depth: int = 256, user_max_queued: int = 0,
+                 tenant_weights: Optional[Dict[str, float]] = None):
+        self._max_concurrency = max(1, int(max_concurrency))
+        self._user_limit = max(0, int(user_max_concurrency))
+        self._dataset_limit = max(0, int(dataset_max_concurrency))
+        self._queue_timeout = max(0.0, float(queue_timeout))
+        self._max_queue_depth = max(0, int(max_queue_depth))
+        self._user_max_queued = max(0, int(user_max_queued))
+        self._weights = dict(tenant_weights or {})
+
+        self._running = 0
+        self._running_users: Counter = Counter()
+        self._running_datasets: Counter = Counter()
+        # Per-tenant heap of (-priority, seq, waiter).  Each backlogged tenant carries the
+        # virtual start tag of its head request; the smallest finish tag is served next.
+        self._queues: Dict[str, List[Tuple[int, int, _Waiter]]] = {}
+        self._start_tags: Dict[str, float] = {}
+        self._last_finish: Dict[str, float] = {}
+        self._vtime = 0.0
+        self._depth = 0
+        self._seq = itertools.count()
+
+        self._stats_lock = threading.Lock()
+        self._wait_samples: Deque[float] = deque(maxlen=_WAIT_SAMPLE_SIZE)
+        self._admitted = 0
+        self._rejected: Counter = Counter()
+
+    # ---------------- public ----------------
+    async def acquire(self, user: Optional[str], dataset: Optional[str], priority: int = 0) -> AdmissionTicket:
+        user, dataset = user or '', dataset or ''
+        if not self._queues and self._can_run(user, dataset):
+            return self._admit(user, dataset, 0.0)
+
+        if self._max_queue_depth and self._depth >= self._max_queue_depth:
+            raise self._reject(503, 'queue_full', user, dataset)
+        if self._user_max_queued and len(self._queues.get(user, ())) >= self._user_max_queued:
+            raise self._reject(429, 'user_queue_full', user, dataset)
+
+        waiter = _Waiter(user, dataset, int(priority or 0), asyncio.get_running_loop().create_future())
+        if user not in self._queues:
+            self._queues[user] = []
+            self._start_tags[user] = max(self._vtime, self._last_finish.get(user, 0.0))
+        heapq.heappush(self._queues[user], (-waiter.priority, next(self._seq), waiter))
+        self._depth += 1
+        # Quotas may already allow this request (e.g. it was only blocked by FIFO order).
+        self._dispatch()
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter.future), self._queue_timeout or None)
+        except asyncio.TimeoutError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitted right at the deadline: keep the slot.
+                return waiter.future.result()
+            self._remove(waiter)
+            raise self._reject(503, 'queue_timeout', user, dataset) from None
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                waiter.future.result().release()
+            else:
+                self._remove(waiter)
+            raise
+
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of queue depth, running counts and admission wait times (seconds)."""
+        with self._stats_lock:
+            samples = sorted(self._wait_samples)
+            admitted, rejected = self._admitted, dict(self._rejected)
+        return {
+            'max_concurrency': self._max_concurrency,
+            'running': self._running,
+            'queue_depth': self._depth,
+            'queue_depth_by_user': {user: len(q) for user, q in self._queues.items() if q},
+            'running_by_user': {k: v for k, v in self._running_users.items() if v},
+            'running_by_dataset': {k: v for k, v in self._running_datasets.items() if v},
+            'admitted_total': admitted,
+            'rejected_total': rejected,
+            'wait_time': {
+                'samples': len(samples),
+                'avg': sum(samples) / len(samples) if samples else 0.0,
+                'p50': _percentile(samples, 50),
+                'p95': _percentile(samples, 95),
+                'p99': _percentile(samples, 99),
+                'max': samples[-1] if samples else 0.0,
+            },
+        }
+
+    # ---------------- internals ----------------
+    def _can_run(self, user: str, dataset: str) -> bool:
+        if self._running >= self._max_concurrency:
+            return False
+        if self._user_limit and self._running_users[user] >= self._user_limit:
+            return False
+        if self._dataset_limit and self._running_datasets[dataset] >= self._dataset_limit:
+            return False
+        return True
+
+    def _admit(self, user: str, dataset: str, wait_time: float) -> AdmissionTicket:
+        self._running += 1
+        self._running_users[user] += 1
+        self._running_datasets[dataset] += 1
+        with self._stats_lock:
+            self._admitted += 1
+            self._wait_samples.append(wait_time)
+        return AdmissionTicket(self, user, dataset, wait_time)
+
+    def _release(self, ticket: AdmissionTicket) -> None:
+        self._running -= 1
+        self._running_users[ticket.user] -= 1
+        if not self._running_users[ticket.user]:
+            del self._running_users[ticket.user]
+        self._running_datasets[ticket.dataset] -= 1
+        if not self._running_datasets[ticket.dataset]:
+            del self._running_datasets[ticket.dataset]
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._running < self._max_concurrency:
+            best = None
+            for user, queue in self._queues.items():
+                if not queue:
+                    continue
+                waiter = queue[0][2]
+                if not self._can_run(user, waiter.dataset):
+                    continue
+                finish = self._start_tags[user] + 1.0 / self._weights.get(user, 1.0)
+                if best is None or finish < best[0]:
+                    best = (finish, user)
+            if best is None:
+                return
+            finish, user = best
+            queue = self._queues[user]
+            _, _, waiter = heapq.heappop(queue)
+            self._depth -= 1
+            self._vtime = self._start_tags[user]
+            self._last_finish[user] = finish
+            if queue:
+                self._start_tags[user] = finish
+            else:
+                self._drop_tenant(user)
+            wait_time = time.monotonic() - waiter.enqueued_at
+            waiter.future.set_result(self._admit(waiter.user, waiter.dataset, wait_time))
+
+    def _remove(self, waiter: _Waiter) -> None:
+        queue = self._queues.get(waiter.user)
+        if not queue:
+            return
+        for idx, entry in enumerate(queue):
+            if entry[2] is waiter:
+                queue[idx] = queue[-1]
+                queue.pop()
+                heapq.heapify(queue)
+                self._depth -= 1
+                break
+        if not queue:
+            self._drop_tenant(waiter.user)
+        # A removed head may have been blocking eligible waiters behind it.
+        self._dispatch()
+
+    def _drop_tenant(self, user: str) -> None:
+        del self._queues[user]
+        del self._start_tags[user]
+        if len(self._last_finish) > _WAIT_SAMPLE_SIZE:
+            # Finish tags at or behind virtual time no longer affect scheduling.
+            self._last_finish = {k: v for k, v in self._last_finish.items() if v > self._vtime}
+
+    def _reject(self, status_code: int, reason: str, user: str, dataset: str) -> AdmissionRejected:
+        with self._stats_lock:
+            self._rejected[reason] += 1
+        LOG.warning(
+            f'[ChatServer] [ADMISSION_REJECTED] [reason={reason}] [user={user}] [dataset={dataset}] '
+            f'[running={self._running}] [queue_depth={self._depth}]'
+        )
+        return AdmissionRejected(status_code, reason, retry_after=max(1.0, self._queue_timeout / 2))
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+_controller: Optional[AdmissionController] = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    """Return the process-wide admission controller (lazy init from config)."""
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = AdmissionController(
+                    _cfg['max_concurrency'],
+                    user_max_concurrency=_cfg['chat_user_max_concurrency'],
+                    dataset_max_concurrency=_cfg['chat_dataset_max_concurrency'],
+                    queue_timeout=float(_cfg['chat_queue_timeout']),
+                    max_queue_depth=_cfg['chat_max_queue_depth'],
+                    user_max_queued=_cfg['chat_user_max_queued'],
+                    tenant_weights=parse_tenant_weights(_cfg['chat_tenant_weights']),
+                )
+    return _controller
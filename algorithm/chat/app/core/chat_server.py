@@ -20,16 +20,20 @@ def create_app() -> FastAPI:
     from chat.app.api import (
         chat_routes,
         health_routes,
+        kb_routes,
         memory_generate_routes,
         model_check_routes,
+        search_cache_routes,
         vocab_routes,
     )
 
     app.include_router(health_routes.router)
     app.include_router(chat_routes.router)
+    app.include_router(kb_routes.router)
     app.include_router(memory_generate_routes.router)
     app.include_router(model_check_routes.router)
     app.include_router(vocab_routes.router)
+    app.include_router(search_cache_routes.router)
     return app
 
 
@@ -60,6 +64,7 @@ class ChatServer:
             elif resolve_dataset_url(DEFAULT_CHAT_DATASET):
                 self.get_query_pipeline(DEFAULT_CHAT_DATASET)
                 self.get_query_pipeline(DEFAULT_CHAT_DATASET, stream=True)
+                self._warmup_reranker_pool()
                 self.startup_validated = True
             else:
                 self.startup_validation_error = (
@@ -74,6 +79,17 @@ class ChatServer:
             LOG.exception('[ChatServer] [SERVER_START_ERROR]')
             raise exc
 
+    @staticmethod
+    def _warmup_reranker_pool() -> None:
+        # Warm-up is best-effort: a failure here only moves reranker construction
+        # back onto the first request, it must not block server startup.
+        try:
+            from chat.pipelines.builders.get_ppl_search import warmup_reranker_pool
+            count = warmup_reranker_pool()
+            LOG.info(f'[ChatServer] [RERANKER_POOL_WARMUP] [pooled={count}]')
+        except Exception as exc:
+            LOG.warning(f'[ChatServer] [RERANKER_POOL_WARMUP_FAILED] [error={exc}]')
+
     def has_dataset(self, dataset: str) -> bool:
         return resolve_dataset_url(dataset) is not None
 
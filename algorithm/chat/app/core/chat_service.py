@@ -1,6 +1,7 @@
 from __future__ import annotations
 import asyncio
 import json
+import math
 import time
 from typing import Any, Dict, List, Optional, Union
 import lazyllm
@@ -8,17 +9,20 @@ from lazyllm import LOG
 import lazyllm.tracing.collect.configs  # noqa: F401
 from lazyllm.tracing import current_trace, enable_trace
 from lazyllm.tracing.collect import runtime as tracing_runtime
-from fastapi.responses import StreamingResponse
-from chat.config import (RAG_MODE, MULTIMODAL_MODE, MAX_CONCURRENCY,
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from chat.config import (RAG_MODE, MULTIMODAL_MODE,
                          LAZYMIND_LLM_PRIORITY, SENSITIVE_FILTER_RESPONSE_TEXT,
                          URL_MAP, resolve_dataset_url)
 from chat.utils.helpers import validate_and_resolve_files
+from chat.app.core.admission import AdmissionRejected, get_admission_controller
 from chat.app.core.chat_server import chat_server
 from chat.utils.load_config import get_config_path, inject_model_config, summarize_model_config_for_log
-from chat.utils.markdown_images import rewrite_markdown_image_urls
+from chat.utils.markdown_images import MarkdownImageStreamRewriter
+from chat.utils.response_log import StreamLogAccumulator, emit_log, should_sample
+from config import config as _cfg
 
-
-rag_sem = asyncio.Semaphore(MAX_CONCURRENCY)
+_STREAM_TEXT_FIELDS = ('think', 'text')
 
 
 def _run_ppl_with_trace(ppl, ppl_args, *, session_id, dataset, mode_tag,
@@ -55,7 +59,6 @@ def _flush_trace_exporter() -> None:
     if provider is None:
         return
     try:
-        from config import config as _cfg
         provider.force_flush(timeout_millis=_cfg['langfuse_force_flush_timeout_ms'])
     except Exception as exc:
         LOG.warning(f'[ChatServer] [TRACE_FLUSH_FAILED] {exc}')
@@ -69,6 +72,19 @@ def _resp(code: int, msg: str, data: Any, cost: float) -> Dict[str, Any]:
     return {'code': code, 'msg': msg, 'data': data, 'cost': cost}
 
 
+def _rejected_response(exc: AdmissionRejected, session_id: str, start_time: float) -> JSONResponse:
+    cost = round(time.time() - start_time, 3)
+    LOG.warning(
+        f'[ChatServer] [KB_CHAT_REJECTED] [status={exc.status_code}] [reason={exc.reason}] '
+        f'[session_id={session_id}] [cost={cost}]'
+    )
+    return JSONResponse(
+        status_code=exc.status_code,
+        content=_resp(exc.status_code, f'chat service busy: {exc.reason}', None, cost),
+        headers={'Retry-After': str(math.ceil(exc.retry_after))},
+    )
+
+
 def check_sensitive_content(
     query: str, session_id: str, start_time: float
 ) -> Optional[Dict[str, Any]]:
@@ -94,6 +110,63 @@ def check_sensitive_content(
     return None
 
 
+def _open_stream_filters() -> Dict[str, Any]:
+    action = _cfg['sensitive_stream_action']
+    if action == 'off' or not chat_server.sensitive_filter.loaded:
+        return {}
+    try:
+        matchers = {field: chat_server.sensitive_filter.stream(action) for field in _STREAM_TEXT_FIELDS}
+    except ValueError as exc:
+        LOG.warning(f'[ChatServer] [SENSITIVE_FILTER_STREAM_DISABLED] {exc}')
+        return {}
+    return {field: matcher for field, matcher in matchers.items() if matcher is not None}
+
+
+def _parse_stream_chunk(chunk: Any) -> Any:
+    if isinstance(chunk, dict):
+        return dict(chunk)
+    if isinstance(chunk, str) and chunk.lstrip()[:1] == '{':
+        try:
+            payload = json.loads(chunk)
+        except (TypeError, ValueError):
+            return chunk
+        if isinstance(payload, dict):
+            return payload
+    return chunk
+
+
+def _rewrite_stream_chunk(chunk_data: Any, rewriter: MarkdownImageStreamRewriter) -> Any:
+    if isinstance(chunk_data, dict):
+        text = chunk_data.get('text')
+        if isinstance(text, str) and text:
+            chunk_data['text'] = rewriter.feed(text)
+        return chunk_data
+    if isinstance(chunk_data, str):
+        return rewriter.feed(chunk_data)
+    return chunk_data
+
+
+def _filter_stream_chunk(chunk_data: Any, filters: Dict[str, Any]) -> Any:
+    if isinstance(chunk_data, dict):
+        for field, matcher in filters.items():
+            value = chunk_data.get(field)
+            if isinstance(value, str) and value:
+                chunk_data[field] = matcher.feed(value)
+        return chunk_data
+    if isinstance(chunk_data, str) and 'text' in filters:
+        return filters['text'].feed(chunk_data)
+    return chunk_data
+
+
+def _flush_stream_text(rewriter: MarkdownImageStreamRewriter, filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    tail = {'think': '', 'text': rewriter.flush()}
+    for field, matcher in filters.items():
+        tail[field] = matcher.feed(tail[field]) + matcher.flush()
+    if not any(tail.values()):
+        return None
+    return {field: value or None for field, value in tail.items()}
+
+
 def build_query_params(query: str, history: Optional[List[Dict[str, Any]]],
                        filters: Optional[Dict[str, Any]], other_files: List[str],
                        databases: Optional[List[Dict[str, Any]]], debug: bool,
@@ -135,16 +208,25 @@ def build_query_params(query: str, history: Optional[List[Dict[str, Any]]],
 def log_chat_request(query: str, session_id: str, filters: Optional[Dict[str, Any]],
                      other_files: List[str], databases: Optional[List[Dict[str, Any]]],
                      image_files: List[str], cost: float,
-                     response: Any = None, log_type: str = 'KB_CHAT') -> None:
+                     response: Any = None, log_type: str = 'KB_CHAT',
+                     response_sha256: Optional[str] = None, response_bytes: Optional[int] = None) -> None:
     databases_str = json.dumps(databases, ensure_ascii=False) if databases else []
     response_str = response if response is not None else None
+    digest_str = (
+        f' [response_sha256={response_sha256}] [response_bytes={response_bytes}]' if response_sha256 else ''
+    )
     LOG.info(
         f'[ChatServer] [{log_type}] [query={query}] [session_id={session_id}] '
         f'[filters={filters}] [files={other_files}] [image_files={image_files}] '
-        f'[databases={databases_str}] [cost={cost}] [response={response_str}]'
+        f'[databases={databases_str}] [cost={cost}] [response={response_str}]{digest_str}'
     )
 
 
+def _agentic_rewrite_config() -> Optional[Dict[str, Any]]:
+    agentic_config = lazyllm.globals.get('agentic_config')
+    return agentic_config if isinstance(agentic_config, dict) else None
+
+
 def _attach_trace_info(data: Any, trace_id: Optional[str]) -> Any:
     if trace_id is None:
         return data
@@ -175,7 +257,8 @@ async def handle_chat(query: str, history: Optional[List[Dict[str, Any]]],
                       is_stream: bool, trace: bool = False,
                       environment_context: Optional[Dict[str, Any]] = None,
                       user_id: Optional[str] = None,
-                      model_config: Optional[Dict[str, Any]] = None) -> Union[Dict[str, Any], StreamingResponse]:
+                      model_config: Optional[Dict[str, Any]] = None
+                      ) -> Union[Dict[str, Any], StreamingResponse, JSONResponse]:
     result = None
     priority = LAZYMIND_LLM_PRIORITY if priority is None else priority
 
@@ -217,12 +300,19 @@ async def handle_chat(query: str, history: Optional[List[Dict[str, Any]]],
         lazyllm.locals._init_sid(sid=session_id)
         inject_model_config(model_config)
 
+    admission = get_admission_controller()
+    tenant = user_id or session_id
+
     if not is_stream:
         if sensitive_check_result:
             return sensitive_check_result
 
         try:
-            async with rag_sem:
+            ticket = await admission.acquire(tenant, dataset, priority)
+        except AdmissionRejected as exc:
+            return _rejected_response(exc, session_id, start_time)
+        try:
+            try:
                 _init_session()
                 ppl_call = _build_ppl_call(bool(reasoning), dataset, query_params, stream=False)
                 result, trace_id = await asyncio.to_thread(
@@ -234,6 +324,8 @@ async def handle_chat(query: str, history: Optional[List[Dict[str, Any]]],
                 cost = round(time.time() - start_time, 3)
                 data = _attach_trace_info(result, trace_id)
                 return _resp(200, 'success', data, cost)
+            finally:
+                ticket.release()
         except Exception as exc:
             LOG.exception(exc)
             cost = round(time.time() - start_time, 3)
@@ -253,13 +345,23 @@ async def handle_chat(query: str, history: Optional[List[Dict[str, Any]]],
             return StreamingResponse(error_stream(), media_type='text/event-stream')
 
         first_frame_logged = False
-        collected_chunks: List[str] = []
+        response_log = StreamLogAccumulator(
+            _cfg['chat_stream_log_max_bytes'],
+            sampled=should_sample(float(_cfg['chat_stream_log_sample_rate'])),
+        )
         ppl_call = _build_ppl_call(bool(reasoning), dataset, query_params, stream=True)
+        # Admit before the response starts so a shed request gets a real 429/503 status.
+        try:
+            ticket = await admission.acquire(tenant, dataset, priority)
+        except AdmissionRejected as exc:
+            return _rejected_response(exc, session_id, start_time)
 
         async def event_stream(ppl, *args) -> Any:
             nonlocal first_frame_logged
+            output_filters = _open_stream_filters()
+            image_rewriter = MarkdownImageStreamRewriter(_agentic_rewrite_config)
             try:
-                async with rag_sem:
+                try:
                     _init_session()
                     async_result, trace_id = await asyncio.to_thread(
                         _run_ppl_with_trace, ppl, args,
@@ -281,47 +383,36 @@ async def handle_chat(query: str, history: Optional[List[Dict[str, Any]]],
                             )
                             first_frame_logged = True
 
-                        agentic_config = lazyllm.globals.get('agentic_config')
-                        rewrite_config = (
-                            agentic_config if isinstance(agentic_config, dict) else None
-                        )
-
-                        if isinstance(chunk, dict):
-                            payload = dict(chunk)
-                            text = payload.get('text')
-                            if isinstance(text, str) and text:
-                                payload['text'] = rewrite_markdown_image_urls(
-                                    text, config=rewrite_config,
-                                )
-                            chunk_data = payload
-                        elif isinstance(chunk, str):
-                            try:
-                                payload = json.loads(chunk)
-                            except (TypeError, ValueError):
-                                payload = None
-                            if isinstance(payload, dict):
-                                text = payload.get('text')
-                                if isinstance(text, str) and text:
-                                    payload['text'] = rewrite_markdown_image_urls(
-                                        text, config=rewrite_config,
-                                    )
-                                chunk_data = payload
-                            else:
-                                chunk_data = rewrite_markdown_image_urls(
-                                    chunk, config=rewrite_config,
+                        chunk_data = _rewrite_stream_chunk(_parse_stream_chunk(chunk), image_rewriter)
+
+                        if output_filters:
+                            chunk_data = _filter_stream_chunk(chunk_data, output_filters)
+                            stopped = next((m for m in output_filters.values() if m.stopped), None)
+                            if stopped is not None:
+                                LOG.warning(
+                                    f'[ChatServer] [SENSITIVE_FILTER_STREAM] [action={stopped.action}] '
+                                    f'[sensitive_word={stopped.word}] [session_id={session_id}]'
                                 )
-                        else:
-                            chunk_data = chunk
+                                if stopped.action == 'abort':
+                                    chunk_data = {'think': None, 'text': SENSITIVE_FILTER_RESPONSE_TEXT, 'sources': []}
+                                response_log.append(json.dumps(chunk_data, ensure_ascii=False, default=str))
+                                yield _sse_line(_resp(200, 'success', chunk_data, round(now - start_time, 3)))
+                                break
 
-                        collected_chunks.append(
-                            json.dumps(chunk_data, ensure_ascii=False, default=str)
-                        )
+                        response_log.append(json.dumps(chunk_data, ensure_ascii=False, default=str))
                         cost = round(now - start_time, 3)
                         yield _sse_line(_resp(200, 'success', chunk_data, cost))
+                    else:
+                        tail = _flush_stream_text(image_rewriter, output_filters)
+                        if tail is not None:
+                            response_log.append(json.dumps(tail, ensure_ascii=False, default=str))
+                            yield _sse_line(_resp(200, 'success', tail, round(time.time() - start_time, 3)))
+                finally:
+                    ticket.release()
 
             except Exception as exc:
                 LOG.exception(exc)
-                collected_chunks.append(f'[EXCEPTION]: {str(exc)}')
+                response_log.append(f'[EXCEPTION]: {str(exc)}')
                 final_resp = _resp(
                     500, f'chat service failed: {exc}', {'status': 'FAILED'}, 0.0
                 )
@@ -332,9 +423,15 @@ async def handle_chat(query: str, history: Optional[List[Dict[str, Any]]],
             final_resp['cost'] = cost
             yield _sse_line(final_resp)
 
-            log_chat_request(query, session_id, filters, other_files, databases, image_files,
-                             cost, '\n'.join(collected_chunks), 'KB_CHAT_STREAM_FINISH')
+            emit_log(
+                log_chat_request, query, session_id, filters, other_files, databases, image_files,
+                cost, response_log.render(), 'KB_CHAT_STREAM_FINISH',
+                response_sha256=response_log.digest, response_bytes=response_log.total_bytes,
+                background=_cfg['chat_stream_log_async'],
+            )
 
+        # The background task covers clients that disconnect before the body is iterated.
         return StreamingResponse(
-            event_stream(*ppl_call), media_type='text/event-stream'
+            event_stream(*ppl_call), media_type='text/event-stream',
+            background=BackgroundTask(ticket.release),
         )
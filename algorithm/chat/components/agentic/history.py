@@ -11,6 +11,7 @@ from chat.utils.stream_scanner import (
     BasePlugin,
     IncrementalScanner,
     MarkdownImageHoldPlugin,
+    prefix_pattern,
 )
 
 from chat.components.agentic.tool_stream import (
@@ -29,6 +30,10 @@ _CITATION_DOC_CHUNK_NEXT_KEY = '_citation_next_chunk_index_map'
 _CITATION_INDEX_PATTERN = r'\d+\.\d+'
 _CITATION_PATTERN = re.compile(r'\[\[(' + _CITATION_INDEX_PATTERN + r')\]\]')
 _SOURCE_LINK_PATTERN = re.compile(r'\[(\d+)\]\(#source-(' + _CITATION_INDEX_PATTERN + r')(?:\s+"[^"]*")?\)')
+_CITATION_PARTIAL_PATTERN = prefix_pattern(r'\[', r'\[', r'\d+', r'\.', r'\d+', r'\]')
+_SOURCE_LINK_PARTIAL_PATTERN = prefix_pattern(
+    r'\[', r'\d+', r'\]', r'\(', *'#source-', r'\d+', r'\.', r'\d+', r'\s+', '"', '[^"]*', '"',
+)
 _SOURCE_REF_PATTERN = re.compile(r'\[\[(' + _CITATION_INDEX_PATTERN + r')\]\]')
 _THINK_BLOCK_PATTERN = re.compile(r'<think>(.*?)</think>', re.DOTALL)
 _HISTORY_TAG_PATTERN = re.compile(
@@ -506,6 +511,9 @@ class _ConfigCitationPlugin(BasePlugin):
     def collect(self) -> list[dict[str, Any]]:
         return list(self._collected.values())
 
+    def is_partial(self, src: str, pos: int) -> bool:
+        return bool(_CITATION_PARTIAL_PATTERN.match(src, pos) or _SOURCE_LINK_PARTIAL_PATTERN.match(src, pos))
+
     def last_incomplete_pos(self, buf: str) -> int | None:
         last_double = buf.rfind('[[')
         if last_double != -1 and ']]' not in buf[last_double + 2:]:
@@ -3,6 +3,7 @@ from chat.components.process.multiturn_query_rewriter import MultiturnQueryRewri
 from chat.components.process.query_image_rewriter import QueryImageRewriter
 from chat.components.process.context_expansion import ContextExpansionComponent
 from chat.components.process.adaptive_topk import AdaptiveKComponent
+from chat.components.process.streaming_rrf import StreamingRRFFusion
 
 __all__ = [
     'SensitiveFilter',
@@ -10,4 +11,5 @@ __all__ = [
     'MultiturnQueryRewriter',
     'ContextExpansionComponent',
     'AdaptiveKComponent',
+    'StreamingRRFFusion',
 ]
@@ -2,46 +2,93 @@
 from __future__ import annotations
 from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
+import numpy as np
 from lazyllm import LOG
 
 
 # ------------- utility functions -----------------
 
+# Largest DP table (capacity slots) for knapsack packing; bigger budgets are packed in coarser token units.
+_KNAPSACK_MAX_SLOTS = 4096
 
-def _moving_average(xs: List[float], w: int) -> List[float]:
-    """Centered moving average; w=1 means no smoothing. Pure Python, edges padded with boundary values."""
+
+def _moving_average(xs: Sequence[float], w: int) -> List[float]:
+    """Centered moving average; w=1 means no smoothing. Edges padded with boundary values."""
     if w <= 1 or len(xs) == 0:
-        return xs[:]
+        return list(xs)
     pad = w // 2
-    ext_left = [xs[0]] * pad
-    ext_right = [xs[-1]] * pad
-    buf = ext_left + xs + ext_right
-    out = []
-    for i in range(len(xs)):
-        window = buf[i:i + w]
-        out.append(sum(window) / w)
-    return out
+    buf = np.pad(np.asarray(xs, dtype=float), (pad, pad), mode='edge')
+    return (np.convolve(buf, np.full(w, 1.0 / w), mode='valid')[:len(xs)]).tolist()
 
 
 def _clamp(x: int, lo: int, hi: int) -> int:
     return max(lo, min(x, hi))
 
 
+def _token_lengths(nodes: Sequence[Any], get_token_len: Callable[[Any], int]) -> np.ndarray:
+    return np.fromiter((int(get_token_len(n)) for n in nodes), dtype=np.int64, count=len(nodes))
+
+
+def _prefix_lengths(nodes: Sequence[Any], get_token_len: Callable[[Any], int], max_tokens: int) -> np.ndarray:
+    """Token lengths of the leading nodes, up to and including the first one that overflows the budget."""
+    lengths, total = [], 0
+    for n in nodes:
+        lengths.append(int(get_token_len(n)))
+        total += lengths[-1]
+        if total > max_tokens:
+            break
+    return np.asarray(lengths, dtype=np.int64)
+
+
+def _prefix_fit(lengths: np.ndarray, max_tokens: int) -> int:
+    return max(int(np.searchsorted(np.cumsum(lengths), max_tokens, side='right')), 1)
+
+
 def _fit_by_budget(nodes: Sequence[Any],
                    get_token_len: Optional[Callable[[Any], int]],
                    max_tokens: Optional[int]) -> int:
     """Compute the maximum k that fits within the token budget (cumulative from the front)."""
     if max_tokens is None or get_token_len is None or len(nodes) == 0:
         return 0
-    acc = 0
-    k = 0
-    for n in nodes:
-        t = int(get_token_len(n))
-        if acc + t > max_tokens:
-            break
-        acc += t
-        k += 1
-    return max(k, 1)
+    return _prefix_fit(_prefix_lengths(nodes, get_token_len, max_tokens), max_tokens)
+
+
+def _knapsack(values: np.ndarray, weights: np.ndarray, capacity: int) -> List[int]:
+    """0/1 knapsack: indices (ascending) maximising the total value with total weight <= capacity.
+
+    Weights are rounded up to ``unit`` tokens so the table stays small; rounding up never
+    lets the selection exceed the real capacity.
+    """
+    unit = -(-capacity // _KNAPSACK_MAX_SLOTS)
+    cap = capacity // unit
+    units = -(-weights // unit)
+    best = np.zeros(cap + 1)
+    take = np.zeros((len(units), cap + 1), dtype=bool)
+    for i, (w, v) in enumerate(zip(units.tolist(), values.tolist())):
+        if w > cap:
+            continue
+        candidate = best[:cap + 1 - w] + v
+        better = candidate > best[w:]
+        take[i, w:] = better
+        best[w:] = np.where(better, candidate, best[w:])
+    chosen, c = [], cap
+    for i in range(len(units) - 1, -1, -1):
+        if take[i, c]:
+            chosen.append(i)
+            c -= int(units[i])
+    return chosen[::-1]
+
+
+def _pack_by_budget(scores: np.ndarray, lengths: np.ndarray, max_tokens: int) -> List[int]:
+    """Indices of the best-scoring subset that fits the budget; the top node is always kept."""
+    if int(lengths.sum()) <= max_tokens:
+        return list(range(len(lengths)))
+    rest = max_tokens - int(lengths[0])
+    if rest <= 0 or len(lengths) == 1:
+        return [0]
+    # Shift scores to be positive so every node that fits adds value; the order is preserved.
+    values = scores[1:] - scores[1:].min() + 1e-6
+    return [0] + [i + 1 for i in _knapsack(values, lengths[1:], rest)]
 
 
 # ------------- main function -----------------
@@ -61,6 +108,7 @@ def adaptive_k_select_from_nodes(
     gap_tau: Optional[float] = None,
     smooth_w: int = 1,
     default_k: int = 6,
+    packing: str = 'prefix',
 ) -> Tuple[List[Any], int, Dict]:
     """
     Adaptive k selection using DocNode.relevance_score:
@@ -68,8 +116,14 @@ def adaptive_k_select_from_nodes(
     - Optional gap_tau: falls back to budget-driven or default_k when the maximum gap is not significant;
     - Finally applies a token budget for secondary truncation.
 
+    packing='prefix' truncates the ranked list at the first node that overflows the budget;
+    packing='knapsack' keeps the top node and then the best-scoring subset of the remaining
+    candidates that fits, so one long node does not crowd out several shorter relevant ones.
+
     Returns: (selected_nodes, k, diag)
     """
+    if packing not in ('prefix', 'knapsack'):
+        raise ValueError(f'unknown packing {packing!r}, expected "prefix" or "knapsack"')
     N = len(nodes)
     if N == 0:
         return [], 0, dict(max_gap=0.0, argmax_idx=-1, scores_head=[], tokens_used=0, k_before_budget=0)
@@ -79,29 +133,34 @@ def adaptive_k_select_from_nodes(
     else:
         nodes_sorted = sorted(nodes, key=get_score, reverse=True)
 
-    scores = [float(get_score(n)) for n in nodes_sorted]
+    scores = np.fromiter((float(get_score(n)) for n in nodes_sorted), dtype=float, count=N)
 
     if N == 1:
         k = 1
         tokens_used = int(get_token_len(nodes_sorted[0])) if get_token_len else 0
         return nodes_sorted[:1], k, dict(
-            max_gap=0.0, argmax_idx=0, scores_head=scores[:1],
+            max_gap=0.0, argmax_idx=0, scores_head=scores[:1].tolist(),
             tokens_used=tokens_used, k_before_budget=1
         )
 
-    s_sm = _moving_average(scores, smooth_w) if smooth_w > 1 else scores
+    s_sm = np.asarray(_moving_average(scores, smooth_w)) if smooth_w > 1 else scores
 
     M = max(1, min(N - 1, int((N - 1) * search_pct)))
-    gaps = [s_sm[i] - s_sm[i + 1] for i in range(M)]
-    argmax_idx = max(range(M), key=lambda i: gaps[i])
-    max_gap = gaps[argmax_idx] if M > 0 else 0.0
+    gaps = s_sm[:M] - s_sm[1:M + 1]
+    argmax_idx = int(np.argmax(gaps))
+    max_gap = float(gaps[argmax_idx])
+
+    budgeted = max_tokens is not None and get_token_len is not None
+    lengths = None
 
     if (gap_tau is not None) and (max_gap < gap_tau):
         k0 = default_k
-        by_budget = _fit_by_budget(nodes_sorted, get_token_len, max_tokens)
-        if by_budget > 0:
-            k0 = by_budget
-        k = _clamp(k0, k_min, k_max or N)
+        if budgeted and packing == 'knapsack':
+            k0 = N
+        elif budgeted:
+            lengths = _prefix_lengths(nodes_sorted, get_token_len, max_tokens)
+            k0 = _prefix_fit(lengths, max_tokens)
+        k = _clamp(k0, k_min, min(k_max or N, N))
     else:
         k = argmax_idx + 1 + bias
         if k_max is not None:
@@ -110,21 +169,31 @@ def adaptive_k_select_from_nodes(
 
     k_before_budget = k
 
-    if max_tokens is not None and get_token_len is not None:
-        by_budget = _fit_by_budget(nodes_sorted, get_token_len, max_tokens)
-        if by_budget > 0:
-            k = min(k, by_budget)
-
-    selected = nodes_sorted[:k]
-    tokens_used = sum(int(get_token_len(n)) for n in selected) if get_token_len else 0
+    # Only the first k nodes can be selected, so only they are measured.
+    if budgeted and packing == 'knapsack':
+        lengths = _token_lengths(nodes_sorted[:k], get_token_len)
+        picked = _pack_by_budget(scores[:k], lengths, max_tokens)
+        k = len(picked)
+    else:
+        if budgeted:
+            if lengths is None:
+                lengths = _prefix_lengths(nodes_sorted[:k], get_token_len, max_tokens)
+            k = min(k, _prefix_fit(lengths, max_tokens))
+        picked = list(range(k))
+    selected = [nodes_sorted[i] for i in picked]
+    if lengths is not None:
+        tokens_used = int(lengths[picked].sum())
+    else:
+        tokens_used = sum(int(get_token_len(n)) for n in selected) if get_token_len else 0
 
     diag = dict(
-        max_gap=float(max_gap),
-        argmax_idx=int(argmax_idx),
-        scores_head=scores[:min(k, 5)],
+        max_gap=max_gap,
+        argmax_idx=argmax_idx,
+        scores_head=scores[picked[:5]].tolist(),
         tokens_used=int(tokens_used),
         k_before_budget=int(k_before_budget),
         search_M=int(M),
+        packing=packing,
     )
     return selected, k, diag
 
@@ -1,10 +1,12 @@
 import time
-from typing import List, Optional, Set, Tuple
-from lazyllm import LOG, Document
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from lazyllm import LOG, Document, ThreadPoolExecutor
 from lazyllm.tools.rag import DocNode
 
 _RPC_RETRIES = 2
 _RPC_RETRY_DELAY = 0.3
+_DEFAULT_KB_ID = 'default'
 
 
 def _get_doc_id(node: DocNode) -> Optional[str]:
@@ -39,33 +41,104 @@ def _relevance_key(n: DocNode) -> Tuple:
     return (-(getattr(n, 'relevance_score', 0.0) or 0.0), n.uid)
 
 
+def _get_span(node: DocNode) -> Tuple[int, int]:
+    return (-2, 2) if (_get_node_type(node) or '').lower() == 'table' else (-1, 1)
+
+
+def _get_number(node: DocNode) -> Optional[int]:
+    number = getattr(node, 'number', None)
+    return number if isinstance(number, int) and number > 0 else None
+
+
+def _window_numbers(number: int, span: Tuple[int, int]) -> Set[int]:
+    return {n for n in range(number + span[0], number + span[1] + 1) if n > 0}
+
+
+def _call_with_retry(fn: Callable[[], Any], what: str) -> Any:
+    for attempt in range(_RPC_RETRIES + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt < _RPC_RETRIES:
+                time.sleep(_RPC_RETRY_DELAY)
+            else:
+                LOG.warning('[CtxExpand] All RPC attempts failed %s: %s', what, e)
+    return None
+
+
+def _as_list(window: Any) -> List[DocNode]:
+    return window if isinstance(window, list) else ([window] if window else [])
+
+
 class ContextExpansionComponent:
     def __init__(self, document: Document, token_budget: int = 3000,
                  score_decay: float = 0.98, max_seeds: Optional[int] = None,
-                 max_new_nodes_per_seed: int = 2):
+                 max_new_nodes_per_seed: int = 2, batch_fetch: bool = True,
+                 max_parallel_fetches: int = 4):
         self.document = document
         self.token_budget = token_budget
         self.score_decay = score_decay
         self.max_seeds = max_seeds
         self.max_new_nodes_per_seed = max(1, int(max_new_nodes_per_seed))
+        self.batch_fetch = batch_fetch
+        self.max_parallel_fetches = max(1, int(max_parallel_fetches))
 
-    def _fetch_neighbors(self, node: DocNode, existing_uids: Set[str]) -> List[DocNode]:
-        doc_id = _get_doc_id(node)
-        if not doc_id:
+    def _fetch_window(self, node: DocNode) -> List[DocNode]:
+        if not _get_doc_id(node):
             return []
-        span = (-2, 2) if (_get_node_type(node) or '').lower() == 'table' else (-1, 1)
-        window = None
-        for attempt in range(_RPC_RETRIES + 1):
-            try:
-                window = self.document.get_window_nodes(node, span=span, merge=False)
-                break
-            except Exception as e:
-                if attempt < _RPC_RETRIES:
-                    time.sleep(_RPC_RETRY_DELAY)
-                else:
-                    LOG.warning('[CtxExpand] All RPC attempts failed uid=%s: %s', node.uid, e)
-                    return []
-        window = window if isinstance(window, list) else ([window] if window else [])
+        window = _call_with_retry(
+            lambda: self.document.get_window_nodes(node, span=_get_span(node), merge=False),
+            f'uid={node.uid}',
+        )
+        return _as_list(window)
+
+    def _fetch_doc_windows(self, group: str, kb_id: str, doc_id: str,
+                           doc_seeds: List[DocNode]) -> Dict[str, List[DocNode]]:
+        numbers: Set[int] = set()
+        for seed in doc_seeds:
+            numbers |= _window_numbers(_get_number(seed), _get_span(seed))
+        nodes = _call_with_retry(
+            lambda: self.document.get_nodes(group=group, kb_id=kb_id, doc_ids={doc_id}, numbers=numbers),
+            f'doc_id={doc_id} numbers={len(numbers)}',
+        )
+        by_number = {_get_number(n): n for n in _as_list(nodes) if _get_number(n) is not None}
+        return {
+            seed.uid: [by_number[n] for n in sorted(_window_numbers(_get_number(seed), _get_span(seed)))
+                       if n in by_number]
+            for seed in doc_seeds
+        }
+
+    def _fetch_windows_batched(self, seeds: List[DocNode]) -> Dict[str, List[DocNode]]:
+        # Seeds of the same document are resolved with one get_nodes call over the union
+        # of their (possibly overlapping) windows. Distinct documents, and seeds the store
+        # cannot batch, are fetched with a bounded-parallel fan-out.
+        grouped: Dict[Tuple[str, str, str], List[DocNode]] = defaultdict(list)
+        jobs: List[Callable[[], Dict[str, List[DocNode]]]] = []
+        can_batch = callable(getattr(self.document, 'get_nodes', None))
+        for seed in seeds:
+            doc_id = _get_doc_id(seed)
+            group = getattr(seed, 'group', None)
+            if doc_id and can_batch and group and _get_number(seed) is not None:
+                kb_id = (seed.global_metadata or {}).get('kb_id') or _DEFAULT_KB_ID
+                grouped[(group, kb_id, doc_id)].append(seed)
+            else:
+                jobs.append(lambda seed=seed: {seed.uid: self._fetch_window(seed)})
+        jobs = [lambda key=key, doc_seeds=doc_seeds: self._fetch_doc_windows(*key, doc_seeds)
+                for key, doc_seeds in grouped.items()] + jobs
+
+        windows: Dict[str, List[DocNode]] = {}
+        if len(jobs) <= 1 or self.max_parallel_fetches == 1:
+            results = [job() for job in jobs]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_parallel_fetches, len(jobs))) as pool:
+                results = list(pool.map(lambda job: job(), jobs))
+        for result in results:
+            windows.update(result)
+        return windows
+
+    @staticmethod
+    def _select_neighbors(node: DocNode, window: List[DocNode], existing_uids: Set[str]) -> List[DocNode]:
+        doc_id = _get_doc_id(node)
         neighbors = [
             n for n in window
             if n.uid != node.uid and n.uid not in existing_uids and _get_doc_id(n) == doc_id
@@ -73,12 +146,16 @@ class ContextExpansionComponent:
         neighbors.sort(key=_node_sort_key)
         return neighbors
 
+    def _fetch_neighbors(self, node: DocNode, existing_uids: Set[str]) -> List[DocNode]:
+        return self._select_neighbors(node, self._fetch_window(node), existing_uids)
+
     def __call__(self, nodes: List[DocNode], **kwargs) -> List[DocNode]:
         if not nodes:
             return nodes
         seeds = sorted(nodes, key=_relevance_key)
         if self.max_seeds is not None and self.max_seeds > 0:
             seeds = seeds[: self.max_seeds]
+        windows = self._fetch_windows_batched(seeds) if self.batch_fetch else None
         existing_uids: Set[str] = {n.uid for n in nodes}
         all_added: List[DocNode] = []
         added_tokens = 0
@@ -86,7 +163,10 @@ class ContextExpansionComponent:
             is_table = (_get_node_type(seed) or '').lower() == 'table'
             if added_tokens >= self.token_budget and not is_table:
                 continue
-            neighbors = self._fetch_neighbors(seed, existing_uids)
+            if windows is not None:
+                neighbors = self._select_neighbors(seed, windows.get(seed.uid, []), existing_uids)
+            else:
+                neighbors = self._fetch_neighbors(seed, existing_uids)
             seed_score = getattr(seed, 'relevance_score', 0.0) or 0.0
             added_for_seed = 0
             cap = max(self.max_new_nodes_per_seed, 4) if is_table else self.max_new_nodes_per_seed
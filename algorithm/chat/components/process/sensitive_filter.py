@@ -1,7 +1,144 @@
 import os
-from typing import Tuple, Optional
+import threading
+from typing import Dict, List, Optional, Tuple
 from lazyllm import LOG
 
+STREAM_ACTIONS = ('mask', 'truncate', 'abort')
+
+
+class _StreamAutomaton:
+    """Aho-Corasick goto/fail tables whose state can be carried across chunks.
+
+    pyahocorasick cannot resume a scan from a saved state, so streamed output
+    is matched against this table built from the same keyword list.
+    ``out[s]`` is the longest keyword ending at state ``s`` and ``depth[s]``
+    is how many trailing characters may still grow into a keyword.  Resolved
+    transitions into a non-root state are memoised in ``delta``, so the fail
+    chain is walked once per such (state, char) pair; there are only as many
+    of those as the keyword list allows, whatever text is streamed.  Chars
+    outside the keyword alphabet go straight to the root.
+    """
+
+    def __init__(self, words: List[str]):
+        goto: List[Dict[str, int]] = [{}]
+        out: List[Optional[str]] = [None]
+        depth = [0]
+        for word in words:
+            state = 0
+            for ch in word:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append(None)
+                    depth.append(depth[state] + 1)
+                state = nxt
+            out[state] = word
+
+        fail = [0] * len(goto)
+        frontier = list(goto[0].values())
+        while frontier:
+            next_frontier = []
+            for state in frontier:
+                for ch, nxt in goto[state].items():
+                    f = fail[state]
+                    while f and ch not in goto[f]:
+                        f = fail[f]
+                    fail[nxt] = goto[f].get(ch, 0) if goto[f].get(ch) != nxt else 0
+                    if out[nxt] is None:
+                        out[nxt] = out[fail[nxt]]
+                    next_frontier.append(nxt)
+            frontier = next_frontier
+
+        self.goto = goto
+        self.fail = fail
+        self.delta: List[Dict[str, int]] = [dict(edges) for edges in goto]
+        self.out = out
+        self.depth = depth
+        self.first_chars = frozenset(goto[0])
+        self.alphabet = frozenset(ch for edges in goto for ch in edges)
+
+    def resolve(self, state: int, ch: str) -> int:
+        if ch not in self.alphabet:
+            return 0
+        s = state
+        while s and ch not in self.goto[s]:
+            s = self.fail[s]
+        nxt = self.goto[s].get(ch, 0)
+        if nxt:
+            self.delta[state][ch] = nxt
+        return nxt
+
+
+class SensitiveStreamMatcher:
+    """Per-stream matcher: feed generated chunks, emit only text that is safe.
+
+    Characters that may still be the start of a keyword are held back until
+    the next chunk decides them, so keywords split across chunk boundaries are
+    caught without rescanning earlier output.
+
+    Actions:
+        mask: replace each matched keyword with ``mask_char``.
+        truncate: emit the text before the first match, then stop.
+        abort: stop at the first match and emit nothing more (the caller
+            replaces the response).
+    """
+
+    def __init__(self, automaton: _StreamAutomaton, action: str = 'mask', mask_char: str = '*'):
+        if action not in STREAM_ACTIONS:
+            raise ValueError(f'Unknown sensitive stream action: {action}')
+        self._ac = automaton
+        self.action = action
+        self._mask_char = mask_char
+        self._state = 0
+        self._pending = ''
+        self.word: Optional[str] = None
+        self.stopped = False
+
+    @property
+    def triggered(self) -> bool:
+        return self.word is not None
+
+    def feed(self, chunk: str) -> str:
+        if self.stopped or not chunk:
+            return ''
+        ac = self._ac
+        state = self._state
+        if not state and ac.first_chars.isdisjoint(chunk):
+            return chunk
+
+        delta, out, resolve = ac.delta, ac.out, ac.resolve
+        text = self._pending + chunk
+        offset = len(self._pending)
+        hits: List[Tuple[int, int, str]] = []
+        for i, ch in enumerate(chunk, offset + 1):
+            nxt = delta[state].get(ch)
+            state = resolve(state, ch) if nxt is None else nxt
+            word = out[state]
+            if word is not None:
+                hits.append((i - len(word), i, word))
+        self._state = state
+
+        if hits:
+            if self.word is None:
+                self.word = hits[0][2]
+            if self.action != 'mask':
+                self.stopped = True
+                self._pending = ''
+                return text[:min(hit[0] for hit in hits)] if self.action == 'truncate' else ''
+            for start, end, _ in hits:
+                text = text[:start] + self._mask_char * (end - start) + text[end:]
+
+        hold = ac.depth[state]
+        self._pending = text[len(text) - hold:] if hold else ''
+        return text[:len(text) - hold] if hold else text
+
+    def flush(self) -> str:
+        """Release held-back text at end of stream."""
+        pending, self._pending, self._state = self._pending, '', 0
+        return '' if self.stopped else pending
+
 
 class SensitiveFilter:
 
@@ -9,6 +146,9 @@ class SensitiveFilter:
         self.actree = None
         self.loaded = False
         self.keyword_count = 0
+        self._words: List[str] = []
+        self._stream_automaton: Optional[_StreamAutomaton] = None
+        self._stream_lock = threading.Lock()
 
         if keyword_path:
             self._load_keywords(keyword_path)
@@ -36,18 +176,21 @@ class SensitiveFilter:
 
         # Load sensitive words
         loaded_count = 0
+        words = []
         try:
             with open(path, 'r', encoding='utf-8') as f:
                 for line in f:
                     word = line.strip()
                     if word:  # skip empty lines
                         self.actree.add_word(word, (word, 'default'))
+                        words.append(word)
                         loaded_count += 1
 
             # Build failure pointers (core of the AC automaton)
             self.actree.make_automaton()
             self.loaded = True
             self.keyword_count = loaded_count
+            self._words = words
 
         except Exception as e:
             LOG.error(f'[SensitiveFilter] Failed to load keywords: {e}')
@@ -73,3 +216,13 @@ class SensitiveFilter:
             return False, ''
 
         return False, ''
+
+    def stream(self, action: str = 'mask', mask_char: str = '*') -> Optional[SensitiveStreamMatcher]:
+        """Return a matcher for one generated stream, or None when no keywords are loaded."""
+        if not self.loaded or not self._words:
+            return None
+        if self._stream_automaton is None:
+            with self._stream_lock:
+                if self._stream_automaton is None:
+                    self._stream_automaton = _StreamAutomaton(self._words)
+        return SensitiveStreamMatcher(self._stream_automaton, action=action, mask_char=mask_char)
@@ -0,0 +1,159 @@
+"""Reciprocal rank fusion that consumes retriever results as they arrive.
+
+``parallel(*retrievers)`` followed by ``RRFFusion`` waits for the slowest retriever
+before fusing anything.  ``StreamingRRFFusion`` runs the retrievers itself and
+folds each result list into the fused scores when it arrives.  Every unfinished
+retriever can still add at most ``1 / (K + 1)`` to any document (its rank-1
+contribution), which bounds how much the ranking can change (the Threshold
+Algorithm argument).  Fusion stops early when:
+
+* the top-k set is settled: the k-th fused score exceeds the best any other
+  document could still reach; the remaining retrievers are not waited for;
+* a retriever misses its deadline: it is dropped and the results of the others are
+  fused (graceful degradation).
+
+The returned set equals ``RRFFusion(top_k)`` over all lists whenever no deadline was
+missed; the scores (and order) reflect the retrievers that had answered, which is
+enough in front of a reranker.  Without early exit or deadlines the output is the
+same as ``RRFFusion`` over the retrievers' lists in the given order.
+
+Usage:
+    fuse = StreamingRRFFusion(retrievers, top_k=50, deadline=1.5)
+    nodes = fuse(query, filters=filters)
+"""
+from __future__ import annotations
+
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+from lazyllm import LOG, ThreadPoolExecutor
+from lazyllm.tools.rag import DocNode
+
+RRF_K = 60
+
+
+def _as_rank_lists(result: Any) -> List[List[DocNode]]:
+    if not result:
+        return []
+    if isinstance(result, Sequence) and all(isinstance(n, DocNode) for n in result):
+        return [list(result)]
+    lists = []
+    for item in result if isinstance(result, Sequence) else []:
+        lists.extend(_as_rank_lists(item))
+    return lists
+
+
+def _fuse(rank_lists: Sequence[List[DocNode]], top_k: int) -> List[DocNode]:
+    # Same scoring, duplicate collapsing and tie order as lazyllm's RRFFusion.
+    fused: Dict[str, float] = {}
+    text_to_node: Dict[str, DocNode] = {}
+    for nodes in rank_lists:
+        for rank, node in enumerate(sorted(nodes, key=lambda x: x.similarity_score or 0.0, reverse=True), start=1):
+            text_to_node[node.text] = node
+            fused[node.text] = fused.get(node.text, 0.0) + 1.0 / (rank + RRF_K)
+    ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)
+    if top_k > 0:
+        ranked = ranked[:top_k]
+    out = []
+    for text, score in ranked:
+        node = text_to_node[text]
+        node.score = score
+        out.append(node)
+    return out
+
+
+def _top_k_settled(scores: Dict[str, float], top_k: int, pending: int) -> bool:
+    """True if ``pending`` more rank lists cannot change which documents make the top-k."""
+    if pending == 0:
+        return True
+    if top_k <= 0 or len(scores) < top_k:
+        return False
+    reachable = pending / (RRF_K + 1)
+    ordered = sorted(scores.values(), reverse=True)
+    # Unseen documents can reach ``reachable``; seen ones outside the top-k their score plus it.
+    best_outside = ordered[top_k] + reachable if len(ordered) > top_k else reachable
+    return ordered[top_k - 1] > best_outside
+
+
+class StreamingRRFFusion:
+    """Run ``retrievers`` concurrently and RRF-fuse their results incrementally.
+
+    Args:
+        retrievers: Callables ``(query, **kwargs) -> List[DocNode]``.  The early-exit bound assumes each
+            returns one rank list with distinct texts, as ``Retriever`` does; otherwise all are waited for.
+        top_k: Fused nodes to return (``<= 0`` returns all and never exits early).
+        deadline: Seconds after the call starts by which a retriever must answer, either one
+            value for all or one per retriever; ``None`` or ``<= 0`` waits indefinitely.
+        early_exit: Return as soon as the top-k set is settled.
+    """
+
+    def __init__(self, retrievers: Sequence[Callable[..., Any]], top_k: int = 50,
+                 deadline: Union[None, float, Sequence[Optional[float]]] = None, early_exit: bool = True):
+        self.retrievers = list(retrievers)
+        self.top_k = top_k
+        if deadline is None or isinstance(deadline, (int, float)):
+            deadline = [deadline] * len(self.retrievers)
+        if len(deadline) != len(self.retrievers):
+            raise ValueError('deadline must be a number or have one entry per retriever')
+        self.deadlines = [d if d is not None and d > 0 else None for d in deadline]
+        self.early_exit = early_exit
+
+    def __call__(self, query: Any, **kwargs) -> List[DocNode]:
+        if not self.retrievers:
+            return []
+        if len(self.retrievers) == 1 and self.deadlines[0] is None:
+            return _fuse(_as_rank_lists(self.retrievers[0](query, **kwargs)), self.top_k)
+
+        start = time.monotonic()
+        executor = ThreadPoolExecutor(max_workers=len(self.retrievers))
+        try:
+            futures = {executor.submit(r, query, **kwargs): i for i, r in enumerate(self.retrievers)}
+            return self._consume(futures, start)
+        finally:
+            # Abandoned retrievers finish in the background; their results are ignored.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _consume(self, futures: Dict[Any, int], start: float) -> List[DocNode]:
+        results: Dict[int, List[List[DocNode]]] = {}
+        scores: Dict[str, float] = {}
+        pending = dict(futures)
+        dropped, errors = [], []
+        bounded = self.early_exit
+        while pending:
+            now = time.monotonic()
+            expired = [f for f, i in pending.items() if self.deadlines[i] is not None
+                       and now - start >= self.deadlines[i]]
+            for future in expired:
+                dropped.append(pending.pop(future))
+            if not pending:
+                break
+            waits = [start + self.deadlines[i] - now for i in pending.values() if self.deadlines[i] is not None]
+            done, _ = wait(list(pending), timeout=min(waits) if waits else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                try:
+                    lists = _as_rank_lists(future.result())
+                except Exception as exc:
+                    LOG.warning(f'[StreamingRRF] retriever {index} failed, fusing the others: {exc}')
+                    errors.append(exc)
+                    continue
+                results[index] = lists
+                if len(lists) > 1 or any(len({n.text for n in nodes}) != len(nodes) for nodes in lists):
+                    # One retriever may then add more than 1 / (K + 1) to a text, so the bound no longer holds.
+                    bounded = False
+                for nodes in lists:
+                    for rank, node in enumerate(sorted(nodes, key=lambda x: x.similarity_score or 0.0,
+                                                       reverse=True), start=1):
+                        scores[node.text] = scores.get(node.text, 0.0) + 1.0 / (rank + RRF_K)
+            if pending and bounded and _top_k_settled(scores, self.top_k, len(pending)):
+                LOG.info(f'[StreamingRRF] top-{self.top_k} settled after {len(results)}/{len(futures)} retrievers '
+                         f'in {time.monotonic() - start:.3f}s')
+                break
+
+        if errors and not results:
+            raise errors[0]
+        if dropped:
+            LOG.warning(f'[StreamingRRF] retrievers {sorted(dropped)} missed their deadline, '
+                        f'fused {len(results)}/{len(futures)}')
+        return _fuse([nodes for index in sorted(results) for nodes in results[index]], self.top_k)
@@ -9,6 +9,8 @@ import re
 import threading
 import time
 from functools import lru_cache
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
 from queue import Empty, Queue
 from typing import Any, Dict, Optional
@@ -43,6 +45,7 @@ from chat.components.agentic.review import (  # noqa: E402
     _spawn_background_review,
 )
 from chat.utils.markdown_images import rewrite_markdown_image_urls  # noqa: E402
+from chat.utils.stream_bus import STREAM_QUEUE_CLASSES, open_stream_channel  # noqa: E402
 from chat.components.agentic.tool_stream import (  # noqa: E402
     _STREAM_CHUNK_SIZE,
     _format_tool_stream_frame,
@@ -333,18 +336,21 @@ async def _agentic_forward_stream(
     _clear_orphaned_lazyllm_queue_lock()
     lazyllm.FileSystemQueue().clear()
     lazyllm.FileSystemQueue.get_instance('think').clear()
+    # With agentic_stream_channel='memory', in-process producers push straight to this
+    # request's event loop; polling FileSystemQueue is the default and works across processes.
+    push_channel = None
+    if _cfg['agentic_stream_channel'] == 'memory':
+        push_channel = open_stream_channel(global_sid, asyncio.get_running_loop())
 
-    def _drain_stream_frames() -> list[dict[str, Any]]:
+    def _frames_from_values(think_values, text_values) -> list[dict[str, Any]]:
         nonlocal streamed_text
         frames: list[dict[str, Any]] = []
 
-        think_values = lazyllm.FileSystemQueue.get_instance('think').dequeue()
         if think_values:
             think_text = ''.join(think_values)
             if think_text:
                 frames.append(_stream_frame(think=think_text))
 
-        text_values = lazyllm.FileSystemQueue().dequeue()
         if text_values:
             text = ''.join(text_values)
             if text:
@@ -360,8 +366,21 @@ async def _agentic_forward_stream(
 
         return frames
 
+    def _drain_stream_frames() -> list[dict[str, Any]]:
+        return _frames_from_values(
+            lazyllm.FileSystemQueue.get_instance('think').dequeue(),
+            lazyllm.FileSystemQueue().dequeue(),
+        )
+
+    def _put_event(event: Any) -> None:
+        if push_channel is not None:
+            push_channel.publish('event', event)
+        else:
+            event_queue.put(event)
+
     def _flush_stream_frames_to_queue() -> None:
-        if closed.is_set():
+        # Pushed tokens already sit in the channel ahead of any later event.
+        if closed.is_set() or push_channel is not None:
             return
         for frame in _drain_stream_frames():
             event_queue.put({'type': 'frame', 'frame': frame})
@@ -375,7 +394,7 @@ async def _agentic_forward_stream(
             tool_event['preview_text'] = query
             frame = _format_tool_stream_frame(tool_event)
             if frame is not None:
-                event_queue.put({'type': 'frame', 'frame': frame})
+                _put_event({'type': 'frame', 'frame': frame})
 
     def _stream_monitor() -> None:
         lazyllm.globals._init_sid(global_sid)
@@ -398,27 +417,42 @@ async def _agentic_forward_stream(
             if not closed.is_set():
                 with output_lock:
                     _flush_stream_frames_to_queue()
-                    event_queue.put({'type': 'final', 'result': result})
+                    _put_event({'type': 'final', 'result': result})
         except Exception as exc:
             if not closed.is_set():
-                event_queue.put(exc)
+                _put_event(exc)
         finally:
             worker_done.set()
             if not closed.is_set():
-                event_queue.put(sentinel)
+                _put_event(sentinel)
 
-    worker = threading.Thread(target=_worker, daemon=True)
-    monitor = threading.Thread(target=_stream_monitor, daemon=True)
-    worker.start()
-    monitor.start()
-    final_result = None
-    try:
+    async def _polled_events():
         while True:
             try:
-                event = await asyncio.to_thread(event_queue.get, True, 0.05)
+                yield await asyncio.to_thread(event_queue.get, True, 0.05)
             except Empty:
                 continue
 
+    async def _pushed_events():
+        while True:
+            for kind, items in groupby(await push_channel.get(), key=itemgetter(0)):
+                payloads = [payload for _, payload in items]
+                if kind not in STREAM_QUEUE_CLASSES:
+                    for payload in payloads:
+                        yield payload
+                    continue
+                values = (payloads, None) if kind == 'think' else (None, payloads)
+                for frame in _frames_from_values(*values):
+                    yield {'type': 'frame', 'frame': frame}
+
+    worker = threading.Thread(target=_worker, daemon=True)
+    monitor = threading.Thread(target=_stream_monitor, daemon=True)
+    worker.start()
+    if push_channel is None:
+        monitor.start()
+    final_result = None
+    try:
+        async for event in (_pushed_events() if push_channel is not None else _polled_events()):
             if event is sentinel:
                 break
             if isinstance(event, Exception):
@@ -467,8 +501,11 @@ async def _agentic_forward_stream(
             )
     finally:
         closed.set()
+        if push_channel is not None:
+            push_channel.close()
         worker.join(timeout=0)
-        monitor.join(timeout=0)
+        if monitor.is_alive():
+            monitor.join(timeout=0)
 
 
 def _ensure_tools_registered() -> None:
@@ -3,10 +3,14 @@ import lazyllm
 from lazyllm import AutoModel, pipeline, parallel, bind, ifs
 from lazyllm.tools.rag import Reranker
 from lazyllm.tools.rag.rank_fusion.reciprocal_rank_fusion import RRFFusion
-from chat.components.process import AdaptiveKComponent, ContextExpansionComponent
+from chat.components.process import AdaptiveKComponent, ContextExpansionComponent, StreamingRRFFusion
 # from chat.components.process.query_image_rewriter import QueryImageRewriter
 from chat.pipelines.builders.get_retriever import get_retriever, get_remote_docment
+from chat.pipelines.builders.reranker_pool import get_reranker_pool
+from chat.pipelines.builders.search_cache import with_search_cache
 from chat.utils.load_config import get_config_path, get_dynamic_role_slot_map
+from chat.utils.token_estimator import get_token_estimator
+from config import config as _cfg
 from vocab.vocab_manager import get_vocab_manager
 
 
@@ -31,8 +35,11 @@ def merge_text_image_nodes(text_nodes, image_nodes):
 
 
 def _adaptive_get_token_len(n: Any) -> int:
-    txt = getattr(n, 'text', '') or ''
-    return max(1, len(txt) // 4)
+    return get_token_estimator()(n)
+
+
+def _build_reranker(model: str, topk: int, config_path: str):
+    return Reranker('ModuleReranker', model=AutoModel(model=model, config=config_path), topk=topk)
 
 
 def _rerank(nodes, query: str, topk: int):
@@ -41,10 +48,13 @@ def _rerank(nodes, query: str, topk: int):
     cfg = lazyllm.globals.config['dynamic_model_configs']
     role_cfg = cfg.get('reranker') if isinstance(cfg, dict) else None
 
-    if 'reranker' not in role_slots or (isinstance(role_cfg, dict) and role_cfg.get(role_slots['reranker'])):
-        return Reranker(
-            'ModuleReranker', model=AutoModel(model='reranker', config=config_path), topk=topk,
-        )(nodes, query=query)
+    slot = role_slots.get('reranker')
+    bucket = role_cfg.get(slot) if slot and isinstance(role_cfg, dict) else None
+    if slot is None or bucket:
+        with get_reranker_pool().acquire(
+            'reranker', topk, config_path, factory=_build_reranker, role_cfg=bucket,
+        ) as reranker:
+            return reranker(nodes, query=query)
 
     for node in nodes or []:
         if getattr(node, 'relevance_score', None) is None:
@@ -52,19 +62,36 @@ def _rerank(nodes, query: str, topk: int):
     return nodes
 
 
+def warmup_reranker_pool(topks=(20,)) -> int:
+    '''Pre-build pooled rerankers for static configs; dynamic roles are built on first request.'''
+    config_path = get_config_path()
+    if 'reranker' in get_dynamic_role_slot_map(config_path):
+        return 0
+    return get_reranker_pool().warmup('reranker', topks, config_path, factory=_build_reranker)
+
+
 def _build_text_branch(retrievers, tmp_retriever, document, topk: int, k_max: int):
     with pipeline() as text_branch:
         text_branch.parse_input = parse_query
-        text_branch.divert = ifs(
-            has_files | bind(x=text_branch.input),
-            tpath=tmp_retriever | bind(files=text_branch.input['files']),
-            fpath=parallel(
-                *[(retriever | bind(filters=text_branch.input['filters']))
-                  for retriever in retrievers]
-            ),
-        )
-        text_branch.merge_results = merge_rank_results
-        text_branch.join = RRFFusion(top_k=50)
+        if _cfg['search_streaming_fusion']:
+            # Fuse retriever results as they arrive instead of waiting for the slowest one.
+            text_branch.divert = ifs(
+                has_files | bind(x=text_branch.input),
+                tpath=StreamingRRFFusion([tmp_retriever], top_k=50) | bind(files=text_branch.input['files']),
+                fpath=StreamingRRFFusion(retrievers, top_k=50, deadline=float(_cfg['search_retriever_deadline']))
+                | bind(filters=text_branch.input['filters']),
+            )
+        else:
+            text_branch.divert = ifs(
+                has_files | bind(x=text_branch.input),
+                tpath=tmp_retriever | bind(files=text_branch.input['files']),
+                fpath=parallel(
+                    *[(retriever | bind(filters=text_branch.input['filters']))
+                      for retriever in retrievers]
+                ),
+            )
+            text_branch.merge_results = merge_rank_results
+            text_branch.join = RRFFusion(top_k=50)
         text_branch.reranker = _rerank | bind(
             query=text_branch.input['query'], topk=topk,
         )
@@ -72,6 +99,7 @@ def _build_text_branch(retrievers, tmp_retriever, document, topk: int, k_max: in
             bias=2, k_max=k_max, gap_tau=0.2,
             get_token_len=_adaptive_get_token_len,
             max_tokens=2048,
+            packing='knapsack',
         )
         text_branch.ctx_expand = ContextExpansionComponent(
             document=document,
@@ -116,7 +144,7 @@ def get_ppl_search(url: str, retriever_configs: List[dict] = None, topk=20, k_ma
                 #     fpath=lambda x: x,
                 # )
                 text_search_ppl.search = text_branch
-            return text_search_ppl
+            return with_search_cache(text_search_ppl, url, rewrite=parse_query)
 
         image_branch = _build_image_branch(image_retriever)
 
@@ -129,4 +157,4 @@ def get_ppl_search(url: str, retriever_configs: List[dict] = None, topk=20, k_ma
             search_ppl.par = parallel(text_branch, image_branch)
             search_ppl.merge = merge_text_image_nodes
 
-    return search_ppl
+    return with_search_cache(search_ppl, url, rewrite=parse_query)
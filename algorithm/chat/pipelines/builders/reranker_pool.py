@@ -0,0 +1,149 @@
+"""Process-wide pool of reranker instances for the search pipeline.
+
+Building a ``Reranker`` (and the ``AutoModel`` behind it) resolves the runtime
+model config and constructs a model client.  Doing that once per chat turn puts
+config parsing on the hot path, so ``_rerank`` borrows a pooled instance keyed
+by ``(model, topk, config_hash)`` instead.
+
+Usage:
+    pool = get_reranker_pool()
+    with pool.acquire('reranker', 20, config_path, factory=build) as reranker:
+        nodes = reranker(nodes, query=query)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from lazyllm import LOG
+
+from config import config as _cfg
+
+RerankerKey = Tuple[str, int, str]
+RerankerFactory = Callable[[str, int, str], Any]
+
+
+def config_hash(config_path: str, role_cfg: Optional[Dict[str, Any]] = None) -> str:
+    '''Return a stable digest of the config that a reranker instance was built from.
+
+    ``role_cfg`` is the per-request dynamic bucket (source/model/url/skip_auth).
+    API keys never live there, so rotating a key does not evict pooled instances.
+    '''
+    payload = json.dumps({'config_path': str(config_path), 'role_cfg': role_cfg or {}},
+                         sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class _PooledReranker:
+    __slots__ = ('reranker', 'semaphore')
+
+    def __init__(self, reranker: Any, max_concurrency: int):
+        self.reranker = reranker
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+
+
+class RerankerPool:
+    '''Thread-safe LRU pool of reranker instances.
+
+    Args:
+        max_size: Maximum number of distinct keys kept alive; the least recently
+            used entry is evicted when exceeded.
+        max_concurrency: Maximum number of concurrent calls allowed on a single
+            pooled instance; extra callers block until a slot frees up.
+    '''
+
+    def __init__(self, max_size: int = 8, max_concurrency: int = 4):
+        self._max_size = max(1, int(max_size))
+        self._max_concurrency = max(1, int(max_concurrency))
+        self._entries: 'OrderedDict[RerankerKey, _PooledReranker]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_locks: Dict[RerankerKey, threading.Lock] = {}
+
+    @staticmethod
+    def make_key(model: str, topk: int, config_path: str,
+                 role_cfg: Optional[Dict[str, Any]] = None) -> RerankerKey:
+        return (model, int(topk), config_hash(config_path, role_cfg))
+
+    def _get_entry(self, key: RerankerKey, config_path: str, factory: RerankerFactory) -> _PooledReranker:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+
+        # Build outside the pool lock so a slow construction does not stall other keys;
+        # the per-key lock makes sure concurrent first callers build only once.
+        with build_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    return entry
+            model, topk, _ = key
+            entry = _PooledReranker(factory(model, topk, config_path), self._max_concurrency)
+            with self._lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                self._build_locks.pop(key, None)
+                while len(self._entries) > self._max_size:
+                    evicted, _ = self._entries.popitem(last=False)
+                    LOG.info(f'[RerankerPool] evicted key={evicted}')
+            LOG.info(f'[RerankerPool] built key={key} size={len(self._entries)}')
+            return entry
+
+    @contextmanager
+    def acquire(self, model: str, topk: int, config_path: str, *, factory: RerankerFactory,
+                role_cfg: Optional[Dict[str, Any]] = None) -> Iterator[Any]:
+        '''Borrow the pooled reranker for the key, building it on first use.'''
+        entry = self._get_entry(self.make_key(model, topk, config_path, role_cfg), config_path, factory)
+        with entry.semaphore:
+            yield entry.reranker
+
+    def warmup(self, model: str, topks, config_path: str, *, factory: RerankerFactory,
+               role_cfg: Optional[Dict[str, Any]] = None) -> int:
+        '''Pre-build instances for each topk; returns the number of instances now pooled.'''
+        for topk in topks:
+            self._get_entry(self.make_key(model, topk, config_path, role_cfg), config_path, factory)
+        return len(self)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._build_locks.clear()
+
+    def __contains__(self, key: RerankerKey) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+_pool: Optional[RerankerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_reranker_pool() -> RerankerPool:
+    '''Return the process-wide reranker pool (lazy init).'''
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = RerankerPool(
+                    max_size=_cfg['reranker_pool_size'],
+                    max_concurrency=_cfg['reranker_pool_max_concurrency'],
+                )
+    return _pool
+
+
+def reset_reranker_pool() -> None:
+    '''Drop the process-wide pool (for testing only).'''
+    global _pool
+    with _pool_lock:
+        _pool = None
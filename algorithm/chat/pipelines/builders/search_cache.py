@@ -0,0 +1,423 @@
+"""Two-level result cache in front of the RAG search pipeline.
+
+Every chat turn that reaches ``get_ppl_search`` runs query rewriting, the parallel
+retrievers, RRF fusion, reranking, adaptive-k and context expansion, even for the
+repeated and near-duplicate questions that make up most enterprise traffic.
+``SearchResultCache`` short-circuits them:
+
+* exact level: keyed by the normalised query, its vocabulary rewrite and the search
+  scope (pipeline url, dataset, filters, files, reranker config);
+* semantic level: within the same scope, the rewritten query's embedding is compared
+  with the cached ones and the closest entry is reused when the cosine similarity
+  reaches ``similarity_threshold``.
+
+Entries expire after ``ttl`` seconds and are tied to the version of their dataset;
+``invalidate_dataset`` (exposed as ``POST /api/search_cache/invalidate``) bumps the
+version when documents are added or deleted.  Results are stored pickled, so every hit
+hands out fresh nodes that downstream stages may mutate freely.  With ``persist_path``
+the cache is saved to disk periodically and reloaded on start; the TTL still applies to
+reloaded entries.
+
+Usage:
+    cache = get_search_cache()
+    search = CachedSearch(search_ppl, url, cache, rewrite=parse_query)
+    nodes = search(query_params)
+"""
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import os
+import pickle
+import re
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import numpy as np
+from lazyllm import LOG
+
+from config import config as _cfg
+
+EmbedFn = Callable[[str], Sequence[float]]
+
+_PERSIST_INTERVAL = 30.0
+_TRAILING_PUNCT = re.compile(r'[\s?？!！。.,，;；:：~～]+$')
+
+
+def normalize_query(query: str) -> str:
+    '''NFKC-fold, lowercase, collapse whitespace and drop trailing punctuation.'''
+    text = unicodedata.normalize('NFKC', query or '').lower()
+    return _TRAILING_PUNCT.sub('', ' '.join(text.split()))
+
+
+def _stable_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, default=repr, separators=(',', ':'))
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha1(_stable_json(value).encode('utf-8')).hexdigest()
+
+
+def dataset_of(url: str, query_params: Dict[str, Any]) -> str:
+    '''Dataset a search runs against: the ``kb_id`` filter, else the name in ``<service>,<name>`` urls.'''
+    kb_id = (query_params.get('filters') or {}).get('kb_id')
+    if isinstance(kb_id, (list, tuple)):
+        kb_id = ','.join(sorted(str(k) for k in kb_id))
+    if kb_id:
+        return str(kb_id)
+    return url.split(',', 1)[1] if ',' in url else url
+
+
+@dataclass
+class SearchCacheStats:
+    hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+    seconds_saved: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.semantic_hits + self.misses
+        return (self.hits + self.semantic_hits) / total if total else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), 'hit_rate': round(self.hit_rate, 4), 'seconds_saved': round(self.seconds_saved, 3)}
+
+
+class _Entry:
+    __slots__ = ('scope', 'dataset', 'version', 'created', 'vector', 'payload', 'seconds')
+
+    def __init__(self, scope: str, dataset: str, version: int, created: float,
+                 vector: Optional[np.ndarray], payload: bytes, seconds: float):
+        self.scope = scope
+        self.dataset = dataset
+        self.version = version
+        self.created = created
+        self.vector = vector
+        self.payload = payload
+        self.seconds = seconds
+
+
+class SearchResultCache:
+    '''Thread-safe exact + embedding-similarity cache of search results.
+
+    Args:
+        max_entries: Entries kept across both levels; the least recently used is evicted.
+        ttl: Seconds an entry stays valid (``<= 0`` keeps it until evicted or invalidated).
+        similarity_threshold: Minimum cosine similarity for a semantic hit; ``<= 0``
+            disables the semantic level.
+        embed_fn: Maps a query to its dense embedding; required for the semantic level.
+        persist_path: Optional pickle file the cache is loaded from and saved to.
+    '''
+
+    def __init__(self, max_entries: int = 4096, ttl: float = 300.0, similarity_threshold: float = 0.95,
+                 embed_fn: Optional[EmbedFn] = None, persist_path: Optional[str] = None):
+        self._max_entries = max(1, int(max_entries))
+        self._ttl = float(ttl)
+        self._threshold = float(similarity_threshold)
+        self._embed_fn = embed_fn
+        self._persist_path = os.path.abspath(persist_path) if persist_path else None
+        self._entries: 'OrderedDict[str, _Entry]' = OrderedDict()
+        self._scopes: Dict[str, Dict[str, None]] = {}
+        self._matrices: Dict[str, tuple] = {}
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        self.stats = SearchCacheStats()
+        if self._persist_path:
+            self._load()
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self._embed_fn is not None and self._threshold > 0
+
+    def _version(self, dataset: str) -> int:
+        # A search over several datasets (``kb_id`` list) is stale once any of them changes.
+        return sum(self._versions.get(name, 0) for name in dataset.split(','))
+
+    def _valid(self, entry: _Entry, now: float) -> bool:
+        if entry.version != self._version(entry.dataset):
+            return False
+        return self._ttl <= 0 or now - entry.created < self._ttl
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry.vector is not None:
+            keys = self._scopes.get(entry.scope)
+            if keys is not None:
+                keys.pop(key, None)
+                if not keys:
+                    del self._scopes[entry.scope]
+            self._matrices.pop(entry.scope, None)
+        self._dirty = True
+
+    def _semantic_match(self, scope: str, vector: np.ndarray, now: float) -> Optional[str]:
+        keys = self._scopes.get(scope)
+        if not keys:
+            return None
+        cached = self._matrices.get(scope)
+        if cached is None:
+            order = list(keys)
+            cached = self._matrices[scope] = (order, np.stack([self._entries[k].vector for k in order]))
+        order, matrix = cached
+        similarities = matrix @ vector
+        for index in np.argsort(-similarities):
+            if similarities[index] < self._threshold:
+                return None
+            if self._valid(self._entries[order[index]], now):
+                return order[index]
+        return None
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        try:
+            vector = np.asarray(self._embed_fn(text), dtype=np.float32).ravel()
+        except Exception as exc:
+            LOG.warning(f'[SearchCache] embedding failed, using the exact level only: {exc}')
+            return None
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else None
+
+    def lookup(self, key: str, scope: str, text: str) -> tuple:
+        '''Return ``(result, vector)``; ``result`` is ``None`` on a miss and ``vector`` is
+        the query embedding to pass to ``put`` (``None`` when the semantic level is off).'''
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._valid(entry, now):
+                self._drop(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                self.stats.seconds_saved += entry.seconds
+                return pickle.loads(entry.payload), None
+        vector = self._embed(text) if self.semantic_enabled else None
+        with self._lock:
+            match = self._semantic_match(scope, vector, now) if vector is not None else None
+            if match is None:
+                self.stats.misses += 1
+                return None, vector
+            entry = self._entries[match]
+            self._entries.move_to_end(match)
+            self.stats.semantic_hits += 1
+            self.stats.seconds_saved += entry.seconds
+            return pickle.loads(entry.payload), vector
+
+    def put(self, key: str, scope: str, dataset: str, result: Any, *,
+            vector: Optional[np.ndarray] = None, seconds: float = 0.0) -> None:
+        try:
+            payload = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as exc:
+            LOG.warning(f'[SearchCache] result is not picklable, not caching: {exc}')
+            return
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = _Entry(scope, dataset, self._version(dataset), time.time(),
+                                        vector, payload, seconds)
+            if vector is not None:
+                self._scopes.setdefault(scope, {})[key] = None
+                self._matrices.pop(scope, None)
+            while len(self._entries) > self._max_entries:
+                self._drop(next(iter(self._entries)))
+            flush = self._persist_path is not None and time.monotonic() - self._last_flush > _PERSIST_INTERVAL
+        if flush:
+            self.flush()
+
+    def invalidate_dataset(self, dataset: Optional[str] = None) -> int:
+        '''Drop entries of ``dataset``, including multi-dataset searches that cover it (all entries when
+        ``None``); return how many were removed.'''
+        with self._lock:
+            if dataset is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                self._scopes.clear()
+                self._matrices.clear()
+                self._versions = {name: version + 1 for name, version in self._versions.items()}
+            else:
+                self._versions[dataset] = self._versions.get(dataset, 0) + 1
+                stale = [key for key, entry in self._entries.items() if dataset in entry.dataset.split(',')]
+                for key in stale:
+                    self._drop(key)
+                removed = len(stale)
+            self._dirty = True
+        LOG.info(f'[SearchCache] invalidated dataset={dataset!r} removed={removed}')
+        if self._persist_path:
+            self.flush()
+        return removed
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def reset_stats(self) -> SearchCacheStats:
+        with self._lock:
+            stats, self.stats = self.stats, SearchCacheStats()
+        return stats
+
+    def flush(self) -> None:
+        '''Write the cache to ``persist_path`` atomically, if it changed since the last flush.'''
+        if not self._persist_path:
+            return
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._dirty:
+                return
+            state = {
+                'versions': dict(self._versions),
+                'entries': [(key, e.scope, e.dataset, e.version, e.created, e.vector, e.payload, e.seconds)
+                            for key, e in self._entries.items()],
+            }
+            self._dirty = False
+        directory = os.path.dirname(self._persist_path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix='.search-cache-', dir=directory)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, self._persist_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+        except OSError as exc:
+            LOG.warning(f'[SearchCache] failed to persist to {self._persist_path}: {exc}')
+
+    def _load(self) -> None:
+        try:
+            with open(self._persist_path, 'rb') as f:
+                state = pickle.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as exc:
+            LOG.warning(f'[SearchCache] ignoring unreadable cache file {self._persist_path}: {exc}')
+            return
+        self._versions = dict(state.get('versions') or {})
+        now = time.time()
+        for key, scope, dataset, version, created, vector, payload, seconds in state.get('entries') or []:
+            entry = _Entry(scope, dataset, version, created, vector, payload, seconds)
+            if not self._valid(entry, now):
+                continue
+            self._entries[key] = entry
+            if vector is not None:
+                self._scopes.setdefault(scope, {})[key] = None
+        while len(self._entries) > self._max_entries:
+            self._drop(next(iter(self._entries)))
+        LOG.info(f'[SearchCache] loaded {len(self._entries)} entries from {self._persist_path}')
+
+
+def _reranker_fingerprint() -> str:
+    # The reranker model can be switched per request, and it decides the final ranking.
+    import lazyllm
+    try:
+        cfg = lazyllm.globals.config['dynamic_model_configs']
+    except Exception:
+        cfg = None
+    return _digest(cfg.get('reranker') if isinstance(cfg, dict) else None)
+
+
+class CachedSearch:
+    '''Callable that serves ``search(query_params)`` from ``cache`` and fills it on a miss.
+
+    Args:
+        search: The search pipeline.
+        url: Pipeline url; part of every key.
+        cache: Shared ``SearchResultCache``.
+        rewrite: ``query_params -> str`` used by the retrievers (vocabulary rewrite);
+            part of the exact key and the text embedded for the semantic level.
+    '''
+
+    def __init__(self, search: Callable, url: str, cache: SearchResultCache,
+                 rewrite: Optional[Callable[[Dict[str, Any]], str]] = None):
+        self._search = search
+        self._url = url
+        self._cache = cache
+        self._rewrite = rewrite
+
+    @property
+    def search(self) -> Callable:
+        return self._search
+
+    def __call__(self, query_params, *args, **kwargs):
+        if args or kwargs or not isinstance(query_params, dict) or not query_params.get('query'):
+            return self._search(query_params, *args, **kwargs)
+        dataset = dataset_of(self._url, query_params)
+        scope = _digest([self._url, dataset, query_params.get('filters') or {},
+                         sorted(str(f) for f in query_params.get('files') or []),
+                         sorted(str(f) for f in query_params.get('image_files') or []),
+                         _reranker_fingerprint()])
+        query = normalize_query(query_params['query'])
+        rewritten = normalize_query(self._rewrite(query_params)) if self._rewrite else query
+        key = _digest([scope, query, rewritten])
+
+        result, vector = self._cache.lookup(key, scope, rewritten)
+        if result is not None:
+            return result
+        start = time.perf_counter()
+        result = self._search(query_params)
+        self._cache.put(key, scope, dataset, result, vector=vector, seconds=time.perf_counter() - start)
+        return result
+
+
+_cache: Optional[SearchResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def _default_embed_fn() -> Optional[EmbedFn]:
+    from lazyllm import AutoModel
+    from chat.utils.load_config import get_config_path, get_embed_index_kwargs, get_image_embed_key
+
+    config_path = get_config_path()
+    role = _cfg['search_cache_embed_key']
+    if not role:
+        image_key = get_image_embed_key(config_path)
+        dense = [ik['embed_key'] for ik in get_embed_index_kwargs(config_path)
+                 if ik.get('metric_type') == 'COSINE' and ik['embed_key'] != image_key]
+        role = dense[0] if dense else None
+    if not role:
+        LOG.warning('[SearchCache] no dense embedding role configured, semantic level disabled')
+        return None
+    return AutoModel(model=role, config=config_path)
+
+
+def get_search_cache() -> Optional[SearchResultCache]:
+    '''Process-wide cache from config, or ``None`` when disabled.'''
+    global _cache
+    if not _cfg['search_cache']:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            threshold = float(_cfg['search_cache_similarity'])
+            _cache = SearchResultCache(
+                max_entries=_cfg['search_cache_max_entries'],
+                ttl=_cfg['search_cache_ttl'],
+                similarity_threshold=threshold,
+                embed_fn=_default_embed_fn() if threshold > 0 else None,
+                persist_path=_cfg['search_cache_path'],
+            )
+            atexit.register(_cache.flush)
+        return _cache
+
+
+def with_search_cache(search: Callable, url: str,
+                      rewrite: Optional[Callable[[Dict[str, Any]], str]] = None) -> Callable:
+    '''Wrap ``search`` in ``CachedSearch`` when the cache is enabled, else return it unchanged.'''
+    cache = get_search_cache()
+    return search if cache is None else CachedSearch(search, url, cache, rewrite=rewrite)
+
+
+def invalidate_search_cache(dataset: Optional[str] = None) -> int:
+    return _cache.invalidate_dataset(dataset) if _cache is not None else 0
+
+
+def reset_search_cache() -> None:
+    '''Drop the process-wide cache (for testing only).'''
+    global _cache
+    with _cache_lock:
+        _cache = None
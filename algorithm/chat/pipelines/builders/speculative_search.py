@@ -0,0 +1,146 @@
+"""Speculative search that overlaps retrieval with the multi-turn query rewrite.
+
+With chat history, ``MultiturnQueryRewriter`` makes an LLM call and the search
+pipeline only starts once it returns, so a turn costs rewrite + search.  Many
+follow-ups are already self-contained, and for those the rewriter hands back the same
+question.  ``SpeculativeSearch`` starts the search on the raw last user query at the
+same time as the rewrite:
+
+* hit: the rewritten query normalises (``normalize_query``) to the raw one, so the
+  speculative result is used and the turn costs max(rewrite, search);
+* miss: the rewrite changed the question, and every stage after it (retrieval,
+  fusion, reranking) is conditioned on the query text, so only the rewritten query is
+  searched.  A speculative run still waiting for a worker is cancelled.  One already
+  running cannot be interrupted inside the pipeline; it finishes in the background,
+  its result is dropped (or kept as a prefetch by the search cache, when enabled) and
+  its time is booked as wasted.
+
+At most ``workers`` speculative searches run at once and as many again may queue;
+beyond that, turns skip speculation and search sequentially.  ``stats`` accounts for
+hits, misses, cancelled, wasted and skipped runs and the seconds saved and wasted.
+
+Usage:
+    search = SpeculativeSearch(get_ppl_search(url), rewrite=rewrite_fn, should_rewrite=has_history)
+    nodes = search(query_params)
+"""
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from lazyllm import LOG, ThreadPoolExecutor
+
+from chat.pipelines.builders.search_cache import normalize_query
+
+
+@dataclass
+class SpeculationStats:
+    speculated: int = 0
+    hits: int = 0
+    misses: int = 0
+    skipped: int = 0
+    cancelled: int = 0
+    wasted: int = 0
+    saved_seconds: float = 0.0
+    wasted_seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), 'hit_rate': round(self.hit_rate, 4),
+                'saved_seconds': round(self.saved_seconds, 3), 'wasted_seconds': round(self.wasted_seconds, 3)}
+
+
+def _timed(fn: Callable[[Dict[str, Any]], Any], query_params: Dict[str, Any]) -> Tuple[Any, float]:
+    start = time.monotonic()
+    return fn(query_params), time.monotonic() - start
+
+
+class SpeculativeSearch:
+    """Run ``search`` on the raw query while ``rewrite`` runs, and reuse it when the rewrite keeps the question.
+
+    Args:
+        search: Search pipeline, ``query_params -> nodes``.
+        rewrite: ``query_params -> query_params`` with the rewritten ``query``.
+        should_rewrite: Predicate on ``query_params``; turns it rejects are searched directly without
+            a rewrite.  ``None`` rewrites every turn.
+        workers: Concurrent speculative searches.
+    """
+
+    def __init__(self, search: Callable[[Dict[str, Any]], Any], rewrite: Callable[[Dict[str, Any]], Dict[str, Any]],
+                 should_rewrite: Optional[Callable[[Dict[str, Any]], bool]] = None, workers: int = 8):
+        self.search = search
+        self.rewrite = rewrite
+        self.should_rewrite = should_rewrite
+        self.workers = max(1, workers)
+        self.stats = SpeculationStats()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+
+    def __call__(self, query_params: Dict[str, Any]) -> Any:
+        if self.should_rewrite is not None and not self.should_rewrite(query_params):
+            return self.search(query_params)
+
+        start = time.monotonic()
+        speculation = self._speculate(dict(query_params))
+        try:
+            rewritten = self.rewrite(dict(query_params))
+        except Exception:
+            self._abandon(speculation)
+            raise
+        rewrite_seconds = time.monotonic() - start
+
+        if speculation is None:
+            return self.search(rewritten)
+        if normalize_query(rewritten.get('query')) != normalize_query(query_params.get('query')):
+            with self._lock:
+                self.stats.misses += 1
+            self._abandon(speculation)
+            return self.search(rewritten)
+
+        try:
+            result, search_seconds = speculation.result()
+        except Exception as exc:
+            LOG.warning(f'[SpeculativeSearch] speculative search failed, searching again: {exc}')
+            return self.search(rewritten)
+        with self._lock:
+            self.stats.hits += 1
+            self.stats.saved_seconds += max(0.0, rewrite_seconds + search_seconds - (time.monotonic() - start))
+        return result
+
+    def _speculate(self, query_params: Dict[str, Any]) -> Optional[Future]:
+        with self._lock:
+            if self._pending >= 2 * self.workers:
+                self.stats.skipped += 1
+                return None
+            self._pending += 1
+            self.stats.speculated += 1
+        future = self._executor.submit(_timed, self.search, query_params)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _abandon(self, speculation: Optional[Future]) -> None:
+        if speculation is None:
+            return
+        if speculation.cancel():
+            with self._lock:
+                self.stats.cancelled += 1
+            return
+        speculation.add_done_callback(self._book_waste)
+
+    def _book_waste(self, future: Future) -> None:
+        seconds = 0.0 if future.exception() is not None else future.result()[1]
+        with self._lock:
+            self.stats.wasted += 1
+            self.stats.wasted_seconds += seconds
@@ -1,10 +1,13 @@
+from functools import partial
 from typing import List
 import lazyllm
 from lazyllm import AutoModel, pipeline, bind, ifs
 
 from chat.pipelines.builders import get_ppl_search, get_ppl_generate
+from chat.pipelines.builders.speculative_search import SpeculativeSearch
 from chat.components.process.multiturn_query_rewriter import MultiturnQueryRewriter
 from chat.utils.load_config import get_config_path
+from config import config as _cfg
 
 
 def has_history(query_params=None, *_, **__) -> bool:
@@ -15,21 +18,36 @@ def keep_query_params(query_params=None, *_, **__):
     return query_params
 
 
+def rewrite_query_params(query_params: dict, rewriter) -> dict:
+    has_appendix = bool(query_params.get('image_files')) or bool(query_params.get('files'))
+    return rewriter(query_params, priority=query_params.get('priority'), has_appendix=has_appendix)
+
+
 def get_ppl_naive(url: str, retriever_configs: List[dict] = None, stream=False):
 
     with lazyllm.save_pipeline_result():
         with pipeline() as rag_ppl:
-            rag_ppl.rewriter = ifs(
-                has_history,
-                tpath=MultiturnQueryRewriter(llm=AutoModel(model='llm', config=get_config_path()))
-                | bind(
-                    priority=rag_ppl.input['priority'],
-                    has_appendix=bool(rag_ppl.input['image_files'])
-                    or bool(rag_ppl.input['files']),
-                ),
-                fpath=keep_query_params,
-            )
-            rag_ppl.search = get_ppl_search(url, retriever_configs)
+            if _cfg['search_speculative']:
+                # The rewrite runs inside the search stage, alongside a search on the raw query.
+                rewriter = MultiturnQueryRewriter(llm=AutoModel(model='llm', config=get_config_path()))
+                rag_ppl.search = SpeculativeSearch(
+                    get_ppl_search(url, retriever_configs),
+                    rewrite=partial(rewrite_query_params, rewriter=rewriter),
+                    should_rewrite=has_history,
+                    workers=_cfg['search_speculative_workers'],
+                )
+            else:
+                rag_ppl.rewriter = ifs(
+                    has_history,
+                    tpath=MultiturnQueryRewriter(llm=AutoModel(model='llm', config=get_config_path()))
+                    | bind(
+                        priority=rag_ppl.input['priority'],
+                        has_appendix=bool(rag_ppl.input['image_files'])
+                        or bool(rag_ppl.input['files']),
+                    ),
+                    fpath=keep_query_params,
+                )
+                rag_ppl.search = get_ppl_search(url, retriever_configs)
             rag_ppl.generate = get_ppl_generate(stream=stream) | bind(
                 image_files=[],
                 query=rag_ppl.input['query'],
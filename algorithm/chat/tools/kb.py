@@ -1,13 +1,17 @@
 import json
+import os
+import threading
+from collections import OrderedDict
 from functools import wraps
 from typing import Any, Dict, List, Optional
 
 import lazyllm
-import requests
 
 from lazyllm import fc_register
 
 from chat.pipelines.builders.get_ppl_search import get_ppl_search
+from chat.utils.load_config import get_config_path, get_text_embed_keys
+from chat.utils.opensearch_client import OpenSearchClient, get_opensearch_client
 from chat.utils.static_file_url import (
     basename_from_path,
     local_path_from_static_file_url,
@@ -28,6 +32,13 @@ _IMAGE_URL_REGISTRY_KEY = '_image_url_registry'
 _CITATION_DOC_KEY_MAP_KEY = '_citation_doc_key_map'
 _CITATION_NEXT_DOC_KEY = '_citation_next_doc_index'
 _CITATION_DOC_CHUNK_NEXT_KEY = '_citation_next_chunk_index_map'
+_SEARCH_PPL_CACHE_SIZE = max(1, int(_cfg['kb_search_ppl_cache_size']))
+
+# Compiled search pipelines keyed by everything that shapes their construction.
+# A ReAct turn can call kb_search many times; rebuilding the retrievers,
+# TempDocRetriever, RRF fusion and embedding models on every call dominated latency.
+_search_ppl_cache: 'OrderedDict[tuple, Any]' = OrderedDict()
+_search_ppl_cache_lock = threading.Lock()
 
 
 def _tool_failure(tool_name: str, exc: Exception) -> Dict[str, Any]:
@@ -249,18 +260,20 @@ def _term_filter(field: str, value: Any) -> Dict[str, Any]:
     }
 
 
+def _opensearch_client(config: Dict[str, Any]) -> OpenSearchClient:
+    return get_opensearch_client(
+        _normalize_es_url(config.get('es_url')),
+        config.get('es_user') or _DEFAULT_ES_USER,
+        config.get('es_password') or _DEFAULT_ES_PASSWORD,
+    )
+
+
 def _opensearch_search(index: str, body: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
-    with requests.sessions.Session() as session:
-        session.trust_env = False
-        resp = session.post(
-            f'{_normalize_es_url(config.get("es_url"))}/{index}/_search',
-            auth=(config.get('es_user') or _DEFAULT_ES_USER, config.get('es_password') or _DEFAULT_ES_PASSWORD),
-            json=body,
-            verify=False,
-            timeout=30,
-        )
-    resp.raise_for_status()
-    return resp.json()
+    return _opensearch_client(config).search(index, body)
+
+
+def _opensearch_msearch(searches: List[tuple], config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return _opensearch_client(config).msearch(searches)
 
 
 def _source_to_result(hit: Dict[str, Any]) -> Dict[str, Any]:
@@ -454,9 +467,13 @@ def _find_node_by_id(node_id: str, config: Dict[str, Any]) -> Optional[Dict[str,
             }
         },
     }
-    for group in ('block', 'line'):
-        index_name = _resolve_index(config, group)
-        hits = _opensearch_search(index_name, body, config).get('hits', {}).get('hits', [])
+    # Resolve against block and line in a single _msearch round trip; block wins
+    # when both match, the same precedence the sequential lookup used to have.
+    searches = [(_resolve_index(config, group), body) for group in ('block', 'line')]
+    for (index_name, _), resp in zip(searches, _opensearch_msearch(searches, config)):
+        if resp.get('error'):
+            raise RuntimeError(f'OpenSearch lookup on {index_name} failed: {resp["error"]}')
+        hits = resp.get('hits', {}).get('hits', [])
         if hits:
             return hits[0]
     return None
@@ -495,6 +512,69 @@ def _serialize_kb_result(result: Any) -> Any:
     return _truncate_text(result, max_len=400)
 
 
+def _model_config_fingerprint() -> tuple:
+    # The mtime makes an edited runtime_models file produce new keys, so pipelines
+    # built against the old embed/retriever settings age out of the LRU.
+    path = get_config_path()
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+    return path, mtime
+
+
+def _search_ppl_cache_key(
+    url: str,
+    kb_id: Optional[str],
+    retriever_configs: Optional[List[Dict[str, Any]]],
+    topk: int,
+    k_max: int,
+) -> tuple:
+    return (
+        url,
+        kb_id,
+        tuple(get_text_embed_keys()),
+        json.dumps(retriever_configs, sort_keys=True, default=str),
+        topk,
+        k_max,
+        _model_config_fingerprint(),
+    )
+
+
+def _get_search_ppl(key: tuple, url: str, retriever_configs: Optional[List[Dict[str, Any]]],
+                    topk: int, k_max: int) -> Any:
+    with _search_ppl_cache_lock:
+        search_ppl = _search_ppl_cache.get(key)
+        if search_ppl is not None:
+            _search_ppl_cache.move_to_end(key)
+            return search_ppl
+
+    search_ppl = get_ppl_search(url=url, retriever_configs=retriever_configs, topk=topk, k_max=k_max)
+    with _search_ppl_cache_lock:
+        search_ppl = _search_ppl_cache.setdefault(key, search_ppl)
+        _search_ppl_cache.move_to_end(key)
+        while len(_search_ppl_cache) > _SEARCH_PPL_CACHE_SIZE:
+            _search_ppl_cache.popitem(last=False)
+    return search_ppl
+
+
+def invalidate_search_ppl_cache(kb_url: Optional[str] = None, kb_id: Optional[str] = None) -> int:
+    """Drop cached search pipelines, optionally only those of one dataset.
+
+    Call this when a dataset's configuration (url, algo binding, node groups)
+    changes so the next kb_search rebuilds against the new settings.
+    Returns the number of entries removed.
+    """
+    with _search_ppl_cache_lock:
+        stale = [
+            key for key in _search_ppl_cache
+            if (kb_url is None or key[0].split(',', 1)[0] == kb_url) and (kb_id is None or key[1] == kb_id)
+        ]
+        for key in stale:
+            del _search_ppl_cache[key]
+    return len(stale)
+
+
 @fc_register('tool', execute_in_sandbox=False)
 @_handle_tool_errors
 def kb_search(
@@ -576,11 +656,11 @@ def kb_search(
     resolved_kb_id = _resolve_kb_id(agentic_config)
     if resolved_kb_id:
         payload['filters']['kb_id'] = resolved_kb_id
-    search_ppl = get_ppl_search(
-        url=f'{kb_url},{kb_name}',
-        retriever_configs=retriever_configs,
-        topk=topk or 20,
-        k_max=k_max or 10,
+    url = f'{kb_url},{kb_name}'
+    topk, k_max = topk or 20, k_max or 10
+    search_ppl = _get_search_ppl(
+        _search_ppl_cache_key(url, resolved_kb_id, retriever_configs, topk, k_max),
+        url, retriever_configs, topk, k_max,
     )
     return _annotate_citations(_serialize_kb_result(search_ppl(payload)))
 
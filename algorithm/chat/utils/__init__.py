@@ -5,6 +5,10 @@
 # helpers.py - Helper functions (including tool schema conversion, etc.)
 # url.py - URL processing utilities
 # stream_scanner.py - Streaming scan utilities
+# stream_bus.py - In-process push channel for agentic stream events
+# opensearch_client.py - Shared keep-alive OpenSearch client
+# response_log.py - Bounded, sampled logging of streamed responses
+# token_estimator.py - Cached, CJK-aware token counts for context budgeting
 
 from chat.utils.schema import (
     BaseMessage, SessionMemory,
@@ -1,9 +1,12 @@
 import re
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Optional
 
 from chat.utils.static_file_url import static_file_url_from_any, basename_from_path as _basename
 
 _IMAGE_MD_RE = re.compile(r'!\[([^\]]*)\]\(([^)]+)\)')
+# An image reference that is still open at the end of the text: `!`, `![alt`, `![alt]`, `![alt](url`.
+_IMAGE_MD_OPEN_RE = re.compile(r'!(?:\[[^\]]*(?:\](?:\([^)]*)?)?)?$')
+_MAX_HELD_IMAGE_CHARS = 2048
 _UPLOAD_ROOT_MARKER = '/var/lib/lazymind/uploads/'
 _BLOCKED_HOST_MARKERS = (
     'ext.lazymind.ai',
@@ -104,3 +107,42 @@ def rewrite_markdown_image_urls(
         return match.group(0)
 
     return _IMAGE_MD_RE.sub(_replace, markdown)
+
+
+class MarkdownImageStreamRewriter:
+    """Incremental ``rewrite_markdown_image_urls`` for one streamed field.
+
+    Each chunk is scanned once.  An image reference still open at the end of a
+    chunk is held back until it closes (or exceeds ``max_hold`` characters), so
+    references split across chunks are rewritten too.  The URL map is only
+    built from ``config_getter()`` when a complete image is actually present.
+    """
+
+    def __init__(self, config_getter: Optional[Callable[[], Optional[Dict[str, Any]]]] = None,
+                 max_hold: int = _MAX_HELD_IMAGE_CHARS):
+        self._config_getter = config_getter
+        self._max_hold = max_hold
+        self._pending = ''
+
+    def feed(self, text: str) -> str:
+        if not text:
+            return text
+        buf = self._pending + text if self._pending else text
+        if '!' not in buf:
+            self._pending = ''
+            return buf
+        open_from = max(buf.rfind(')') + 1, len(buf) - self._max_hold)
+        match = _IMAGE_MD_OPEN_RE.search(buf, open_from)
+        cut = match.start() if match else len(buf)
+        self._pending = buf[cut:]
+        return self._rewrite(buf[:cut])
+
+    def flush(self) -> str:
+        pending, self._pending = self._pending, ''
+        return pending
+
+    def _rewrite(self, text: str) -> str:
+        if '![' not in text:
+            return text
+        config = self._config_getter() if self._config_getter else None
+        return rewrite_markdown_image_urls(text, config=config)
@@ -0,0 +1,101 @@
+"""Shared keep-alive OpenSearch client for chat tools.
+
+Opening a ``requests.Session`` per query costs a TCP/TLS handshake every time.
+Clients here are cached per (url, user, password) and keep a pooled
+``HTTPAdapter`` so consecutive tool calls reuse warm connections.
+"""
+from __future__ import annotations
+
+import json
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import config as _cfg
+
+_DEFAULT_TIMEOUT = 30
+
+
+class OpenSearchClient:
+    """Thin OpenSearch REST client over a pooled, keep-alive session.
+
+    Args:
+        base_url: OpenSearch endpoint, e.g. ``https://opensearch:9200``.
+        auth: ``(user, password)`` basic-auth pair.
+        pool_maxsize: Max keep-alive connections held for the endpoint.
+        timeout: Per-request timeout in seconds.
+    """
+
+    def __init__(self, base_url: str, auth: Tuple[str, str], pool_maxsize: int = 10,
+                 timeout: float = _DEFAULT_TIMEOUT):
+        self._base_url = base_url.rstrip('/')
+        self._timeout = timeout
+        self._session = requests.sessions.Session()
+        # Endpoints are internal; never route them through LAZYLLM_*/HTTP(S)_PROXY.
+        self._session.trust_env = False
+        self._session.auth = auth
+        self._session.verify = False
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, int(pool_maxsize)))
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+    @property
+    def base_url(self) -> str:
+        return self._base_url
+
+    def search(self, index: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        resp = self._session.post(f'{self._base_url}/{index}/_search', json=body, timeout=self._timeout)
+        resp.raise_for_status()
+        return resp.json()
+
+    def msearch(self, searches: Sequence[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Run several (index, body) searches in one ``_msearch`` round trip.
+
+        Returns one response dict per search, in order.  Per-search failures are
+        reported by OpenSearch as an ``error`` entry and are left to the caller.
+        """
+        payload = ''.join(
+            f'{json.dumps({"index": index})}\n{json.dumps(body)}\n' for index, body in searches
+        )
+        resp = self._session.post(
+            f'{self._base_url}/_msearch',
+            data=payload.encode('utf-8'),
+            headers={'Content-Type': 'application/x-ndjson'},
+            timeout=self._timeout,
+        )
+        resp.raise_for_status()
+        return resp.json().get('responses', [])
+
+    def close(self) -> None:
+        self._session.close()
+
+
+_clients: Dict[Tuple[str, str, str], OpenSearchClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_opensearch_client(base_url: str, user: str, password: str,
+                          pool_maxsize: Optional[int] = None) -> OpenSearchClient:
+    """Return the process-wide client for the endpoint and credentials (lazy init)."""
+    key = (base_url.rstrip('/'), user or '', password or '')
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = OpenSearchClient(
+                    key[0], (key[1], key[2]),
+                    pool_maxsize=pool_maxsize or _cfg['opensearch_pool_maxsize'],
+                )
+                _clients[key] = client
+    return client
+
+
+def reset_clients() -> None:
+    """Close and drop all cached clients (for testing only)."""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
@@ -0,0 +1,167 @@
+"""Bounded, sampled logging of streamed chat responses.
+
+A streamed answer used to be kept chunk by chunk until the stream ended and
+then logged in full, so log memory grew with answer length times concurrency.
+``StreamLogAccumulator`` keeps only a head and a tail of the response within a
+byte cap, plus a SHA-256 of the full content so the complete answer can still
+be matched against other records.  Unsampled streams keep no text at all.
+
+``emit_log`` hands the final log call to a background thread so formatting and
+writing a large record does not stall the event loop.
+
+Usage:
+    acc = StreamLogAccumulator(max_bytes=8192, sampled=should_sample(0.1))
+    for chunk in chunks:
+        acc.append(chunk)
+    emit_log(log_fn, acc.render(), acc.digest)
+"""
+from __future__ import annotations
+
+import hashlib
+import queue
+import random
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Optional
+
+from lazyllm import LOG
+
+_SEPARATOR = '\n'
+
+
+def should_sample(rate: float) -> bool:
+    """Sampling decision for one stream; rate is clamped to [0, 1]."""
+    if rate >= 1:
+        return True
+    if rate <= 0:
+        return False
+    return random.random() < rate
+
+
+class StreamLogAccumulator:
+    """Head/tail retention of streamed text within ``max_bytes``.
+
+    Args:
+        max_bytes: Upper bound on retained text (UTF-8 bytes, approximate at
+            chunk granularity for the tail).  0 keeps everything.
+        head_ratio: Share of ``max_bytes`` reserved for the start of the answer.
+        sampled: When False only the digest and counters are kept.
+    """
+
+    def __init__(self, max_bytes: int = 8192, head_ratio: float = 0.5, sampled: bool = True):
+        self._max_bytes = max(0, int(max_bytes))
+        self._head_cap = int(self._max_bytes * min(max(head_ratio, 0.0), 1.0))
+        self._tail_cap = self._max_bytes - self._head_cap
+        self.sampled = sampled
+        self._hash = hashlib.sha256()
+        self._head: list = []
+        self._head_bytes = 0
+        self._tail: Deque[bytes] = deque()
+        self._tail_bytes = 0
+        self.total_bytes = 0
+        self.chunks = 0
+
+    def append(self, text: str) -> None:
+        data = text.encode('utf-8', errors='replace')
+        if self.chunks:
+            data = _SEPARATOR.encode('utf-8') + data
+        self.chunks += 1
+        self.total_bytes += len(data)
+        self._hash.update(data)
+        if not self.sampled:
+            return
+        if not self._max_bytes:
+            self._head.append(data)
+            return
+
+        room = self._head_cap - self._head_bytes
+        if room > 0:
+            self._head.append(data[:room])
+            self._head_bytes += min(room, len(data))
+            data = data[room:]
+            if not data:
+                return
+        if not self._tail_cap:
+            return
+        self._tail.append(data)
+        self._tail_bytes += len(data)
+        while self._tail_bytes - len(self._tail[0]) >= self._tail_cap:
+            self._tail_bytes -= len(self._tail.popleft())
+
+    @property
+    def digest(self) -> str:
+        return self._hash.hexdigest()
+
+    @property
+    def retained_bytes(self) -> int:
+        return self._head_bytes + self._tail_bytes if self._max_bytes else self.total_bytes
+
+    def render(self) -> Optional[str]:
+        """Retained text with an elision marker, or None when unsampled."""
+        if not self.sampled:
+            return None
+        head = b''.join(self._head)
+        if not self._max_bytes:
+            return head.decode('utf-8', errors='replace')
+        tail = b''.join(self._tail)
+        if len(tail) > self._tail_cap:
+            tail = tail[len(tail) - self._tail_cap:]
+        omitted = self.total_bytes - len(head) - len(tail)
+        if omitted <= 0:
+            return (head + tail).decode('utf-8', errors='replace')
+        return (
+            f'{head.decode("utf-8", errors="ignore")}'
+            f'...[{omitted} bytes omitted]...'
+            f'{tail.decode("utf-8", errors="ignore")}'
+        )
+
+
+class _LogEmitter:
+    """Single daemon thread draining a bounded queue of log calls."""
+
+    def __init__(self, maxsize: int = 1024):
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, name='chat-log-emitter', daemon=True)
+        self._thread.start()
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> bool:
+        try:
+            self._queue.put_nowait((fn, args, kwargs))
+        except queue.Full:
+            return False
+        return True
+
+    def join(self) -> None:
+        """Block until every submitted record has been written (for testing)."""
+        self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            fn, args, kwargs = self._queue.get()
+            try:
+                fn(*args, **kwargs)
+            except Exception as exc:
+                LOG.warning(f'[ChatServer] [LOG_EMIT_FAILED] {exc}')
+            finally:
+                self._queue.task_done()
+
+
+_emitter: Optional[_LogEmitter] = None
+_emitter_lock = threading.Lock()
+
+
+def get_log_emitter() -> _LogEmitter:
+    """Return the process-wide log emitter (lazy init)."""
+    global _emitter
+    if _emitter is None:
+        with _emitter_lock:
+            if _emitter is None:
+                _emitter = _LogEmitter()
+    return _emitter
+
+
+def emit_log(fn: Callable[..., Any], *args: Any, background: bool = True, **kwargs: Any) -> None:
+    """Run a log call off the event loop; falls back to inline when the queue is full."""
+    if background and get_log_emitter().submit(fn, *args, **kwargs):
+        return
+    fn(*args, **kwargs)
@@ -0,0 +1,157 @@
+"""In-process push channel for streamed agent output.
+
+LLM modules publish stream tokens through ``lazyllm.FileSystemQueue`` (the
+``__default__`` text queue and the ``think`` queue).  The default backend is
+SQLite, so every token is a disk write that a consumer has to poll for.
+
+``open_stream_channel`` hooks those two queues with a thin proxy: while a
+channel is subscribed for the current ``globals._sid`` the token is handed
+straight to the consumer's event loop; otherwise it falls through to the
+original backend, which keeps cross-process producers working.
+
+Usage:
+    channel = open_stream_channel(global_sid, asyncio.get_running_loop())
+    if channel is not None:
+        try:
+            batch = await channel.get()   # [(kind, payload), ...]
+        finally:
+            channel.close()
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import lazyllm
+
+STREAM_QUEUE_CLASSES = ('__default__', 'think')
+
+StreamItem = Tuple[str, Any]
+
+
+class StreamChannel:
+    """Thread-safe producer side, asyncio consumer side.
+
+    Items published from worker threads are buffered and handed to the loop
+    with a single ``call_soon_threadsafe`` per wake-up, so a burst of tokens
+    costs one loop hop instead of one per token.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, sids: Sequence[str] = ()):
+        self._loop = loop
+        self._sids = tuple(sids)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._lock = threading.Lock()
+        self._pending: List[StreamItem] = []
+        self._scheduled = False
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def publish(self, kind: str, payload: Any = None) -> bool:
+        """Queue an item for the consumer; returns False once the channel is closed."""
+        with self._lock:
+            if self._closed:
+                return False
+            self._pending.append((kind, payload))
+            if self._scheduled:
+                return True
+            self._scheduled = True
+        try:
+            self._loop.call_soon_threadsafe(self._deliver)
+        except RuntimeError:
+            # Loop already closed: the consumer is gone.
+            with self._lock:
+                self._closed = True
+            return False
+        return True
+
+    def _deliver(self) -> None:
+        with self._lock:
+            batch, self._pending = self._pending, []
+            self._scheduled = False
+        if batch:
+            self._queue.put_nowait(batch)
+
+    async def get(self) -> List[StreamItem]:
+        """Wait for the next batch of items, in publish order."""
+        return await self._queue.get()
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            self._pending = []
+        _unsubscribe(self._sids, self)
+
+
+class _PushFileSystemQueue:
+    """FileSystemQueue stand-in that pushes to a subscribed channel when one exists."""
+
+    def __init__(self, klass: str, fallback: Any):
+        self._class = klass
+        self._fallback = fallback
+
+    @property
+    def sid(self) -> str:
+        return f'{lazyllm.globals._sid}-{self._class}'
+
+    def enqueue(self, message):
+        channel = _subscribers.get(self.sid)
+        if channel is not None and channel.publish(self._class, message):
+            return None
+        return self._fallback.enqueue(message)
+
+    def __getattr__(self, name):
+        return getattr(self._fallback, name)
+
+
+_subscribers: Dict[str, StreamChannel] = {}
+_subscribers_lock = threading.Lock()
+_install_lock = threading.Lock()
+
+
+def _unsubscribe(sids: Sequence[str], channel: StreamChannel) -> None:
+    with _subscribers_lock:
+        for sid in sids:
+            if _subscribers.get(sid) is channel:
+                del _subscribers[sid]
+
+
+def install_push_queues(klasses: Sequence[str] = STREAM_QUEUE_CLASSES) -> bool:
+    """Wrap the process-wide FileSystemQueue instances for ``klasses`` (idempotent).
+
+    Returns False when ``lazyllm.FileSystemQueue`` is not the stock pooled
+    implementation (e.g. replaced in tests), in which case callers should keep
+    polling the queue.
+    """
+    queue_cls = lazyllm.FileSystemQueue
+    pool = getattr(queue_cls, '__queue_pool__', None)
+    pool_lock = getattr(queue_cls, '__queue_pool_lock__', None)
+    if not isinstance(pool, dict) or pool_lock is None:
+        return False
+    with _install_lock, pool_lock:
+        for klass in klasses:
+            current = queue_cls(klass=klass)
+            if not isinstance(current, _PushFileSystemQueue):
+                pool[klass] = _PushFileSystemQueue(klass, current)
+    return True
+
+
+def open_stream_channel(global_sid: str, loop: asyncio.AbstractEventLoop,
+                        klasses: Sequence[str] = STREAM_QUEUE_CLASSES) -> Optional[StreamChannel]:
+    """Subscribe a new channel to the stream queues of ``global_sid``.
+
+    Returns None when the queues cannot be hooked; the caller should then fall
+    back to polling ``lazyllm.FileSystemQueue``.
+    """
+    if not install_push_queues(klasses):
+        return None
+    sids = [f'{global_sid}-{klass}' for klass in klasses]
+    channel = StreamChannel(loop, sids)
+    with _subscribers_lock:
+        for sid in sids:
+            _subscribers[sid] = channel
+    return channel
@@ -16,6 +16,21 @@ _THINK_OPEN = '<think>'
 _THINK_CLOSE = '</think>'
 
 
+def prefix_pattern(*parts: str) -> re.Pattern:
+    """Compile a pattern that matches, up to end of string, any prefix of ``''.join(parts)``
+    that covers at least ``parts[0]``.
+
+    Each part is a regex atom; a prefix may stop after any part, so literals
+    must be split per character and repeatable atoms (digits, ``[^)]*``) listed alone.
+    Use with ``pattern.match(src, pos)`` to test whether ``src[pos:]`` is an
+    unfinished token.
+    """
+    nested = ''
+    for part in reversed(parts[1:]):
+        nested = f'(?:{part}{nested})?'
+    return re.compile(parts[0] + nested + r'\Z')
+
+
 # ============================================================
 # BasePlugin
 # ============================================================
@@ -26,6 +41,14 @@ class BasePlugin(ABC):
     def match(self, src: str, pos: int) -> Tuple[int, str] | None:
         ...
 
+    def is_partial(self, src: str, pos: int) -> bool | None:
+        """Whether the failed match at ``pos`` may still succeed once more text arrives.
+
+        Return None (the default) to let the scanner fall back to
+        ``last_incomplete_pos`` over the whole buffer.
+        """
+        return None
+
     def last_incomplete_pos(self, buf: str) -> int | None:
         return None
 
@@ -39,6 +62,7 @@ class BasePlugin(ABC):
 class CitationPlugin(BasePlugin):
     prefix_set = {'['}
     _pat = re.compile(r'\[\[(\d+)\]\]')
+    _partial_pat = prefix_pattern(r'\[', r'\[', r'\d+', r'\]')
 
     def __init__(self, refs: Dict[int, object]):
         self.refs = refs
@@ -87,6 +111,9 @@ class CitationPlugin(BasePlugin):
     def collect(self):
         return list(self._collected.values())
 
+    def is_partial(self, src: str, pos: int) -> bool:
+        return self._partial_pat.match(src, pos) is not None
+
     def last_incomplete_pos(self, buf: str) -> int | None:
         # 1) unclosed '[[...'
         last_double = buf.rfind('[[')
@@ -105,6 +132,8 @@ class ImagePlugin(BasePlugin):
     prefix_set = {'!'}
     # Use non-greedy matching for alt and url, allowing alt to contain parentheses etc.
     _pat = re.compile(r'!\[(.*?)\]\((.*?)\)')
+    # '.' stops at newlines, so an image token can only complete on its own line.
+    _partial_pat = prefix_pattern('!', r'\[', '.*')
 
     def __init__(self, url_map: Dict[str, str]):
         self.url_map = url_map
@@ -132,6 +161,9 @@ class ImagePlugin(BasePlugin):
 
         return (m.end(), '')
 
+    def is_partial(self, src: str, pos: int) -> bool:
+        return self._partial_pat.match(src, pos) is not None
+
     def last_incomplete_pos(self, buf: str) -> int | None:
         """
         More precise detection of whether an image token is unclosed:
@@ -174,10 +206,15 @@ class MarkdownImageHoldPlugin(BasePlugin):
     """Keep unclosed ``![alt](url)`` tokens in the scanner buffer across chunks."""
 
     prefix_set = {'!'}
+    # Shape of the markdown image regex used downstream by rewrite_markdown_image_urls.
+    _partial_pat = prefix_pattern('!', r'\[', r'[^\]]*', r'\]', r'\(', r'[^)]*')
 
     def match(self, src: str, pos: int):
         return None
 
+    def is_partial(self, src: str, pos: int) -> bool:
+        return self._partial_pat.match(src, pos) is not None
+
     def last_incomplete_pos(self, buf: str) -> int | None:
         return markdown_image_incomplete_pos(buf)
 
@@ -186,82 +223,87 @@ class MarkdownImageHoldPlugin(BasePlugin):
 # IncrementalScanner
 # ============================================================
 class IncrementalScanner:
-    """BODY / THINK state streaming parser."""
+    """BODY / THINK state streaming parser.
+
+    Only characters listed in the trigger table (plugin ``prefix_set`` plus
+    ``<`` for think tags) are inspected; plain text between them is skipped
+    with a single regex search.  ``buf`` keeps just the unresolved suffix,
+    starting at the first token that could still complete, so every character
+    is scanned a bounded number of times regardless of the answer length.
+    """
 
     def __init__(self, plugins: List[BasePlugin], initial_state: str = 'BODY'):
         self.plugins = plugins
         self.state = initial_state
         self.buf = ''
-
-    # ---------------- helpers ----------------
-    @staticmethod
-    def _partial_tag_start(buf: str, tag: str) -> int | None:
-        """If the buffer ends with an incomplete prefix of `tag`, return the start index of that prefix in the buffer.
-        E.g. buf="<thi" & tag="`think`" -> return len(buf)-4.
-        Returns None for a complete match or no prefix.
-        """
-        n = len(tag)
-        # Only consider strict "tail is a proper prefix of tag"; complete match does not count
-        for k in range(n - 1, 0, -1):
-            if buf.endswith(tag[:k]):
-                return len(buf) - k
-        return None
+        triggers: Dict[str, List[BasePlugin]] = {'<': []}
+        for pl in plugins:
+            for ch in pl.prefix_set:
+                if len(ch) == 1:
+                    triggers.setdefault(ch, []).append(pl)
+        self._triggers = triggers
+        self._trigger_re = re.compile('[' + ''.join(re.escape(ch) for ch in sorted(triggers)) + ']')
+        # Plugins without is_partial() keep the whole-buffer last_incomplete_pos() hold.
+        self._legacy_plugins = [pl for pl in plugins if type(pl).is_partial is BasePlugin.is_partial]
 
     # ---------------- public ----------------
     def feed(self, chunk: str) -> List[Tuple[str, str]]:
-        self.buf += chunk
+        buf = self.buf + chunk
         out: List[Tuple[str, str]] = []
         i = seg_start = 0
+        hold = len(buf)
+
+        while True:
+            m = self._trigger_re.search(buf, i)
+            if m is None:
+                break
+            i = m.start()
 
-        while i < len(self.buf):
             # ---- think toggle ----
-            if self.state == 'BODY' and self.buf.startswith(_THINK_OPEN, i):
-                if i > seg_start:
-                    out.append(('text', self.buf[seg_start:i]))
-                i += len(_THINK_OPEN)
-                seg_start = i
-                self.state = 'THINK'
-                continue
-            if self.state == 'THINK' and self.buf.startswith(_THINK_CLOSE, i):
-                if i > seg_start:
-                    out.append(('think', self.buf[seg_start:i]))
-                i += len(_THINK_CLOSE)
-                seg_start = i
-                self.state = 'BODY'
-                continue
+            if buf[i] == '<':
+                tag = _THINK_OPEN if self.state == 'BODY' else _THINK_CLOSE
+                if buf.startswith(tag, i):
+                    if i > seg_start:
+                        out.append((self._field(), buf[seg_start:i]))
+                    i += len(tag)
+                    seg_start = i
+                    self.state = 'THINK' if self.state == 'BODY' else 'BODY'
+                    continue
+                # A tail that may still grow into either tag is held, as before.
+                if len(buf) - i < len(_THINK_CLOSE) and any(
+                    len(buf) - i < len(t) and t.startswith(buf[i:]) for t in (_THINK_OPEN, _THINK_CLOSE)
+                ):
+                    hold = i
+                    break
 
             # ---- plugin match attempt ----
-            handled = False
-            for pl in self.plugins:
-                if self.buf[i] not in pl.prefix_set:
-                    continue
-                res = pl.match(self.buf, i)
+            handled = partial = False
+            for pl in self._triggers[buf[i]]:
+                res = pl.match(buf, i)
                 if res:
                     end, replacement = res
                     if i > seg_start:
-                        out.append((self._field(), self.buf[seg_start:i]))
+                        out.append((self._field(), buf[seg_start:i]))
                     out.append((self._field(), replacement))
                     i, seg_start, handled = end, end, True
                     break
-            if not handled:
-                i += 1
-
-        # ---- safe zone cutoff ----
-        cut = len(self.buf)
-        # 1) unclosed token reported by plugin
-        for pl in self.plugins:
-            pos = pl.last_incomplete_pos(self.buf)
-            if pos is not None and pos >= seg_start and pos < cut:
-                cut = pos
-        # 2) incomplete prefix of THINK tag (`think` / `/think`)
-        for tag in (_THINK_OPEN, _THINK_CLOSE):
-            pos = self._partial_tag_start(self.buf, tag)
-            if pos is not None and pos >= seg_start and pos < cut:
-                cut = pos
-
-        if cut > seg_start:
-            out.append((self._field(), self.buf[seg_start:cut]))
-        self.buf = self.buf[cut:]
+                partial = partial or bool(pl.is_partial(buf, i))
+            if handled:
+                continue
+            if partial:
+                hold = i
+                break
+            i += 1
+
+        # ---- legacy plugins: unclosed token reported over the whole buffer ----
+        for pl in self._legacy_plugins:
+            pos = pl.last_incomplete_pos(buf)
+            if pos is not None and seg_start <= pos < hold:
+                hold = pos
+
+        if hold > seg_start:
+            out.append((self._field(), buf[seg_start:hold]))
+        self.buf = buf[hold:]
         return [p for p in out if p[1]]
 
     def flush(self) -> List[Tuple[str, str]]:
@@ -0,0 +1,101 @@
+"""Token length estimates for budgeting retrieved context.
+
+``len(text) // 4`` matches English prose reasonably well but undercounts CJK text
+by a factor of three to four (one Han character is roughly one token), so
+Chinese contexts packed under a ``max_tokens`` budget overshoot it.
+``TokenEstimator`` counts with a real tokenizer when one is configured and
+otherwise with ``heuristic_token_len``, which counts CJK characters one token
+each.  Results are memoised per text, because the same nodes are measured again
+by adaptive-k, context expansion and the prompt builder.
+
+Usage:
+    estimate = get_token_estimator()
+    tokens = estimate(node)          # or estimate('plain text')
+"""
+from __future__ import annotations
+
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+from lazyllm import LOG
+
+from config import config as _cfg
+
+TokenCounter = Callable[[str], int]
+
+# Han, kana, hangul and full-width forms: about one token per character in common BPE vocabularies.
+_CJK = re.compile(r'[\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]')
+_CACHE_SIZE = 16384
+_CACHE_MAX_CHARS = 16384
+
+
+def heuristic_token_len(text: str) -> int:
+    """Plain ASCII counts four characters per token.
+
+    In text with non-ASCII content, CJK characters count one token each, other non-ASCII
+    characters two per token, and the ASCII runs between them (short words, numbers,
+    identifiers) three characters per token.
+    """
+    if text.isascii():
+        return len(text) // 4
+    non_ascii = len(text) - len(text.encode('ascii', 'ignore'))
+    cjk = len(_CJK.findall(text))
+    return cjk + (non_ascii - cjk) // 2 + (len(text) - non_ascii) // 3
+
+
+def tiktoken_counter(encoding_name: str) -> TokenCounter:
+    """Counter backed by a tiktoken encoding, e.g. ``cl100k_base``."""
+    from lazyllm.thirdparty import tiktoken
+    encoding = tiktoken.get_encoding(encoding_name)
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+class TokenEstimator:
+    """Memoised token counter for nodes and strings.
+
+    Args:
+        counter: ``text -> token count``; defaults to ``heuristic_token_len``.
+        cache_size: Distinct texts whose counts are kept (LRU).
+    """
+
+    def __init__(self, counter: Optional[TokenCounter] = None, cache_size: int = _CACHE_SIZE):
+        self._counter = counter or heuristic_token_len
+        self._cached = lru_cache(maxsize=cache_size)(self._counter)
+
+    def count(self, text: str) -> int:
+        # Very long texts are rare and would pin a lot of memory, so they bypass the cache.
+        counter = self._counter if len(text) > _CACHE_MAX_CHARS else self._cached
+        return max(1, int(counter(text)))
+
+    def __call__(self, item: Any) -> int:
+        text = item if isinstance(item, str) else getattr(item, 'text', '')
+        return self.count(text or '')
+
+
+_estimator: Optional[TokenEstimator] = None
+_estimator_lock = threading.Lock()
+
+
+def get_token_estimator() -> TokenEstimator:
+    """Process-wide estimator; ``chat_tokenizer`` selects a tiktoken encoding, empty means the heuristic."""
+    global _estimator
+    with _estimator_lock:
+        if _estimator is None:
+            name = _cfg['chat_tokenizer']
+            counter = None
+            if name:
+                try:
+                    counter = tiktoken_counter(name)
+                except Exception as exc:
+                    LOG.warning(f'[TokenEstimator] tokenizer {name!r} unavailable, using the heuristic: {exc}')
+            _estimator = TokenEstimator(counter)
+        return _estimator
+
+
+def reset_token_estimator() -> None:
+    """Drop the process-wide estimator (for testing only)."""
+    global _estimator
+    with _estimator_lock:
+        _estimator = None
@@ -9,8 +9,18 @@ config = Config(prefix='LAZYMIND', home='~/.lazyllm_rag')
 # ---------------------------------------------------------------------------
 config.add('mount_base_dir', str, '/data', 'MOUNT_BASE_DIR', description='Base directory for mounted files.')
 config.add('sensitive_words_path', str, 'data/sensitive_words.txt', 'SENSITIVE_WORDS_PATH', description='Path to sensitive words file.')
+config.add('sensitive_stream_action', str, 'mask', 'SENSITIVE_STREAM_ACTION', description='Action on sensitive words in streamed output: mask, truncate, abort or off.')
 config.add('llm_priority', int, 0, 'LLM_PRIORITY', description='LLM priority level.')
 config.add('max_concurrency', int, 10, 'MAX_CONCURRENCY', description='Max concurrent requests.')
+config.add('chat_user_max_concurrency', int, 4, 'CHAT_USER_MAX_CONCURRENCY', description='Max concurrent chat requests per user (0 = no cap).')
+config.add('chat_dataset_max_concurrency', int, 0, 'CHAT_DATASET_MAX_CONCURRENCY', description='Max concurrent chat requests per dataset (0 = no cap).')
+config.add('chat_queue_timeout', str, '30.0', 'CHAT_QUEUE_TIMEOUT', description='Seconds a chat request may wait for admission before 503 (float as str).')
+config.add('chat_max_queue_depth', int, 256, 'CHAT_MAX_QUEUE_DEPTH', description='Max queued chat requests before new ones get 503 (0 = no cap).')
+config.add('chat_user_max_queued', int, 16, 'CHAT_USER_MAX_QUEUED', description='Max queued chat requests per user before new ones get 429 (0 = no cap).')
+config.add('chat_tenant_weights', str, '', 'CHAT_TENANT_WEIGHTS', description='Fair-share weights per user, e.g. "user_a:2,user_b:0.5".')
+config.add('chat_stream_log_max_bytes', int, 8192, 'CHAT_STREAM_LOG_MAX_BYTES', description='Head+tail bytes of a streamed response kept for the finish log (0 = all).')
+config.add('chat_stream_log_sample_rate', str, '1.0', 'CHAT_STREAM_LOG_SAMPLE_RATE', description='Share of streamed responses whose text is logged; others log only hash and size (float as str).')
+config.add('chat_stream_log_async', bool, True, 'CHAT_STREAM_LOG_ASYNC', description='Write stream finish logs from a background thread.')
 config.add('rag_mode', bool, True, 'RAG_MODE', description='Enable RAG mode.')
 config.add('multimodal_mode', bool, True, 'MULTIMODAL_MODE', description='Enable multimodal mode.')
 config.add('shared_upload_dir', str, '/var/lib/lazymind/uploads', 'SHARED_UPLOAD_DIR', description='Shared upload dir for normalized images and frames.')
@@ -25,6 +35,8 @@ config.add('algo_dataset_name', str, 'general_algo', 'ALGO_DATASET_NAME', descri
 config.add('default_chat_dataset', str, 'algo', 'DEFAULT_CHAT_DATASET', description='Default chat dataset.')
 config.add('skip_startup_pipeline', bool, False, 'SKIP_STARTUP_PIPELINE', description='Skip startup pipeline initialization.')
 config.add('model_config_path', str, 'dynamic', 'MODEL_CONFIG_PATH', description='Runtime model config path (inner/online/dynamic or file path).')
+config.add('reranker_pool_size', int, 8, 'RERANKER_POOL_SIZE', description='Max reranker instances kept in the process-wide pool (LRU).')
+config.add('reranker_pool_max_concurrency', int, 4, 'RERANKER_POOL_MAX_CONCURRENCY', description='Max concurrent calls per pooled reranker instance.')
 
 # ---------------------------------------------------------------------------
 # Tracing / observability
@@ -42,6 +54,7 @@ config.add('skill_fs_url', str, 'remote://skills', 'SKILL_FS_URL', description='
 config.add('opensearch_uri', str, None, 'OPENSEARCH_URI', description='OpenSearch/Elasticsearch URI.')
 config.add('opensearch_user', str, 'admin', 'OPENSEARCH_USER', description='OpenSearch username.')
 config.add('opensearch_password', str, '', 'OPENSEARCH_PASSWORD', description='OpenSearch password.')
+config.add('opensearch_pool_maxsize', int, 10, 'OPENSEARCH_POOL_MAXSIZE', description='Max keep-alive connections per OpenSearch endpoint for chat tools.')
 config.add('web_search_timeout', int, 10, 'WEB_SEARCH_TIMEOUT', description='Web search request timeout in seconds.')
 config.add('web_search_auto_sources', str, 'bocha,google,bing,wikipedia', 'WEB_SEARCH_AUTO_SOURCES', description='Comma-separated list of auto web search sources.')
 config.add('web_search_wikipedia_base_url', str, 'https://zh.wikipedia.org', 'WEB_SEARCH_WIKIPEDIA_BASE_URL', description='Wikipedia base URL for web search.')
@@ -52,7 +65,20 @@ config.add('web_search_bing_endpoint', str, '', 'WEB_SEARCH_BING_ENDPOINT', desc
 config.add('web_search_bocha_api_key', str, '', 'WEB_SEARCH_BOCHA_API_KEY', description='Bocha search API key.')
 config.add('web_search_bocha_base_url', str, 'https://api.bochaai.com', 'WEB_SEARCH_BOCHA_BASE_URL', description='Bocha search base URL.')
 config.add('arxiv_search_timeout', int, 15, 'ARXIV_SEARCH_TIMEOUT', description='Arxiv search timeout in seconds.')
+config.add('kb_search_ppl_cache_size', int, 16, 'KB_SEARCH_PPL_CACHE_SIZE', description='Max compiled search pipelines cached for the kb_search tool (LRU).')
+config.add('search_cache', bool, False, 'SEARCH_CACHE', description='Cache search pipeline results (exact + embedding-similarity levels).')
+config.add('search_cache_ttl', int, 300, 'SEARCH_CACHE_TTL', description='Seconds a cached search result stays valid (0 = until evicted or invalidated).')
+config.add('search_cache_max_entries', int, 4096, 'SEARCH_CACHE_MAX_ENTRIES', description='Max cached search results (LRU).')
+config.add('search_cache_similarity', str, '0.95', 'SEARCH_CACHE_SIMILARITY', description='Min cosine similarity for a semantic cache hit; 0 disables the semantic level (float as str).')
+config.add('search_cache_embed_key', str, '', 'SEARCH_CACHE_EMBED_KEY', description='Embed role used by the semantic cache level (default: first dense text embed role).')
+config.add('search_cache_path', str, None, 'SEARCH_CACHE_PATH', description='Optional file the search cache is persisted to and reloaded from.')
+config.add('chat_tokenizer', str, '', 'CHAT_TOKENIZER', description='tiktoken encoding used to budget retrieved context, e.g. cl100k_base (empty = CJK-aware heuristic).')
+config.add('search_streaming_fusion', bool, False, 'SEARCH_STREAMING_FUSION', description='Fuse KB retriever results as they arrive and stop once the top-k is settled.')
+config.add('search_retriever_deadline', str, '0', 'SEARCH_RETRIEVER_DEADLINE', description='Seconds each KB retriever may take under streaming fusion before it is dropped (0 = wait; float as str).')
+config.add('search_speculative', bool, False, 'SEARCH_SPECULATIVE', description='Search the raw query while the multi-turn rewrite runs and reuse the result when the rewrite keeps the question.')
+config.add('search_speculative_workers', int, 8, 'SEARCH_SPECULATIVE_WORKERS', description='Concurrent speculative searches; turns beyond twice this many in flight search sequentially.')
 config.add('max_retries', int, 20, 'MAX_RETRIES', description='Max retries for agentic function call loop.')
+config.add('agentic_stream_channel', str, 'fsqueue', 'AGENTIC_STREAM_CHANNEL', description="Agentic stream transport: 'fsqueue' (poll FileSystemQueue, works for cross-process producers) or 'memory' (in-process push).")
 config.add('memory_review_interval', int, 1, 'MEMORY_REVIEW_INTERVAL', description='Memory review trigger interval (turns).')
 config.add('skill_review_interval', int, 5, 'SKILL_REVIEW_INTERVAL', description='Skill review trigger interval (turns).')
 config.add('review_max_retries', int, 5, 'REVIEW_MAX_RETRIES', description='Max retries for background review agent.')
@@ -77,6 +103,18 @@ config.add('startup_retry_interval', str, '2', 'STARTUP_RETRY_INTERVAL', descrip
 config.add('startup_timeout', str, '0', 'STARTUP_TIMEOUT', description='Startup wait timeout in seconds (0 = no timeout).')
 config.add('reset_algo_on_startup', bool, False, 'RESET_ALGO_ON_STARTUP', description='Drop all vector/segment data and algorithm registration on startup, then rebuild from scratch.')
 config.add('rag_image_path_prefix', str, '/mnt/lustre/share_data/mineru/images/', 'RAG_IMAGE_PATH_PREFIX', description='Image path prefix for RAG documents.')
+config.add('image_download_concurrency', int, 8, 'IMAGE_DOWNLOAD_CONCURRENCY', description='Max parallel image downloads (and pooled connections) when materialising parsed images.')
+config.add('image_cache_max_mb', int, 0, 'IMAGE_CACHE_MAX_MB', description='Evict least recently used images once the image cache exceeds this size in MB (0 = never; parsed nodes keep source_path pointing at cached files).')
+config.add('node_transform_cache', bool, False, 'NODE_TRANSFORM_CACHE', description='Reuse cached NodeParser transform results for unchanged documents and pages.')
+config.add('node_transform_cache_max_mb', int, 2048, 'NODE_TRANSFORM_CACHE_MAX_MB', description='Evict least recently used NodeParser transform cache entries once the cache exceeds this size in MB (0 = never).')
+config.add('node_transform_cache_dir', str, None, 'NODE_TRANSFORM_CACHE_DIR', description='NodeParser transform cache directory (defaults to <shared_upload_dir>/.transform_cache).')
+config.add('node_transform_workers', int, 0, 'NODE_TRANSFORM_WORKERS', description='NodeParser per-file mode: 0 transforms a batch as a whole, 1 per file in-process, >1 per file on a process pool.')
+config.add('ocr_page_window', int, 0, 'OCR_PAGE_WINDOW', description='Parse PDFs on the OCR service in windows of this many pages, concurrently and resumably (0 = whole file per request).')
+config.add('ocr_window_concurrency', int, 4, 'OCR_WINDOW_CONCURRENCY', description='Max page windows of one PDF parsed at the same time.')
+config.add('ocr_window_timeout', int, 600, 'OCR_WINDOW_TIMEOUT', description='Per-window OCR request timeout in seconds when ocr_page_window is set.')
+config.add('embed_batch_window_ms', str, '0', 'EMBED_BATCH_WINDOW_MS', description='Coalesce concurrent query embeddings within this many milliseconds into one batch request per model (0 = off; float as str).')
+config.add('embed_batch_max_size', int, 64, 'EMBED_BATCH_MAX_SIZE', description='Max texts per coalesced query-embedding request.')
+config.add('embed_query_cache_size', int, 1024, 'EMBED_QUERY_CACHE_SIZE', description='Recent query vectors kept per embedding model when embed batching is on (0 = no cache).')
 config.add('ocr_patch_applied', bool, False, 'OCR_PATCH_APPLIED', description='Whether the OCR service patch has been applied.')
 config.add('ocr_service_variant', str, 'online', 'OCR_SERVICE_VARIANT', description='OCR service variant (online/offline).')
 
@@ -106,6 +144,16 @@ config.add('word_group_apply_url', str, None, 'WORD_GROUP_APPLY_URL', descriptio
 config.add('core_service_url', str, None, 'CORE_SERVICE_URL', description='Core service base URL.')
 # ACL_DB_DSN: now requires LAZYMIND_ACL_DB_DSN prefix.
 config.add('acl_db_dsn', str, None, 'ACL_DB_DSN', description='ACL database DSN (PostgreSQL connection string).')
+config.add('vocab_registry_max_users', int, 4096, 'VOCAB_REGISTRY_MAX_USERS', description='Max per-user vocab managers kept in memory (0 = unbounded).')
+config.add('vocab_registry_max_mb', int, 512, 'VOCAB_REGISTRY_MAX_MB', description='Approximate memory cap for loaded vocab automata in MB (0 = unbounded).')
+config.add('vocab_overlay_compact_ratio', str, '0.1', 'VOCAB_OVERLAY_COMPACT_RATIO', description='Compact the vocab delta overlay once it exceeds this share of the base vocabulary.')
+config.add('vocab_overlay_compact_min', int, 1024, 'VOCAB_OVERLAY_COMPACT_MIN', description='Minimum vocab delta overlay size (words) before compaction.')
+config.add('vocab_history_page_size', int, 500, 'VOCAB_HISTORY_PAGE_SIZE', description='Rows per keyset page when streaming chat histories for vocab evolution.')
+config.add('vocab_history_prefetch_chunks', int, 8, 'VOCAB_HISTORY_PREFETCH_CHUNKS', description='Max history chunks read ahead of synonym extraction per user.')
+config.add('vocab_evolution_checkpoint_path', str, None, 'VOCAB_EVOLUTION_CHECKPOINT_PATH', description='JSON file storing per-user history watermarks for vocab evolution (unset = no checkpoint).')
+config.add('vocab_evolution_user_concurrency', int, 4, 'VOCAB_EVOLUTION_USER_CONCURRENCY', description='Users processed concurrently by a vocab evolution run.')
+config.add('vocab_evolution_llm_concurrency', int, 8, 'VOCAB_EVOLUTION_LLM_CONCURRENCY', description='Max in-flight LLM calls across all users of a vocab evolution run.')
+config.add('vocab_extraction_max_prompt_tokens', int, 8000, 'VOCAB_EXTRACTION_MAX_PROMPT_TOKENS', description='Estimated token budget for packing history chunks into one extraction prompt (0 = one chunk per prompt).')
 
 # ---------------------------------------------------------------------------
 # Evo
@@ -14,7 +14,8 @@ from chat.utils.load_config import (
     get_text_embed_keys,
 )
 from config import config as _cfg
-from parsing.readers import ImageEmbReader, VideoReader
+from parsing.embed_batcher import with_embed_batching
+from parsing.readers import ImageEmbReader, PageWindowMineruPDFReader, PageWindowPaddleOCRPDFReader, VideoReader
 from parsing.transform import GeneralParser, LineSplitter, NodeParser
 
 ALGO_ID = 'general_algo'
@@ -77,6 +78,14 @@ def _build_store_config(index_kwargs):
     }
 
 
+def _page_window_kwargs() -> dict:
+    return {
+        'window_pages': _cfg['ocr_page_window'],
+        'max_concurrency': _cfg['ocr_window_concurrency'],
+        'timeout': _cfg['ocr_window_timeout'],
+    }
+
+
 def _build_pdf_reader():
     ocr_type = _cfg['ocr_server_type']
     ocr_url = _cfg['ocr_server_url'].rstrip('/')
@@ -88,7 +97,7 @@ def _build_pdf_reader():
         upload_mode = _parse_bool_config(_cfg['mineru_upload_mode'])
         if upload_mode is None:
             upload_mode = _default_mineru_upload_mode(ocr_url)
-        return MineruPDFReader(
+        kwargs = dict(
             url=ocr_url,
             backend=_cfg['mineru_backend'],
             upload_mode=upload_mode,
@@ -98,12 +107,18 @@ def _build_pdf_reader():
             service_variant=service_variant,
             image_cache_dir='/app/uploads/.image_cache'
         )
+        if _cfg['ocr_page_window'] > 0:
+            return PageWindowMineruPDFReader(**{**kwargs, **_page_window_kwargs()})
+        return MineruPDFReader(**kwargs)
     if ocr_type == 'paddleocr':
-        return PaddleOCRPDFReader(
+        kwargs = dict(
             url=ocr_url,
             service_variant=service_variant,
             images_dir='/app/uploads/.image_cache'
         )
+        if _cfg['ocr_page_window'] > 0:
+            return PageWindowPaddleOCRPDFReader(**kwargs, **_page_window_kwargs())
+        return PaddleOCRPDFReader(**kwargs)
     raise ValueError(f'Unsupported OCR server type: {ocr_type!r}')
 
 
@@ -214,7 +229,10 @@ def build_document() -> Document:
     # non-existent file path and return an empty map, so the embed model falls back to
     # an unconfigured OnlineModule instead of the Qwen/BGE model in the yaml.
     resolved_config_path = get_config_path()
+    image_embed_key = get_image_embed_key()
+    # Every retrieval embeds its query once per text key; coalesce those calls (images keep their own path).
     embed = {k: AutoModel(model=k, config=resolved_config_path) for k in embed_keys}
+    embed = {k: e if k == image_embed_key else with_embed_batching(e) for k, e in embed.items()}
 
     # Current LazyLLM expects store_conf on DocumentProcessor when using DocumentProcessor,
     # while Document receives only the remote processor manager.
@@ -246,7 +264,6 @@ def build_document() -> Document:
                            group_type=NodeGroupType.CHUNK, transform=LineSplitter, parent='block')
 
     text_embed_keys = get_text_embed_keys() or embed_keys
-    image_embed_key = get_image_embed_key()
     if image_embed_key:
         docs.activate_group('image', embed_keys=image_embed_key)
     docs.activate_group('block', embed_keys=text_embed_keys)
@@ -0,0 +1,194 @@
+"""Micro-batching of query embeddings on the document server.
+
+``build_document`` creates one embedding model per embed key, and every retrieval
+embeds its query once per key with its own request.  Under concurrent traffic most of
+the embedding service's time goes to per-request overhead rather than to the texts.
+``EmbeddingBatcher`` wraps a model and coalesces single-text calls:
+
+* the first call opens a batch and waits ``window`` seconds (or until ``max_batch``
+  texts have joined), then sends all collected texts as one list request and fans
+  the vectors back out to the waiting callers;
+* identical texts in the same batch are embedded once;
+* a small LRU keeps recently embedded query vectors, so repeated queries skip the
+  service entirely.
+
+List inputs (ingestion already batches by node) and calls with extra arguments such as
+``modality`` are passed straight through.  If a batch request fails, its texts are
+retried one by one so that a single bad text only fails its own caller.
+
+The batcher is a ``ModuleBase`` holding the model as a submodule, so ``Document`` still
+registers and starts a locally deployed embedding model behind it.
+
+Usage:
+    embed = with_embed_batching(AutoModel(model='embed_main', config=config_path))
+    vector = embed('what is the refund policy')
+"""
+from __future__ import annotations
+
+import ast
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Optional
+
+from lazyllm import LOG, ModuleBase
+
+from config import config as _cfg
+
+
+@dataclass
+class EmbedBatchStats:
+    requests: int = 0
+    cache_hits: int = 0
+    coalesced: int = 0
+    batches: int = 0
+    texts_embedded: int = 0
+
+    @property
+    def mean_batch(self) -> float:
+        return self.texts_embedded / self.batches if self.batches else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), 'mean_batch': round(self.mean_batch, 2)}
+
+
+class _Batch:
+    __slots__ = ('futures', 'full')
+
+    def __init__(self):
+        self.futures: Dict[str, Future] = {}
+        self.full = threading.Event()
+
+
+def _copy(vector: Any) -> Any:
+    # Callers own what they get back; the cached vector must not be shared.
+    if isinstance(vector, list):
+        return list(vector)
+    if isinstance(vector, dict):
+        return dict(vector)
+    return vector
+
+
+def _normalize_batch(vectors: Any) -> Any:
+    # Models may return the batch serialized; decode it the way lazyllm's embed wrapper does.
+    if isinstance(vectors, (bytes, bytearray, memoryview)):
+        vectors = bytes(vectors).decode('utf-8', 'ignore')
+    if isinstance(vectors, str):
+        try:
+            vectors = json.loads(vectors)
+        except json.JSONDecodeError:
+            vectors = ast.literal_eval(vectors)
+    if not isinstance(vectors, list):
+        raise TypeError(f'unexpected batch embedding type: {type(vectors)}')
+    return vectors
+
+
+class EmbeddingBatcher(ModuleBase):
+    """Coalesce concurrent single-text calls to ``embed`` into batched list calls.
+
+    Args:
+        embed: Embedding callable accepting a string or a list of strings.
+        window: Seconds a batch stays open for more texts.
+        max_batch: Texts per batch request; a full batch is sent immediately.
+        cache_size: Recent query vectors kept (LRU); ``0`` disables the cache.
+    """
+
+    def __init__(self, embed: Callable[..., Any], window: float = 0.003, max_batch: int = 64,
+                 cache_size: int = 1024):
+        super().__init__()
+        self.embed = embed
+        self.window = window
+        self.max_batch = max(1, max_batch)
+        self.cache_size = cache_size
+        self.stats = EmbedBatchStats()
+        self._lock = threading.Lock()
+        self._batch: Optional[_Batch] = None
+        self._cache: 'OrderedDict[str, Any]' = OrderedDict()
+
+    def __getattr__(self, name: str) -> Any:
+        # Expose the model's attributes (e.g. ``batch_size``, which ingestion checks).
+        if name != 'embed' and 'embed' in self.__dict__:
+            try:
+                return getattr(self.embed, name)
+            except AttributeError:
+                pass
+        return super().__getattr__(name)
+
+    def __reduce__(self):
+        return (EmbeddingBatcher, (self.embed, self.window, self.max_batch, self.cache_size))
+
+    def __call__(self, input: Any, **kwargs) -> Any:
+        # Bypass ModuleBase's call hooks: the wrapper stays transparent (the model's own errors, no added overhead).
+        return self.forward(input, **kwargs)
+
+    def forward(self, input: Any, **kwargs) -> Any:
+        if kwargs or not isinstance(input, str):
+            return self.embed(input, **kwargs)
+        leader = None
+        with self._lock:
+            self.stats.requests += 1
+            if input in self._cache:
+                self._cache.move_to_end(input)
+                self.stats.cache_hits += 1
+                return _copy(self._cache[input])
+            batch = self._batch
+            if batch is None:
+                batch = leader = self._batch = _Batch()
+            future = batch.futures.get(input)
+            if future is None:
+                future = batch.futures[input] = Future()
+                if len(batch.futures) >= self.max_batch:
+                    self._batch = None
+                    batch.full.set()
+            else:
+                self.stats.coalesced += 1
+        if leader is not None:
+            leader.full.wait(self.window)
+            with self._lock:
+                if self._batch is leader:
+                    self._batch = None
+            self._flush(leader.futures)
+        return _copy(future.result())
+
+    def _flush(self, futures: Dict[str, Future]) -> None:
+        texts = list(futures)
+        try:
+            vectors = _normalize_batch(self.embed(texts)) if len(texts) > 1 else [self.embed(texts[0])]
+            if len(vectors) != len(texts):
+                raise ValueError(f'batch size mismatch: {len(texts)} texts, {len(vectors)} vectors')
+        except Exception as exc:
+            if len(texts) == 1:
+                futures[texts[0]].set_exception(exc)
+                return
+            LOG.warning(f'[EmbeddingBatcher] batch of {len(texts)} failed, embedding one by one: {exc}')
+            vectors = []
+            for text in texts:
+                try:
+                    vectors.append(self.embed(text))
+                except Exception as item_exc:
+                    vectors.append(item_exc)
+        with self._lock:
+            self.stats.batches += 1
+            self.stats.texts_embedded += len(texts)
+            for text, vector in zip(texts, vectors):
+                if not isinstance(vector, Exception) and self.cache_size > 0:
+                    self._cache[text] = vector
+                    self._cache.move_to_end(text)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        for text, vector in zip(texts, vectors):
+            if isinstance(vector, Exception):
+                futures[text].set_exception(vector)
+            else:
+                futures[text].set_result(vector)
+
+
+def with_embed_batching(embed: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap ``embed`` in an ``EmbeddingBatcher`` when ``embed_batch_window_ms`` is set, else return it unchanged."""
+    window_ms = float(_cfg['embed_batch_window_ms'])
+    if window_ms <= 0:
+        return embed
+    return EmbeddingBatcher(embed, window=window_ms / 1000, max_batch=_cfg['embed_batch_max_size'],
+                            cache_size=_cfg['embed_query_cache_size'])
@@ -0,0 +1,268 @@
+"""Concurrent, deduplicated image downloads backed by an indexed on-disk cache.
+
+``ImageConverterNode`` used to fetch every referenced image serially with a fresh
+``requests.get``.  ``ImageMaterializer`` instead:
+
+* downloads on a bounded thread pool over one pooled keep-alive session;
+* shares one in-flight download between all callers asking for the same URL;
+* keeps an index file (``.image_index.json``) keyed by the sha256 of the URL, so a
+  cache hit is a dict lookup instead of a filesystem probe;
+* evicts least recently used files once the cache grows past ``max_bytes``.
+
+Files keep the layout ``ImageConverterNode`` already used (relative OCR paths under
+their own name, absolute URLs under ``sha256(url) + suffix``), so existing caches and
+node metadata stay valid; files present on disk but missing from the index are adopted
+on first use.
+
+Usage:
+    materializer = get_image_materializer(image_root)
+    futures = [materializer.submit(url, local_path) for url, local_path in targets]
+    paths = [f.result() for f in futures]
+    materializer.flush()    # persist the index and apply size-based eviction
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from lazyllm import LOG, ThreadPoolExecutor
+
+from config import config as _cfg
+
+_INDEX_FILE = '.image_index.json'
+_DEFAULT_TIMEOUT = 30
+
+
+def _default_file_mode() -> int:
+    # mkstemp creates 0600 files; cached images get the mode open() would give them.
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+_FILE_MODE = _default_file_mode()
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+class ImageMaterializer:
+    """Thread-safe download cache for one image root.
+
+    Args:
+        root: Directory holding cached images and the index file.
+        max_concurrency: Max parallel downloads (and pooled connections per host).
+        max_bytes: Cache size that triggers LRU eviction on ``flush``; 0 disables eviction.
+        timeout: Per-request timeout in seconds.
+    """
+
+    def __init__(self, root: str, max_concurrency: int = 8, max_bytes: int = 0,
+                 timeout: float = _DEFAULT_TIMEOUT, session: Optional[requests.Session] = None):
+        self._root = os.path.abspath(root)
+        self._index_path = os.path.join(self._root, _INDEX_FILE)
+        self._max_bytes = max(0, int(max_bytes))
+        self._timeout = timeout
+        max_concurrency = max(1, int(max_concurrency))
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=max_concurrency, pool_maxsize=max_concurrency)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        self._session = session
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='image-download')
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._index: Dict[str, Dict[str, Any]] = {}
+        self._total_bytes = 0
+        self._dirty = False
+        os.makedirs(self._root, exist_ok=True)
+        self._load_index()
+
+    @property
+    def root(self) -> str:
+        return self._root
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _load_index(self) -> None:
+        try:
+            with open(self._index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exc:
+            LOG.warning(f'[ImageCache] ignoring unreadable index {self._index_path}: {exc}')
+            return
+        entries = data.get('entries') if isinstance(data, dict) else None
+        if isinstance(entries, dict):
+            self._index = {k: v for k, v in entries.items() if isinstance(v, dict) and v.get('path')}
+            self._total_bytes = sum(int(v.get('size') or 0) for v in self._index.values())
+
+    def _lookup(self, key: str, local_path: str) -> Optional[str]:
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is not None and entry['path'] == local_path:
+                entry['atime'] = time.time()
+                return local_path
+        return None
+
+    def _record(self, key: str, url: str, local_path: str, size: int) -> None:
+        with self._lock:
+            previous = self._index.get(key)
+            if previous is not None:
+                self._total_bytes -= int(previous.get('size') or 0)
+            self._index[key] = {'url': url, 'path': local_path, 'size': size, 'atime': time.time()}
+            self._total_bytes += size
+            self._dirty = True
+
+    def _download(self, key: str, url: str, local_path: str) -> str:
+        # Adopt files cached before the index existed; this probe only happens on an index miss.
+        size = _file_size(local_path)
+        if size <= 0:
+            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+            response = self._session.get(url, timeout=self._timeout)
+            response.raise_for_status()
+            fd, tmp_path = tempfile.mkstemp(prefix='.image-', dir=os.path.dirname(local_path))
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(response.content)
+                os.chmod(tmp_path, _FILE_MODE)
+                os.replace(tmp_path, local_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+            size = len(response.content)
+        self._record(key, url, local_path, size)
+        return local_path
+
+    def _finish(self, key: str, future: Future) -> None:
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def submit(self, url: str, local_path: str) -> Future:
+        """Return a future resolving to ``local_path`` once ``url`` is cached there."""
+        local_path = os.path.abspath(local_path)
+        key = _url_key(url)
+        if self._lookup(key, local_path) is not None:
+            future: Future = Future()
+            future.set_result(local_path)
+            return future
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._pool.submit(self._download, key, url, local_path)
+                self._inflight[key] = future
+                future.add_done_callback(lambda f, key=key: self._finish(key, f))
+        return future
+
+    def fetch(self, url: str, local_path: str) -> str:
+        return self.submit(url, local_path).result()
+
+    def invalidate(self, url: str) -> None:
+        """Forget ``url`` (e.g. its file vanished) so the next request downloads it again."""
+        with self._lock:
+            entry = self._index.pop(_url_key(url), None)
+            if entry is not None:
+                self._total_bytes -= int(entry.get('size') or 0)
+                self._dirty = True
+
+    def _evict(self) -> int:
+        if not self._max_bytes or self._total_bytes <= self._max_bytes:
+            return 0
+        with self._lock:
+            busy = {key for key in self._inflight}
+            victims = sorted(
+                ((entry.get('atime') or 0, key) for key, entry in self._index.items() if key not in busy),
+            )
+            removed = []
+            for _, key in victims:
+                if self._total_bytes <= self._max_bytes:
+                    break
+                entry = self._index.pop(key)
+                self._total_bytes -= int(entry.get('size') or 0)
+                removed.append(entry['path'])
+            if removed:
+                self._dirty = True
+        for path in removed:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        if removed:
+            LOG.info(f'[ImageCache] evicted {len(removed)} images, cache now {self._total_bytes} bytes')
+        return len(removed)
+
+    def flush(self) -> None:
+        """Apply size-based eviction and persist the index if it changed."""
+        self._evict()
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = json.dumps({'entries': self._index}, ensure_ascii=False)
+            self._dirty = False
+        fd, tmp_path = tempfile.mkstemp(prefix='.image-index-', dir=self._root)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp_path, self._index_path)
+        except OSError as exc:
+            LOG.warning(f'[ImageCache] failed to write index {self._index_path}: {exc}')
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            with self._lock:
+                self._dirty = True
+
+    def close(self) -> None:
+        self.flush()
+        self._pool.shutdown(wait=True)
+        self._session.close()
+
+
+_materializers: Dict[str, ImageMaterializer] = {}
+_materializers_lock = threading.Lock()
+
+
+def get_image_materializer(root: str) -> ImageMaterializer:
+    """Process-wide materializer for ``root``, sized from config on first use."""
+    key = os.path.abspath(root)
+    with _materializers_lock:
+        materializer = _materializers.get(key)
+        if materializer is None:
+            materializer = ImageMaterializer(
+                key,
+                max_concurrency=_cfg['image_download_concurrency'],
+                max_bytes=_cfg['image_cache_max_mb'] * 1024 * 1024,
+            )
+            _materializers[key] = materializer
+        return materializer
+
+
+def reset_image_materializers() -> None:
+    with _materializers_lock:
+        materializers = list(_materializers.values())
+        _materializers.clear()
+    for materializer in materializers:
+        materializer.close()
@@ -1,7 +1,10 @@
 from parsing.readers.imageEmbReader import ImageEmbReader
+from parsing.readers.pageWindowReader import PageWindowMineruPDFReader, PageWindowPaddleOCRPDFReader
 from parsing.readers.videoReader import VideoReader
 
 __all__ = [
     'ImageEmbReader',
+    'PageWindowMineruPDFReader',
+    'PageWindowPaddleOCRPDFReader',
     'VideoReader',
 ]
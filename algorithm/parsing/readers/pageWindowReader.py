@@ -0,0 +1,267 @@
+"""OCR readers that parse a PDF as concurrent page windows and resume after failures.
+
+``MineruPDFReader`` / ``PaddleOCRPDFReader`` send a whole PDF to the OCR service in
+one request, so a huge PDF occupies a worker for as long as the service needs and a
+failure near the end discards everything.  The readers here instead:
+
+* split the PDF into windows of ``window_pages`` pages;
+* dispatch the windows concurrently (at most ``max_concurrency`` in flight), retrying
+  transient errors per window;
+* persist each finished window's raw service response, so a failed read resumes with
+  only the windows that are still missing;
+* stitch the responses back together with page indices rebased onto the original PDF.
+
+Window PDFs and results live in ``<pdf>.windows/`` next to the source (the offline
+MinerU service may read the window files by path) and are removed once the whole
+document has been read.  A manifest ties them to the file content and reader settings,
+so a replaced file or changed backend starts over.
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from lazyllm import LOG, ThreadPoolExecutor
+from lazyllm.common import retry_transient
+from lazyllm.thirdparty import pypdf
+from lazyllm.tools.rag import MineruPDFReader
+from lazyllm.tools.rag.readers import PaddleOCRPDFReader
+
+_MANIFEST = 'manifest.json'
+DEFAULT_WINDOW_PAGES = 20
+DEFAULT_WINDOW_CONCURRENCY = 4
+
+
+class PageWindow(NamedTuple):
+    start: int  # first page, 0-based, in the original PDF
+    end: int  # one past the last page
+    path: str
+
+    @property
+    def name(self) -> str:
+        return f'pages_{self.start}-{self.end}'
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    fd, tmp_path = tempfile.mkstemp(prefix='.window-', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class WindowProgress:
+    """Window PDFs and finished window results of one document.
+
+    Args:
+        pdf_path: Source PDF.
+        window_pages: Pages per window.
+        namespace: Reader settings the results depend on (service, backend, ...).
+    """
+
+    def __init__(self, pdf_path: str, window_pages: int, namespace: str = ''):
+        self._pdf_path = os.path.abspath(pdf_path)
+        self._window_pages = max(1, int(window_pages))
+        self._root = f'{self._pdf_path}.windows'
+        self._namespace = namespace
+        self._key = None
+
+    @property
+    def root(self) -> str:
+        return self._root
+
+    def _result_path(self, window: PageWindow) -> str:
+        return os.path.join(self._root, f'{window.name}.json')
+
+    def _manifest_matches(self) -> bool:
+        if self._key is None:
+            self._key = hashlib.sha256(
+                f'{_file_digest(self._pdf_path)}|{self._window_pages}|{self._namespace}'.encode('utf-8')).hexdigest()
+        try:
+            with open(os.path.join(self._root, _MANIFEST), 'r', encoding='utf-8') as f:
+                return json.load(f).get('key') == self._key
+        except (OSError, ValueError):
+            return False
+
+    def windows(self) -> List[PageWindow]:
+        """Split the PDF into windows, reusing the split (and results) of an earlier attempt."""
+        reader = pypdf.PdfReader(self._pdf_path)
+        total = len(reader.pages)
+        windows = []
+        for start in range(0, total, self._window_pages):
+            end = min(start + self._window_pages, total)
+            windows.append(PageWindow(start, end, os.path.join(self._root, f'pages_{start}-{end}.pdf')))
+        if len(windows) <= 1:
+            return [PageWindow(0, total, self._pdf_path)]
+        if self._manifest_matches() and all(os.path.exists(w.path) for w in windows):
+            return windows
+
+        self.clear()
+        os.makedirs(self._root, exist_ok=True)
+        for window in windows:
+            writer = pypdf.PdfWriter()
+            for index in range(window.start, window.end):
+                writer.add_page(reader.pages[index])
+            buf = io.BytesIO()
+            writer.write(buf)
+            _write_atomic(window.path, buf.getvalue())
+        _write_atomic(os.path.join(self._root, _MANIFEST),
+                      json.dumps({'key': self._key, 'source': self._pdf_path}).encode('utf-8'))
+        return windows
+
+    def load(self, window: PageWindow) -> Optional[str]:
+        try:
+            with open(self._result_path(window), 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def save(self, window: PageWindow, result: str) -> None:
+        _write_atomic(self._result_path(window), result.encode('utf-8'))
+
+    def clear(self) -> None:
+        shutil.rmtree(self._root, ignore_errors=True)
+
+
+class _PageWindowMixin:
+    """Shared window scheduling for the OCR readers below.
+
+    Subclasses call ``_read_windows`` with a function that OCRs one window file and
+    returns the raw response text, and a function that merges the per-window responses.
+    """
+
+    def _init_windows(self, window_pages: int, max_concurrency: int, max_retries: int, retry_delay: float):
+        self._window_pages = max(1, int(window_pages))
+        self._window_concurrency = max(1, int(max_concurrency))
+        self._window_retries = max(0, int(max_retries))
+        self._window_retry_delay = retry_delay
+
+    def _read_windows(self, file, fetch: Callable[[PageWindow], str],
+                      merge: Callable[[List[PageWindow], Dict[int, str]], str]) -> Optional[str]:
+        """Return the merged response, or ``None`` if the PDF fits in one window."""
+        progress = WindowProgress(str(file), self._window_pages, namespace=self.appendix_hash_key)
+        windows = progress.windows()
+        if len(windows) <= 1:
+            return None
+
+        results: Dict[int, str] = {}
+        pending = []
+        for window in windows:
+            saved = progress.load(window)
+            if saved is None:
+                pending.append(window)
+            else:
+                results[window.start] = saved
+        name = os.path.basename(str(file))
+        if results:
+            LOG.info(f'[PageWindowReader] {name}: resuming, {len(results)}/{len(windows)} windows already parsed')
+
+        def _fetch_one(window: PageWindow) -> str:
+            result = retry_transient(fetch, max_retries=self._window_retries, base_delay=self._window_retry_delay,
+                                     log_prefix=f'[PageWindowReader] {name} {window.name} ')(window)
+            progress.save(window, result)
+            return result
+
+        errors = []
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(len(pending), self._window_concurrency)) as executor:
+                futures = [(window, executor.submit(_fetch_one, window)) for window in pending]
+                for window, future in futures:
+                    try:
+                        results[window.start] = future.result()
+                    except Exception as exc:
+                        errors.append((window, exc))
+        if errors:
+            window, exc = errors[0]
+            LOG.warning(f'[PageWindowReader] {name}: {len(errors)}/{len(windows)} windows failed, '
+                        f'finished windows are kept for the next attempt')
+            raise RuntimeError(f'[PageWindowReader] {name}: failed to parse {window.name}: {exc}') from exc
+
+        merged = merge(windows, results)
+        progress.clear()
+        return merged
+
+
+class PageWindowMineruPDFReader(_PageWindowMixin, MineruPDFReader):
+    """``MineruPDFReader`` that parses large PDFs as concurrent page windows on a local MinerU service.
+
+    Args:
+        window_pages: Pages per window; PDFs with at most this many pages are read in one request.
+        max_concurrency: Max windows parsed at the same time.
+        max_retries: Retries per window on transient errors.
+        retry_delay: Base of the exponential backoff between retries, in seconds.
+        **kwargs: Passed to ``MineruPDFReader``; ``timeout`` now applies to each window.
+
+    Only the offline (local service) variant is windowed; the online API keeps its own splitting.
+    """
+
+    __lazyllm_registry_disable__ = True
+
+    def __init__(self, *args, window_pages: int = DEFAULT_WINDOW_PAGES,
+                 max_concurrency: int = DEFAULT_WINDOW_CONCURRENCY, max_retries: int = 3,
+                 retry_delay: float = 2.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._init_windows(window_pages, max_concurrency, max_retries, retry_delay)
+
+    def _fetch_sync(self, file: Path, use_cache: bool) -> str:
+        merged = self._read_windows(file, lambda window: super(PageWindowMineruPDFReader, self)._fetch_sync(
+            Path(window.path), use_cache), self._merge_windows)
+        return super()._fetch_sync(file, use_cache) if merged is None else merged
+
+    def _merge_windows(self, windows: List[PageWindow], results: Dict[int, str]) -> str:
+        content_list = []
+        for window in windows:
+            for item in self._offline_content_list(json.loads(results[window.start])):
+                if not isinstance(item, dict):
+                    continue
+                if item.get('page_idx') is not None:
+                    item['page_idx'] = int(item['page_idx']) + window.start
+                for line in item.get('lines') or []:
+                    if isinstance(line, dict) and line.get('page') is not None:
+                        line['page'] = int(line['page']) + window.start
+                content_list.append(item)
+        return json.dumps({'result': [{'content_list': content_list}]}, ensure_ascii=False)
+
+
+class PageWindowPaddleOCRPDFReader(_PageWindowMixin, PaddleOCRPDFReader):
+    """``PaddleOCRPDFReader`` that submits page windows concurrently and resumes failed reads.
+
+    Args: see ``PageWindowMineruPDFReader``.
+    """
+
+    __lazyllm_registry_disable__ = True
+
+    def __init__(self, *args, window_pages: int = DEFAULT_WINDOW_PAGES,
+                 max_concurrency: int = DEFAULT_WINDOW_CONCURRENCY, max_retries: int = 3,
+                 retry_delay: float = 2.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._init_windows(window_pages, max_concurrency, max_retries, retry_delay)
+
+    def _fetch_async(self, file):
+        merged = self._read_windows(file, lambda window: self._fetch_job(window.path)[0], self._merge_windows)
+        return super()._fetch_async(file) if merged is None else (merged, None)
+
+    def _merge_windows(self, windows: List[PageWindow], results: Dict[int, str]) -> str:
+        # Pages are positional in PaddleOCR results, so concatenating windows in order rebases them.
+        return self._merge_split_results({window.start: (results[window.start], None) for window in windows})[0]
+
+
+__all__ = ['PageWindowMineruPDFReader', 'PageWindowPaddleOCRPDFReader', 'WindowProgress']
@@ -1,4 +1,6 @@
 import copy
+import functools
+from bisect import bisect_left
 from dataclasses import dataclass
 from typing import Callable, List, Optional, Sequence, Tuple
 from pathlib import Path
@@ -61,6 +63,10 @@ CHUNKING_REGEX = r'[^。？\?！\n]+[。？\?！\n]?'
 DEFAULT_PARAGRAPH_SEP = '\n\n\n'
 
 DEFAULT_CHUNK_SIZE = 1024
+# Token counts are memoised per sentence; longer texts (whole documents, oversized paragraphs)
+# are tokenised directly so the cache never pins large strings.
+TOKEN_CACHE_SIZE = 65536
+TOKEN_CACHE_MAX_CHARS = 4096
 
 
 @dataclass
@@ -133,6 +139,7 @@ class ParagraphSplitter(ModuleBase):
 
     _chunking_tokenizer_fn: Callable[[str], List[str]] = PrivateAttr()
     _tokenizer: Callable = PrivateAttr()
+    _cached_token_size: Callable[[str], int] = PrivateAttr()
     _split_fns: List[Callable] = PrivateAttr()
     _sub_sentence_split_fns: List[Callable] = PrivateAttr()
 
@@ -162,6 +169,11 @@ class ParagraphSplitter(ModuleBase):
         self.secondary_chunking_regex = secondary_chunking_regex or CHUNKING_REGEX
         self._chunking_tokenizer_fn = chunking_tokenizer_fn or split_by_sentence_tokenizer()
         self._tokenizer = tokenizer or (lambda x: x)
+        # The default identity tokenizer makes ``len`` the token count; anything else is memoised
+        # so repeated sentences (headers, footers, boilerplate) are tokenised once per splitter.
+        self._cached_token_size = (
+            functools.lru_cache(maxsize=TOKEN_CACHE_SIZE)(self._count_tokens) if tokenizer else len
+        )
 
         self._split_fns = [
             self._split_para,
@@ -270,7 +282,7 @@ class ParagraphSplitter(ModuleBase):
 
         return _merge_list(splits=new_splits, chunk_size=self.chunk_size)
 
-    def _split(self, text: str, chunk_size: int) -> List[_Split]:
+    def _split(self, text: str, chunk_size: int, token_size: Optional[int] = None) -> List[_Split]:
         r"""Break text into splits that are smaller than chunk size.
 
         The order of splitting is:
@@ -279,9 +291,11 @@ class ParagraphSplitter(ModuleBase):
         3. split by second chunking regex (default is "[^,\.;]+[,\.;]?")
         4. split by default separator (" ")
 
+        Every piece is tokenised once: an oversized piece hands its size down to the recursive call.
         """
-        token_size = self._token_size(text)
-        if self._token_size(text) <= chunk_size:
+        if token_size is None:
+            token_size = self._token_size(text)
+        if token_size <= chunk_size:
             return [_Split(text, is_sentence=True, token_size=token_size)]
 
         text_splits_by_fns, is_sentence = self._get_splits_by_fns(text)
@@ -298,82 +312,71 @@ class ParagraphSplitter(ModuleBase):
                     )
                 )
             else:
-                recursive_text_splits = self._split(text_split_by_fns, chunk_size=chunk_size)
+                recursive_text_splits = self._split(text_split_by_fns, chunk_size=chunk_size, token_size=token_size)
                 text_splits.extend(recursive_text_splits)
         return text_splits
 
     def _merge(self, splits: List[_Split], chunk_size: int) -> List[str]:
-        """Merge splits into chunks."""
+        """Merge splits into chunks in a single pass.
+
+        The open chunk keeps prefix sums of its token sizes, so its length is ``prefix[-1]`` and
+        the overlap carried into the next chunk (the longest suffix that fits the overlap budget)
+        is found by bisection instead of rescanning and re-inserting splits.
+        """
         chunks: List[str] = []
-        cur_chunk: List[Tuple[str, int]] = []  # list of (text, length)
-        last_chunk: List[Tuple[str, int]] = []
-        cur_chunk_len = 0
+        cur_texts: List[str] = []
+        prefix: List[int] = [0]  # prefix[i] == token size of cur_texts[:i]
         new_chunk = True
         cur_chunk_size = chunk_size + self.chunk_overlap
 
         def close_chunk() -> None:
-            nonlocal cur_chunk, last_chunk, cur_chunk_len, new_chunk
+            nonlocal cur_texts, prefix, new_chunk
 
-            chunks.append(''.join([text for text, length in cur_chunk]))
-            last_chunk = cur_chunk
-            pre_overlap = int(cur_chunk_len / 5)
-            cur_chunk = []
-            cur_chunk_len = 0
+            chunks.append(''.join(cur_texts))
+            total = prefix[-1]
+            budget = self.chunk_overlap + int(total / 5)
             new_chunk = True
 
-            # cur_chunk_size = chunk_size + self.chunk_overlap + pre_overlap
-
-            if len(last_chunk) > 0:
-                last_index = len(last_chunk) - 1
-
-                while last_index >= 0:
-                    if cur_chunk_len + last_chunk[last_index][1] <= self.chunk_overlap + pre_overlap:
-                        text, length = last_chunk[last_index]
-                        cur_chunk_len += length
-                        cur_chunk.insert(0, (text, length))
-                        last_index -= 1
-                    else:
-                        if cur_chunk_len < self.chunk_overlap:
-                            text, length = last_chunk[last_index]
-                            text = text[length - (self.chunk_overlap + pre_overlap - cur_chunk_len):]
-                            sub_splits = self._get_sub_split_text(text=text)
-                            if len(sub_splits) > 1:
-                                text = ''.join(sub_splits[1:])
-                            else:
-                                text = sub_splits[0]
-
-                            length = len(text)
-                            cur_chunk_len += length
-                            cur_chunk.insert(0, (text, length))
-                            last_index -= 1
-                        break
-
-        while len(splits) > 0:
-            cur_split = splits[0]
+            # Splits [start:] form the longest suffix whose size fits the overlap budget.
+            start = bisect_left(prefix, total - budget, 0, len(cur_texts))
+            overlap_len = total - prefix[start]
+            texts = cur_texts[start:]
+            sizes = [prefix[i + 1] - prefix[i] for i in range(start, len(cur_texts))]
+            if start > 0 and overlap_len < self.chunk_overlap:
+                # Top the overlap up with the tail of the first split that did not fit whole.
+                text, length = cur_texts[start - 1], prefix[start] - prefix[start - 1]
+                text = text[length - (budget - overlap_len):]
+                sub_splits = self._get_sub_split_text(text=text)
+                if len(sub_splits) > 1:
+                    text = ''.join(sub_splits[1:])
+                else:
+                    text = sub_splits[0]
+                texts.insert(0, text)
+                sizes.insert(0, len(text))
+
+            cur_texts = texts
+            prefix = [0]
+            for size in sizes:
+                prefix.append(prefix[-1] + size)
+
+        index = 0
+        while index < len(splits):
+            cur_split = splits[index]
             if cur_split.token_size > cur_chunk_size:
                 raise ValueError('Single token exceeded chunk size')
-            if cur_chunk_len + cur_split.token_size > cur_chunk_size and not new_chunk:
+            if prefix[-1] + cur_split.token_size > cur_chunk_size and not new_chunk:
                 # if adding split to current chunk exceeds chunk size: close out chunk
                 close_chunk()
             else:
-                if (
-                    cur_split.is_sentence
-                    or cur_chunk_len + cur_split.token_size <= cur_chunk_size
-                    or new_chunk  # new chunk, always add at least one split
-                ):
-                    # add split to chunk
-                    cur_chunk_len += cur_split.token_size
-                    cur_chunk.append((cur_split.text, cur_split.token_size))
-                    splits.pop(0)
-                    new_chunk = False
-                else:
-                    # close out chunk
-                    close_chunk()
+                # the split fits, or this is a new chunk which always takes at least one split
+                cur_texts.append(cur_split.text)
+                prefix.append(prefix[-1] + cur_split.token_size)
+                index += 1
+                new_chunk = False
 
         # handle the last chunk
         if not new_chunk:
-            chunk = ''.join([text for text, length in cur_chunk])
-            chunks.append(chunk)
+            chunks.append(''.join(cur_texts))
 
         # run postprocessing to remove blank spaces
         return self._postprocess_chunks(chunks)
@@ -390,9 +393,14 @@ class ParagraphSplitter(ModuleBase):
             new_chunks.append(stripped_chunk)
         return new_chunks
 
-    def _token_size(self, text: str) -> int:
+    def _count_tokens(self, text: str) -> int:
         return len(self._tokenizer(text))
 
+    def _token_size(self, text: str) -> int:
+        if len(text) > TOKEN_CACHE_MAX_CHARS:
+            return self._count_tokens(text)
+        return self._cached_token_size(text)
+
     def _get_splits_by_fns(self, text: str) -> Tuple[List[str], bool]:
         for split_fn in self._split_fns:
             splits = split_fn(text)
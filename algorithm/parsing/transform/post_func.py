@@ -4,18 +4,37 @@ import functools
 import hashlib
 import inspect
 import itertools
+import multiprocessing
 import re
+import sys
+import threading
+import time
 from pathlib import Path
-from typing import Any, List, Union
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlparse
 
-import requests
 import lazyllm
 from lazyllm import ModuleBase, LOG
 from lazyllm.tools.rag import DocNode
 from lazyllm.tools.rag.doc_node import ImageDocNode
 
+try:
+    from lazyllm.tracing.collect.hook import LazyTracingHook as _TracingHook
+    from lazyllm.tracing.collect.runtime import tracing_available as _tracing_available
+except ImportError:  # lazyllm without built-in tracing
+    _TracingHook, _tracing_available = None, lambda: False
+
 from config import config as _cfg
+from parsing.image_cache import get_image_materializer
+from parsing.transform.transform_cache import (
+    TransformCache,
+    cache_key,
+    content_hash,
+    dump_nodes,
+    get_transform_cache,
+    load_nodes,
+)
 from parsing.utils import normalize_image_file
 from processor.table_image_map import merge_table_image_maps, normalize_table_image_map, serialize_table_image_map
 
@@ -116,6 +135,53 @@ TIME_PATTERNS = [
 ]
 
 
+# Lines longer than this are classified without caching: headings are short and repeat
+# across documents, long body paragraphs rarely do.
+_CLASSIFY_CACHE_MAX_CHARS = 256
+_CLASSIFY_CACHE_SIZE = 65536
+
+
+class _LineClassifier:
+    """Classify a stripped line by the first matching pattern of prioritized pattern lists.
+
+    All patterns are compiled into one alternation of named groups in priority order.
+    ``re.match`` tries alternatives left to right and only falls through to the next when
+    one cannot match at all, so the winning label is the one the sequential ``_match``
+    loop over each list would pick, at the cost of a single regex call.  Results for short
+    lines are kept in an LRU cache keyed by the stripped text, since the time patterns
+    anchor at the end of the line and a prefix alone does not decide the class.
+    """
+
+    def __init__(self, rules: List, cache_size: int = _CLASSIFY_CACHE_SIZE):
+        parts, self._labels = [], {}
+        for label, patterns in rules:
+            for pattern in patterns:
+                name = f'p{len(parts)}'
+                self._labels[name] = label
+                parts.append(f'(?P<{name}>{getattr(pattern, "pattern", pattern)})')
+        self._regex = re.compile('|'.join(parts))
+        self._cached_classify = functools.lru_cache(maxsize=cache_size)(self._classify)
+
+    def _classify(self, text: str):
+        match = self._regex.match(text)
+        return self._labels[match.lastgroup] if match else None
+
+    def __call__(self, text: str):
+        text = text.strip()
+        if len(text) > _CLASSIFY_CACHE_MAX_CHARS:
+            return self._classify(text)
+        return self._cached_classify(text)
+
+    def cache_info(self):
+        return self._cached_classify.cache_info()
+
+
+_LAYOUT_CLASSIFIER = _LineClassifier([
+    (ParagraphType.Time_text, TIME_PATTERNS),
+    (ParagraphType.Index_text, INDEX_PATTERNS),
+])
+
+
 def _reset_node_index(nodes) -> List[DocNode]:
     result = []
     for index, node in enumerate(nodes):
@@ -124,6 +190,51 @@ def _reset_node_index(nodes) -> List[DocNode]:
     return result
 
 
+def _order_by_file(nodes: List[DocNode]) -> List[DocNode]:
+    # Same ordering LayoutNodeParser applies: stable sort by file, index restarting per file.
+    result = []
+    nodes = sorted(nodes, key=lambda x: x.metadata['file_name'])
+    for _file_name, group in itertools.groupby(nodes, key=lambda x: x.metadata['file_name']):
+        result.extend(_reset_node_index(nodes=list(group)))
+    return result
+
+
+def _split_by_file(nodes: List[DocNode]) -> List[List[DocNode]]:
+    nodes = sorted(nodes, key=lambda x: x.metadata['file_name'])
+    return [list(group) for _file_name, group in itertools.groupby(nodes, key=lambda x: x.metadata['file_name'])]
+
+
+def _file_cost(nodes: List[DocNode]) -> int:
+    # Transform time is roughly linear in text size, plus a fixed per-node cost.
+    return sum(len(node.text or '') for node in nodes) + 64 * len(nodes)
+
+
+def _schedule_file_chunks(files: List[List[DocNode]], workers: int, chunks_per_worker: int = 4) -> List[List[int]]:
+    """Pack file indexes into pool tasks, largest files first.
+
+    Files are ordered by descending cost (longest-processing-time first); small files are
+    batched until a chunk reaches ~1/(workers * chunks_per_worker) of the total, so a large
+    corpus of small files does not pay one round trip per file.
+    """
+    costs = [_file_cost(nodes) for nodes in files]
+    target = max(1, sum(costs) // max(1, workers * chunks_per_worker))
+    chunks, current, current_cost = [], [], 0
+    for index in sorted(range(len(files)), key=lambda i: (-costs[i], i)):
+        if current and current_cost + costs[index] > target:
+            chunks.append(current)
+            current, current_cost = [], 0
+        current.append(index)
+        current_cost += costs[index]
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _page_segments(nodes: List[DocNode]) -> List[List[DocNode]]:
+    # Runs of consecutive nodes on the same page; concatenated they give back ``nodes``.
+    return [list(group) for _page, group in itertools.groupby(nodes, key=lambda x: x.metadata.get('page'))]
+
+
 def _match(node: Union[DocNode, str], patterns: List) -> Union[re.Match, bool]:
     if not patterns:
         return False
@@ -168,6 +279,33 @@ def _extract_image_path(node: DocNode) -> str:
     return ''
 
 
+def _is_image_node(node: DocNode) -> bool:
+    text = (node.text or '').strip()
+    if re.search(r'images\/[^\s\)]+\.(jpg|jpeg|png|gif|bmp|webp|tiff|tif)', text, flags=re.I):
+        return True
+    if str(node.metadata.get('type', '')).lower() in {
+        ParagraphType.Picture, ParagraphType.Figure, 'image', 'img'
+    }:
+        return True
+    return bool(_extract_image_path(node))
+
+
+def _collect_image_paths(document: List[DocNode]) -> List[str]:
+    # Pure part of ImageConverterNode: which images a document references, in node order.
+    collected = []
+    for node in document:
+        if not _is_image_node(node):
+            continue
+        text = (node.text or '').strip()
+        image_paths = re.findall(r'!\[.*?\]\((.*?)\)', text)
+        if not image_paths:
+            image_path = _extract_image_path(node)
+            if image_path:
+                image_paths = [image_path]
+        collected.extend(image_path for image_path in image_paths if image_path)
+    return collected
+
+
 class LayoutNodeParser(ModuleBase):
     """
     Classify nodes via regex ->
@@ -208,11 +346,7 @@ class LayoutNodeParser(ModuleBase):
     ) -> List[DocNode]:
         result = []
         for node in nodes:
-            node._metadata['text_type'] = ParagraphType.Text
-            if _match(node, TIME_PATTERNS):
-                node._metadata['text_type'] = ParagraphType.Time_text
-            elif _match(node, INDEX_PATTERNS):
-                node._metadata['text_type'] = ParagraphType.Index_text
+            node._metadata['text_type'] = _LAYOUT_CLASSIFIER(node.text) or ParagraphType.Text
             result.append(node)
         return result
 
@@ -285,6 +419,10 @@ class ImageConverterNode(ModuleBase):
         os.makedirs(self._image_root, exist_ok=True)
         self._normalized_root.mkdir(parents=True, exist_ok=True)
 
+    @property
+    def _materializer(self):
+        return get_image_materializer(self._image_root)
+
     def forward(self, document: List[DocNode], **kwargs) -> List[ImageDocNode]:
         return self._parse_nodes(document)
 
@@ -293,14 +431,7 @@ class ImageConverterNode(ModuleBase):
         return 'ImageConverterNode'
 
     def _is_image_node(self, node: DocNode) -> bool:
-        text = (node.text or '').strip()
-        if re.search(r'images\/[^\s\)]+\.(jpg|jpeg|png|gif|bmp|webp|tiff|tif)', text, flags=re.I):
-            return True
-        if str(node.metadata.get('type', '')).lower() in {
-            ParagraphType.Picture, ParagraphType.Figure, 'image', 'img'
-        }:
-            return True
-        return bool(_extract_image_path(node))
+        return _is_image_node(node)
 
     def _build_download_url(self, image_path: str) -> str:
         if not image_path:
@@ -311,74 +442,77 @@ class ImageConverterNode(ModuleBase):
             return ''
         return f'{self._ocr_server_url}/{image_path.lstrip("/")}'
 
-    def _materialize_image(self, image_path: str) -> str:
-        if not image_path:
-            return ''
-
+    def _resolve_image(self, image_path: str) -> Tuple[str, str]:
         if _is_url(image_path):
-            remote_url = image_path
             parsed = urlparse(image_path)
             suffix = os.path.splitext(parsed.path)[1] or '.jpg'
             file_name = hashlib.sha256(image_path.encode('utf-8')).hexdigest() + suffix
-            local_path = os.path.join(self._image_root, file_name)
-        else:
-            relative_path = image_path.lstrip('/').replace('..', '_')
-            local_path = os.path.join(self._image_root, relative_path)
-            remote_url = self._build_download_url(image_path)
-
-        Path(local_path).parent.mkdir(parents=True, exist_ok=True)
-        if os.path.exists(local_path) and os.path.getsize(local_path) > 0:
-            return local_path
+            return image_path, os.path.join(self._image_root, file_name)
+        relative_path = image_path.lstrip('/').replace('..', '_')
+        return self._build_download_url(image_path), os.path.join(self._image_root, relative_path)
 
-        response = requests.get(remote_url, timeout=30)
-        response.raise_for_status()
-        with open(local_path, 'wb') as f:
-            f.write(response.content)
-        return local_path
+    def _materialize_image(self, image_path: str) -> str:
+        if not image_path:
+            return ''
+        remote_url, local_path = self._resolve_image(image_path)
+        return self._materializer.fetch(remote_url, local_path)
 
     def _normalize_image_file(self, image_path: str) -> str:
         return normalize_image_file(image_path=image_path, normalized_root=self._normalized_root)
 
+    def _submit_image(self, image_path: str) -> Future:
+        image_url = self._build_download_url(image_path)
+        if not image_url:
+            raise ValueError('LAZYMIND_OCR_SERVER_URL is empty, cannot resolve relative image path')
+        return self._materializer.submit(*self._resolve_image(image_path))
+
+    def _collect_image_paths(self, document: List[DocNode]) -> List[str]:
+        return _collect_image_paths(document)
+
     def _parse_nodes(self, document: List[DocNode], **kwargs) -> List[ImageDocNode]:
+        return self._convert_image_paths(self._collect_image_paths(document))
+
+    def _convert_image_paths(self, image_paths: List[str]) -> List[ImageDocNode]:
+        # Start every download first so they overlap, then build nodes in document order.
+        pending = []
+        for image_path in image_paths:
+            try:
+                pending.append((image_path, self._submit_image(image_path)))
+            except Exception as exc:
+                pending.append((image_path, exc))
+
         image_nodes = []
         seen_paths = set()
-        for node in document:
-            if not self._is_image_node(node):
-                continue
-            text = (node.text or '').strip()
-            image_paths = re.findall(r'!\[.*?\]\((.*?)\)', text)
-            if not image_paths:
-                image_path = _extract_image_path(node)
-                if image_path:
-                    image_paths = [image_path]
-            for image_path in image_paths:
-                if not image_path:
-                    continue
+        for image_path, future in pending:
+            try:
+                if isinstance(future, Exception):
+                    raise future
+                local_image_path = future.result()
                 try:
-                    image_url = self._build_download_url(image_path)
-                    if not image_url:
-                        raise ValueError(
-                            'LAZYMIND_OCR_SERVER_URL is empty, cannot resolve relative image path'
-                        )
+                    normalized_path = self._normalize_image_file(local_image_path)
+                except FileNotFoundError:
+                    # Indexed file was removed behind the cache's back; download it once more.
+                    self._materializer.invalidate(self._resolve_image(image_path)[0])
                     local_image_path = self._materialize_image(image_path)
                     normalized_path = self._normalize_image_file(local_image_path)
-                    if normalized_path in seen_paths:
-                        continue
-                    seen_paths.add(normalized_path)
-                    source_path = os.path.abspath(local_image_path)
-                    metadata = {
-                        'source_path': source_path,
-                        'normalized_source_path': normalized_path,
-                        'file_name': os.path.basename(source_path),
-                        'file_ext': Path(source_path).suffix.lower() or '.jpg',
-                        'file_type': 'image',
-                        'is_pure_image': True,
-                        'image_url': image_url,
-                    }
-                    image_nodes.append(ImageDocNode(image_path=normalized_path, metadata=metadata))
-                except Exception as exc:
-                    LOG.warning(f'[ImageConverterNode] materialize image failed: {image_path}, error: {exc}')
+                if normalized_path in seen_paths:
                     continue
+                seen_paths.add(normalized_path)
+                source_path = os.path.abspath(local_image_path)
+                metadata = {
+                    'source_path': source_path,
+                    'normalized_source_path': normalized_path,
+                    'file_name': os.path.basename(source_path),
+                    'file_ext': Path(source_path).suffix.lower() or '.jpg',
+                    'file_type': 'image',
+                    'is_pure_image': True,
+                    'image_url': self._build_download_url(image_path),
+                }
+                image_nodes.append(ImageDocNode(image_path=normalized_path, metadata=metadata))
+            except Exception as exc:
+                LOG.warning(f'[ImageConverterNode] materialize image failed: {image_path}, error: {exc}')
+                continue
+        self._materializer.flush()
         return image_nodes
 
 
@@ -753,34 +887,106 @@ class GroupFilterNodeParser(ModuleBase):
         return new_nodes
 
 
+def _tracing_active() -> bool:
+    # Mirrors LazyTracingHook.pre_hook: spans are only recorded when tracing is enabled for this
+    # session and a tracing backend is actually available.
+    trace_cfg = lazyllm.globals.get('trace', {}) or {}
+    enabled = trace_cfg.get('enabled')
+    if enabled is None:
+        enabled = lazyllm.config['trace_enabled']
+    return bool(enabled) and trace_cfg.get('sampled') is not False and _tracing_available()
+
+
+class _StageChain:
+    """A lazyllm pipeline of transform stages with a plain function-composition fast path.
+
+    When neither the pipeline nor any stage carries a hook (other than an idle built-in tracing
+    hook), return_trace or module caching, calling each stage's ``forward`` in turn produces
+    the same result without the per-stage hook and bookkeeping overhead.
+    """
+
+    def __init__(self, flow, stages: List[ModuleBase]):
+        self._flow = flow
+        self._stages = stages
+
+    def _is_plain(self) -> bool:
+        traced = False
+        for obj in (self._flow, *self._stages):
+            hooks = getattr(obj, '_hooks', None)
+            if hooks is None:
+                return False
+            for hook in hooks:
+                if _TracingHook is None or hook is not _TracingHook:
+                    return False
+                traced = True
+        if any(stage._return_trace or getattr(stage, '_use_cache', False) for stage in self._stages):
+            return False
+        return not traced or not _tracing_active()
+
+    def __call__(self, nodes):
+        if not self._is_plain():
+            return self._flow(nodes)
+        for stage in self._stages:
+            nodes = stage.forward(nodes)
+        return nodes
+
+
 class NodeParser:
+    """Post-processing chain applied to the raw nodes of a parsed document.
+
+    Args:
+        transform_cache: Transform result cache; defaults to the process-wide one from config.
+        workers: 0 transforms the whole batch at once. >= 1 transforms each file independently;
+            more than one worker fans the files out to a process pool.
+    """
+
+    def __init__(self, transform_cache: Optional[TransformCache] = None, workers: Optional[int] = None):
+        self._transform_cache = transform_cache
+        self._workers = workers
+        self._compiled: Dict[str, Tuple[Any, Any]] = {}
+        self._compile_lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_compiled'] = {}
+        state.pop('_compile_lock', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._compile_lock = threading.Lock()
+
+    def close(self) -> None:
+        """Shut down the transform process pool, if one was started."""
+        with self._compile_lock:
+            compiled = self._compiled.pop('pool', None)
+        if compiled is not None:
+            compiled[1].shutdown(wait=True)
+
     def transform(self, document: DocNode, **kwargs) -> List[Union[str, DocNode]]:
         return
 
     def batch_forward(self, documents, node_group, **kwargs):
-        nodes = self._parse_nodes(documents)
+        nodes = self._parse_nodes(documents, node_group=node_group)
         for node in nodes:
             node._group = node_group
         return nodes
 
-    @staticmethod
     def _parse_nodes(
+        self,
         nodes,
         **kwargs: Any,
     ) -> List[DocNode]:
         raw_nodes = list(nodes)
+        node_group = kwargs.pop('node_group', None) or ''
+        cache = self._transform_cache or get_transform_cache()
+        workers = _cfg['node_transform_workers'] if self._workers is None else self._workers
+        if workers > 0:
+            nodes, image_paths = self._transform_per_file(raw_nodes, cache, node_group, kwargs, workers)
+        else:
+            nodes, image_paths = self._transform(raw_nodes, cache, node_group, kwargs)
 
-        with lazyllm.pipeline() as parser_ppl:
-            parser_ppl.clear_parser = NodeTextClear()
-            parser_ppl.table_converter = TableConverterNode()
-            parser_ppl.layout_parser = LayoutNodeParser()
-            parser_ppl.group_nodes = GroupNodeParser()
-            parser_ppl.group_filter_nodes = GroupFilterNodeParser()
-            parser_ppl.merge_nodes = MergeNodeParser()
-
-        nodes = parser_ppl(nodes)
-        extracted_img_nodes = ImageConverterNode()(raw_nodes)
-        nodes.extend(extracted_img_nodes)
+        nodes.extend(self._image_converter()._convert_image_paths(image_paths))
         embed_keys = ['file_name', 'title']
         del_keys = ['list_type', 'code_type', 'text_type', 'table_caption', 'table_footnote']
         for ind, node in enumerate(nodes):
@@ -793,10 +999,133 @@ class NodeParser:
 
         return nodes
 
+    def _transform(self, raw_nodes, cache, node_group, params):
+        if cache is not None:
+            return self._parse_cached(raw_nodes, cache, node_group, params)
+        page_nodes = self._page_pipeline()(raw_nodes)
+        nodes = self._document_pipeline()(_order_by_file(page_nodes))
+        return nodes, _collect_image_paths(raw_nodes)
+
+    def _transform_per_file(self, raw_nodes, cache, node_group, params, workers):
+        files = _split_by_file(raw_nodes)
+        if workers == 1 or len(files) < 2:
+            results = [self._transform(file_nodes, cache, node_group, dict(params)) for file_nodes in files]
+        else:
+            results = self._transform_in_pool(files, cache, node_group, params, workers)
+        nodes, image_paths = [], []
+        for file_nodes, file_images in results:
+            nodes.extend(file_nodes)
+            image_paths.extend(file_images)
+        return nodes, image_paths
+
+    def _transform_in_pool(self, files, cache, node_group, params, workers):
+        pool = self._compile('pool', workers, lambda: ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context('spawn')))
+        cache_root = cache.root if cache is not None else None
+        cache_max_bytes = cache.max_bytes if cache is not None else 0
+        results: List[Optional[tuple]] = [None] * len(files)
+        # Chunks come largest-first, so the biggest files start before the queue fills with small ones.
+        futures = {
+            pool.submit(_transform_files_in_worker, cache_root, cache_max_bytes, node_group, params,
+                        [dump_nodes(files[i]) for i in chunk]): chunk
+            for chunk in _schedule_file_chunks(files, workers)
+        }
+        for future in as_completed(futures):
+            chunk_results, stats = future.result()
+            for i, (dumped, file_images) in zip(futures[future], chunk_results):
+                results[i] = (load_nodes(dumped), file_images)
+            if cache is not None and stats is not None:
+                cache.stats.merge(stats)
+        return results
+
+    def _compile(self, name: str, signature: Any, build: Callable[[], Any]) -> Any:
+        # Stages are built once per parser and rebuilt only when their parameters change.
+        with self._compile_lock:
+            compiled = self._compiled.get(name)
+            if compiled is None or compiled[0] != signature:
+                if compiled is not None and hasattr(compiled[1], 'shutdown'):
+                    compiled[1].shutdown(wait=False)
+                compiled = (signature, build())
+                self._compiled[name] = compiled
+            return compiled[1]
+
+    def _image_converter(self) -> 'ImageConverterNode':
+        signature = (_cfg['ocr_server_url'], _cfg['rag_image_path_prefix'], _cfg['shared_upload_dir'])
+        return self._compile('image_converter', signature, ImageConverterNode)
+
+    def _page_pipeline(self) -> _StageChain:
+        # Clear/table/layout only look at one node at a time, so their results can be cached per page.
+        def _build():
+            stages = [NodeTextClear(), TableConverterNode(), LayoutNodeParser()]
+            with lazyllm.pipeline() as page_ppl:
+                page_ppl.clear_parser = stages[0]
+                page_ppl.table_converter = stages[1]
+                page_ppl.layout_parser = stages[2]
+            return _StageChain(page_ppl, stages)
+        return self._compile('page', None, _build)
+
+    def _document_pipeline(self) -> _StageChain:
+        # Grouping and merging span pages and always run over the whole document.
+        def _build():
+            stages = [GroupNodeParser(), GroupFilterNodeParser(), MergeNodeParser()]
+            with lazyllm.pipeline() as document_ppl:
+                document_ppl.group_nodes = stages[0]
+                document_ppl.group_filter_nodes = stages[1]
+                document_ppl.merge_nodes = stages[2]
+            return _StageChain(document_ppl, stages)
+        return self._compile('document', None, _build)
+
+    def _parse_cached(self, raw_nodes, cache, node_group, params):
+        code_hash = _transform_code_hash()
+        document_key = cache_key('document', content_hash(raw_nodes), node_group, code_hash, params)
+        entry = cache.get(document_key)
+        if entry is not None:
+            return load_nodes(entry['nodes']), list(entry['images'])
+
+        page_nodes, image_paths, seconds = [], [], 0.0
+        for segment in _page_segments(raw_nodes):
+            page_key = cache_key('page', content_hash(segment), node_group, code_hash, params)
+            page_entry = cache.get(page_key, page=True)
+            if page_entry is None:
+                start = time.perf_counter()
+                parsed = self._page_pipeline()(segment)
+                page_entry = {'nodes': dump_nodes(parsed), 'images': _collect_image_paths(segment),
+                              'seconds': time.perf_counter() - start}
+                cache.put(page_key, page_entry)
+            else:
+                parsed = load_nodes(page_entry['nodes'])
+            page_nodes.extend(parsed)
+            image_paths.extend(page_entry['images'])
+            seconds += page_entry['seconds']
+
+        start = time.perf_counter()
+        nodes = self._document_pipeline()(_order_by_file(page_nodes))
+        seconds += time.perf_counter() - start
+        cache.put(document_key, {'nodes': dump_nodes(nodes), 'images': image_paths, 'seconds': seconds})
+        return nodes, image_paths
+
     def __call__(self, nodes, **kwargs):
         return self._parse_nodes(nodes, **kwargs)
 
 
+_worker_state: Dict[Optional[str], Tuple['NodeParser', Optional[TransformCache]]] = {}
+
+
+def _transform_files_in_worker(cache_root: Optional[str], cache_max_bytes: int, node_group: str,
+                               params: Dict[str, Any], files):
+    # Runs inside a pool process; the parser and its compiled stages are reused across chunks.
+    state = _worker_state.get(cache_root)
+    if state is None:
+        cache = TransformCache(cache_root, max_bytes=cache_max_bytes) if cache_root else None
+        state = _worker_state[cache_root] = (NodeParser(workers=0), cache)
+    parser, cache = state
+    results = []
+    for dumped in files:
+        nodes, image_paths = parser._transform(load_nodes(dumped), cache, node_group, dict(params))
+        results.append((dump_nodes(nodes), image_paths))
+    return results, cache.reset_stats() if cache is not None else None
+
+
 def parser_code_hash():
     from hashlib import sha256
 
@@ -804,3 +1133,13 @@ def parser_code_hash():
     parser_code = inspect.getsource(parser._parse_nodes)
     parser_hash = sha256((parser_code).encode('utf-8')).hexdigest()
     return parser_hash
+
+
+@functools.lru_cache(maxsize=None)
+def _transform_code_hash() -> str:
+    # The stages live in this module (plus the table image helpers), so any edit to them
+    # changes the fingerprint and invalidates cached transform results.
+    import processor.table_image_map as table_image_map
+
+    sources = [parser_code_hash(), inspect.getsource(sys.modules[__name__]), inspect.getsource(table_image_map)]
+    return hashlib.sha256('\n'.join(sources).encode('utf-8')).hexdigest()
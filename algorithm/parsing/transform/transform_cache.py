@@ -0,0 +1,243 @@
+"""On-disk cache of post-transform nodes for incremental re-parsing.
+
+``NodeParser`` runs the same deterministic transform chain over every document a
+reader produces.  Re-ingesting an unchanged document therefore recomputes exactly
+what it computed last time.  ``TransformCache`` stores the intermediate results keyed
+by what they depend on:
+
+* content hash of the raw nodes (text + metadata, in order);
+* node group the parser runs for;
+* code fingerprint of the transform chain;
+* parser parameters.
+
+Two kinds of entries share the store: whole-document results (the text nodes after
+merging) and per-page results of the node-local stages, so a changed document only
+recomputes the pages that actually changed.
+
+Entries are pickled ``(text, metadata)`` pairs written atomically under
+``<root>/<key[:2]>/<key>.pkl``; the cache lives on local disk next to the uploads it
+was derived from and is never read from untrusted locations.
+
+The store is bounded by ``node_transform_cache_max_mb``: once it grows past the cap,
+the least recently used entries (by mtime, which a hit refreshes) are deleted.  The
+directory may be shared by several processes, so eviction rescans it rather than
+trusting an in-memory index.
+
+Usage::
+
+    cache = TransformCache('/data/uploads/.transform_cache', max_bytes=512 * 1024 * 1024)
+    parser = NodeParser(transform_cache=cache)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterable, List, Optional
+
+from lazyllm import LOG
+from lazyllm.tools.rag import DocNode
+
+from config import config as _cfg
+
+
+def _stable_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, default=repr, separators=(',', ':'))
+
+
+def content_hash(nodes: Iterable[DocNode]) -> str:
+    """Order-sensitive sha256 over the text and metadata of ``nodes``."""
+    digest = hashlib.sha256()
+    for node in nodes:
+        digest.update(_stable_json([node.text, node.metadata]).encode('utf-8'))
+        digest.update(b'\x1e')
+    return digest.hexdigest()
+
+
+def cache_key(kind: str, content: str, node_group: str, code_hash: str, params: Dict[str, Any]) -> str:
+    return hashlib.sha256(_stable_json([kind, content, node_group, code_hash, params]).encode('utf-8')).hexdigest()
+
+
+def dump_nodes(nodes: Iterable[DocNode]) -> List[tuple]:
+    return [(node._content, node.metadata) for node in nodes]
+
+
+def load_nodes(items: Iterable[tuple]) -> List[DocNode]:
+    return [DocNode(text=text, metadata=metadata) for text, metadata in items]
+
+
+@dataclass
+class TransformCacheStats:
+    hits: int = 0
+    misses: int = 0
+    page_hits: int = 0
+    page_misses: int = 0
+    seconds_saved: float = 0.0
+    evictions: int = 0
+
+    def merge(self, other: TransformCacheStats) -> None:
+        self.hits += other.hits
+        self.misses += other.misses
+        self.page_hits += other.page_hits
+        self.page_misses += other.page_misses
+        self.seconds_saved += other.seconds_saved
+        self.evictions += other.evictions
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), 'hit_rate': round(self.hit_rate, 4), 'seconds_saved': round(self.seconds_saved, 3)}
+
+
+class TransformCache:
+    """Thread-safe pickle-per-entry store under ``root``.
+
+    Args:
+        root: Cache directory, created on first write.
+        max_bytes: Evict least recently used entries once the cache exceeds this many
+            bytes (0 = never).
+    """
+
+    def __init__(self, root: str, max_bytes: int = 0):
+        self._root = os.path.abspath(root)
+        self._max_bytes = max(0, int(max_bytes))
+        self._lock = threading.Lock()
+        self._disabled = False
+        self._total_bytes: Optional[int] = None
+        self.stats = TransformCacheStats()
+
+    @property
+    def root(self) -> str:
+        return self._root
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._root, key[:2], f'{key}.pkl')
+
+    def get(self, key: str, *, page: bool = False) -> Optional[Dict[str, Any]]:
+        entry = None
+        if not self._disabled:
+            path = self._path(key)
+            try:
+                with open(path, 'rb') as f:
+                    entry = pickle.load(f)
+                if self._max_bytes:
+                    os.utime(path)  # mtime is the recency eviction goes by
+            except FileNotFoundError:
+                pass
+            except Exception as exc:
+                LOG.warning(f'[TransformCache] dropping unreadable entry {key}: {exc}')
+        with self._lock:
+            if entry is None:
+                if page:
+                    self.stats.page_misses += 1
+                else:
+                    self.stats.misses += 1
+            else:
+                if page:
+                    self.stats.page_hits += 1
+                else:
+                    self.stats.hits += 1
+                self.stats.seconds_saved += entry.get('seconds', 0.0)
+        return entry
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        if self._disabled:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix='.entry-', dir=os.path.dirname(path))
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+                size = os.path.getsize(tmp_path)
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+        except OSError as exc:
+            # An unwritable cache must never fail ingestion; keep parsing uncached.
+            LOG.warning(f'[TransformCache] disabling cache at {self._root}: {exc}')
+            self._disabled = True
+            return
+        if self._max_bytes:
+            with self._lock:
+                if self._total_bytes is None:
+                    self._total_bytes = sum(size for _, size, _ in self._scan())
+                else:
+                    self._total_bytes += size
+                over = self._total_bytes > self._max_bytes
+            if over:
+                self._evict()
+
+    def _scan(self) -> List[tuple]:
+        entries = []
+        for dirpath, _, filenames in os.walk(self._root):
+            for name in filenames:
+                if not name.endswith('.pkl'):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def _evict(self) -> int:
+        # Other processes may share the directory, so go by what is on disk. Trim to 90% of
+        # the cap so a full cache does not rescan on every following write.
+        entries = sorted(self._scan())
+        total = sum(size for _, size, _ in entries)
+        target = self._max_bytes * 9 // 10
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        with self._lock:
+            self._total_bytes = total
+            self.stats.evictions += removed
+        if removed:
+            LOG.info(f'[TransformCache] evicted {removed} entries, cache now {total} bytes')
+        return removed
+
+    def reset_stats(self) -> TransformCacheStats:
+        with self._lock:
+            stats, self.stats = self.stats, TransformCacheStats()
+        return stats
+
+
+_caches: Dict[str, TransformCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_transform_cache() -> Optional[TransformCache]:
+    """Process-wide cache from config, or ``None`` when disabled."""
+    if not _cfg['node_transform_cache']:
+        return None
+    root = _cfg['node_transform_cache_dir'] or os.path.join(_cfg['shared_upload_dir'], '.transform_cache')
+    root = os.path.abspath(root)
+    with _caches_lock:
+        if root not in _caches:
+            _caches[root] = TransformCache(root, max_bytes=_cfg['node_transform_cache_max_mb'] * 1024 * 1024)
+        return _caches[root]
@@ -4,6 +4,7 @@ from .db import (
     fetch_chat_histories_for_user_id,
     fetch_vocab_for_user_id,
     fetch_vocab_groups_for_user_id,
+    iter_chat_histories_for_user_id,
     list_chat_users,
 )
 from .evolution import (
@@ -26,6 +27,7 @@ __all__ = [
     'get_ppl_vocab_evolution',
     'get_vocab_evolution_service',
     'get_vocab_manager',
+    'iter_chat_histories_for_user_id',
     'list_chat_users',
     'run_vocab_evolution',
 ]
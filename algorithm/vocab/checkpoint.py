@@ -0,0 +1,164 @@
+"""Per-user history watermarks for incremental vocabulary evolution.
+
+A watermark is the keyset position ``(create_time, seq, message_id)`` of the last chat
+history row a successful evolution run consumed for a user.  The next run passes it to
+``iter_chat_histories_for_user_id(after=...)`` and only reads newer rows.
+
+Watermarks live in a small JSON file (``vocab_evolution_checkpoint_path``); writes go to a
+temporary file that replaces the original, so a crash never leaves a torn checkpoint.
+
+``EvolutionRunJournal`` records users an unfinished run already processed, with their
+planned actions, so a restarted run resumes instead of re-extracting them.
+"""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from lazyllm import LOG
+
+
+@dataclass(frozen=True)
+class HistoryWatermark:
+    create_time: Any
+    seq: int
+    message_id: Any
+
+    def as_keyset(self) -> Tuple[Any, int, Any]:
+        return self.create_time, self.seq, self.message_id
+
+    def to_dict(self) -> Dict[str, Any]:
+        is_datetime = isinstance(self.create_time, datetime)
+        return {
+            'create_time': self.create_time.isoformat() if is_datetime else self.create_time,
+            'create_time_is_datetime': is_datetime,
+            'seq': self.seq,
+            'message_id': self.message_id,
+        }
+
+    @classmethod
+    def from_dict(cls, value: Dict[str, Any]) -> 'HistoryWatermark':
+        create_time = value.get('create_time')
+        if value.get('create_time_is_datetime') and isinstance(create_time, str):
+            create_time = datetime.fromisoformat(create_time)
+        return cls(create_time=create_time, seq=int(value.get('seq') or 0), message_id=value.get('message_id'))
+
+    @classmethod
+    def from_record(cls, record: Any) -> 'HistoryWatermark':
+        return cls(create_time=record.create_time, seq=int(record.seq or 0), message_id=record.message_id)
+
+
+class HistoryCheckpointStore:
+    """JSON-file map of user_id -> HistoryWatermark."""
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            with open(self._path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as exc:
+            LOG.warning(f'[VocabCheckpoint] unreadable checkpoint {self._path}: {exc}')
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def get(self, user_id: str) -> Optional[HistoryWatermark]:
+        with self._lock:
+            value = self._read().get(user_id)
+        return HistoryWatermark.from_dict(value) if isinstance(value, dict) else None
+
+    def update(self, watermarks: Dict[str, HistoryWatermark]) -> None:
+        if not watermarks:
+            return
+        with self._lock:
+            data = self._read()
+            data.update({user_id: mark.to_dict() for user_id, mark in watermarks.items()})
+            directory = os.path.dirname(os.path.abspath(self._path))
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix='.vocab-checkpoint-', dir=directory)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, default=str)
+                os.replace(tmp_path, self._path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+
+
+class EvolutionRunJournal:
+    """Append-only JSON-lines log of users finished by the current, not yet applied, run.
+
+    The first line holds the run signature; ``open`` discards a journal left by a run
+    with a different signature.  Each later line is one user's actions and watermark.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def _load(self) -> Tuple[Optional[str], Dict[str, Dict[str, Any]]]:
+        signature, entries = None, {}
+        try:
+            with open(self._path, 'r', encoding='utf-8') as f:
+                for line_no, line in enumerate(f):
+                    try:
+                        item = json.loads(line)
+                    except ValueError:
+                        # A crash mid-append leaves at most one torn trailing line.
+                        break
+                    if line_no == 0:
+                        signature = item.get('signature')
+                    elif isinstance(item, dict) and item.get('user_id'):
+                        entries[item['user_id']] = item
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            LOG.warning(f'[VocabCheckpoint] unreadable run journal {self._path}: {exc}')
+        return signature, entries
+
+    def open(self, signature: str) -> Dict[str, Dict[str, Any]]:
+        """Return users already finished under ``signature``; start a fresh journal otherwise."""
+        with self._lock:
+            previous, entries = self._load()
+            if previous == signature:
+                return entries
+            os.makedirs(os.path.dirname(os.path.abspath(self._path)), exist_ok=True)
+            with open(self._path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'signature': signature}) + '\n')
+            return {}
+
+    def record(self, user_id: str, actions: List[Dict[str, Any]], watermark: Optional[HistoryWatermark]) -> None:
+        line = json.dumps(
+            {'user_id': user_id, 'actions': actions, 'watermark': watermark.to_dict() if watermark else None},
+            ensure_ascii=False, default=str,
+        )
+        with self._lock:
+            with open(self._path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def clear(self) -> None:
+        with self._lock:
+            try:
+                os.unlink(self._path)
+            except FileNotFoundError:
+                pass
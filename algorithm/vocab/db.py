@@ -16,7 +16,7 @@ from __future__ import annotations
 import shlex
 import threading
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from urllib.parse import urlsplit, urlunsplit
 
 from lazyllm import LOG
@@ -316,16 +316,53 @@ def list_chat_users(
         return []
 
 
-def fetch_chat_histories_for_user_id(
+_HISTORY_COLUMNS = """
+        SELECT c.create_user_id AS user_id,
+               c.id AS conversation_id,
+               h.id AS message_id,
+               h.seq,
+               COALESCE(h.raw_content, '') AS raw_content,
+               COALESCE(h.content, '') AS content,
+               COALESCE(h.result, '') AS result,
+               h.create_time
+        FROM conversations c
+        JOIN chat_histories h ON h.conversation_id = c.id
+"""
+
+
+def _history_row_to_dict(row: Any) -> Dict[str, Any]:
+    return {
+        'user_id': row['user_id'],
+        'conversation_id': row['conversation_id'],
+        'message_id': row['message_id'],
+        'seq': row['seq'],
+        'raw_content': row['raw_content'],
+        'content': row['content'],
+        'result': row['result'],
+        'create_time': row['create_time'],
+    }
+
+
+def iter_chat_histories_for_user_id(
     user_id: str,
     *,
     start_time: Optional[datetime] = None,
     end_time: Optional[datetime] = None,
+    after: Optional[Tuple[Any, int, Any]] = None,
+    page_size: Optional[int] = None,
     db_dsn: Optional[str] = None,
     db_url: Optional[str] = None,
-) -> List[Dict[str, Any]]:
-    """Return chat histories for one user ordered by time and sequence."""
-    params: Dict[str, Any] = {'user_id': user_id}
+) -> Iterator[Dict[str, Any]]:
+    """Yield chat histories for one user ordered by time and sequence, one keyset page at a time.
+
+    Each page is a separate ``LIMIT`` query continuing after the last ``(create_time, seq, id)``
+    seen, read through a server-side cursor, so memory stays bounded by ``page_size`` and no
+    long transaction is held.  ``after`` resumes strictly after a previously processed row
+    (see ``HistoryWatermark``).  On a database error the rows yielded so far stand and
+    iteration stops.
+    """
+    page_size = max(1, int(page_size or _cfg['vocab_history_page_size']))
+    params: Dict[str, Any] = {'user_id': user_id, 'page_size': page_size}
     where = ['c.create_user_id = :user_id', 'c.deleted_at IS NULL']
     if start_time is not None:
         where.append('h.create_time >= :start_time')
@@ -333,41 +370,47 @@ def fetch_chat_histories_for_user_id(
     if end_time is not None:
         where.append('h.create_time <= :end_time')
         params['end_time'] = end_time
-    sql = f"""
-        SELECT c.create_user_id AS user_id,
-               c.id AS conversation_id,
-               h.id AS message_id,
-               h.seq,
-             COALESCE(h.raw_content, '') AS raw_content,
-             COALESCE(h.content, '') AS content,
-             COALESCE(h.result, '') AS result,
-               h.create_time
-        FROM conversations c
-        JOIN chat_histories h ON h.conversation_id = c.id
-        WHERE {' AND '.join(where)}
-        ORDER BY h.create_time ASC, h.seq ASC, h.id ASC
-    """
+    # create_time and seq are NOT NULL in chat_histories, so the row-value comparison is total.
+    keyset = '(h.create_time, h.seq, h.id) > (:after_time, :after_seq, :after_id)'
+    base_where = ' AND '.join(where)
+    order = 'ORDER BY h.create_time ASC, h.seq ASC, h.id ASC LIMIT :page_size'
+    first_sql = text(f'{_HISTORY_COLUMNS} WHERE {base_where} {order}')
+    next_sql = text(f'{_HISTORY_COLUMNS} WHERE {base_where} AND {keyset} {order}')
+
+    cursor = after
     try:
         engine = _get_core_conn(db_dsn=db_dsn, db_url=db_url)
-        with engine.connect() as conn:
-            rows = conn.execute(text(sql), params).mappings().all()
+        while True:
+            if cursor is not None:
+                params.update(after_time=cursor[0], after_seq=cursor[1], after_id=cursor[2])
+            with engine.connect() as conn:
+                result = conn.execution_options(stream_results=True).execute(
+                    next_sql if cursor is not None else first_sql, params)
+                page = [_history_row_to_dict(row) for row in result.mappings()]
+            yield from page
+            if len(page) < page_size:
+                return
+            last = page[-1]
+            cursor = (last['create_time'], last['seq'], last['message_id'])
     except Exception as exc:
-        LOG.error(f'[VocabDB] fetch_chat_histories_for_user_id({user_id!r}) failed: {exc}')
-        return []
+        LOG.error(f'[VocabDB] iter_chat_histories_for_user_id({user_id!r}) failed: {exc}')
 
-    return [
-        {
-            'user_id': row['user_id'],
-            'conversation_id': row['conversation_id'],
-            'message_id': row['message_id'],
-            'seq': row['seq'],
-            'raw_content': row['raw_content'],
-            'content': row['content'],
-            'result': row['result'],
-            'create_time': row['create_time'],
-        }
-        for row in rows
-    ]
+
+def fetch_chat_histories_for_user_id(
+    user_id: str,
+    *,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    db_dsn: Optional[str] = None,
+    db_url: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Return chat histories for one user ordered by time and sequence.
+
+    Loads everything into memory; prefer ``iter_chat_histories_for_user_id`` for large histories.
+    """
+    return list(iter_chat_histories_for_user_id(
+        user_id, start_time=start_time, end_time=end_time, db_dsn=db_dsn, db_url=db_url,
+    ))
 
 
 def fetch_chat_histories_for_session(
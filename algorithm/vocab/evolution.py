@@ -2,34 +2,44 @@
 
 This module keeps only the algorithm-side extraction flow:
 
-1. Read recent chat histories by user.
-2. Slice histories into LLM-friendly chunks.
-3. Extract high-confidence synonym pairs with evidence message IDs.
+1. Stream recent chat histories by user (keyset pages, resuming after the
+   user's checkpoint watermark when one is configured).
+2. Slice histories into LLM-friendly chunks, read ahead by a bounded window.
+3. Pack chunks into token-limited prompts and extract high-confidence synonym
+   pairs with evidence message IDs, merging duplicates across prompts.
 4. Compare them against the existing vocab groups.
 5. Serialize backend action dicts and submit them back to core.
+
+``VocabEvolutionService`` runs users concurrently; every LLM call of a run shares
+one concurrency budget, and a run journal lets an interrupted run resume.
 """
 from __future__ import annotations
 
+import hashlib
 import json
+import queue
 import re
 import threading
-from collections import defaultdict
-from dataclasses import dataclass, field
+from collections import defaultdict, deque
+from concurrent.futures import as_completed
+from contextlib import nullcontext
+from dataclasses import asdict, dataclass, field
 from datetime import datetime, timedelta, timezone
-from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 import lazyllm
 import httpx
-from lazyllm import LOG, pipeline, AutoModel
+from lazyllm import LOG, pipeline, AutoModel, ThreadPoolExecutor
 from lazyllm.components import ChatPrompter
 from lazyllm.components.formatter import JsonFormatter
 from lazyllm.module import ModuleBase
 from chat.utils.load_config import get_config_path
 
 from config import config as _cfg
+from .checkpoint import EvolutionRunJournal, HistoryCheckpointStore, HistoryWatermark
 from .db import (
-    fetch_chat_histories_for_user_id,
     fetch_vocab_groups_for_user_id,
+    iter_chat_histories_for_user_id,
     list_chat_users,
 )
 
@@ -200,6 +210,16 @@ def _split_text_for_limit(value: Any, limit: int) -> List[str]:
     return segments
 
 
+def _estimate_tokens(text: str) -> int:
+    # CJK characters take three UTF-8 bytes and roughly one token each; other text ~4 chars per token.
+    wide = (len(text.encode('utf-8')) - len(text)) // 2
+    return max(1, wide + (len(text) - wide) // 4)
+
+
+def _llm_slot(budget: Optional[threading.BoundedSemaphore]):
+    return budget if budget is not None else nullcontext()
+
+
 def _format_evidence_lines(evidence: Sequence[Dict[str, str]]) -> str:
     lines = [f'- [message_id={item["message_id"]}] {item["text"]}' for item in evidence if item.get('message_id')]
     return '\n'.join(lines) if lines else 'N/A'
@@ -307,6 +327,7 @@ class VocabEvolutionRequest:
     core_db_dsn: Optional[str] = None
     core_db_url: Optional[str] = None
     vocab_db_url: Optional[str] = None
+    use_checkpoint: bool = True
 
     @classmethod
     def from_value(cls, value: 'VocabEvolutionRequest | Dict[str, Any] | None') -> 'VocabEvolutionRequest':
@@ -376,59 +397,167 @@ class SynonymCandidate:
         return items[0], items[1]
 
 
+@dataclass
+class HistoryProgress:
+    """Keyset position of the last history row handed downstream for one user."""
+    watermark: Optional[HistoryWatermark] = None
+    start: Optional[HistoryWatermark] = None
+    count: int = 0
+
+
+def _prefetch(items: Iterable[Any], window: int) -> Iterator[Any]:
+    """Read ``items`` on a helper thread, at most ``window`` items ahead of the consumer."""
+    if window <= 0:
+        yield from items
+        return
+    done = object()
+    buffer: queue.Queue = queue.Queue(maxsize=window)
+    stop = threading.Event()
+
+    def _put(item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce() -> None:
+        try:
+            for item in items:
+                if not _put((item, None)):
+                    return
+        except Exception as exc:
+            _put((done, exc))
+            return
+        _put((done, None))
+
+    thread = threading.Thread(target=_produce, name='vocab-history-prefetch', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def _pack_chunks(chunks: Iterable[Dict[str, Any]], max_tokens: int) -> Iterator[Dict[str, Any]]:
+    """Group consecutive chunks into prompts of at most ``max_tokens`` estimated tokens.
+
+    A chunk larger than the budget still gets a prompt of its own; ``max_tokens <= 0``
+    disables packing.
+    """
+    pack: List[Dict[str, Any]] = []
+    pack_tokens = 0
+    for chunk in chunks:
+        tokens = _estimate_tokens(chunk['text'])
+        if pack and (max_tokens <= 0 or pack_tokens + tokens > max_tokens):
+            yield _merge_pack(pack)
+            pack, pack_tokens = [], 0
+        pack.append(chunk)
+        pack_tokens += tokens
+    if pack:
+        yield _merge_pack(pack)
+
+
+def _merge_pack(chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    if len(chunks) == 1:
+        return dict(chunks[0], chunk_count=1)
+    pack = {
+        'chunk_id': chunks[0]['chunk_id'],
+        'message_ids': _dedupe_keep_order(msg_id for chunk in chunks for msg_id in chunk['message_ids']),
+        'text': '\n'.join(chunk['text'] for chunk in chunks),
+        'chunk_count': len(chunks),
+    }
+    if all('records' in chunk for chunk in chunks):
+        pack['records'] = [row for chunk in chunks for row in chunk['records']]
+    return pack
+
+
 class HistoryCollector(ModuleBase):
     def __init__(
         self,
-        fetch_histories_fn: Callable[..., List[Dict[str, Any]]] = fetch_chat_histories_for_user_id,
+        fetch_histories_fn: Callable[..., Iterable[Dict[str, Any]]] = iter_chat_histories_for_user_id,
+        checkpoint_store: Optional[HistoryCheckpointStore] = None,
         return_trace: bool = False,
     ) -> None:
         super().__init__(return_trace=return_trace)
         self._fetch_histories = fetch_histories_fn
+        self._checkpoint_store = checkpoint_store
+
+    @staticmethod
+    def _iter_records(histories: Iterable[Dict[str, Any]], progress: HistoryProgress) -> Iterator[ChatHistoryRecord]:
+        for item in histories:
+            record = ChatHistoryRecord.from_dict(item)
+            progress.watermark = HistoryWatermark.from_record(record)
+            progress.count += 1
+            yield record
 
     def forward(self, payload: Dict[str, Any], **kwargs: Any) -> Dict[str, Any]:
         request = VocabEvolutionRequest.from_value(payload.get('request'))
         user_id = _norm_text(payload.get('user_id'))
         start_time, end_time = request.resolve_time_range()
-        histories = self._fetch_histories(
-            user_id,
-            start_time=start_time,
-            end_time=end_time,
-            db_dsn=request.core_db_dsn,
-            db_url=request.core_db_url,
-        )
-        rows = [ChatHistoryRecord.from_dict(item) for item in histories]
+        fetch_kwargs: Dict[str, Any] = {
+            'start_time': start_time,
+            'end_time': end_time,
+            'db_dsn': request.core_db_dsn,
+            'db_url': request.core_db_url,
+        }
+        watermark = None
+        if self._checkpoint_store is not None and request.use_checkpoint:
+            watermark = self._checkpoint_store.get(user_id)
+        if watermark is not None:
+            fetch_kwargs['after'] = watermark.as_keyset()
+        progress = HistoryProgress(watermark=watermark, start=watermark)
         return {
             'request': request,
             'user_id': user_id,
-            'histories': rows,
+            'histories': self._iter_records(self._fetch_histories(user_id, **fetch_kwargs), progress),
+            'history_progress': progress,
         }
 
 
 class HistoryChunker(ModuleBase):
+    """Pack history rows into prompt-sized chunks.
+
+    A list of histories yields a list of chunks; a lazy stream yields a lazy stream of
+    chunks, read ahead by at most ``vocab_history_prefetch_chunks``.  Every chunk carries
+    its own ``records`` so later stages never need the whole history.
+    """
+
     def __init__(self, return_trace: bool = False) -> None:
         super().__init__(return_trace=return_trace)
 
-    def forward(self, payload: Dict[str, Any], **kwargs: Any) -> Dict[str, Any]:
-        request: VocabEvolutionRequest = payload['request']
-        histories: List[ChatHistoryRecord] = payload['histories']
-        max_chunk_chars = max(1, request.max_chunk_chars)
-        chunks = []
+    @staticmethod
+    def iter_chunks(user_id: str, histories: Iterable[ChatHistoryRecord],
+                    max_chunk_chars: int) -> Iterator[Dict[str, Any]]:
+        max_chunk_chars = max(1, max_chunk_chars)
+        chunk_count = 0
         current_parts: List[str] = []
         current_message_ids: List[str] = []
+        current_records: Dict[str, ChatHistoryRecord] = {}
         current_chars = 0
 
-        def _flush_current() -> None:
-            nonlocal current_parts, current_message_ids, current_chars
-            if not current_parts:
-                return
-            chunks.append({
-                'chunk_id': f'{payload["user_id"]}-chunk-{len(chunks) + 1}',
+        def _take_current() -> Dict[str, Any]:
+            nonlocal chunk_count, current_parts, current_message_ids, current_records, current_chars
+            chunk_count += 1
+            chunk = {
+                'chunk_id': f'{user_id}-chunk-{chunk_count}',
                 'message_ids': _dedupe_keep_order(current_message_ids),
                 'text': '\n'.join(current_parts),
-            })
+                'records': list(current_records.values()),
+            }
             current_parts = []
             current_message_ids = []
+            current_records = {}
             current_chars = 0
+            return chunk
 
         for row in histories:
             prefix = f'[message_id={row.message_id}] '
@@ -438,20 +567,45 @@ class HistoryChunker(ModuleBase):
                 block_len = len(block)
                 sep_len = 1 if current_parts else 0
                 if current_parts and current_chars + sep_len + block_len > max_chunk_chars:
-                    _flush_current()
+                    yield _take_current()
                     sep_len = 0
                 current_parts.append(block)
                 current_message_ids.append(row.message_id)
+                current_records[row.message_id] = row
                 current_chars += sep_len + block_len
 
-        _flush_current()
+        if current_parts:
+            yield _take_current()
+
+    def forward(self, payload: Dict[str, Any], **kwargs: Any) -> Dict[str, Any]:
+        request: VocabEvolutionRequest = payload['request']
+        histories: Iterable[ChatHistoryRecord] = payload['histories']
+        chunks = self.iter_chunks(payload['user_id'], histories, request.max_chunk_chars)
         payload = dict(payload)
-        payload['chunks'] = chunks
+        if isinstance(histories, list):
+            payload['chunks'] = list(chunks)
+        else:
+            payload['chunks'] = _prefetch(chunks, _cfg['vocab_history_prefetch_chunks'])
         return payload
 
 
 class SynonymExtractionModule(ModuleBase):
-    def __init__(self, llm: Optional[Any] = None, *, return_trace: bool = False) -> None:
+    """Extract synonym candidates from history chunks.
+
+    Consecutive chunks are packed into one prompt up to ``vocab_extraction_max_prompt_tokens``,
+    and up to ``max_inflight`` prompts of a user are extracted concurrently; ``llm_budget``
+    caps in-flight LLM calls across every user sharing it.  Candidates from all prompts are
+    merged before planning.
+    """
+
+    def __init__(
+        self,
+        llm: Optional[Any] = None,
+        *,
+        llm_budget: Optional[threading.BoundedSemaphore] = None,
+        max_inflight: Optional[int] = None,
+        return_trace: bool = False,
+    ) -> None:
         super().__init__(return_trace=return_trace)
         if llm is None:
             llm = AutoModel(model='llm', config=get_config_path())
@@ -461,6 +615,8 @@ class SynonymExtractionModule(ModuleBase):
             format=JsonFormatter(),
             stream=False,
         )
+        self._llm_budget = llm_budget
+        self._max_inflight = max(1, int(max_inflight or _cfg['vocab_evolution_llm_concurrency']))
 
     def _coerce_output(self, value: Any) -> List[Dict[str, Any]]:
         if isinstance(value, list):
@@ -521,37 +677,70 @@ class SynonymExtractionModule(ModuleBase):
                 existing.reason = item.reason
         return list(merged.values())
 
+    def _extract(self, request: VocabEvolutionRequest, user_id: str, pack: Dict[str, Any], **kwargs: Any) -> Any:
+        prompt_payload = {
+            'max_pairs': str(request.max_pairs_per_chunk * pack.get('chunk_count', 1)),
+            'history_segments': pack['text'],
+        }
+        attempts = max(1, request.extraction_retries)
+        for attempt in range(attempts):
+            try:
+                # The budget slot is held per attempt, so a failing user never blocks others between retries.
+                with _llm_slot(self._llm_budget):
+                    return self._llm(prompt_payload, **kwargs)
+            except Exception as exc:
+                LOG.warning(
+                    f'[VocabEvolution] extraction failed user={user_id!r} '
+                    f'attempt={attempt + 1} error={exc}'
+                )
+                last_error = exc
+        # Fail the user rather than return nothing: its watermark must not move past unread histories.
+        raise RuntimeError(f'synonym extraction failed after {attempts} attempts: {last_error}') from last_error
+
+    def _iter_extracted(self, request: VocabEvolutionRequest, user_id: str,
+                        packs: Iterable[Dict[str, Any]], **kwargs: Any) -> Iterator[Tuple[Dict[str, Any], Any]]:
+        """Yield ``(pack, raw_result)`` in pack order, keeping at most ``max_inflight`` packs in flight."""
+        if self._max_inflight <= 1:
+            for pack in packs:
+                yield pack, self._extract(request, user_id, pack, **kwargs)
+            return
+        inflight: deque = deque()
+        with ThreadPoolExecutor(max_workers=self._max_inflight) as pool:
+            for pack in packs:
+                inflight.append((pack, pool.submit(self._extract, request, user_id, pack, **kwargs)))
+                if len(inflight) >= self._max_inflight:
+                    done_pack, future = inflight.popleft()
+                    yield done_pack, future.result()
+            while inflight:
+                done_pack, future = inflight.popleft()
+                yield done_pack, future.result()
+
     def forward(self, payload: Dict[str, Any], **kwargs: Any) -> Dict[str, Any]:
         request: VocabEvolutionRequest = payload['request']
         user_id = payload['user_id']
-        histories: List[ChatHistoryRecord] = payload['histories']
-        history_by_id = {row.message_id: row for row in histories}
+        histories: Iterable[ChatHistoryRecord] = payload['histories']
+        # Streamed runs validate against each chunk's own records and keep only the evidence rows.
+        streamed = not isinstance(histories, list)
+        all_by_id = {} if streamed else {row.message_id: row for row in histories}
+        evidence: Dict[str, ChatHistoryRecord] = {}
         extracted: List[SynonymCandidate] = []
 
-        for chunk in payload.get('chunks', []):
-            prompt_payload = {
-                'max_pairs': str(request.max_pairs_per_chunk),
-                'history_segments': chunk['text'],
-            }
-            raw_result: Any = []
-            for attempt in range(max(1, request.extraction_retries)):
-                try:
-                    raw_result = self._llm(prompt_payload, **kwargs)
-                    records = self._coerce_output(raw_result)
-                    if records is not None:
-                        break
-                except Exception as exc:
-                    LOG.warning(
-                        f'[VocabEvolution] extraction failed user={user_id!r} '
-                        f'attempt={attempt + 1} error={exc}'
-                    )
+        packs = _pack_chunks(payload.get('chunks', []), _cfg['vocab_extraction_max_prompt_tokens'])
+        for pack, raw_result in self._iter_extracted(request, user_id, packs, **kwargs):
+            history_by_id = (
+                {row.message_id: row for row in pack['records']} if 'records' in pack else all_by_id
+            )
             for item in self._coerce_output(raw_result):
                 candidate = self._validate_candidate(user_id, item, history_by_id)
                 if candidate is not None:
                     extracted.append(candidate)
+                    if streamed:
+                        evidence.update((msg_id, history_by_id[msg_id]) for msg_id in candidate.message_ids)
 
         payload = dict(payload)
         payload['candidates'] = self._dedupe_candidates(extracted)
+        if streamed:
+            payload['histories'] = list(evidence.values())
         return payload
 
 
@@ -561,22 +750,27 @@ class ActionPlanningModule(ModuleBase):
         llm: Optional[Any] = None,
         *,
         fetch_vocab_groups_fn: Callable[..., Dict[str, Dict[str, Any]]] = fetch_vocab_groups_for_user_id,
+        llm_budget: Optional[threading.BoundedSemaphore] = None,
         return_trace: bool = False,
     ) -> None:
         super().__init__(return_trace=return_trace)
         self._base_llm = llm
         self._llm = None
+        self._llm_init_lock = threading.Lock()
         self._fetch_vocab_groups = fetch_vocab_groups_fn
+        self._llm_budget = llm_budget
 
     def _get_llm(self) -> Any:
         if self._llm is None:
-            from chat.pipelines.builders import get_automodel
-            base_llm = self._base_llm or get_automodel('llm')
-            self._llm = base_llm.share(
-                prompt=ChatPrompter(instruction=_CONFLICT_PROMPT),
-                format=JsonFormatter(),
-                stream=False,
-            )
+            with self._llm_init_lock:
+                if self._llm is None:
+                    from chat.pipelines.builders import get_automodel
+                    base_llm = self._base_llm or get_automodel('llm')
+                    self._llm = base_llm.share(
+                        prompt=ChatPrompter(instruction=_CONFLICT_PROMPT),
+                        format=JsonFormatter(),
+                        stream=False,
+                    )
         return self._llm
 
     def _build_memberships(self, groups: Dict[str, Dict[str, Any]]) -> Dict[str, List[str]]:
@@ -635,7 +829,9 @@ class ActionPlanningModule(ModuleBase):
         response: Dict[str, Any] = {}
         for attempt in range(max(1, request.conflict_retries)):
             try:
-                raw = self._get_llm()(prompt_payload, **kwargs)
+                llm = self._get_llm()
+                with _llm_slot(self._llm_budget):
+                    raw = llm(prompt_payload, **kwargs)
                 if isinstance(raw, dict):
                     response = raw
                     break
@@ -999,38 +1195,76 @@ def get_ppl_vocab_evolution(
     *,
     extraction_llm: Optional[Any] = None,
     conflict_llm: Optional[Any] = None,
-    fetch_histories_fn: Callable[..., List[Dict[str, Any]]] = fetch_chat_histories_for_user_id,
+    fetch_histories_fn: Callable[..., Iterable[Dict[str, Any]]] = iter_chat_histories_for_user_id,
     fetch_vocab_groups_fn: Callable[..., Dict[str, Dict[str, Any]]] = fetch_vocab_groups_for_user_id,
+    checkpoint_store: Optional[HistoryCheckpointStore] = None,
+    llm_budget: Optional[threading.BoundedSemaphore] = None,
 ):
     """Build the per-user vocabulary evolution pipeline."""
     with lazyllm.save_pipeline_result():
         with pipeline() as ppl:
-            ppl.collect_histories = HistoryCollector(fetch_histories_fn=fetch_histories_fn)
+            ppl.collect_histories = HistoryCollector(
+                fetch_histories_fn=fetch_histories_fn,
+                checkpoint_store=checkpoint_store,
+            )
             ppl.build_chunks = HistoryChunker()
-            ppl.extract_candidates = SynonymExtractionModule(llm=extraction_llm)
+            ppl.extract_candidates = SynonymExtractionModule(llm=extraction_llm, llm_budget=llm_budget)
             ppl.plan_actions = ActionPlanningModule(
                 llm=conflict_llm,
                 fetch_vocab_groups_fn=fetch_vocab_groups_fn,
+                llm_budget=llm_budget,
             )
     return ppl
 
 
 class VocabEvolutionService:
+    """Run the evolution pipeline for every user of a request.
+
+    Users run on up to ``user_concurrency`` worker threads while all their LLM calls share
+    a budget of ``llm_concurrency`` slots.  A failing user is logged and skipped.  When a
+    run journal is configured (by default next to the checkpoint file), each finished
+    user's actions are journaled, so re-running an interrupted request resumes with the
+    remaining users; ``commit_checkpoints`` clears the journal once actions are applied.
+
+    Runs that journal or checkpoint share state until ``commit_checkpoints``, so a ``run``
+    from another thread waits until the running one has been committed.  Without a journal
+    or checkpoint store there is nothing to commit and runs only serialize among themselves.
+    """
+
     def __init__(
         self,
         *,
         fetch_users_fn: Callable[..., List[str]] = list_chat_users,
-        fetch_histories_fn: Callable[..., List[Dict[str, Any]]] = fetch_chat_histories_for_user_id,
+        fetch_histories_fn: Callable[..., Iterable[Dict[str, Any]]] = iter_chat_histories_for_user_id,
         fetch_vocab_groups_fn: Callable[..., Dict[str, Dict[str, Any]]] = fetch_vocab_groups_for_user_id,
         extraction_llm: Optional[Any] = None,
         conflict_llm: Optional[Any] = None,
+        checkpoint_store: Optional[HistoryCheckpointStore] = None,
+        run_journal: Optional[EvolutionRunJournal] = None,
+        user_concurrency: Optional[int] = None,
+        llm_concurrency: Optional[int] = None,
     ) -> None:
         self._fetch_users = fetch_users_fn
+        if checkpoint_store is None and _cfg['vocab_evolution_checkpoint_path']:
+            checkpoint_store = HistoryCheckpointStore(_cfg['vocab_evolution_checkpoint_path'])
+        if run_journal is None and checkpoint_store is not None:
+            run_journal = EvolutionRunJournal(checkpoint_store.path + '.journal')
+        self._checkpoint_store = checkpoint_store
+        self._run_journal = run_journal
+        self._pending_watermarks: Dict[str, HistoryWatermark] = {}
+        self._pending_lock = threading.Lock()
+        self._run_cond = threading.Condition()
+        self._run_owner: Optional[int] = None
+        self._user_concurrency = max(1, int(user_concurrency or _cfg['vocab_evolution_user_concurrency']))
+        self._llm_budget = threading.BoundedSemaphore(
+            max(1, int(llm_concurrency or _cfg['vocab_evolution_llm_concurrency'])))
         self._pipeline = get_ppl_vocab_evolution(
             extraction_llm=extraction_llm,
             conflict_llm=conflict_llm,
             fetch_histories_fn=fetch_histories_fn,
             fetch_vocab_groups_fn=fetch_vocab_groups_fn,
+            checkpoint_store=checkpoint_store,
+            llm_budget=self._llm_budget,
         )
 
     def _resolve_users(self, request: VocabEvolutionRequest) -> List[str]:
@@ -1044,12 +1278,67 @@ class VocabEvolutionService:
             db_url=request.core_db_url,
         )
 
+    @staticmethod
+    def _run_signature(request: VocabEvolutionRequest, user_ids: Sequence[str]) -> str:
+        payload = json.dumps({'request': asdict(request), 'user_ids': list(user_ids)}, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def _process_user(self, request: VocabEvolutionRequest, user_id: str) -> Dict[str, Any]:
+        LOG.info(f'[VocabEvolution] processing user_id={user_id!r}')
+        lazyllm.globals._init_sid(sid=user_id)
+        lazyllm.locals._init_sid(sid=user_id)
+        setattr(lazyllm.globals, _LAZYLLM_CONTEXT_CREATE_USER_ATTR, user_id)
+        return self._pipeline({'request': request, 'user_id': user_id})
+
+    def _iter_user_results(self, request: VocabEvolutionRequest,
+                           user_ids: Sequence[str]) -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+        """Yield ``(user_id, result)`` as users finish; ``result`` is None when the user failed."""
+        def _safe(user_id: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+            try:
+                return user_id, self._process_user(request, user_id)
+            except Exception as exc:
+                LOG.error(f'[VocabEvolution] processing failed user_id={user_id!r} error={exc}')
+                return user_id, None
+
+        workers = min(self._user_concurrency, len(user_ids))
+        if workers <= 1:
+            for user_id in user_ids:
+                yield _safe(user_id)
+            return
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_safe, user_id) for user_id in user_ids]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def _claim_run(self) -> None:
+        # The owning thread may run again before committing (e.g. retrying a partial run).
+        me = threading.get_ident()
+        with self._run_cond:
+            while self._run_owner not in (None, me):
+                self._run_cond.wait()
+            self._run_owner = me
+
+    def _release_run(self) -> None:
+        with self._run_cond:
+            self._run_owner = None
+            self._run_cond.notify_all()
+
     def run(
         self,
         request: VocabEvolutionRequest | Dict[str, Any] | None = None,
     ) -> List[Dict[str, Any]]:
+        self._claim_run()
+        try:
+            actions = self._run(request)
+        except BaseException:
+            self._release_run()
+            raise
+        if self._checkpoint_store is None and self._run_journal is None:
+            self._release_run()
+        return actions
+
+    def _run(self, request: VocabEvolutionRequest | Dict[str, Any] | None) -> List[Dict[str, Any]]:
         req = VocabEvolutionRequest.from_value(request)
-        actions: List[Dict[str, Any]] = []
         user_ids = self._resolve_users(req)
         target_label = req.user_id or '<all-users>'
         LOG.info(
@@ -1057,30 +1346,69 @@ class VocabEvolutionService:
             f'resolved_user_count={len(user_ids)}'
         )
 
-        for user_id in user_ids:
-            LOG.info(f'[VocabEvolution] processing user_id={user_id!r}')
-            try:
-                lazyllm.globals._init_sid(sid=user_id)
-                lazyllm.locals._init_sid(sid=user_id)
-                setattr(lazyllm.globals, _LAZYLLM_CONTEXT_CREATE_USER_ATTR, user_id)
-                result = self._pipeline({'request': req, 'user_id': user_id})
-            except Exception as exc:
-                LOG.error(f'[VocabEvolution] processing failed user_id={user_id!r} error={exc}')
+        user_actions_by_id: Dict[str, List[Dict[str, Any]]] = {}
+        resumed: Dict[str, Dict[str, Any]] = {}
+        if self._run_journal is not None:
+            resumed = self._run_journal.open(self._run_signature(req, user_ids))
+        for user_id, entry in resumed.items():
+            user_actions_by_id[user_id] = list(entry.get('actions') or [])
+            if entry.get('watermark'):
+                with self._pending_lock:
+                    self._pending_watermarks[user_id] = HistoryWatermark.from_dict(entry['watermark'])
+        if resumed:
+            LOG.info(f'[VocabEvolution] resuming run with {len(resumed)} users already processed')
+
+        remaining = [user_id for user_id in user_ids if user_id not in resumed]
+        for user_id, result in self._iter_user_results(req, remaining):
+            if result is None:
                 continue
             user_actions = result.get('actions', [])
-            actions.extend(user_actions)
+            user_actions_by_id[user_id] = user_actions
+            progress = result.get('history_progress')
+            watermark = progress.watermark if isinstance(progress, HistoryProgress) and progress.count else None
+            if watermark is not None:
+                with self._pending_lock:
+                    self._pending_watermarks[user_id] = watermark
+            if self._run_journal is not None:
+                self._run_journal.record(user_id, user_actions, watermark)
             LOG.info(
                 f'[VocabEvolution] processed user_id={user_id!r} '
-                f'action_count={len(user_actions)} skipped_count={len(result.get("skipped_reasons", []))}'
+                f'action_count={len(user_actions)} skipped_count={len(result.get("skipped_reasons", []))} '
+                f'history_count={progress.count if isinstance(progress, HistoryProgress) else "-"}'
             )
 
+        # Keep the resolved user order regardless of completion order.
+        actions = [item for user_id in user_ids for item in user_actions_by_id.get(user_id, [])]
         serialized_actions = [_serialize_backend_action(item) for item in actions]
         LOG.info(
             f'[VocabEvolution] finished requested_user_id={target_label!r} '
-            f'action_count={len(serialized_actions)}'
+            f'action_count={len(serialized_actions)} failed_user_count={len(user_ids) - len(user_actions_by_id)}'
         )
         return serialized_actions
 
+    def commit_checkpoints(self) -> None:
+        """Persist watermarks of users processed since the last commit (call once their actions are applied).
+
+        Also lets a ``run`` waiting in another thread start.
+        """
+        try:
+            with self._pending_lock:
+                pending, self._pending_watermarks = self._pending_watermarks, {}
+            if self._checkpoint_store is not None and pending:
+                self._checkpoint_store.update(pending)
+                LOG.info(f'[VocabEvolution] committed history watermarks user_count={len(pending)}')
+            if self._run_journal is not None:
+                self._run_journal.clear()
+        finally:
+            self._release_run()
+
+    def release_run(self) -> None:
+        """Let a waiting ``run`` start without committing (call when applying the actions failed).
+
+        Pending watermarks and the journal are kept, so the next run resumes instead of starting over.
+        """
+        self._release_run()
+
 
 _service_lock = threading.Lock()
 _service: Optional[VocabEvolutionService] = None
@@ -1104,7 +1432,16 @@ def run_vocab_evolution(
 ) -> List[Dict[str, Any]]:
     svc = service or get_vocab_evolution_service()
     actions = svc.run(request)
-    apply_vocab_evolution_actions(actions, apply_url=apply_url, post_fn=post_fn)
+    try:
+        apply_vocab_evolution_actions(actions, apply_url=apply_url, post_fn=post_fn)
+    except Exception:
+        release_run = getattr(svc, 'release_run', None)
+        if release_run is not None:
+            release_run()
+        raise
+    commit_checkpoints = getattr(svc, 'commit_checkpoints', None)
+    if commit_checkpoints is not None:
+        commit_checkpoints()
     return actions
 
 
@@ -1114,6 +1451,7 @@ __all__ = [
     'ChatHistoryRecord',
     'HistoryChunker',
     'HistoryCollector',
+    'HistoryProgress',
     'SynonymCandidate',
     'SynonymExtractionModule',
     'VocabEvolutionRequest',
@@ -0,0 +1,236 @@
+"""Incremental AC automaton updates for vocabulary reloads.
+
+A full reload rebuilds the whole Aho-Corasick automaton even when evolution only
+touched a handful of groups.  ``IncrementalACProcessor`` keeps the automaton it was
+built with as an immutable *base* and expresses later vocabulary changes as a small
+*overlay*: an automaton over the added or re-clustered words, plus tombstones for
+base words that are gone or now belong to another group.  Matching walks both and
+drops tombstoned base hits, which yields the same matches as a rebuilt automaton.
+
+Each update returns a new processor sharing the base with the old one, so snapshots
+stay immutable.  Once the overlay outgrows a threshold, ``compact`` folds it into a
+fresh base; ``VocabManager`` runs that on a background thread.
+
+Usage:
+    proc = IncrementalACProcessor.build(rows, discriminator)
+    proc = proc.apply(new_rows)         # cheap while the diff is small
+    if proc.needs_compaction(0.1, 1024):
+        proc = proc.compact()
+"""
+from __future__ import annotations
+
+import copy
+from collections import Counter
+from operator import itemgetter
+from typing import Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+from lazyllm import LOG
+from lazyllm.thirdparty import ahocorasick
+from lazyllm.tools.rag.query_enh_ac import QueryEnhACProcessor
+
+
+class VocabIndex:
+    """Normalised view of vocab rows: last-wins ``word -> cluster`` plus all (word, cluster) memberships.
+
+    These are exactly the inputs ``QueryEnhACProcessor`` derives its automaton and
+    cluster lists from, so two rows lists with equal indexes build equivalent processors.
+    """
+
+    __slots__ = ('rows', 'entries', 'word_to_cluster', 'pairs', '_multi')
+
+    def __init__(self, rows: List[dict], word_key: str = 'word', cluster_key: str = 'cluster_id') -> None:
+        self.rows = rows
+        try:
+            entries = list(map(itemgetter(word_key, cluster_key), rows))
+        except KeyError:
+            entries = [(r.get(word_key), r.get(cluster_key)) for r in rows]
+        word_to_cluster = dict(entries)
+        if None in word_to_cluster or None in word_to_cluster.values():
+            # Rows missing either key are skipped, as the processor does.
+            entries = [(w, c) for w, c in entries if w is not None and c is not None]
+            word_to_cluster = dict(entries)
+        self.entries = entries
+        self.word_to_cluster: Dict = word_to_cluster
+        self.pairs: FrozenSet[Tuple] = frozenset(entries)
+        self._multi: Optional[FrozenSet] = None
+
+    def signature(self) -> int:
+        """Order-independent hash of the memberships; callers compare ``word_to_cluster`` on a hit."""
+        return hash(self.pairs)
+
+    def multi_cluster_words(self) -> FrozenSet:
+        """Words listed under several clusters, whose last-wins cluster depends on row order."""
+        if self._multi is None:
+            if len(self.pairs) == len(self.word_to_cluster):
+                self._multi = frozenset()
+            else:
+                counts = Counter(w for w, _ in self.pairs)
+                self._multi = frozenset(w for w, n in counts.items() if n > 1)
+        return self._multi
+
+    def cluster_lists(self, clusters=None) -> Dict:
+        """Word lists for ``clusters`` (all when None), built in row order exactly as the processor does."""
+        entries = self.entries if clusters is None else [(w, c) for w, c in self.entries if c in clusters]
+        word_sets: Dict = {}
+        for w, c in entries:
+            words = word_sets.get(c)
+            if words is None:
+                words = word_sets[c] = set()
+            words.add(w)
+        return {c: list(words) for c, words in word_sets.items()}
+
+
+class _LayeredAutomaton:
+    """``iter``-compatible view over a base automaton, an overlay and tombstoned base words."""
+
+    __slots__ = ('base', 'overlay', 'tombstones', 'size')
+
+    def __init__(self, base, overlay, tombstones: FrozenSet, size: int) -> None:
+        self.base = base
+        self.overlay = overlay
+        self.tombstones = tombstones
+        self.size = size
+
+    def __bool__(self) -> bool:
+        return self.size > 0
+
+    def iter(self, text: str) -> Iterator[Tuple[int, Tuple]]:
+        if self.base is not None:
+            if self.tombstones:
+                tombstones = self.tombstones
+                for end, value in self.base.iter(text):
+                    if value[1] not in tombstones:
+                        yield end, value
+            else:
+                yield from self.base.iter(text)
+        if self.overlay is not None:
+            yield from self.overlay.iter(text)
+
+
+_MISSING = object()
+
+
+def _build_automaton(word_to_cluster: Dict):
+    if not word_to_cluster:
+        return None
+    automaton = ahocorasick.Automaton()
+    for word, cluster_id in word_to_cluster.items():
+        automaton.add_word(str(word), (cluster_id, str(word)))
+    automaton.make_automaton()
+    return automaton
+
+
+class IncrementalACProcessor(QueryEnhACProcessor):
+    """QueryEnhACProcessor whose automaton is a shared base plus a per-snapshot delta overlay.
+
+    Instances are treated as immutable: ``apply`` and ``compact`` return new processors.
+    """
+
+    _base = None
+    _base_words: Dict = {}
+    _overlay_words: Dict = {}
+    _tombstones: FrozenSet = frozenset()
+    _index: Optional[VocabIndex] = None
+
+    @classmethod
+    def build(cls, rows: List[dict], discriminator=None,
+              index: Optional[VocabIndex] = None) -> 'IncrementalACProcessor':
+        """Full build: every word goes into a new base automaton."""
+        proc = cls(data_source=[], discriminator=discriminator)
+        return proc._rebuilt(index or VocabIndex(rows, proc.word_key, proc.cluster_key))
+
+    @property
+    def overlay_size(self) -> int:
+        return len(self._overlay_words) + len(self._tombstones)
+
+    @property
+    def index(self) -> Optional[VocabIndex]:
+        return self._index
+
+    def needs_compaction(self, ratio: float, min_size: int) -> bool:
+        return self.overlay_size > max(min_size, ratio * len(self._base_words))
+
+    def _set_layers(self, base, base_words: Dict, overlay_words: Dict, tombstones: FrozenSet) -> None:
+        self._base = base
+        self._base_words = base_words
+        self._overlay_words = overlay_words
+        self._tombstones = tombstones
+        if not overlay_words and not tombstones:
+            self.automaton = base
+        else:
+            # Automaton values carry str(word), so tombstones are compared in that form.
+            self.automaton = _LayeredAutomaton(
+                base, _build_automaton(overlay_words), frozenset(map(str, tombstones)), len(self.word_to_cluster))
+
+    def _derive(self, index: VocabIndex) -> 'IncrementalACProcessor':
+        # Shallow copy keeps the boundary filter (and, for overlays, the base automaton) shared.
+        proc = copy.copy(self)
+        proc._index = index
+        proc.vocab_data = index.rows
+        proc._data_source = index.rows
+        proc.word_to_cluster = index.word_to_cluster
+        return proc
+
+    def _rebuilt(self, index: VocabIndex) -> 'IncrementalACProcessor':
+        proc = self._derive(index)
+        proc.cluster_to_words = index.cluster_lists()
+        proc._set_layers(_build_automaton(index.word_to_cluster), index.word_to_cluster, {}, frozenset())
+        return proc
+
+    def apply(self, rows: List[dict], index: Optional[VocabIndex] = None) -> 'IncrementalACProcessor':
+        """Return a snapshot for ``rows`` that reuses this one's base automaton.
+
+        Only words whose memberships changed (plus words listed under several clusters,
+        whose winner depends on row order) are compared against the base.  Falls back to
+        a full build when more than half of the new vocabulary would land in the overlay,
+        since the overlay would then cost as much as a rebuild.
+        """
+        index = index or VocabIndex(rows, self.word_key, self.cluster_key)
+        if self._index is None:
+            return self._rebuilt(index)
+        changed = self._index.pairs ^ index.pairs
+        candidates = {w for w, _ in changed}
+        candidates.update(index.multi_cluster_words())
+
+        new_words, base_words = index.word_to_cluster, self._base_words
+        overlay_words = dict(self._overlay_words)
+        tombstones = set(self._tombstones)
+        for word in candidates:
+            overlay_words.pop(word, None)
+            tombstones.discard(word)
+            new_cluster = new_words.get(word, _MISSING)
+            base_cluster = base_words.get(word, _MISSING)
+            if new_cluster == base_cluster:
+                continue
+            if base_cluster is not _MISSING:
+                tombstones.add(word)
+            if new_cluster is not _MISSING:
+                overlay_words[word] = new_cluster
+        if (len(overlay_words) + len(tombstones)) * 2 > len(new_words):
+            return self._rebuilt(index)
+
+        affected = {c for _, c in changed}
+        cluster_to_words = dict(self.cluster_to_words)
+        for cluster_id in affected:
+            cluster_to_words.pop(cluster_id, None)
+        cluster_to_words.update(index.cluster_lists(affected))
+
+        proc = self._derive(index)
+        proc.cluster_to_words = cluster_to_words
+        proc._set_layers(self._base, base_words, overlay_words, frozenset(tombstones))
+        LOG.debug(
+            f'[VocabIncremental] applied diff: overlay={len(overlay_words)} '
+            f'tombstones={len(tombstones)} clusters={len(affected)}'
+        )
+        return proc
+
+    def compact(self) -> 'IncrementalACProcessor':
+        """Return an equivalent snapshot whose base automaton holds the whole vocabulary."""
+        proc = copy.copy(self)
+        proc._set_layers(_build_automaton(self.word_to_cluster), self.word_to_cluster, {}, frozenset())
+        return proc
+
+    def __copy__(self) -> 'IncrementalACProcessor':
+        proc = object.__new__(type(self))
+        proc.__dict__.update(self.__dict__)
+        return proc
@@ -1,6 +1,8 @@
 """VocabManager: Multi-user vocabulary manager wrapping QueryEnhACProcessor with hot-reload support.
 
-Each user (user_id) maintains an independent QueryEnhACProcessor instance.
+Each user (user_id) has its own VocabManager; users with identical vocabularies share one
+immutable QueryEnhACProcessor snapshot, and the registry of managers is bounded (LRU by
+user count and approximate memory, see ``vocab_registry_max_users`` / ``vocab_registry_max_mb``).
 Vocabulary data is queried from the backend-managed PostgreSQL core.public.words table
 by user_id.
 
@@ -18,12 +20,19 @@ Environment variables:
 from __future__ import annotations
 
 import threading
-from typing import Callable, List, Optional, Union
+import weakref
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Union
 
 from lazyllm import LOG
-from lazyllm.tools.rag.query_enh_ac import QueryEnhACProcessor
+
+from config import config as _cfg
 
 from .db import fetch_vocab_for_user_id
+from .incremental import IncrementalACProcessor, VocabIndex
+
+# Rough per-word cost of a loaded processor (dict entries, cluster lists, automaton nodes).
+_APPROX_BYTES_PER_WORD = 320
 
 
 def get_automodel(role: str):
@@ -32,9 +41,108 @@ def get_automodel(role: str):
     return _get_automodel(role)
 
 
+_discriminator_lock = threading.Lock()
+_discriminator = None
+_discriminator_loaded = False
+
+
+def _shared_discriminator():
+    """The process-wide disambiguation LLM; one instance, so equal vocabularies share a snapshot."""
+    global _discriminator, _discriminator_loaded
+    if not _discriminator_loaded:
+        with _discriminator_lock:
+            if not _discriminator_loaded:
+                _discriminator = get_automodel('llm')
+                _discriminator_loaded = True
+    return _discriminator
+
+
+class _SnapshotPool:
+    """Immutable processors shared by every user whose vocabulary is identical.
+
+    Entries are keyed by an order-independent hash of the vocabulary and confirmed by
+    comparing the word/cluster maps on a hit.  They hold weak references, so a snapshot
+    lives exactly as long as some manager still points at it; ``live_bytes`` tracks the
+    approximate size of the live ones.  Processors handed out here are never mutated:
+    a reload builds, derives or reuses another one.
+    """
+
+    def __init__(self) -> None:
+        # RLock: a finalizer may fire while this thread already holds the lock.
+        self._lock = threading.RLock()
+        self._entries: Dict[tuple, tuple] = {}
+        self.live_bytes = 0
+
+    def acquire(self, rows: List[dict], discriminator,
+                previous: Optional[IncrementalACProcessor] = None) -> IncrementalACProcessor:
+        """Return a snapshot for ``rows``: a pooled equal one, a delta over ``previous``, or a full build."""
+        index = VocabIndex(rows)
+        # The entry keeps the discriminator alive so its id() cannot be reused for another model.
+        key = (id(discriminator), index.signature())
+        proc = self._lookup(key, index)
+        if proc is not None:
+            return proc
+
+        if isinstance(previous, IncrementalACProcessor):
+            proc = previous.apply(rows, index=index)
+        else:
+            proc = IncrementalACProcessor.build(rows, discriminator, index=index)
+        with self._lock:
+            existing = self._lookup(key, index)
+            if existing is not None:
+                return existing
+            self._track(key, proc, discriminator)
+        return proc
+
+    def replace(self, old: IncrementalACProcessor, new: IncrementalACProcessor) -> None:
+        """Point the pool entry of ``old`` at its equivalent ``new`` (e.g. a compacted snapshot)."""
+        with self._lock:
+            for key, entry in self._entries.items():
+                if entry[0]() is old:
+                    self._track(key, new, entry[1])
+                    return
+
+    def _track(self, key: tuple, proc: IncrementalACProcessor, discriminator) -> None:
+        size = len(proc.word_to_cluster) * _APPROX_BYTES_PER_WORD
+        self._entries[key] = (weakref.ref(proc), discriminator)
+        self.live_bytes += size
+        weakref.finalize(proc, self._release, key, size)
+
+    def _lookup(self, key: tuple, index: VocabIndex) -> Optional[IncrementalACProcessor]:
+        with self._lock:
+            entry = self._entries.get(key)
+            proc = entry[0]() if entry else None
+        if proc is None or proc.index is None:
+            return None
+        if proc.word_to_cluster != index.word_to_cluster or proc.index.pairs != index.pairs:
+            return None
+        return proc
+
+    def _release(self, key: tuple, size: int) -> None:
+        with self._lock:
+            self.live_bytes -= size
+            entry = self._entries.get(key)
+            if entry is not None and entry[0]() is None:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+_snapshots = _SnapshotPool()
+
+
 class VocabManager:
     """Single-user vocabulary manager: bound to one user_id, loads vocabulary from DB, supports hot-reload.
 
+    The processor in ``_proc`` is an immutable snapshot, possibly shared with other users
+    holding the same vocabulary.  Queries read it without locking; ``reload`` builds the
+    next snapshot aside and swaps the reference in one assignment.  Reloads apply the
+    vocabulary diff as an overlay on the current automaton; once the overlay passes
+    ``vocab_overlay_compact_ratio`` / ``vocab_overlay_compact_min`` a background thread
+    folds it into a fresh base automaton.
+
     Args:
         user_id: User identifier.
         data_source: Optional custom data source (callable or list);
@@ -43,12 +151,12 @@ class VocabManager:
 
     def __init__(self, user_id: str = '', *, data_source: Optional[Callable] = None) -> None:
         self._user_id = user_id
-        self._lock = threading.RLock()
+        self._reload_lock = threading.Lock()
+        self._referenced = False
+        self._compaction_thread: Optional[threading.Thread] = None
+        self._discriminator = _shared_discriminator()
         actual_source = data_source if data_source is not None else self._load_from_db
-        self._proc = QueryEnhACProcessor(
-            data_source=actual_source,
-            discriminator=get_automodel('llm'),
-        )
+        self._proc = self._build_snapshot(actual_source)
         LOG.info(f'[VocabManager] initialized for user_id={user_id!r}, vocab_size={self.vocab_size}')
 
     # ------------------------------------------------------------------
@@ -60,6 +168,47 @@ class VocabManager:
         field format matches QueryEnhACProcessor."""
         return fetch_vocab_for_user_id(self._user_id)
 
+    def _build_snapshot(self, data_source: Union[Callable, List[dict]],
+                        previous: Optional[IncrementalACProcessor] = None) -> IncrementalACProcessor:
+        rows = data_source() if callable(data_source) else list(data_source)
+        return _snapshots.acquire(rows, self._discriminator, previous=previous)
+
+    @staticmethod
+    def _needs_compaction(proc) -> bool:
+        return isinstance(proc, IncrementalACProcessor) and proc.needs_compaction(
+            float(_cfg['vocab_overlay_compact_ratio']), _cfg['vocab_overlay_compact_min'])
+
+    def _schedule_compaction(self) -> None:
+        # Called with _reload_lock held.
+        if self._compaction_thread is not None or not self._needs_compaction(self._proc):
+            return
+        self._compaction_thread = threading.Thread(
+            target=self._compact_overlay, name=f'vocab-compact-{self._user_id}', daemon=True)
+        self._compaction_thread.start()
+
+    def _compact_overlay(self) -> None:
+        while True:
+            with self._reload_lock:
+                proc = self._proc
+                if not self._needs_compaction(proc):
+                    self._compaction_thread = None
+                    return
+            try:
+                compacted = proc.compact()
+            except Exception as exc:
+                LOG.error(f'[VocabManager] user_id={self._user_id!r} compaction failed: {exc}')
+                with self._reload_lock:
+                    self._compaction_thread = None
+                return
+            with self._reload_lock:
+                if self._proc is proc:
+                    self._proc = compacted
+                    _snapshots.replace(proc, compacted)
+                    LOG.info(
+                        f'[VocabManager] compacted vocab overlay for user_id={self._user_id!r}, '
+                        f'vocab_size={len(compacted.word_to_cluster)}'
+                    )
+
     def _enhance_query(self, query: Union[str, List]) -> Union[str, List]:
         try:
             enhanced_query = self._proc(query)
@@ -82,28 +231,31 @@ class VocabManager:
     # ------------------------------------------------------------------
 
     def reload(self) -> int:
-        """Hot-reload: re-query vocabulary from the database and rebuild the AC automaton.
+        """Hot-reload: re-query vocabulary from the database and swap in an updated AC automaton.
+
+        Only the diff against the current vocabulary is built; queries running during the
+        reload keep using the previous snapshot.
 
         Returns:
             Total number of words in the updated vocabulary.
         """
-        with self._lock:
-            self._proc.update_data_source(self._load_from_db)
-            count = len(self._proc.word_to_cluster)
-            LOG.info(f'[VocabManager] reloaded for user_id={self._user_id!r}, vocab_size={count}')
-            return count
+        with self._reload_lock:
+            proc = self._build_snapshot(self._load_from_db, previous=self._proc)
+            self._proc = proc
+            self._schedule_compaction()
+        count = len(proc.word_to_cluster)
+        LOG.info(f'[VocabManager] reloaded for user_id={self._user_id!r}, vocab_size={count}')
+        return count
 
     def __call__(self, query: Union[str, List]) -> Union[str, List]:
         """Enhance the query using the vocabulary and return;
         returns as-is when vocabulary is empty, no match survives filtering, or enhancement fails."""
-        with self._lock:
-            return self._enhance_query(query)
+        return self._enhance_query(query)
 
     @property
     def vocab_size(self) -> int:
         """Number of words currently loaded."""
-        with self._lock:
-            return len(self._proc.word_to_cluster)
+        return len(self._proc.word_to_cluster)
 
     @property
     def user_id(self) -> str:
@@ -114,25 +266,90 @@ class VocabManager:
 # Multi-user registry (replaces the original module-level singleton)
 # ---------------------------------------------------------------------------
 
-_registry: dict = {}
-_registry_lock = threading.Lock()
+class _VocabRegistry:
+    """Bounded user_id -> VocabManager map with CLOCK (second-chance) eviction.
+
+    Hits are plain dict reads that only set the manager's reference bit, so the hot path
+    takes no lock.  Misses build the manager under the lock and then evict unreferenced
+    managers, oldest first, while the registry exceeds ``vocab_registry_max_users`` or the
+    live snapshots exceed ``vocab_registry_max_mb``.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._managers: 'OrderedDict[str, VocabManager]' = OrderedDict()
+        self.evictions = 0
+
+    def get(self, user_id: str) -> VocabManager:
+        mgr = self._managers.get(user_id)
+        if mgr is not None:
+            mgr._referenced = True
+            return mgr
+        with self._lock:
+            mgr = self._managers.get(user_id)
+            if mgr is None:
+                mgr = VocabManager(user_id)
+                self._managers[user_id] = mgr
+                self._evict(keep=user_id)
+            return mgr
+
+    def _over_budget(self) -> bool:
+        max_users = _cfg['vocab_registry_max_users']
+        max_bytes = _cfg['vocab_registry_max_mb'] * 2 ** 20
+        return bool(
+            (max_users and len(self._managers) > max_users)
+            or (max_bytes and _snapshots.live_bytes > max_bytes)
+        )
+
+    def _evict(self, keep: str) -> None:
+        # Each manager gets at most one second chance per sweep; shared snapshots may keep
+        # memory above the cap, in which case the sweep stops instead of emptying the registry.
+        budget = 2 * len(self._managers)
+        evicted = 0
+        while budget and len(self._managers) > 1 and self._over_budget():
+            budget -= 1
+            user_id, mgr = self._managers.popitem(last=False)
+            if user_id == keep or mgr._referenced:
+                mgr._referenced = False
+                self._managers[user_id] = mgr
+                continue
+            evicted += 1
+        if evicted:
+            self.evictions += evicted
+            LOG.info(
+                f'[VocabManager] registry evicted={evicted} users={len(self._managers)} '
+                f'live_mb={_snapshots.live_bytes / 2 ** 20:.1f}'
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._managers.clear()
+
+    def stats(self) -> dict:
+        return {
+            'users': len(self._managers),
+            'snapshots': len(_snapshots),
+            'live_bytes': _snapshots.live_bytes,
+            'evictions': self.evictions,
+        }
+
+
+_registry = _VocabRegistry()
 
 
 def get_vocab_manager(user_id: str = '') -> VocabManager:
-    """Return the VocabManager for the given user_id (lazy init, one instance per user_id).
+    """Return the VocabManager for the given user_id (lazy init, one instance per cached user_id).
 
     Args:
         user_id: User identifier.
                  Pass an empty string to get the default manager with no user filter (vocabulary is usually empty).
     """
-    if user_id not in _registry:
-        with _registry_lock:
-            if user_id not in _registry:
-                _registry[user_id] = VocabManager(user_id)
-    return _registry[user_id]
+    return _registry.get(user_id)
 
 
 def clear_registry() -> None:
     """Clear the registry (for testing only, to ensure isolation between test cases)."""
-    with _registry_lock:
-        _registry.clear()
+    global _discriminator, _discriminator_loaded
+    _registry.clear()
+    with _discriminator_lock:
+        _discriminator, _discriminator_loaded = None, False
@@ -0,0 +1,34 @@
+package doc
+
+import (
+	"context"
+	"time"
+
+	"lazymind/core/common"
+	"lazymind/core/log"
+)
+
+const kbInvalidatePath = "/api/kb/invalidate"
+
+// notifyKBInvalidate tells the chat service that a dataset's configuration changed,
+// so it drops the search pipelines it compiled for that dataset. Chat requests filter
+// on dataset ids, so datasetID is sent rather than the algo-side kb id.
+func notifyKBInvalidate(ctx context.Context, datasetID string) {
+	invalidateURL := common.JoinURL(common.ChatServiceEndpoint(), kbInvalidatePath)
+	if err := common.ApiPost(ctx, invalidateURL, map[string]string{"kb_id": datasetID}, nil, nil, 15*time.Second); err != nil {
+		log.Logger.Warn().Err(err).Str("url", invalidateURL).Str("dataset_id", datasetID).Msg("kb invalidate notify failed")
+	}
+}
+
+const searchCacheInvalidatePath = "/api/search_cache/invalidate"
+
+// notifySearchCacheInvalidate tells the chat service that documents of a dataset were
+// added, reparsed, moved or deleted, so it stops serving cached search results for it.
+// Parsing finishes asynchronously; results cached while it runs expire with the chat
+// service's search cache TTL.
+func notifySearchCacheInvalidate(ctx context.Context, datasetID string) {
+	invalidateURL := common.JoinURL(common.ChatServiceEndpoint(), searchCacheInvalidatePath)
+	if err := common.ApiPost(ctx, invalidateURL, map[string]string{"dataset": datasetID}, nil, nil, 15*time.Second); err != nil {
+		log.Logger.Warn().Err(err).Str("url", invalidateURL).Str("dataset_id", datasetID).Msg("search cache invalidate notify failed")
+	}
+}
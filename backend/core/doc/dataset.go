@@ -1048,6 +1048,7 @@ func DeleteDataset(w http.ResponseWriter, r *http.Request) {
 		Str("user_id", userID).
 		Dur("elapsed", time.Since(kbStart)).
 		Msg("kb service delete ok")
+	notifyKBInvalidate(r.Context(), datasetID)
 
 	// 2) text datasets
 	now := time.Now().UTC()
@@ -1182,6 +1183,9 @@ func UpdateDataset(w http.ResponseWriter, r *http.Request) {
 		Str("algo_id", algoID).
 		Dur("elapsed", time.Since(kbStart)).
 		Msg("kb service update ok")
+	if newAlgoID != "" {
+		notifyKBInvalidate(r.Context(), datasetID)
+	}
 
 	now := time.Now().UTC()
 	ds.DisplayName = newDisplay
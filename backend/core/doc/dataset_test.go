@@ -247,6 +247,61 @@ func TestUpdateDatasetUsesNamespacedAlgoDisplayName(t *testing.T) {
 	}
 }
 
+func TestUpdateDatasetAlgoChangeInvalidatesChatSearchPipelines(t *testing.T) {
+	db := newDocumentTestDB(t)
+	now := time.Date(2026, 5, 14, 10, 0, 0, 0, time.UTC)
+	if err := db.Create(&orm.Dataset{
+		ID:          "ds-rebind",
+		KbID:        "kb-rebind",
+		DisplayName: "name",
+		Type:        1,
+		Ext:         json.RawMessage(`{"algo_id":"general_algo"}`),
+		BaseModel: orm.BaseModel{
+			CreateUserID: "user-123",
+			CreatedAt:    now,
+			UpdatedAt:    now,
+		},
+	}).Error; err != nil {
+		t.Fatalf("create dataset: %v", err)
+	}
+
+	var invalidated map[string]string
+	prevTransport := http.DefaultTransport
+	http.DefaultTransport = roundTripFunc(func(r *http.Request) (*http.Response, error) {
+		switch r.Host + r.URL.Path {
+		case "algo.test/v1/kbs/kb-rebind/update":
+			return testJSONResponse(http.StatusOK, `{}`), nil
+		case "algo.test/v1/algo/other_algo/groups":
+			return testJSONResponse(http.StatusOK, `{"code":200,"data":[]}`), nil
+		case "chat.test/api/kb/invalidate":
+			if err := json.NewDecoder(r.Body).Decode(&invalidated); err != nil {
+				t.Errorf("decode kb invalidate request: %v", err)
+			}
+			return testJSONResponse(http.StatusOK, `{"status":"ok"}`), nil
+		default:
+			t.Errorf("unexpected request %s%s", r.Host, r.URL.Path)
+			return testJSONResponse(http.StatusNotFound, `{"message":"not found"}`), nil
+		}
+	})
+	t.Cleanup(func() { http.DefaultTransport = prevTransport })
+	t.Setenv("LAZYMIND_ALGO_SERVICE_URL", "http://algo.test")
+	t.Setenv("LAZYMIND_CHAT_SERVICE_URL", "http://chat.test")
+
+	req := httptest.NewRequest(http.MethodPatch, "/api/core/datasets/ds-rebind", strings.NewReader(`{"algo":{"algo_id":"other_algo"}}`))
+	req = mux.SetURLVars(req, map[string]string{"dataset": "ds-rebind"})
+	req.Header.Set("X-User-Id", "user-123")
+	rec := httptest.NewRecorder()
+
+	UpdateDataset(rec, req)
+
+	if rec.Code != http.StatusOK {
+		t.Fatalf("expected status 200, got %d: %s", rec.Code, rec.Body.String())
+	}
+	if invalidated["kb_id"] != "ds-rebind" {
+		t.Fatalf("expected chat search pipelines of ds-rebind to be invalidated, got %#v", invalidated)
+	}
+}
+
 func TestParseDatasetScanManaged(t *testing.T) {
 	t.Parallel()
 
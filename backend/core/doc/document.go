@@ -1214,6 +1214,7 @@ func deleteExternalDocs(r *http.Request, datasetID string, rows []orm.Document)
 		Any("request_body", req).
 		Any("response_body", resp).
 		Msg("external delete-docs request succeeded")
+	notifySearchCacheInvalidate(requestContext(r), datasetID)
 	return nil
 }
 
@@ -164,6 +164,109 @@ func TestBatchDeleteDocumentRecalculatesParentFolderSize(t *testing.T) {
 	assertFolderHasZeroSize(t, db, "dataset-1", "folder-1")
 }
 
+func TestDeleteDocumentInvalidatesChatSearchCache(t *testing.T) {
+	db := newDocumentTestDB(t)
+	seedFolderWithSizedDoc(t, db, "dataset-1", "folder-1", "doc-1", 31744)
+	if err := db.Model(&orm.Document{}).Where("id = ?", "doc-1").Update("lazyllm_doc_id", "lazy-1").Error; err != nil {
+		t.Fatalf("bind lazyllm doc id: %v", err)
+	}
+
+	var invalidated map[string]string
+	prevTransport := http.DefaultTransport
+	http.DefaultTransport = roundTripFunc(func(r *http.Request) (*http.Response, error) {
+		switch r.Host + r.URL.Path {
+		case "docs.test/v1/docs/delete":
+			return testJSONResponse(http.StatusOK, `{}`), nil
+		case "chat.test/api/search_cache/invalidate":
+			if err := json.NewDecoder(r.Body).Decode(&invalidated); err != nil {
+				t.Errorf("decode search cache invalidate request: %v", err)
+			}
+			return testJSONResponse(http.StatusOK, `{"status":"ok"}`), nil
+		default:
+			t.Errorf("unexpected request %s%s", r.Host, r.URL.Path)
+			return testJSONResponse(http.StatusNotFound, `{"message":"not found"}`), nil
+		}
+	})
+	t.Cleanup(func() { http.DefaultTransport = prevTransport })
+	t.Setenv("LAZYMIND_DOCUMENT_SERVICE_URL", "http://docs.test")
+	t.Setenv("LAZYMIND_CHAT_SERVICE_URL", "http://chat.test")
+
+	req := httptest.NewRequest(http.MethodDelete, "/api/core/datasets/dataset-1/documents/doc-1", nil)
+	req.Header.Set("X-User-Id", "user-1")
+	req = mux.SetURLVars(req, map[string]string{"dataset": "dataset-1", "document": "doc-1"})
+	rec := httptest.NewRecorder()
+
+	DeleteDocument(rec, req)
+
+	if rec.Code != http.StatusOK {
+		t.Fatalf("expected status 200, got %d: %s", rec.Code, rec.Body.String())
+	}
+	if invalidated["dataset"] != "dataset-1" {
+		t.Fatalf("expected search cache of dataset-1 to be invalidated, got %#v", invalidated)
+	}
+}
+
+func TestMoveDocumentInvalidatesSourceAndTargetSearchCache(t *testing.T) {
+	db := newDocumentTestDB(t)
+	seedFolderWithSizedDoc(t, db, "dataset-1", "folder-1", "doc-1", 31744)
+	seedFolderWithSizedDoc(t, db, "dataset-2", "folder-2", "doc-2", 1024)
+	if err := db.Model(&orm.Document{}).Where("id = ?", "doc-1").Update("lazyllm_doc_id", "lazy-1").Error; err != nil {
+		t.Fatalf("bind lazyllm doc id: %v", err)
+	}
+	if err := db.Create(&orm.Task{
+		ID:              "task-1",
+		DocID:           "doc-1",
+		DatasetID:       "dataset-1",
+		TaskType:        "move",
+		TargetDatasetID: "dataset-2",
+		TargetPID:       "folder-2",
+		Ext:             json.RawMessage(`{}`),
+		BaseModel: orm.BaseModel{
+			CreateUserID:   "user-1",
+			CreateUserName: "Alice",
+			CreatedAt:      time.Date(2026, 5, 12, 10, 0, 0, 0, time.UTC),
+			UpdatedAt:      time.Date(2026, 5, 12, 10, 0, 0, 0, time.UTC),
+		},
+	}).Error; err != nil {
+		t.Fatalf("create task: %v", err)
+	}
+
+	var invalidated []string
+	prevTransport := http.DefaultTransport
+	http.DefaultTransport = roundTripFunc(func(r *http.Request) (*http.Response, error) {
+		switch r.Host + r.URL.Path {
+		case "docs.test/v1/docs/transfer":
+			return testJSONResponse(http.StatusOK, `{}`), nil
+		case "chat.test/api/search_cache/invalidate":
+			var body map[string]string
+			if err := json.NewDecoder(r.Body).Decode(&body); err != nil {
+				t.Errorf("decode search cache invalidate request: %v", err)
+			}
+			invalidated = append(invalidated, body["dataset"])
+			return testJSONResponse(http.StatusOK, `{"status":"ok"}`), nil
+		default:
+			t.Errorf("unexpected request %s%s", r.Host, r.URL.Path)
+			return testJSONResponse(http.StatusNotFound, `{"message":"not found"}`), nil
+		}
+	})
+	t.Cleanup(func() { http.DefaultTransport = prevTransport })
+	t.Setenv("LAZYMIND_DOCUMENT_SERVICE_URL", "http://docs.test")
+	t.Setenv("LAZYMIND_CHAT_SERVICE_URL", "http://chat.test")
+
+	req := httptest.NewRequest(http.MethodPost, "/api/core/datasets/dataset-1/tasks:start", nil)
+	req.Header.Set("X-User-Id", "user-1")
+	results, err := startTransferTasksInternal(req, "dataset-1", []string{"task-1"}, "move")
+	if err != nil {
+		t.Fatalf("start move task: %v", err)
+	}
+	if len(results) != 1 || results[0].SubmitStatus != "SUBMITTED" {
+		t.Fatalf("expected the move to be submitted, got %+v", results)
+	}
+	if strings.Join(invalidated, ",") != "dataset-1,dataset-2" {
+		t.Fatalf("expected search cache of source and target datasets to be invalidated, got %v", invalidated)
+	}
+}
+
 func seedFolderWithSizedDoc(t *testing.T, db *orm.DB, datasetID, folderID, docID string, size int64) {
 	t.Helper()
 	now := time.Date(2026, 5, 12, 10, 0, 0, 0, time.UTC)
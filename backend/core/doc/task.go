@@ -1406,6 +1406,7 @@ func startParseTasksInternal(r *http.Request, datasetID string, taskIDs []string
 	if startedCount == 0 {
 		return resultsResp, fmt.Errorf("no tasks submitted successfully")
 	}
+	notifySearchCacheInvalidate(r.Context(), datasetID)
 	return resultsResp, nil
 }
 
@@ -2492,6 +2493,20 @@ func startTransferTasksInternal(r *http.Request, datasetID string, taskIDs []str
 		}
 		return results, err
 	}
+	// A move also takes the documents out of the source dataset.
+	notifiedTargets := map[string]struct{}{}
+	if mode == "move" {
+		notifiedTargets[datasetID] = struct{}{}
+		notifySearchCacheInvalidate(r.Context(), datasetID)
+	}
+	for _, taskRow := range validTaskRows {
+		targetDatasetID := strings.TrimSpace(taskRow.TargetDatasetID)
+		if _, ok := notifiedTargets[targetDatasetID]; ok || targetDatasetID == "" {
+			continue
+		}
+		notifiedTargets[targetDatasetID] = struct{}{}
+		notifySearchCacheInvalidate(r.Context(), targetDatasetID)
+	}
 	now := time.Now().UTC()
 	for i, taskRow := range validTaskRows {
 		ext := preparedExts[i]
@@ -2,6 +2,7 @@ import asyncio
 import importlib.util
 import sys
 from pathlib import Path
+from types import SimpleNamespace
 
 import httpx
 
@@ -64,3 +65,11 @@ def test_health_route_captures_connection_error(monkeypatch):
     assert result['document_server_url'] == 'http://doc-service:8080'
     assert result['document_server_reachable'] is False
     assert 'network down' in result['document_server_error']
+
+
+def test_admission_metrics_route_returns_controller_snapshot(monkeypatch):
+    module = _load_health_routes_module()
+    snapshot = {'running': 1, 'queue_depth': 2}
+    monkeypatch.setattr(module, 'get_admission_controller', lambda: SimpleNamespace(metrics=lambda: snapshot))
+
+    assert asyncio.run(module.admission_metrics()) == snapshot
@@ -0,0 +1,246 @@
+import asyncio
+import time
+
+import pytest
+
+from chat.app.core.admission import AdmissionController, AdmissionRejected, parse_tenant_weights
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_fast_path_admits_and_release_is_idempotent():
+    async def _scenario():
+        controller = AdmissionController(2)
+        ticket = await controller.acquire('u1', 'algo')
+        running = controller.metrics()['running']
+        ticket.release()
+        ticket.release()
+        return running, controller.metrics()
+
+    running, metrics = _run(_scenario())
+
+    assert running == 1
+    assert metrics['running'] == 0
+    assert metrics['admitted_total'] == 1
+    assert metrics['wait_time']['samples'] == 1
+
+
+def test_user_quota_lets_other_users_overtake():
+    async def _scenario():
+        controller = AdmissionController(4, user_max_concurrency=1)
+        first = await controller.acquire('heavy', 'algo')
+        queued = asyncio.create_task(controller.acquire('heavy', 'algo'))
+        await asyncio.sleep(0)
+        light = await asyncio.wait_for(controller.acquire('light', 'algo'), 1)
+        depth = controller.metrics()['queue_depth_by_user']
+        first.release()
+        second = await asyncio.wait_for(queued, 1)
+        for ticket in (light, second):
+            ticket.release()
+        return depth
+
+    assert _run(_scenario()) == {'heavy': 1}
+
+
+def test_dataset_quota_holds_requests_for_busy_dataset():
+    async def _scenario():
+        controller = AdmissionController(4, dataset_max_concurrency=1)
+        first = await controller.acquire('u1', 'ds-a')
+        blocked = asyncio.create_task(controller.acquire('u2', 'ds-a'))
+        await asyncio.sleep(0)
+        other = await asyncio.wait_for(controller.acquire('u3', 'ds-b'), 1)
+        was_blocked = not blocked.done()
+        first.release()
+        (await asyncio.wait_for(blocked, 1)).release()
+        other.release()
+        return was_blocked
+
+    assert _run(_scenario()) is True
+
+
+def test_higher_priority_goes_first_within_a_tenant():
+    async def _scenario():
+        controller = AdmissionController(1)
+        order = []
+        holder = await controller.acquire('u1', 'algo')
+
+        async def _request(name, priority):
+            ticket = await controller.acquire('u1', 'algo', priority)
+            order.append(name)
+            ticket.release()
+
+        tasks = [asyncio.create_task(_request('low', 1)), asyncio.create_task(_request('high', 9))]
+        await asyncio.sleep(0)
+        holder.release()
+        await asyncio.gather(*tasks)
+        return order
+
+    assert _run(_scenario()) == ['high', 'low']
+
+
+def test_queue_deadline_sheds_with_503_and_frees_the_queue():
+    async def _scenario():
+        controller = AdmissionController(1, queue_timeout=0.05)
+        holder = await controller.acquire('u1', 'algo')
+        with pytest.raises(AdmissionRejected) as exc_info:
+            await controller.acquire('u2', 'algo')
+        holder.release()
+        return exc_info.value, controller.metrics()
+
+    exc, metrics = _run(_scenario())
+
+    assert exc.status_code == 503
+    assert exc.reason == 'queue_timeout'
+    assert exc.retry_after >= 1
+    assert metrics['queue_depth'] == 0
+    assert metrics['rejected_total'] == {'queue_timeout': 1}
+
+
+def test_queue_caps_reject_with_429_for_tenant_and_503_for_service():
+    async def _scenario():
+        controller = AdmissionController(1, max_queue_depth=2, user_max_queued=1)
+        holder = await controller.acquire('u1', 'algo')
+        waiting = [asyncio.create_task(controller.acquire('u1', 'algo'))]
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as per_user:
+            await controller.acquire('u1', 'algo')
+        waiting.append(asyncio.create_task(controller.acquire('u2', 'algo')))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as global_cap:
+            await controller.acquire('u3', 'algo')
+        holder.release()
+        for task in waiting:
+            (await asyncio.wait_for(task, 1)).release()
+        return per_user.value.status_code, global_cap.value.status_code
+
+    assert _run(_scenario()) == (429, 503)
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def _scenario():
+        controller = AdmissionController(1)
+        holder = await controller.acquire('u1', 'algo')
+        waiter = asyncio.create_task(controller.acquire('u2', 'algo'))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        depth = controller.metrics()['queue_depth']
+        holder.release()
+        return depth, controller.metrics()['running']
+
+    assert _run(_scenario()) == (0, 0)
+
+
+def test_tenant_weights_split_admissions_proportionally():
+    async def _scenario():
+        controller = AdmissionController(1, tenant_weights=parse_tenant_weights('gold:2, bad, x:abc'))
+        order = []
+        holder = await controller.acquire('warmup', 'algo')
+
+        async def _request(user):
+            ticket = await controller.acquire(user, 'algo')
+            order.append(user)
+            ticket.release()
+
+        tasks = [asyncio.create_task(_request(user)) for user in ['gold'] * 8 + ['bronze'] * 8]
+        await asyncio.sleep(0)
+        holder.release()
+        await asyncio.gather(*tasks)
+        return order
+
+    order = _run(_scenario())
+
+    assert order[:9].count('gold') == 6
+    assert parse_tenant_weights('a:2,b:0,c') == {'a': 2.0}
+
+
+# ---------------------------------------------------------------------------
+# Load harness: stub pipeline with a fixed service time behind the gate.
+# ---------------------------------------------------------------------------
+_SERVICE_TIME = 0.01
+
+
+class _SemaphoreGate:
+    """The previous behaviour: one global FIFO semaphore."""
+
+    def __init__(self, max_concurrency):
+        self._sem = asyncio.Semaphore(max_concurrency)
+
+    async def run(self, user, dataset):
+        async with self._sem:
+            await asyncio.sleep(_SERVICE_TIME)
+
+
+class _AdmissionGate:
+    def __init__(self, controller):
+        self.controller = controller
+
+    async def run(self, user, dataset):
+        ticket = await self.controller.acquire(user, dataset)
+        try:
+            await asyncio.sleep(_SERVICE_TIME)
+        finally:
+            ticket.release()
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def _timed(gate, user, latencies, rejected):
+    start = time.perf_counter()
+    try:
+        await gate.run(user, 'algo')
+    except AdmissionRejected as exc:
+        rejected.append(exc.status_code)
+        return
+    latencies.setdefault(user, []).append(time.perf_counter() - start)
+
+
+async def _burst_then_light_users(gate, heavy_requests=80, light_users=4, light_requests=3):
+    latencies, rejected = {}, []
+    tasks = [asyncio.create_task(_timed(gate, 'heavy', latencies, rejected)) for _ in range(heavy_requests)]
+    await asyncio.sleep(_SERVICE_TIME * 2)
+    for idx in range(light_users):
+        for _ in range(light_requests):
+            tasks.append(asyncio.create_task(_timed(gate, f'light-{idx}', latencies, rejected)))
+    await asyncio.gather(*tasks)
+    light = [v for user, values in latencies.items() if user != 'heavy' for v in values]
+    return {'light_p99': _percentile(light, 99), 'heavy_done': len(latencies['heavy']), 'rejected': rejected}
+
+
+def test_load_harness_light_users_are_not_starved_by_a_burst():
+    baseline = _run(_burst_then_light_users(_SemaphoreGate(4)))
+    fair = _run(_burst_then_light_users(_AdmissionGate(AdmissionController(4, queue_timeout=30))))
+    report = {'semaphore': baseline, 'admission': fair}
+    print(f'[admission bench] {report}')
+
+    assert fair['heavy_done'] == baseline['heavy_done'] == 80
+    assert not fair['rejected']
+    # FIFO makes light users wait behind the whole burst (~80/4 service times);
+    # fair queuing serves them within a few service times.
+    assert fair['light_p99'] < _SERVICE_TIME * 12
+    assert fair['light_p99'] * 3 < baseline['light_p99']
+
+
+def test_load_harness_overload_sheds_instead_of_unbounded_waits():
+    timeout = _SERVICE_TIME * 5
+
+    async def _overload():
+        controller = AdmissionController(2, queue_timeout=timeout, user_max_queued=0)
+        gate = _AdmissionGate(controller)
+        latencies, rejected = {}, []
+        await asyncio.gather(*(_timed(gate, f'u{i % 5}', latencies, rejected) for i in range(100)))
+        return [v for values in latencies.values() for v in values], rejected, controller.metrics()
+
+    latencies, rejected, metrics = _run(_overload())
+    print(f'[admission overload] admitted={len(latencies)} rejected={len(rejected)} wait={metrics["wait_time"]}')
+
+    assert rejected and set(rejected) == {503}
+    assert len(latencies) + len(rejected) == 100
+    assert metrics['wait_time']['max'] <= timeout + _SERVICE_TIME * 5
+    assert metrics['queue_depth'] == 0 and metrics['running'] == 0
@@ -41,12 +41,19 @@ def _import_chat_server_module(monkeypatch, *, default_dataset='algo', url_map=N
 
     fake_filter_module.SensitiveFilter = _FakeSensitiveFilter
 
+    fake_ppl_search = ModuleType('chat.pipelines.builders.get_ppl_search')
+    fake_ppl_search.warmup_calls = []
+    fake_ppl_search.warmup_reranker_pool = lambda: fake_ppl_search.warmup_calls.append(True) or 1
+    fake_agentic.ppl_search = fake_ppl_search
+
     for name in ['chat.app.core.chat_server', 'chat.app.api', 'chat.app.api.chat_routes', 'chat.app.api.health_routes']:
         sys.modules.pop(name, None)
     monkeypatch.setitem(sys.modules, 'lazyllm', fake_lazyllm)
     monkeypatch.setitem(sys.modules, 'chat.config', fake_config)
     monkeypatch.setitem(sys.modules, 'chat.pipelines.agentic', fake_agentic)
     monkeypatch.setitem(sys.modules, 'chat.components.process.sensitive_filter', fake_filter_module)
+    monkeypatch.setitem(sys.modules, 'chat.pipelines.builders', ModuleType('chat.pipelines.builders'))
+    monkeypatch.setitem(sys.modules, 'chat.pipelines.builders.get_ppl_search', fake_ppl_search)
 
     module = importlib.import_module('chat.app.core.chat_server')
     return module, fake_agentic
@@ -54,6 +61,7 @@ def _import_chat_server_module(monkeypatch, *, default_dataset='algo', url_map=N
 
 def test_chat_server_builds_and_caches_pipelines(monkeypatch):
     module, fake_agentic = _import_chat_server_module(monkeypatch)
+    fake_agentic.ppl_search.warmup_calls.clear()
     server = module.ChatServer()
 
     assert server.startup_validated is True
@@ -83,6 +91,19 @@ def test_chat_server_builds_and_caches_pipelines(monkeypatch):
             'stream': True,
         },
     ]
+    assert fake_agentic.ppl_search.warmup_calls == [True]
+
+
+def test_chat_server_startup_survives_reranker_warmup_failure(monkeypatch):
+    module, fake_agentic = _import_chat_server_module(monkeypatch)
+
+    def _boom():
+        raise RuntimeError('reranker unavailable')
+
+    monkeypatch.setattr(fake_agentic.ppl_search, 'warmup_reranker_pool', _boom)
+    server = module.ChatServer()
+
+    assert server.startup_validated is True
 
 
 def test_chat_server_raises_when_default_dataset_missing(monkeypatch):
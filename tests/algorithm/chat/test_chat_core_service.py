@@ -4,6 +4,8 @@ import json
 import sys
 from types import ModuleType, SimpleNamespace
 
+from chat.app.core.admission import AdmissionController
+
 
 def _import_chat_service_module(monkeypatch, *, chat_server=None):
     fake_lazyllm = ModuleType('lazyllm')
@@ -56,6 +58,11 @@ def _import_chat_service_module(monkeypatch, *, chat_server=None):
 
     fake_markdown_images = ModuleType('chat.utils.markdown_images')
     fake_markdown_images.rewrite_markdown_image_urls = lambda markdown, **kw: markdown
+    fake_markdown_images.MarkdownImageStreamRewriter = type('MarkdownImageStreamRewriter', (), {
+        '__init__': lambda self, *a, **kw: None,
+        'feed': lambda self, text: text,
+        'flush': lambda self: '',
+    })
 
     fake_load_config = ModuleType('chat.utils.load_config')
     fake_load_config.get_config_path = lambda: '/tmp/dummy_model_config.yaml'
@@ -295,6 +302,12 @@ def test_run_sync_ppl_uses_reasoning_pipeline(monkeypatch):
     }
 
 
+def _install_admission_controller(monkeypatch, module, **kwargs):
+    controller = AdmissionController(**kwargs)
+    monkeypatch.setattr(module, 'get_admission_controller', lambda: controller)
+    return controller
+
+
 def _decode_sse_payloads(raw_chunks):
     payloads = []
     for raw in raw_chunks:
@@ -322,9 +335,10 @@ def test_handle_chat_stream_returns_sse_chunks_and_final_status(monkeypatch):
     module = _import_chat_service_module(monkeypatch, chat_server=chat_server)
 
     class _FakeStreamingResponse:
-        def __init__(self, body_iterator, media_type):
+        def __init__(self, body_iterator, media_type, background=None):
             self.body_iterator = body_iterator
             self.media_type = media_type
+            self.background = background
 
     def fake_run_ppl_with_trace(ppl, ppl_args, *, session_id, dataset, mode_tag, trace_enabled):
         # ppl_args is a tuple; first element is the query_params dict
@@ -393,9 +407,10 @@ def test_handle_chat_stream_preserves_separate_think_and_text_frames(monkeypatch
     module = _import_chat_service_module(monkeypatch, chat_server=chat_server)
 
     class _FakeStreamingResponse:
-        def __init__(self, body_iterator, media_type):
+        def __init__(self, body_iterator, media_type, background=None):
             self.body_iterator = body_iterator
             self.media_type = media_type
+            self.background = background
 
     async def fake_to_thread(fn, *args, **kwargs):
         return fn(*args, **kwargs)
@@ -437,13 +452,13 @@ def test_handle_chat_stream_preserves_separate_think_and_text_frames(monkeypatch
     ]
 
 
-def test_handle_chat_concurrency_respects_semaphore_and_session_isolation(monkeypatch):
+def test_handle_chat_concurrency_respects_admission_and_session_isolation(monkeypatch):
     init_calls = []
     start_order = []
     release_first = asyncio.Event()
 
     module = _import_chat_service_module(monkeypatch)
-    monkeypatch.setattr(module, 'rag_sem', asyncio.Semaphore(1))
+    controller = _install_admission_controller(monkeypatch, module, max_concurrency=1)
     monkeypatch.setattr(module, 'validate_and_resolve_files', lambda files: ([], []))
     monkeypatch.setattr(module.lazyllm.globals, '_init_sid', lambda sid: init_calls.append(('global', sid)))
     monkeypatch.setattr(module.lazyllm.locals, '_init_sid', lambda sid: init_calls.append(('local', sid)))
@@ -506,6 +521,8 @@ def test_handle_chat_concurrency_respects_semaphore_and_session_isolation(monkey
     results = asyncio.run(_run_pair())
 
     assert [item['data'] for item in results] == [{'text': 'q1'}, {'text': 'q2'}]
+    assert controller.metrics()['admitted_total'] == 2
+    assert controller.metrics()['running'] == 0
     assert start_order == ['q1', 'q2']
     assert init_calls == [
         ('global', 'sid-1'),
@@ -539,3 +556,116 @@ def test_log_chat_request_includes_observability_fields(monkeypatch):
     assert "[files=['/tmp/a.txt']]" in message
     assert "[image_files=['/tmp/b.png']]" in message
     assert '[cost=0.123]' in message
+
+
+def test_handle_chat_stream_filters_generated_output(monkeypatch):
+    from chat.components.process.sensitive_filter import SensitiveStreamMatcher, _StreamAutomaton
+
+    async def _stream():
+        yield {'think': None, 'text': 'the sec'}
+        yield {'think': None, 'text': 'ret is out'}
+
+    automaton = _StreamAutomaton(['secret'])
+    logged = []
+
+    def _run(action):
+        chat_server = SimpleNamespace(
+            sensitive_filter=SimpleNamespace(
+                loaded=True, check=lambda query: (False, None),
+                stream=lambda act: SensitiveStreamMatcher(automaton, act),
+            ),
+            has_dataset=lambda dataset: dataset == 'algo',
+            get_query_pipeline=lambda dataset, stream=False: lambda query_params: _stream(),
+            query_ppl_reasoning='unused',
+        )
+        module = _import_chat_service_module(monkeypatch, chat_server=chat_server)
+
+        class _FakeStreamingResponse:
+            def __init__(self, body_iterator, media_type, background=None):
+                self.body_iterator = body_iterator
+
+        async def fake_to_thread(fn, *args, **kwargs):
+            return fn(*args, **kwargs)
+
+        monkeypatch.setitem(module._cfg._impl, 'sensitive_stream_action', action)
+        monkeypatch.setattr(module, 'validate_and_resolve_files', lambda files: ([], []))
+        monkeypatch.setattr(module, 'StreamingResponse', _FakeStreamingResponse)
+        monkeypatch.setattr(module.asyncio, 'to_thread', fake_to_thread)
+        monkeypatch.setattr(module, 'emit_log', lambda fn, *args, **kwargs: logged.append(args))
+
+        async def _collect():
+            response = await module.handle_chat(
+                query='hello', history=[], session_id='sid-1', filters={'kb_id': ['kb1']}, files=None, debug=False,
+                reasoning=False, databases=[], dataset='algo', priority=1, available_tools=None,
+                available_skills=None, memory=None, user_preference=None, use_memory=None, is_stream=True,
+            )
+            return [chunk async for chunk in response.body_iterator]
+
+        return [payload['data'] for payload in _decode_sse_payloads(asyncio.run(_collect()))]
+
+    assert _run('mask') == [
+        {'think': None, 'text': 'the '},
+        {'think': None, 'text': '****** is out'},
+        {'status': 'FINISHED'},
+    ]
+    assert _run('truncate') == [
+        {'think': None, 'text': 'the '},
+        {'think': None, 'text': ''},
+        {'status': 'FINISHED'},
+    ]
+    assert _run('abort')[1] == {'think': None, 'text': 'blocked', 'sources': []}
+    assert _run('off')[1] == {'think': None, 'text': 'ret is out'}
+    # The finish log records the request filters, not the output matchers.
+    assert [args[2] for args in logged] == [{'kb_id': ['kb1']}] * 4
+
+
+def test_handle_chat_stream_logs_bounded_response_with_digest(monkeypatch):
+    import hashlib
+
+    texts = [f'part-{i:03d}-' + 'x' * 40 for i in range(50)]
+
+    async def _stream():
+        for text in texts:
+            yield {'think': None, 'text': text}
+
+    chat_server = SimpleNamespace(
+        sensitive_filter=SimpleNamespace(loaded=False, check=lambda query: (False, None)),
+        has_dataset=lambda dataset: dataset == 'algo',
+        get_query_pipeline=lambda dataset, stream=False: lambda query_params: _stream(),
+        query_ppl_reasoning='unused',
+    )
+    module = _import_chat_service_module(monkeypatch, chat_server=chat_server)
+    messages = []
+
+    class _FakeStreamingResponse:
+        def __init__(self, body_iterator, media_type, background=None):
+            self.body_iterator = body_iterator
+
+    async def fake_to_thread(fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+    monkeypatch.setitem(module._cfg._impl, 'chat_stream_log_max_bytes', 512)
+    monkeypatch.setitem(module._cfg._impl, 'chat_stream_log_async', False)
+    monkeypatch.setattr(module.LOG, 'info', lambda message: messages.append(message))
+    monkeypatch.setattr(module, 'validate_and_resolve_files', lambda files: ([], []))
+    monkeypatch.setattr(module, 'StreamingResponse', _FakeStreamingResponse)
+    monkeypatch.setattr(module.asyncio, 'to_thread', fake_to_thread)
+
+    async def _collect():
+        response = await module.handle_chat(
+            query='hello', history=[], session_id='sid-1', filters=None, files=None, debug=False,
+            reasoning=False, databases=[], dataset='algo', priority=1, available_tools=None,
+            available_skills=None, memory=None, user_preference=None, use_memory=None, is_stream=True,
+        )
+        return [chunk async for chunk in response.body_iterator]
+
+    asyncio.run(_collect())
+
+    full = '\n'.join(json.dumps({'think': None, 'text': text}, ensure_ascii=False) for text in texts)
+    finish = [message for message in messages if '[KB_CHAT_STREAM_FINISH]' in message]
+    assert len(finish) == 1
+    assert '[filters=None]' in finish[0]
+    assert f'[response_sha256={hashlib.sha256(full.encode()).hexdigest()}]' in finish[0]
+    assert 'part-000' in finish[0] and 'part-049' in finish[0]
+    assert 'part-025' not in finish[0]
+    assert 'bytes omitted' in finish[0]
@@ -1,9 +1,15 @@
+import itertools
+import random
+import time
+
+import numpy as np
 import pytest
 
 from chat.components.process.adaptive_topk import (
     AdaptiveKComponent,
     _fit_by_budget,
     _moving_average,
+    _pack_by_budget,
     adaptive_k_select_from_nodes,
 )
 
@@ -112,3 +118,129 @@ def test_adaptive_k_component_forwards_kwargs():
     selected = component(nodes, k_min=2)
 
     assert [node.uid for node in selected] == ['a', 'b']
+
+
+def _legacy_select(nodes, get_token_len=None, max_tokens=None, bias=2, search_pct=1.0, k_min=1, k_max=None,
+                   gap_tau=None, smooth_w=1, default_k=6):
+    """Pure-Python selection as it was before vectorisation, kept as the reference."""
+    scores = [n.relevance_score for n in nodes]
+    if len(nodes) < 2:
+        return list(nodes[:1])
+
+    def fit():
+        acc = k = 0
+        for n in nodes:
+            if acc + get_token_len(n) > max_tokens:
+                break
+            acc += get_token_len(n)
+            k += 1
+        return max(k, 1)
+
+    if smooth_w > 1:
+        pad = smooth_w // 2
+        buf = [scores[0]] * pad + scores + [scores[-1]] * pad
+        scores = [sum(buf[i:i + smooth_w]) / smooth_w for i in range(len(scores))]
+    m = max(1, min(len(nodes) - 1, int((len(nodes) - 1) * search_pct)))
+    gaps = [scores[i] - scores[i + 1] for i in range(m)]
+    argmax = max(range(m), key=lambda i: gaps[i])
+    budgeted = max_tokens is not None and get_token_len is not None
+    if gap_tau is not None and gaps[argmax] < gap_tau:
+        k = _clamp_legacy(fit() if budgeted else default_k, k_min, k_max or len(nodes))
+    else:
+        k = _clamp_legacy(min(argmax + 1 + bias, k_max or len(nodes)), k_min, len(nodes))
+    if budgeted:
+        k = min(k, fit())
+    return list(nodes[:k])
+
+
+def _clamp_legacy(x, lo, hi):
+    return max(lo, min(x, hi))
+
+
+def _random_nodes(rng, n):
+    scores = sorted((rng.random() for _ in range(n)), reverse=True)
+    return [DummyNode(str(i), text='x' * rng.randrange(0, 800), score=s) for i, s in enumerate(scores)]
+
+
+def test_vectorised_selection_matches_legacy_on_random_inputs():
+    rng = random.Random(11)
+    token_len = lambda n: len(n.text) // 4  # noqa: E731
+    for _ in range(400):
+        nodes = _random_nodes(rng, rng.randrange(1, 60))
+        kwargs = dict(bias=rng.randrange(0, 4), search_pct=rng.choice([0.3, 0.5, 1.0]), k_min=rng.randrange(1, 3),
+                      k_max=rng.choice([None, 5, 10]), gap_tau=rng.choice([None, 0.05, 0.2]),
+                      smooth_w=rng.choice([1, 1, 3]), default_k=rng.randrange(1, 8))
+        if rng.random() < 0.7:
+            kwargs.update(get_token_len=token_len, max_tokens=rng.randrange(50, 2000))
+        selected, k, diag = adaptive_k_select_from_nodes(nodes, **kwargs)
+        assert [n.uid for n in selected] == [n.uid for n in _legacy_select(nodes, **kwargs)], kwargs
+        assert k == len(selected)
+        if kwargs.get('max_tokens'):
+            assert diag['tokens_used'] == sum(token_len(n) for n in selected)
+
+
+def test_knapsack_packing_keeps_top_node_and_fills_budget_with_best_subset():
+    nodes = [
+        DummyNode('top', text='x' * 400, score=0.95),
+        DummyNode('long', text='x' * 2000, score=0.94),
+        DummyNode('short1', text='x' * 400, score=0.93),
+        DummyNode('short2', text='x' * 400, score=0.92),
+    ]
+    kwargs = dict(get_token_len=lambda n: len(n.text) // 4, max_tokens=400, bias=10)
+
+    prefix, _, _ = adaptive_k_select_from_nodes(nodes, **kwargs)
+    packed, k, diag = adaptive_k_select_from_nodes(nodes, packing='knapsack', **kwargs)
+
+    assert [n.uid for n in prefix] == ['top']
+    assert [n.uid for n in packed] == ['top', 'short1', 'short2']
+    assert k == 3 and diag['tokens_used'] == 300 and diag['packing'] == 'knapsack'
+
+    nodes[0].text = 'x' * 4000
+    assert [n.uid for n in adaptive_k_select_from_nodes(nodes, packing='knapsack', **kwargs)[0]] == ['top']
+    with pytest.raises(ValueError):
+        adaptive_k_select_from_nodes(nodes, packing='greedy')
+
+
+def test_knapsack_is_optimal_and_never_exceeds_budget():
+    rng = random.Random(5)
+    for _ in range(150):
+        n = rng.randrange(2, 11)
+        scores = np.array(sorted((rng.random() for _ in range(n)), reverse=True))
+        lengths = np.array([rng.randrange(1, 400) for _ in range(n)])
+        budget = rng.randrange(1, 1500) * rng.choice([1, 1, 20])
+        picked = _pack_by_budget(scores, lengths, budget)
+
+        assert picked[0] == 0 and picked == sorted(picked)
+        if lengths[0] <= budget:
+            assert lengths[picked].sum() <= budget
+            values = scores - scores[1:].min() + 1e-6
+            best = max(values[[0, *subset]].sum() for r in range(n) for subset in itertools.combinations(range(1, n), r)
+                       if lengths[[0, *subset]].sum() <= budget)
+            # Budgets above the table size are packed in coarser units, which may leave a little value behind.
+            assert values[picked].sum() >= best - (1e-9 if budget <= 4096 else 0.35 * best)
+
+
+@pytest.mark.benchmark
+def test_selection_benchmark_50_to_500_candidates():
+    """Selection time of the vectorised component against the pure-Python reference."""
+    rng = random.Random(3)
+    token_len = lambda n: len(n.text) // 4  # noqa: E731
+    kwargs = dict(get_token_len=token_len, max_tokens=2048, gap_tau=0.2, k_max=None)
+    timings = {}
+    for size in (50, 100, 200, 500):
+        batches = [_random_nodes(rng, size) for _ in range(20)]
+        start = time.perf_counter()
+        for nodes in batches:
+            _legacy_select(nodes, **kwargs)
+        legacy_s = time.perf_counter() - start
+        start = time.perf_counter()
+        for nodes in batches:
+            adaptive_k_select_from_nodes(nodes, **kwargs)
+        prefix_s = time.perf_counter() - start
+        start = time.perf_counter()
+        for nodes in batches:
+            adaptive_k_select_from_nodes(nodes, packing='knapsack', **{**kwargs, 'k_max': 10})
+        knapsack_s = time.perf_counter() - start
+        timings[size] = (legacy_s / 20 * 1e3, prefix_s / 20 * 1e3, knapsack_s / 20 * 1e3)
+        print(f'[adaptive-k bench] candidates={size} legacy_ms={timings[size][0]:.3f} '
+              f'prefix_ms={timings[size][1]:.3f} knapsack_k10_ms={timings[size][2]:.3f}')
@@ -1,3 +1,6 @@
+import threading
+import time
+
 import pytest
 
 from chat.components.process.context_expansion import (
@@ -176,3 +179,91 @@ def test_context_expansion_helpers_are_defensive():
         type = 'table'
 
     assert _get_node_type(TypeOnlyNode()) == 'table'
+
+
+class NumberedNode(DummyNode):
+    def __init__(self, uid, number, doc_id='doc-1', text='abcd', score=0.0, group='block', metadata=None):
+        super().__init__(uid, text=text, score=score, metadata=metadata or {'index': number},
+                         global_metadata={'docid': doc_id, 'kb_id': 'kb-1'})
+        self.number = number
+        self.group = group
+
+
+class LatencyStore:
+    """Fake document store: every round trip costs `latency` seconds."""
+
+    def __init__(self, nodes, latency=0.02, barrier=None):
+        self.nodes = nodes
+        self.latency = latency
+        self.barrier = barrier
+        self.window_calls = []
+        self.get_nodes_calls = []
+
+    def get_window_nodes(self, node, span, merge):
+        time.sleep(self.latency)
+        self.window_calls.append(node.uid)
+        numbers = set(range(node.number + span[0], node.number + span[1] + 1))
+        return [n for n in self.nodes if _get_doc_id(n) == _get_doc_id(node) and n.number in numbers]
+
+    def get_nodes(self, group, kb_id, doc_ids, numbers):
+        if self.barrier is not None:
+            self.barrier.wait()  # every fetch has to be in flight at once to pass
+        time.sleep(self.latency)
+        self.get_nodes_calls.append((group, kb_id, set(doc_ids), set(numbers)))
+        return [n for n in self.nodes if n.group == group and _get_doc_id(n) in doc_ids and n.number in numbers]
+
+
+def _doc_nodes(doc_id, count):
+    return [NumberedNode(f'{doc_id}-{i}', i, doc_id=doc_id) for i in range(1, count + 1)]
+
+
+def test_context_expansion_batches_seeds_of_same_document_into_one_round_trip():
+    nodes = _doc_nodes('doc-1', 20)
+    seeds = [nodes[i] for i in (2, 4, 10, 15)]
+    for rank, seed in enumerate(seeds):
+        seed.relevance_score = 1.0 - rank * 0.1
+
+    batched_store = LatencyStore(nodes)
+    batched = ContextExpansionComponent(batched_store, token_budget=100, max_new_nodes_per_seed=2)
+    batched_result = batched(list(seeds))
+
+    for node in nodes:
+        node.relevance_score = 0.0
+    for rank, seed in enumerate(seeds):
+        seed.relevance_score = 1.0 - rank * 0.1
+    sequential_store = LatencyStore(nodes)
+    sequential = ContextExpansionComponent(sequential_store, token_budget=100, max_new_nodes_per_seed=2,
+                                           batch_fetch=False)
+    sequential_result = sequential(list(seeds))
+
+    assert len(batched_store.get_nodes_calls) == 1
+    assert batched_store.window_calls == []
+    assert batched_store.get_nodes_calls[0][3] == {2, 3, 4, 5, 6, 10, 11, 12, 15, 16, 17}
+    assert len(sequential_store.window_calls) == len(seeds)
+    assert [n.uid for n in batched_result] == [n.uid for n in sequential_result]
+
+
+def test_context_expansion_batched_mode_preserves_token_budget():
+    nodes = _doc_nodes('doc-1', 10)
+    first, second = nodes[2], nodes[7]
+    first.relevance_score, second.relevance_score = 0.9, 0.8
+    store = LatencyStore(nodes, latency=0)
+    component = ContextExpansionComponent(store, token_budget=2, max_new_nodes_per_seed=2)
+
+    result = component([first, second])
+
+    added = [n.uid for n in result if n.uid not in {first.uid, second.uid}]
+    assert added == ['doc-1-2', 'doc-1-4']
+    assert len(store.get_nodes_calls) == 1
+
+
+def test_context_expansion_fans_out_across_documents_in_parallel():
+    nodes = _doc_nodes('doc-1', 5) + _doc_nodes('doc-2', 5) + _doc_nodes('doc-3', 5)
+    seeds = [nodes[2], nodes[7], nodes[12]]
+    store = LatencyStore(nodes, latency=0, barrier=threading.Barrier(3, timeout=5.0))
+    component = ContextExpansionComponent(store, token_budget=100, max_parallel_fetches=3)
+
+    result = component(seeds)
+
+    assert sorted(tuple(doc_ids) for _, _, doc_ids, _ in store.get_nodes_calls) == [('doc-1',), ('doc-2',), ('doc-3',)]
+    assert len(result) == 9
@@ -1,6 +1,8 @@
 import sys
 import types
 
+import pytest
+
 from chat.components.process.sensitive_filter import SensitiveFilter
 
 
@@ -97,3 +99,130 @@ def test_sensitive_filter_handles_load_and_check_exceptions(monkeypatch, tmp_pat
     filter_.loaded = True
 
     assert filter_.check('blocked') == (False, '')
+
+
+def _stream_filter(monkeypatch, tmp_path, words):
+    monkeypatch.setitem(sys.modules, 'ahocorasick', types.SimpleNamespace(Automaton=FakeAutomaton))
+    keyword_file = tmp_path / 'keywords.txt'
+    keyword_file.write_text('\n'.join(words) + '\n', encoding='utf-8')
+    return SensitiveFilter(str(keyword_file))
+
+
+def _feed_all(matcher, chunks):
+    return ''.join(matcher.feed(chunk) for chunk in chunks) + matcher.flush()
+
+
+def test_stream_matcher_masks_keywords_split_across_chunks(monkeypatch, tmp_path):
+    filter_ = _stream_filter(monkeypatch, tmp_path, ['secret', 'cre', '机密'])
+    matcher = filter_.stream()
+
+    emitted = [matcher.feed(chunk) for chunk in ['the se', 'cr', 'et is 机', '密 ok']]
+
+    assert emitted == ['the ', '', '****** is ', '** ok']
+    assert matcher.flush() == ''
+    assert matcher.word == 'cre'
+    assert _feed_all(filter_.stream(), ['s', 'e', 'c', 'x']) == 'secx'
+
+
+def test_stream_matcher_truncate_and_abort_stop_the_stream(monkeypatch, tmp_path):
+    filter_ = _stream_filter(monkeypatch, tmp_path, ['bcd', 'abcde'])
+
+    truncate = filter_.stream('truncate')
+    assert [truncate.feed(chunk) for chunk in ['xxab', 'cd', 'more']] == ['xx', 'a', '']
+    assert truncate.stopped and truncate.word == 'bcd'
+    assert truncate.flush() == ''
+
+    abort = filter_.stream('abort')
+    assert [abort.feed(chunk) for chunk in ['ok ', 'bc', 'd tail']] == ['ok ', '', '']
+    assert abort.stopped and abort.flush() == ''
+
+
+def test_stream_matcher_requires_loaded_keywords_and_known_action(monkeypatch, tmp_path):
+    assert SensitiveFilter().stream() is None
+
+    filter_ = _stream_filter(monkeypatch, tmp_path, ['blocked'])
+    try:
+        filter_.stream('drop')
+    except ValueError as exc:
+        assert 'drop' in str(exc)
+    else:
+        raise AssertionError('unknown action should be rejected')
+
+
+def test_stream_automaton_memo_is_bounded_by_the_keywords(monkeypatch, tmp_path):
+    import random
+
+    filter_ = _stream_filter(monkeypatch, tmp_path, ['secret', 'sec', 'cret', '机密文件'])
+    rng = random.Random(3)
+    alphabet = 'secrt机密文件 ab'
+    for _ in range(3):
+        matcher = filter_.stream()
+        _feed_all(matcher, [''.join(rng.choice(alphabet) for _ in range(50)) for _ in range(200)])
+        _feed_all(matcher, [''.join(chr(rng.randrange(0xac00, 0xd7a4)) for _ in range(50)) for _ in range(200)])
+    automaton = filter_._stream_automaton
+    memoised = sum(len(edges) for edges in automaton.delta)
+
+    # Every memoised transition is a keyword edge of some state on the fail chain.
+    assert all(ch in automaton.alphabet and nxt for edges in automaton.delta for ch, nxt in edges.items())
+    assert memoised <= len(automaton.goto) * len(automaton.alphabet)
+    _feed_all(filter_.stream(), [''.join(chr(rng.randrange(0xac00, 0xd7a4)) for _ in range(50)) for _ in range(200)])
+    assert sum(len(edges) for edges in automaton.delta) == memoised
+
+
+@pytest.mark.benchmark
+def test_stream_matcher_benchmark_against_per_chunk_and_full_buffer_rescans(tmp_path):
+    """Stateful streaming vs naive per-chunk scans (miss boundaries) and full-buffer rescans."""
+    import random
+    import time
+
+    pytest.importorskip('ahocorasick')
+    rng = random.Random(7)
+    alphabet = 'abcdefghij 的是了在和有'
+    words = sorted({''.join(rng.choice(alphabet) for _ in range(rng.randint(4, 8))) for _ in range(2000)})
+    keyword_file = tmp_path / 'keywords.txt'
+    keyword_file.write_text('\n'.join(words) + '\n', encoding='utf-8')
+    filter_ = SensitiveFilter(str(keyword_file))
+    assert filter_.loaded
+
+    text = ''.join(rng.choice(alphabet) for _ in range(20000))
+    pieces, pos = [], 0
+    while pos < len(text):
+        step = rng.randint(1, 6)
+        pieces.append(text[pos:pos + step])
+        pos += step
+    expected = {end for end, _ in filter_.actree.iter(text)}
+
+    def _naive():
+        hits, base = set(), 0
+        for piece in pieces:
+            hits.update(base + end for end, _ in filter_.actree.iter(piece))
+            base += len(piece)
+        return hits
+
+    def _full_buffer():
+        hits, buffer = set(), ''
+        for piece in pieces:
+            buffer += piece
+            hits.update(end for end, _ in filter_.actree.iter(buffer))
+        return hits
+
+    def _streaming():
+        matcher, out = filter_.stream(), []
+        for piece in pieces:
+            out.append(matcher.feed(piece))
+        out.append(matcher.flush())
+        return {i for i, ch in enumerate(''.join(out)) if ch == '*' and text[i] != '*'}
+
+    report = {}
+    for name, run in (('naive_per_chunk', _naive), ('full_buffer', _full_buffer), ('streaming', _streaming)):
+        start = time.perf_counter()
+        hits = run()
+        elapsed = time.perf_counter() - start
+        report[name] = {'us_per_chunk': elapsed / len(pieces) * 1e6, 'hits': hits}
+    print(f'[sensitive stream bench] chunks={len(pieces)} '
+          f'{ {k: round(v["us_per_chunk"], 2) for k, v in report.items()} } matches={len(expected)}')
+
+    masked_ends = {end for end in expected if end in report['streaming']['hits']}
+    assert expected and masked_ends == expected
+    assert report['full_buffer']['hits'] == expected
+    assert report['naive_per_chunk']['hits'] < expected
@@ -0,0 +1,152 @@
+import random
+import statistics
+import threading
+import time
+
+import pytest
+from lazyllm.tools.rag import DocNode
+from lazyllm.tools.rag.rank_fusion.reciprocal_rank_fusion import RRFFusion
+
+from chat.components.process.streaming_rrf import StreamingRRFFusion
+
+
+def _node(text, score):
+    node = DocNode(text=text)
+    node.similarity_score = score
+    return node
+
+
+class _FakeRetriever:
+    """Returns a fixed ranking after ``latency`` seconds, or once ``gate`` is set; fresh nodes on every call."""
+
+    def __init__(self, texts, latency=0.0, error=None, gate=None):
+        self.texts = list(texts)
+        self.latency = latency
+        self.error = error
+        self.gate = gate
+        self.calls = []
+        self.finished = threading.Event()
+
+    def __call__(self, query, **kwargs):
+        self.calls.append((query, kwargs))
+        time.sleep(self.latency)
+        if self.gate is not None:
+            assert self.gate.wait(5.0)
+        self.finished.set()
+        if self.error:
+            raise self.error
+        return [_node(text, 1.0 - i / 100) for i, text in enumerate(self.texts)]
+
+
+def _full_fusion(retrievers, top_k):
+    lists = [r(None) for r in retrievers]
+    return [(n.text, n.score) for n in RRFFusion(top_k=top_k)(tuple(lst for lst in lists if lst))]
+
+
+def _texts(nodes):
+    return [n.text for n in nodes]
+
+
+def test_without_early_exit_matches_rrf_fusion_exactly():
+    rng = random.Random(1)
+    for _ in range(50):
+        pool = [f'doc{i}' for i in range(40)]
+        retrievers = [_FakeRetriever(rng.sample(pool, rng.randrange(0, 20)), latency=rng.random() * 0.002)
+                      for _ in range(rng.randrange(1, 5))]
+        top_k = rng.choice([5, 20, 50, 0])
+
+        fused = StreamingRRFFusion(retrievers, top_k=top_k, early_exit=False)('q')
+
+        assert [(n.text, n.score) for n in fused] == _full_fusion(retrievers, top_k)
+
+
+def test_early_exit_returns_the_exact_top_k_set_on_random_inputs():
+    rng = random.Random(2)
+    exits = 0
+    for _ in range(60):
+        consensus = [f'c{i}' for i in range(rng.randrange(2, 8))]
+        retrievers = []
+        for r in range(rng.randrange(2, 5)):
+            noise = [f'r{r}-{i}' for i in range(rng.randrange(0, 15))]
+            retrievers.append(_FakeRetriever(consensus + noise, latency=rng.choice([0.0, 0.001, 0.02])))
+        top_k = rng.randrange(1, 10)
+
+        fused = StreamingRRFFusion(retrievers, top_k=top_k)('q')
+        exits += not all(r.finished.is_set() for r in retrievers)
+
+        expected = _full_fusion(retrievers, top_k)
+        assert sorted(_texts(fused)) == sorted(text for text, _ in expected)
+    assert exits > 0
+
+
+def test_slow_retriever_is_not_waited_for_once_top_k_is_settled():
+    consensus = [f'c{i}' for i in range(5)]
+    fast = [_FakeRetriever(consensus + [f'f{r}-{i}' for i in range(15)]) for r in range(3)]
+    gate = threading.Event()
+    slow = _FakeRetriever(['s{}'.format(i) for i in range(20)], gate=gate)
+
+    fused = StreamingRRFFusion(fast + [slow], top_k=5)('q', filters={'kb_id': 'kb'})
+
+    assert not slow.finished.is_set()
+    assert all(r.calls == [('q', {'filters': {'kb_id': 'kb'}})] for r in fast)
+    gate.set()
+    assert sorted(_texts(fused)) == sorted(t for t, _ in _full_fusion(fast + [slow], 5))
+
+
+def test_deadline_drops_late_retriever_and_fuses_the_rest():
+    fast = [_FakeRetriever([f'd{i}' for i in range(10)]), _FakeRetriever([f'd{i}' for i in range(5, 15)])]
+    gate = threading.Event()
+    slow = _FakeRetriever([f'late{i}' for i in range(10)], gate=gate)
+
+    fused = StreamingRRFFusion(fast + [slow], top_k=50, deadline=[None, None, 0.1])('q')
+
+    assert not slow.finished.is_set()
+    gate.set()
+    assert [(n.text, n.score) for n in fused] == _full_fusion(fast, 50)
+
+
+def test_failed_retrievers_degrade_and_all_failing_raises():
+    ok = _FakeRetriever(['a', 'b'])
+    broken = _FakeRetriever(['x'], error=RuntimeError('store down'))
+    assert _texts(StreamingRRFFusion([ok, broken], top_k=5)('q')) == ['a', 'b']
+
+    with pytest.raises(RuntimeError, match='store down'):
+        StreamingRRFFusion([broken, _FakeRetriever([], error=RuntimeError('store down'))], top_k=5)('q')
+
+
+def test_duplicate_texts_disable_early_exit():
+    dup = _FakeRetriever(['a', 'a', 'b'])
+    others = [_FakeRetriever(['a', 'b']) for _ in range(2)]
+    slow = _FakeRetriever(['z'], latency=0.05)
+
+    StreamingRRFFusion([dup] + others + [slow], top_k=1)('q')
+
+    assert slow.finished.is_set()
+    with pytest.raises(ValueError):
+        StreamingRRFFusion([dup, slow], deadline=[1.0])
+
+
+@pytest.mark.benchmark
+def test_skewed_latency_benchmark():
+    """Wait-for-all vs streaming fusion, 40 queries: three fast retrievers that agree on their leading
+    documents (in varying order) and one slow, long-tailed retriever."""
+    rng = random.Random(7)
+    timings = {'wait_all': [], 'streaming': []}
+    exact = 0
+    for _ in range(40):
+        consensus = [f'c{i}' for i in range(5)]
+        latencies = [min(0.02, rng.lognormvariate(-6, 1)) for _ in range(3)] + [0.1 + rng.expovariate(10)]
+        retrievers = [_FakeRetriever(rng.sample(consensus, 5) + [f'r{r}-{i}' for i in range(15)], latency=latency)
+                      for r, latency in enumerate(latencies)]
+        expected = sorted(t for t, _ in _full_fusion([_FakeRetriever(r.texts) for r in retrievers], 5))
+        results = {}
+        for mode, early_exit in (('wait_all', False), ('streaming', True)):
+            start = time.perf_counter()
+            results[mode] = StreamingRRFFusion(retrievers, top_k=5, early_exit=early_exit)('q')
+            timings[mode].append(time.perf_counter() - start)
+        exact += sorted(_texts(results['streaming'])) == expected == sorted(_texts(results['wait_all']))
+
+    wait_ms, stream_ms = (statistics.median(timings[m]) * 1e3 for m in ('wait_all', 'streaming'))
+    print(f'[streaming rrf bench] queries=40 wait_all_p50_ms={wait_ms:.1f} streaming_p50_ms={stream_ms:.1f} '
+          f'exact={exact}/40')
+    assert exact == 40
@@ -0,0 +1,131 @@
+import asyncio
+import gc
+import hashlib
+import json
+import os
+import threading
+import tracemalloc
+
+import pytest
+
+from chat.utils import response_log
+from chat.utils.response_log import StreamLogAccumulator
+
+
+def _chunks(count, size=40):
+    return [f'{i:04d}' + 'y' * size for i in range(count)]
+
+
+def test_accumulator_keeps_head_and_tail_within_cap_and_hashes_everything():
+    chunks = _chunks(200)
+    acc = StreamLogAccumulator(max_bytes=256)
+    for chunk in chunks:
+        acc.append(chunk)
+
+    full = '\n'.join(chunks)
+    rendered = acc.render()
+
+    assert acc.digest == hashlib.sha256(full.encode()).hexdigest()
+    assert acc.total_bytes == len(full.encode())
+    assert acc.retained_bytes <= 256 + 45
+    assert rendered.startswith(full[:128])
+    assert rendered.endswith(full[-128:])
+    assert f'...[{len(full) - 256} bytes omitted]...' in rendered
+
+
+def test_accumulator_short_response_is_returned_whole_and_unsampled_keeps_no_text():
+    acc = StreamLogAccumulator(max_bytes=1024)
+    for chunk in ['你好', 'world']:
+        acc.append(chunk)
+    assert acc.render() == '你好\nworld'
+
+    unsampled = StreamLogAccumulator(max_bytes=1024, sampled=False)
+    unsampled.append('secret answer')
+    assert unsampled.render() is None
+    assert unsampled.retained_bytes == 0
+    assert unsampled.digest == hashlib.sha256(b'secret answer').hexdigest()
+
+    uncapped = StreamLogAccumulator(max_bytes=0)
+    for chunk in _chunks(50):
+        uncapped.append(chunk)
+    assert uncapped.render() == '\n'.join(_chunks(50))
+
+
+def test_sampling_rate_bounds():
+    assert response_log.should_sample(1.0) is True
+    assert response_log.should_sample(0) is False
+
+
+def test_emit_log_runs_off_thread_and_inline_when_requested():
+    seen = []
+
+    def _record(value):
+        seen.append((value, threading.current_thread().name))
+
+    response_log.emit_log(_record, 'bg')
+    response_log.get_log_emitter().join()
+    response_log.emit_log(_record, 'inline', background=False)
+
+    assert seen == [('bg', 'chat-log-emitter'), ('inline', threading.current_thread().name)]
+
+
+def _rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return 0
+
+
+@pytest.mark.benchmark
+def test_stream_log_memory_benchmark_200_concurrent_50kb_streams():
+    """Legacy collect-and-join vs bounded accumulator at the moment all streams are open."""
+    streams, chunk_count = 200, 100
+    chunk = {'think': None, 'text': 'z' * 490}
+
+    async def _run(make_sink, finish):
+        ready = asyncio.Event()
+        done = 0
+        measured = {}
+
+        async def _one():
+            nonlocal done
+            sink = make_sink()
+            for i in range(chunk_count):
+                sink.append(json.dumps(chunk, ensure_ascii=False))
+                if i % 10 == 0:
+                    await asyncio.sleep(0)
+            done += 1
+            if done == streams:
+                measured['traced'] = tracemalloc.get_traced_memory()[0]
+                measured['rss'] = _rss_bytes()
+                ready.set()
+            await ready.wait()
+            return finish(sink)
+
+        results = await asyncio.gather(*(_one() for _ in range(streams)))
+        return measured, results
+
+    report = {}
+    for name, make_sink, finish in (
+        ('legacy', list, lambda sink: '\n'.join(sink)),
+        ('bounded', lambda: StreamLogAccumulator(max_bytes=8192), lambda sink: sink.render()),
+    ):
+        gc.collect()
+        base_rss = _rss_bytes()
+        tracemalloc.start()
+        try:
+            measured, results = asyncio.run(_run(make_sink, finish))
+        finally:
+            tracemalloc.stop()
+        report[name] = {
+            'held_mb': round(measured['traced'] / 2 ** 20, 2),
+            'rss_growth_mb': round(max(0, measured['rss'] - base_rss) / 2 ** 20, 2),
+            'logged_kb_per_stream': round(len(results[0].encode()) / 1024, 1),
+        }
+        del results
+    print(f'[response_log bench] {report}')
+
+    assert report['legacy']['logged_kb_per_stream'] > 45
+    assert report['bounded']['logged_kb_per_stream'] < 9
+    assert report['bounded']['held_mb'] * 3 < report['legacy']['held_mb']
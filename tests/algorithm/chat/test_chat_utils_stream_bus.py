@@ -0,0 +1,118 @@
+import asyncio
+import threading
+
+import lazyllm
+import pytest
+
+from chat.utils import stream_bus
+
+
+@pytest.fixture
+def pooled_queue(monkeypatch):
+    """Memory FileSystemQueue with the same pooled-singleton layout as lazyllm's."""
+
+    class _PooledQueue:
+        __queue_pool__ = {}
+        __queue_pool_lock__ = threading.RLock()
+
+        def __new__(cls, *args, klass='__default__', **kwargs):
+            with cls.__queue_pool_lock__:
+                if klass not in cls.__queue_pool__:
+                    inst = super().__new__(cls)
+                    inst._class = klass
+                    inst._items = {}
+                    cls.__queue_pool__[klass] = inst
+                return cls.__queue_pool__[klass]
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        @classmethod
+        def get_instance(cls, klass):
+            return cls(klass=klass)
+
+        @property
+        def sid(self):
+            return f'{lazyllm.globals._sid}-{self._class}'
+
+        def enqueue(self, message):
+            self._items.setdefault(self.sid, []).append(message)
+
+        def dequeue(self, limit=None):
+            return self._items.pop(self.sid, [])
+
+        def clear(self):
+            self._items.pop(self.sid, None)
+
+    monkeypatch.setattr(lazyllm, 'FileSystemQueue', _PooledQueue)
+    return _PooledQueue
+
+
+def test_channel_coalesces_thread_publishes_in_order():
+    async def _run():
+        channel = stream_bus.StreamChannel(asyncio.get_running_loop())
+
+        def _produce():
+            for i in range(200):
+                channel.publish('__default__', str(i))
+
+        producer = threading.Thread(target=_produce)
+        producer.start()
+        received, batches = [], 0
+        while len(received) < 200:
+            batch = await channel.get()
+            batches += 1
+            received.extend(payload for _, payload in batch)
+        producer.join()
+        channel.close()
+        return received, batches, channel.publish('__default__', 'late')
+
+    received, batches, late_accepted = asyncio.run(_run())
+
+    assert received == [str(i) for i in range(200)]
+    assert batches <= 200
+    assert late_accepted is False
+
+
+def test_subscribed_sid_is_pushed_and_other_sids_fall_back(pooled_queue):
+    async def _run():
+        channel = stream_bus.open_stream_channel('push-sid', asyncio.get_running_loop())
+        assert channel is not None
+
+        lazyllm.globals._init_sid('push-sid')
+        lazyllm.FileSystemQueue().enqueue('pushed')
+        lazyllm.FileSystemQueue.get_instance('think').enqueue('thinking')
+        lazyllm.globals._init_sid('other-sid')
+        lazyllm.FileSystemQueue().enqueue('polled')
+        batch = await channel.get()
+
+        channel.close()
+        lazyllm.globals._init_sid('push-sid')
+        lazyllm.FileSystemQueue().enqueue('after-close')
+        return batch
+
+    batch = asyncio.run(_run())
+
+    assert batch == [('__default__', 'pushed'), ('think', 'thinking')]
+    lazyllm.globals._init_sid('other-sid')
+    assert lazyllm.FileSystemQueue().dequeue() == ['polled']
+    lazyllm.globals._init_sid('push-sid')
+    assert lazyllm.FileSystemQueue().dequeue() == ['after-close']
+    assert lazyllm.FileSystemQueue.get_instance('think').dequeue() == []
+
+
+def test_install_is_idempotent_and_skips_unpooled_queues(pooled_queue, monkeypatch):
+    assert stream_bus.install_push_queues() is True
+    wrapped = pooled_queue.__queue_pool__['__default__']
+    assert stream_bus.install_push_queues() is True
+    assert pooled_queue.__queue_pool__['__default__'] is wrapped
+
+    class _PlainQueue:
+        pass
+
+    monkeypatch.setattr(lazyllm, 'FileSystemQueue', _PlainQueue)
+    loop = asyncio.new_event_loop()
+    try:
+        assert stream_bus.open_stream_channel('sid', loop) is None
+    finally:
+        loop.close()
@@ -1,6 +1,13 @@
+import random
+import time
 from types import SimpleNamespace
 
+import pytest
+
+from chat.components.agentic.history import _build_stream_citation_scanner
 from chat.utils.stream_scanner import (
+    _THINK_CLOSE,
+    _THINK_OPEN,
     CitationPlugin,
     ImagePlugin,
     IncrementalScanner,
@@ -87,3 +94,204 @@ def test_incremental_scanner_handles_partial_think_tags_and_plugins():
         ('text', '[1](#source "Source.md")'),
     ]
     assert tail == []
+
+
+class _ReferenceScanner(IncrementalScanner):
+    """Previous rescan-the-whole-buffer implementation, kept as the differential oracle."""
+
+    @staticmethod
+    def _partial_tag_start(buf, tag):
+        for k in range(len(tag) - 1, 0, -1):
+            if buf.endswith(tag[:k]):
+                return len(buf) - k
+        return None
+
+    def feed(self, chunk):
+        self.buf += chunk
+        out = []
+        i = seg_start = 0
+        while i < len(self.buf):
+            if self.state == 'BODY' and self.buf.startswith(_THINK_OPEN, i):
+                if i > seg_start:
+                    out.append(('text', self.buf[seg_start:i]))
+                i += len(_THINK_OPEN)
+                seg_start = i
+                self.state = 'THINK'
+                continue
+            if self.state == 'THINK' and self.buf.startswith(_THINK_CLOSE, i):
+                if i > seg_start:
+                    out.append(('think', self.buf[seg_start:i]))
+                i += len(_THINK_CLOSE)
+                seg_start = i
+                self.state = 'BODY'
+                continue
+            handled = False
+            for pl in self.plugins:
+                if self.buf[i] not in pl.prefix_set:
+                    continue
+                res = pl.match(self.buf, i)
+                if res:
+                    end, replacement = res
+                    if i > seg_start:
+                        out.append((self._field(), self.buf[seg_start:i]))
+                    out.append((self._field(), replacement))
+                    i, seg_start, handled = end, end, True
+                    break
+            if not handled:
+                i += 1
+        cut = len(self.buf)
+        for pl in self.plugins:
+            pos = pl.last_incomplete_pos(self.buf)
+            if pos is not None and pos >= seg_start and pos < cut:
+                cut = pos
+        for tag in (_THINK_OPEN, _THINK_CLOSE):
+            pos = self._partial_tag_start(self.buf, tag)
+            if pos is not None and pos >= seg_start and pos < cut:
+                cut = pos
+        if cut > seg_start:
+            out.append((self._field(), self.buf[seg_start:cut]))
+        self.buf = self.buf[cut:]
+        return [p for p in out if p[1]]
+
+
+def _ref_node(idx):
+    return SimpleNamespace(
+        text=f'source {idx} ![fig](fig{idx}.png)',
+        metadata={'images': [f'https://cdn.example.com/fig{idx}.png'], 'page': idx},
+        global_metadata={'file_name': f'Doc{idx}.md', 'docid': f'doc-{idx}', 'kb_id': 'kb-1'},
+        _uid=f'uid-{idx}',
+        _group='block',
+    )
+
+
+_IMAGE_MAP = {'chart-final.png': 'https://cdn.example.com/chart-final.png'}
+
+# Recorded answers, including the edge cases that used to be held back until flush.
+_RECORDED_STREAMS = [
+    '<think>look up [[1]] first</think>Answer with [[1]] and [[2]], unknown [[9]].\n',
+    'plan</think>Body ![chart](chart-final.png) then ![fuzzy](chart-final-v2.png) and ![gone](nope.png).',
+    'Unclosed [[abc stays text, so does [[ 12 ]] and a lone [ or ! at the end [',
+    'Code: a[[0]] < b and x<y</thin> <thinking> ![alt with ) paren](chart-final.png) [[2]]',
+    'Broken image ![alt\nnext line](chart-final.png) and ![a] b](chart-final.png) tail <thi',
+    'Agentic [[1.1]] and [[2.1]] and [3](#source-2.1 "Doc.md") and [x](#source-oops) [[1.',
+    'Image hold ![dog](/static-files/path/dog.jpg?sig=abc) and ![open](/never/closed',
+]
+
+
+def _chunkings(text, seed):
+    rng = random.Random(seed)
+    yield [text]
+    yield list(text)
+    for _ in range(3):
+        chunks, i = [], 0
+        while i < len(text):
+            n = rng.randint(1, 5)
+            chunks.append(text[i:i + n])
+            i += n
+        yield chunks
+
+
+def _merged(segments):
+    merged = []
+    for field, seg in segments:
+        if merged and merged[-1][0] == field:
+            merged[-1] = (field, merged[-1][1] + seg)
+        else:
+            merged.append((field, seg))
+    return merged
+
+
+def _run(scanner, chunks):
+    out = []
+    for chunk in chunks:
+        out.extend(scanner.feed(chunk))
+    return out + scanner.flush()
+
+
+def _generate_scanner(cls, state):
+    plugins = [CitationPlugin({1: _ref_node(1), 2: _ref_node(2)}), ImagePlugin(dict(_IMAGE_MAP))]
+    return cls(plugins, initial_state=state), plugins[0]
+
+
+def _agentic_scanner(cls):
+    config = {'_citation_sources': {
+        '1.1': {'file_name': 'Doc1.md', 'display_index': 1},
+        '2.1': {'file_name': 'Doc2.md', 'display_index': 2},
+    }}
+    scanner, plugin = _build_stream_citation_scanner(config)
+    return cls(scanner.plugins, initial_state='BODY'), plugin
+
+
+def test_incremental_scanner_matches_reference_on_recorded_streams():
+    factories = [
+        lambda cls: _generate_scanner(cls, 'BODY'),
+        lambda cls: _generate_scanner(cls, 'THINK'),
+        _agentic_scanner,
+    ]
+    for seed, text in enumerate(_RECORDED_STREAMS):
+        for make in factories:
+            for chunks in _chunkings(text, seed):
+                scanner, plugin = make(IncrementalScanner)
+                reference, reference_plugin = make(_ReferenceScanner)
+
+                got = _run(scanner, chunks)
+                expected = _run(reference, chunks)
+
+                assert _merged(got) == _merged(expected), (text, chunks)
+                assert plugin.collect() == reference_plugin.collect()
+
+
+def test_incremental_scanner_holds_only_unresolved_suffix():
+    scanner = IncrementalScanner([CitationPlugin({})], initial_state='BODY')
+
+    assert scanner.feed('see [[abc and more') == [('text', 'see [[abc and more')]
+    assert scanner.feed(' text [[12') == [('text', ' text ')]
+    assert scanner.buf == '[[12'
+
+
+def _answer(size, seed=7, citations=True):
+    rng = random.Random(seed)
+    words = ['retrieval', 'augmented', 'generation', 'chunk', 'index', 'vector', '<b>bold</b>', 'a[0]', 'wow!']
+    parts, total = ['<think>plan the answer</think>'], 0
+    while total < size:
+        word = rng.choice(words)
+        if citations and rng.random() < 0.02:
+            word = f'[[{rng.randint(1, 3)}]]'
+        elif rng.random() < 0.005:
+            word = '![chart](chart-final.png)'
+        parts.append(word)
+        total += len(word) + 1
+    return ' '.join(parts)
+
+
+def _feed_timed(cls, text, seed=11):
+    rng = random.Random(seed)
+    scanner = cls([CitationPlugin({1: _ref_node(1), 2: _ref_node(2)}), ImagePlugin(dict(_IMAGE_MAP))])
+    start = time.perf_counter()
+    out, i = [], 0
+    while i < len(text):
+        n = rng.randint(1, 5)
+        out.extend(scanner.feed(text[i:i + n]))
+        i += n
+    out.extend(scanner.flush())
+    return time.perf_counter() - start, out
+
+
+@pytest.mark.benchmark
+def test_incremental_scanner_benchmark_100kb_in_small_chunks():
+    """Feed a 100 KB answer in 1-5 char chunks; also a held-back '[[' case where the old scanner was quadratic."""
+    text = _answer(100 * 1024)
+    new_s, new_out = _feed_timed(IncrementalScanner, text)
+    old_s, old_out = _feed_timed(_ReferenceScanner, text)
+    assert _merged(new_out) == _merged(old_out)
+
+    held = _answer(4 * 1024, seed=3, citations=False).replace('</think>', '</think> unclosed [[ref', 1)
+    new_held_s, new_held_out = _feed_timed(IncrementalScanner, held)
+    old_held_s, old_held_out = _feed_timed(_ReferenceScanner, held)
+    assert _merged(new_held_out) == _merged(old_held_out)
+
+    report = {
+        '100kb_new_ms': new_s * 1000, '100kb_old_ms': old_s * 1000,
+        '4kb_held_new_ms': new_held_s * 1000, '4kb_held_old_ms': old_held_s * 1000,
+    }
+    print(f'[stream_scanner bench] {report}')
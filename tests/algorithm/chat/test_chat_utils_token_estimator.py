@@ -0,0 +1,126 @@
+import os
+import random
+import time
+
+import pytest
+
+import chat.utils.token_estimator as token_estimator
+from chat.components.process.adaptive_topk import adaptive_k_select_from_nodes
+from chat.utils.token_estimator import TokenEstimator, heuristic_token_len
+
+_ZH = ('根据公司规定，员工在年度计划中申请退款时，需要提交书面申请并附上相关发票。财务部门将在十五个工作日内完成审核，'
+       '并通过原支付渠道退还款项。')
+_EN = ('According to company policy, employees requesting a refund on an annual plan must submit a written request '
+       'with the relevant invoices attached. Finance will complete the review within fifteen business days. ')
+_MIXED = 'RAG 系统使用 BM25 和 dense embedding (bge-m3) 进行混合检索，top_k=20，然后通过 reranker 重排序。'
+_JA = '会社の規定により、年間プランの返金を申請する従業員は、関連する請求書を添付した書面を提出する必要があります。'
+
+
+class _Node:
+    def __init__(self, text, score):
+        self.text = text
+        self.relevance_score = score
+
+
+@pytest.fixture(autouse=True)
+def _reset_estimator(monkeypatch):
+    monkeypatch.setitem(token_estimator._cfg._impl, 'chat_tokenizer', '')
+    token_estimator.reset_token_estimator()
+    yield
+    token_estimator.reset_token_estimator()
+
+
+@pytest.fixture
+def cl100k(monkeypatch):
+    """Reference tokenizer from the BPE file bundled with lazyllm, so no download is needed."""
+    tiktoken_load = pytest.importorskip('tiktoken.load')
+    import lazyllm
+    bundled = os.path.join(os.path.dirname(lazyllm.__file__), 'tokenizers')
+    if not os.path.exists(os.path.join(bundled, 'cl100k_base.tiktoken')):
+        pytest.skip('cl100k_base BPE file is not bundled')
+    monkeypatch.setattr(tiktoken_load, 'read_file_cached',
+                        lambda blobpath, expected_hash=None: open(
+                            os.path.join(bundled, os.path.basename(blobpath)), 'rb').read())
+    return token_estimator.tiktoken_counter('cl100k_base')
+
+
+def test_heuristic_keeps_ascii_rate_and_counts_cjk_per_character():
+    assert heuristic_token_len('abcd' * 3) == 3
+    assert heuristic_token_len('') == 0
+    assert heuristic_token_len('退款政策') == 4
+    assert heuristic_token_len('退款 policy') == 4
+    assert heuristic_token_len('café au lait') == 3
+
+
+def test_estimator_memoises_counts_and_accepts_nodes(monkeypatch):
+    calls = []
+
+    def counter(text):
+        calls.append(text)
+        return len(text)
+
+    estimate = TokenEstimator(counter)
+    assert estimate(_Node('hello', 1.0)) == 5
+    assert estimate('hello') == 5
+    assert estimate(_Node('', 1.0)) == 1
+    assert estimate(object()) == 1
+    assert calls == ['hello', '']
+
+    monkeypatch.setattr(token_estimator, '_CACHE_MAX_CHARS', 4)
+    estimate('long text')
+    estimate('long text')
+    assert calls[-2:] == ['long text', 'long text']
+
+
+def test_configured_tokenizer_and_fallback(monkeypatch, cl100k):
+    monkeypatch.setitem(token_estimator._cfg._impl, 'chat_tokenizer', 'cl100k_base')
+    assert token_estimator.get_token_estimator()(_ZH) == cl100k(_ZH)
+
+    token_estimator.reset_token_estimator()
+    monkeypatch.setitem(token_estimator._cfg._impl, 'chat_tokenizer', 'no-such-encoding')
+    assert token_estimator.get_token_estimator()(_ZH) == heuristic_token_len(_ZH)
+
+
+def _corpus(rng, size):
+    parts = [_ZH, _EN, _MIXED, _JA]
+    nodes = []
+    for i in range(size):
+        text = ''.join(rng.choice(parts) for _ in range(rng.randrange(1, 6)))
+        nodes.append(_Node(text, 1.0 - i / size))
+    return nodes
+
+
+def test_prompt_size_accuracy_benchmark(cl100k):
+    """Select candidates under max_tokens=2048 with each estimator and measure the real prompt size."""
+    rng = random.Random(17)
+    estimators = {
+        'len//4': lambda n: max(1, len(n.text) // 4),
+        'heuristic': TokenEstimator(),
+        'tokenizer': TokenEstimator(cl100k),
+    }
+    overshoot = {name: [] for name in estimators}
+    node_error = {name: [] for name in estimators}
+    for size in (50, 100, 200, 500):
+        nodes = _corpus(rng, size)
+        for node in nodes[:50]:
+            real = cl100k(node.text)
+            for name, estimate in estimators.items():
+                node_error[name].append(abs(estimate(node) - real) / real)
+        for name, estimate in estimators.items():
+            start = time.perf_counter()
+            selected, _, _ = adaptive_k_select_from_nodes(nodes, get_token_len=estimate, max_tokens=2048, gap_tau=1.0,
+                                                          packing='knapsack')
+            elapsed_ms = (time.perf_counter() - start) * 1e3
+            real = sum(cl100k(n.text) for n in selected)
+            overshoot[name].append(real / 2048)
+            print(f'[token budget bench] candidates={size} estimator={name} selected={len(selected)} '
+                  f'real_tokens={real} select_ms={elapsed_ms:.2f}')
+    for name in estimators:
+        mean_error = sum(node_error[name]) / len(node_error[name])
+        print(f'[token budget bench] estimator={name} mean_node_error={mean_error:.1%} '
+              f'max_prompt_vs_budget={max(overshoot[name]):.2f}')
+
+    assert max(overshoot['len//4']) > 1.8
+    assert max(overshoot['heuristic']) < 1.15
+    assert max(overshoot['tokenizer']) <= 1.0
+    assert sum(node_error['heuristic']) < sum(node_error['len//4']) / 2
@@ -23,3 +23,44 @@ def test_rewrite_markdown_image_urls_replaces_hallucinated_host(tmp_path, monkey
     )
     assert expected in rewritten
     assert 'ext.lazymind.ai' not in rewritten
+
+
+def test_stream_rewriter_matches_whole_text_rewrite_for_split_images(monkeypatch):
+    from chat.utils.markdown_images import MarkdownImageStreamRewriter
+
+    config = {'_image_url_registry': {}}
+    calls = []
+
+    def _config():
+        calls.append(1)
+        return config
+
+    monkeypatch.setattr(
+        'chat.utils.markdown_images.build_image_url_map_from_config',
+        lambda cfg: {'https://ext.lazymind.ai/a.png': 'https://cdn/a.png'} if cfg else {},
+    )
+    text = ('intro! wow ![a](https://ext.lazymind.ai/a.png) mid ![b](https://agent-cdn.minimax.io/b.png) '
+            'end ![open')
+    expected = rewrite_markdown_image_urls(text, config=config)
+
+    for size in (1, 3, 7, 64):
+        rewriter = MarkdownImageStreamRewriter(_config)
+        pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        out = ''.join(rewriter.feed(piece) for piece in pieces) + rewriter.flush()
+        assert out == expected
+
+    assert 'https://cdn/a.png' in expected and 'minimax' not in expected
+    calls.clear()
+    plain = MarkdownImageStreamRewriter(_config)
+    assert plain.feed('no images here') == 'no images here'
+    assert calls == []
+
+
+def test_stream_rewriter_releases_overlong_open_reference():
+    from chat.utils.markdown_images import MarkdownImageStreamRewriter
+
+    rewriter = MarkdownImageStreamRewriter(max_hold=16)
+
+    assert rewriter.feed('a ![alt') == 'a '
+    assert rewriter.feed(' text that never closes') == '![alt text that never closes'
+    assert rewriter.flush() == ''
@@ -0,0 +1,131 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from chat.utils import opensearch_client
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """Minimal OpenSearch stand-in: only ``col_line`` holds the node."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.server.stats_lock:
+            self.server.connections += 1
+
+    def _hits(self, index):
+        hits = [{'_id': 'n1', '_source': {'uid': 'n1'}}] if index == 'col_line' else []
+        return {'hits': {'hits': hits}}
+
+    def do_POST(self):
+        with self.server.stats_lock:
+            self.server.requests += 1
+        raw = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+        if self.path == '/_msearch':
+            lines = [json.loads(line) for line in raw.splitlines() if line.strip()]
+            payload = {'responses': [self._hits(header['index']) for header in lines[::2]]}
+        else:
+            payload = self._hits(self.path.strip('/').split('/')[0])
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@pytest.fixture
+def stand_in():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StandInHandler)
+    server.daemon_threads = True
+    server.stats_lock = threading.Lock()
+    server.requests = server.connections = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    opensearch_client.reset_clients()
+    try:
+        yield server, f'http://127.0.0.1:{server.server_address[1]}'
+    finally:
+        opensearch_client.reset_clients()
+        server.shutdown()
+        server.server_close()
+
+
+def _reset_stats(server):
+    with server.stats_lock:
+        server.requests = server.connections = 0
+
+
+_BODY = {'size': 1, 'query': {'ids': {'values': ['n1']}}}
+
+
+def test_client_is_shared_per_endpoint_and_credentials(stand_in):
+    _, url = stand_in
+    first = opensearch_client.get_opensearch_client(url, 'u', 'p')
+
+    assert opensearch_client.get_opensearch_client(url + '/', 'u', 'p') is first
+    assert opensearch_client.get_opensearch_client(url, 'u', 'other') is not first
+
+
+def test_msearch_returns_one_response_per_search_in_order(stand_in):
+    server, url = stand_in
+    client = opensearch_client.get_opensearch_client(url, 'u', 'p')
+
+    responses = client.msearch([('col_block', _BODY), ('col_line', _BODY)])
+
+    assert [len(r['hits']['hits']) for r in responses] == [0, 1]
+    assert server.requests == 1
+
+
+@pytest.mark.benchmark
+def test_opensearch_lookup_benchmark_round_trips_and_wall_time(stand_in):
+    """Session-per-call sequential lookups vs pooled keep-alive client with _msearch."""
+    server, url = stand_in
+    lookups = 30
+
+    def _legacy_lookup():
+        for index in ('col_block', 'col_line'):
+            with requests.sessions.Session() as session:
+                session.trust_env = False
+                resp = session.post(f'{url}/{index}/_search', json=_BODY, auth=('u', 'p'), timeout=30)
+                hits = resp.json()['hits']['hits']
+            if hits:
+                return hits[0]
+        return None
+
+    def _pooled_lookup():
+        client = opensearch_client.get_opensearch_client(url, 'u', 'p')
+        for resp in client.msearch([('col_block', _BODY), ('col_line', _BODY)]):
+            hits = resp['hits']['hits']
+            if hits:
+                return hits[0]
+        return None
+
+    report = {}
+    for name, lookup in (('legacy', _legacy_lookup), ('pooled', _pooled_lookup)):
+        _reset_stats(server)
+        start = time.perf_counter()
+        for _ in range(lookups):
+            assert lookup()['_id'] == 'n1'
+        elapsed = time.perf_counter() - start
+        report[name] = {
+            'round_trips_per_lookup': server.requests / lookups,
+            'connections': server.connections,
+            'wall_ms_per_lookup': elapsed / lookups * 1000,
+        }
+    print(f'[opensearch_client bench] {report}')
+
+    assert report['legacy']['round_trips_per_lookup'] == 2
+    assert report['pooled']['round_trips_per_lookup'] == 1
+    assert report['pooled']['connections'] == 1
+    assert report['legacy']['connections'] == 2 * lookups
@@ -3,6 +3,7 @@ from types import SimpleNamespace
 
 retriever_mod = importlib.import_module('chat.pipelines.builders.get_retriever')
 ppl_search_mod = importlib.import_module('chat.pipelines.builders.get_ppl_search')
+reranker_pool_mod = importlib.import_module('chat.pipelines.builders.reranker_pool')
 
 
 class _DummyContext:
@@ -271,3 +272,28 @@ def test_get_ppl_search_diverts_to_temp_retriever_when_files_present(monkeypatch
 
     assert recorded['ifs']['cond']() is True
 
+
+def test_rerank_reuses_pooled_reranker_across_queries(monkeypatch):
+    built = []
+
+    class _FakeReranker:
+        def __init__(self, name, model, topk):
+            built.append((name, model, topk))
+            self.topk = topk
+
+        def __call__(self, nodes, query):
+            return list(nodes)[:self.topk]
+
+    pool = reranker_pool_mod.RerankerPool(max_size=2)
+    monkeypatch.setattr(ppl_search_mod, 'get_reranker_pool', lambda: pool)
+    monkeypatch.setattr(ppl_search_mod, 'get_config_path', lambda: '/cfg.yaml')
+    monkeypatch.setattr(ppl_search_mod, 'get_dynamic_role_slot_map', lambda path: {})
+    monkeypatch.setattr(ppl_search_mod, 'AutoModel', lambda model, config=False: f'model:{model}')
+    monkeypatch.setattr(ppl_search_mod, 'Reranker', _FakeReranker)
+
+    first = ppl_search_mod._rerank([1, 2, 3], query='q1', topk=2)
+    second = ppl_search_mod._rerank([4, 5, 6], query='q2', topk=2)
+
+    assert first == [1, 2]
+    assert second == [4, 5]
+    assert built == [('ModuleReranker', 'model:reranker', 2)]
@@ -133,3 +133,34 @@ def test_get_ppl_naive_keeps_expected_stage_order(monkeypatch):
     assert recorded['ifs']['cond']({'history': []}) is False
     assert recorded['ifs']['fpath']('x') == 'x'
     assert recorded['stream'] is True
+
+
+def test_get_ppl_naive_speculative_search_runs_the_rewrite_inside_search(monkeypatch):
+    fake_rag_pipeline = _FakePipeline({'query': 'q', 'history': ['turn-1'], 'debug': False})
+    seen = {}
+
+    class _FakeRewriter:
+        def __init__(self, **kwargs):
+            seen['init'] = kwargs
+
+        def __call__(self, query_params, **kwargs):
+            seen['call'] = kwargs
+            return query_params
+
+    monkeypatch.setitem(naive_mod._cfg._impl, 'search_speculative', True)
+    monkeypatch.setattr(naive_mod.lazyllm, 'save_pipeline_result', lambda: _DummyContext())
+    monkeypatch.setattr(naive_mod, 'pipeline', lambda: _DummyContextWithValue(fake_rag_pipeline))
+    monkeypatch.setattr(naive_mod, 'bind', lambda **kwargs: _DummyPipe())
+    monkeypatch.setattr(naive_mod, 'AutoModel', lambda model, config=False: f'model:{model}')
+    monkeypatch.setattr(naive_mod, 'MultiturnQueryRewriter', _FakeRewriter)
+    monkeypatch.setattr(naive_mod, 'get_ppl_search', lambda url, retriever_configs: 'search')
+    monkeypatch.setattr(naive_mod, 'get_ppl_generate', lambda stream=False: _DummyPipe('generate'))
+
+    naive_mod.get_ppl_naive('http://kb-service')
+
+    assert fake_rag_pipeline.assignments == ['search', 'generate']
+    search = fake_rag_pipeline.search
+    assert isinstance(search, naive_mod.SpeculativeSearch) and search.search == 'search'
+    assert search.should_rewrite is naive_mod.has_history
+    search.rewrite({'query': 'q', 'priority': 3, 'files': ['a.pdf'], 'image_files': []})
+    assert seen == {'init': {'llm': 'model:llm'}, 'call': {'priority': 3, 'has_appendix': True}}
@@ -0,0 +1,158 @@
+import importlib
+import statistics
+import threading
+import time
+
+import pytest
+
+pool_mod = importlib.import_module('chat.pipelines.builders.reranker_pool')
+
+
+class _StubReranker:
+    """Local stand-in for Reranker(ModuleReranker): construction is the expensive part."""
+
+    build_cost = 0.004
+    active = 0
+    peak = 0
+    _lock = threading.Lock()
+
+    def __init__(self, model, topk, config_path):
+        time.sleep(self.build_cost)
+        self.model = model
+        self.topk = topk
+        self.config_path = config_path
+
+    def __call__(self, nodes, query):
+        cls = type(self)
+        with cls._lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        try:
+            time.sleep(0.0005)
+            return list(nodes)[:self.topk]
+        finally:
+            with cls._lock:
+                cls.active -= 1
+
+
+def _counting_factory():
+    built = []
+
+    def factory(model, topk, config_path):
+        built.append((model, topk, config_path))
+        return _StubReranker(model, topk, config_path)
+
+    return factory, built
+
+
+def test_pool_reuses_instance_for_same_key():
+    pool = pool_mod.RerankerPool(max_size=4, max_concurrency=2)
+    factory, built = _counting_factory()
+
+    with pool.acquire('reranker', 5, '/cfg.yaml', factory=factory) as first:
+        pass
+    with pool.acquire('reranker', 5, '/cfg.yaml', factory=factory) as second:
+        pass
+
+    assert first is second
+    assert built == [('reranker', 5, '/cfg.yaml')]
+
+
+def test_pool_key_distinguishes_topk_and_role_config():
+    pool = pool_mod.RerankerPool(max_size=8)
+    factory, built = _counting_factory()
+
+    with pool.acquire('reranker', 5, '/cfg.yaml', factory=factory):
+        pass
+    with pool.acquire('reranker', 10, '/cfg.yaml', factory=factory):
+        pass
+    with pool.acquire('reranker', 5, '/cfg.yaml', factory=factory, role_cfg={'source': 'siliconflow'}):
+        pass
+
+    assert len(built) == 3
+    assert pool.make_key('reranker', 5, '/cfg.yaml') in pool
+    assert pool_mod.config_hash('/cfg.yaml', {'a': 1, 'b': 2}) == pool_mod.config_hash('/cfg.yaml', {'b': 2, 'a': 1})
+
+
+def test_pool_evicts_least_recently_used_entry():
+    pool = pool_mod.RerankerPool(max_size=2)
+    factory, built = _counting_factory()
+
+    for topk in (1, 2):
+        with pool.acquire('reranker', topk, '/cfg.yaml', factory=factory):
+            pass
+    with pool.acquire('reranker', 1, '/cfg.yaml', factory=factory):
+        pass
+    with pool.acquire('reranker', 3, '/cfg.yaml', factory=factory):
+        pass
+
+    assert len(pool) == 2
+    assert pool.make_key('reranker', 1, '/cfg.yaml') in pool
+    assert pool.make_key('reranker', 2, '/cfg.yaml') not in pool
+    assert pool.make_key('reranker', 3, '/cfg.yaml') in pool
+
+
+def test_pool_builds_once_under_concurrent_first_use_and_limits_concurrency():
+    pool = pool_mod.RerankerPool(max_size=2, max_concurrency=2)
+    factory, built = _counting_factory()
+    _StubReranker.active = _StubReranker.peak = 0
+
+    def _worker():
+        for _ in range(5):
+            with pool.acquire('reranker', 3, '/cfg.yaml', factory=factory) as reranker:
+                reranker(range(10), query='q')
+
+    threads = [threading.Thread(target=_worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(built) == 1
+    assert _StubReranker.peak <= 2
+
+
+def test_pool_warmup_prebuilds_each_topk():
+    pool = pool_mod.RerankerPool(max_size=4)
+    factory, built = _counting_factory()
+
+    assert pool.warmup('reranker', (10, 20), '/cfg.yaml', factory=factory) == 2
+    with pool.acquire('reranker', 20, '/cfg.yaml', factory=factory):
+        pass
+
+    assert [topk for _, topk, _ in built] == [10, 20]
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+@pytest.mark.benchmark
+def test_reranker_pool_micro_benchmark_p50_p99():
+    """Compare per-query latency of build-per-query vs pooled rerankers with a local stub."""
+    nodes = list(range(50))
+    rounds = 60
+
+    unpooled = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        _StubReranker('reranker', 10, '/cfg.yaml')(nodes, query='q')
+        unpooled.append(time.perf_counter() - start)
+
+    pool = pool_mod.RerankerPool(max_size=4)
+    pool.warmup('reranker', (10,), '/cfg.yaml', factory=_StubReranker)
+    pooled = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        with pool.acquire('reranker', 10, '/cfg.yaml', factory=_StubReranker) as reranker:
+            reranker(nodes, query='q')
+        pooled.append(time.perf_counter() - start)
+
+    report = {
+        'unpooled_p50_ms': statistics.median(unpooled) * 1000,
+        'unpooled_p99_ms': _percentile(unpooled, 99) * 1000,
+        'pooled_p50_ms': statistics.median(pooled) * 1000,
+        'pooled_p99_ms': _percentile(pooled, 99) * 1000,
+    }
+    print(f'[reranker_pool bench] {report}')
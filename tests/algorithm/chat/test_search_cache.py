@@ -0,0 +1,249 @@
+import hashlib
+import random
+import time
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from lazyllm.tools.rag import DocNode
+
+import chat.pipelines.builders.search_cache as search_cache
+from chat.app.api import search_cache_routes
+from chat.pipelines.builders.search_cache import CachedSearch, SearchResultCache, normalize_query
+
+_URL = 'http://algo:8000,kb_main'
+
+
+def _embed(text):
+    # Character-trigram hashing: paraphrases that share most wording land close together.
+    vector = np.zeros(256, dtype=np.float32)
+    padded = f'  {text}  '
+    for i in range(len(padded) - 2):
+        vector[int(hashlib.md5(padded[i:i + 3].encode('utf-8')).hexdigest(), 16) % 256] += 1
+    return vector
+
+
+class _FakeSearch:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = []
+
+    def __call__(self, query_params):
+        self.calls.append(query_params['query'])
+        time.sleep(self.latency)
+        return [DocNode(text=f'answer to {query_params["query"]}',
+                        metadata={'kb': query_params['filters'].get('kb_id')})]
+
+
+def _params(query, kb_id='kb_main', **extra):
+    return {'query': query, 'filters': {'kb_id': kb_id}, 'files': [], 'image_files': [], 'user_id': 'u1', **extra}
+
+
+@pytest.fixture(autouse=True)
+def _no_global_cache(monkeypatch):
+    monkeypatch.setitem(search_cache._cfg._impl, 'search_cache', False)
+    search_cache.reset_search_cache()
+    yield
+    search_cache.reset_search_cache()
+
+
+def test_normalize_query_folds_case_width_space_and_trailing_punctuation():
+    assert normalize_query('  What  is ＲＡＧ？ ') == 'what is rag'
+    assert normalize_query('退款政策是什么。') == '退款政策是什么'
+    assert normalize_query('') == ''
+
+
+def test_exact_hit_returns_fresh_copies_and_keys_cover_scope():
+    search = _FakeSearch()
+    cached = CachedSearch(search, _URL, SearchResultCache(similarity_threshold=0))
+
+    first = cached(_params('What is the refund policy?'))
+    first[0]._content = 'mutated downstream'
+    second = cached(_params('what is the refund   policy'))
+
+    assert search.calls == ['What is the refund policy?']
+    assert second[0].text == 'answer to What is the refund policy?'
+    cached(_params('what is the refund policy', kb_id='kb_other'))
+    cached(_params('what is the refund policy', files=['tmp.pdf']))
+    assert len(search.calls) == 3
+
+
+def test_vocabulary_rewrite_is_part_of_the_key():
+    search = _FakeSearch()
+    synonyms = {'u1': 'refund policy', 'u2': 'return policy'}
+    cached = CachedSearch(search, _URL, SearchResultCache(similarity_threshold=0),
+                          rewrite=lambda p: synonyms[p['user_id']])
+
+    cached(_params('refund policy'))
+    cached(_params('refund policy', user_id='u2'))
+    cached(_params('refund policy'))
+
+    assert len(search.calls) == 2
+
+
+def test_semantic_hit_within_threshold_only():
+    search = _FakeSearch()
+    cache = SearchResultCache(similarity_threshold=0.85, embed_fn=_embed)
+    cached = CachedSearch(search, _URL, cache)
+
+    cached(_params('what is the refund policy for annual plans'))
+    hit = cached(_params('what is the refund policy for the annual plans'))
+    cached(_params('how do I reset my password'))
+    cached(_params('what is the refund policy for annual plans', kb_id='kb_other'))
+
+    assert hit[0].text == 'answer to what is the refund policy for annual plans'
+    assert len(search.calls) == 3
+    assert (cache.stats.hits, cache.stats.semantic_hits, cache.stats.misses) == (0, 1, 3)
+
+
+def test_ttl_expires_both_levels(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(search_cache.time, 'time', lambda: clock[0])
+    search = _FakeSearch()
+    cached = CachedSearch(search, _URL, SearchResultCache(ttl=60, similarity_threshold=0.85, embed_fn=_embed))
+
+    cached(_params('what is the refund policy for annual plans'))
+    clock[0] += 59
+    cached(_params('what is the refund policy for annual plans'))
+    cached(_params('what is the refund policy for the annual plans'))
+    assert len(search.calls) == 1
+
+    clock[0] += 2
+    cached(_params('what is the refund policy for the annual plans'))
+    assert len(search.calls) == 2
+    cached(_params('what is the refund policy for annual plans'))
+    assert len(search.calls) == 2
+
+
+def test_dataset_invalidation_drops_only_that_dataset():
+    search = _FakeSearch()
+    cache = SearchResultCache(similarity_threshold=0.85, embed_fn=_embed)
+    cached = CachedSearch(search, _URL, cache)
+    cached(_params('refund policy', kb_id='kb_a'))
+    cached(_params('refund policy', kb_id='kb_b'))
+
+    assert cache.invalidate_dataset('kb_a') == 1
+    cached(_params('refund policy', kb_id='kb_a'))
+    cached(_params('refund policy', kb_id='kb_b'))
+    assert search.calls == ['refund policy'] * 3
+
+    assert cache.invalidate_dataset() == 2
+    assert len(cache) == 0
+
+
+def test_invalidating_one_dataset_drops_multi_dataset_searches_over_it():
+    search = _FakeSearch()
+    cache = SearchResultCache(similarity_threshold=0)
+    cached = CachedSearch(search, _URL, cache)
+    cached(_params('refund policy', kb_id=['kb_a', 'kb_b']))
+    cached(_params('refund policy', kb_id='kb_c'))
+
+    assert cache.invalidate_dataset('kb_b') == 1
+    cached(_params('refund policy', kb_id=['kb_a', 'kb_b']))
+    cached(_params('refund policy', kb_id='kb_c'))
+    assert search.calls == ['refund policy'] * 3
+
+
+def test_dataset_falls_back_to_url_name():
+    assert search_cache.dataset_of(_URL, {'filters': {}}) == 'kb_main'
+    assert search_cache.dataset_of(_URL, {'filters': {'kb_id': ['b', 'a']}}) == 'a,b'
+    assert search_cache.dataset_of('http://algo:8000', {}) == 'http://algo:8000'
+
+
+def test_persistence_round_trip_keeps_versions(tmp_path):
+    path = str(tmp_path / 'cache' / 'search.pkl')
+    cache = SearchResultCache(similarity_threshold=0.85, embed_fn=_embed, persist_path=path)
+    search = _FakeSearch()
+    cached = CachedSearch(search, _URL, cache)
+    cached(_params('what is the refund policy for annual plans', kb_id='kb_a'))
+    cached(_params('how do I reset my password', kb_id='kb_b'))
+    cache.invalidate_dataset('kb_b')
+    cache.flush()
+
+    reloaded = SearchResultCache(similarity_threshold=0.85, embed_fn=_embed, persist_path=path)
+    cached = CachedSearch(search, _URL, reloaded)
+    assert len(reloaded) == 1
+    cached(_params('what is the refund policy for the annual plans', kb_id='kb_a'))
+    cached(_params('how do I reset my password', kb_id='kb_b'))
+    assert reloaded.stats.semantic_hits == 1 and len(search.calls) == 3
+
+    (tmp_path / 'broken.pkl').write_bytes(b'not a pickle')
+    assert len(SearchResultCache(persist_path=str(tmp_path / 'broken.pkl'))) == 0
+
+
+def test_embedding_failure_falls_back_to_exact_level():
+    def broken(_):
+        raise RuntimeError('embedding service down')
+
+    search = _FakeSearch()
+    cached = CachedSearch(search, _URL, SearchResultCache(similarity_threshold=0.85, embed_fn=broken))
+    cached(_params('refund policy'))
+    cached(_params('refund policy'))
+    assert len(search.calls) == 1
+
+
+def test_lru_bound():
+    search = _FakeSearch()
+    cache = SearchResultCache(max_entries=2, similarity_threshold=0)
+    cached = CachedSearch(search, _URL, cache)
+    for query in ('a', 'b', 'a', 'c', 'a', 'b'):
+        cached(_params(query))
+    assert search.calls == ['a', 'b', 'c', 'b']
+    assert len(cache) == 2
+
+
+def test_config_switch_and_invalidate_route(monkeypatch):
+    search = _FakeSearch()
+    assert search_cache.with_search_cache(search, _URL) is search
+
+    monkeypatch.setitem(search_cache._cfg._impl, 'search_cache', True)
+    monkeypatch.setitem(search_cache._cfg._impl, 'search_cache_similarity', '0')
+    wrapped = search_cache.with_search_cache(search, _URL)
+    assert isinstance(wrapped, CachedSearch) and wrapped.search is search
+    wrapped(_params('refund policy'))
+    wrapped(_params('refund policy'))
+
+    app = FastAPI()
+    app.include_router(search_cache_routes.router)
+    client = TestClient(app)
+    assert client.get('/api/search_cache/stats').json()['hits'] == 1
+    response = client.post('/api/search_cache/invalidate', json={'dataset': 'kb_main'})
+    assert response.json() == {'status': 'ok', 'dataset': 'kb_main', 'removed': 1}
+    wrapped(_params('refund policy'))
+    assert len(search.calls) == 2
+
+
+def _zipf_log(n_queries, n_distinct, s, seed):
+    rng = random.Random(seed)
+    topics = [f'question {i} about the {rng.choice(["refund", "travel", "security", "leave"])} policy of '
+              f'department {rng.randrange(50)}' for i in range(n_distinct)]
+    weights = [1 / (rank + 1) ** s for rank in range(n_distinct)]
+    variants = [lambda q: q, lambda q: q.upper() + '?', lambda q: f'  {q}  ', lambda q: q.replace(' the ', ' our ')]
+    return [rng.choice(variants)(rng.choices(topics, weights)[0]) for _ in range(n_queries)]
+
+
+@pytest.mark.benchmark
+def test_zipfian_replay_benchmark():
+    """Replay a Zipf(1.1) query log with surface paraphrases: uncached vs two-level cache."""
+    latency = 0.002
+    log = _zipf_log(1500, 300, 1.1, seed=7)
+
+    uncached = _FakeSearch(latency)
+    start = time.perf_counter()
+    for query in log:
+        uncached(_params(query))
+    uncached_s = time.perf_counter() - start
+
+    cache = SearchResultCache(similarity_threshold=0.9, embed_fn=_embed)
+    cached = CachedSearch(_FakeSearch(latency), _URL, cache)
+    start = time.perf_counter()
+    for query in log:
+        cached(_params(query))
+    cached_s = time.perf_counter() - start
+    stats = cache.stats.as_dict()
+    print(f'[search cache bench] queries={len(log)} uncached_s={uncached_s:.2f} cached_s={cached_s:.2f} '
+          f'stats={stats}')
+
+    assert stats['semantic_hits'] > 0
+    assert stats['hit_rate'] > 0.6
@@ -0,0 +1,171 @@
+import random
+import statistics
+import threading
+import time
+
+import pytest
+
+from chat.pipelines.builders.speculative_search import SpeculativeSearch
+
+
+class _FakeSearch:
+    def __init__(self, latency=0.0, error=None):
+        self.latency = latency
+        self.error = error
+        self.calls = []
+
+    def __call__(self, query_params):
+        self.calls.append(query_params['query'])
+        time.sleep(self.latency)
+        if self.error:
+            raise self.error
+        return [f'node for {query_params["query"]}']
+
+
+class _FakeRewriter:
+    """Stands in for the rewrite LLM call: ``rewrites`` maps a raw query to its rewrite (default unchanged)."""
+
+    def __init__(self, latency=0.0, rewrites=None, error=None):
+        self.latency = latency
+        self.rewrites = rewrites or {}
+        self.error = error
+
+    def __call__(self, query_params):
+        time.sleep(self.latency)
+        if self.error:
+            raise self.error
+        query = query_params['query']
+        query_params['query'] = self.rewrites.get(query, query)
+        query_params['origin_query'] = query
+        return query_params
+
+
+def _has_history(query_params):
+    return bool(query_params.get('history'))
+
+
+def _params(query, history=('earlier turn',)):
+    return {'query': query, 'history': list(history), 'filters': {'kb_id': 'kb'}, 'files': []}
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return predicate()
+
+
+def test_unchanged_rewrite_reuses_the_speculative_search():
+    # Search and rewrite each wait for the other to start, so the turn only completes if they overlap.
+    search_started, rewrite_started = threading.Event(), threading.Event()
+    rewriter = _FakeRewriter(rewrites={'Refund policy?': 'refund policy'})
+    search = _FakeSearch()
+
+    def overlapping_search(query_params):
+        search_started.set()
+        assert rewrite_started.wait(2.0)
+        return search(query_params)
+
+    def overlapping_rewrite(query_params):
+        rewrite_started.set()
+        assert search_started.wait(2.0)
+        return rewriter(query_params)
+
+    speculative = SpeculativeSearch(overlapping_search, overlapping_rewrite, should_rewrite=_has_history)
+    params = _params('Refund policy?')
+
+    assert speculative(params) == ['node for Refund policy?']
+    assert search.calls == ['Refund policy?']
+    assert params == _params('Refund policy?')
+    stats = speculative.stats.as_dict()
+    assert (stats['speculated'], stats['hits'], stats['misses'], stats['hit_rate']) == (1, 1, 0, 1.0)
+    assert (stats['cancelled'], stats['wasted'], stats['skipped']) == (0, 0, 0)
+
+
+def test_changed_rewrite_searches_the_rewrite_and_books_the_waste():
+    search = _FakeSearch(latency=0.05)
+    speculative = SpeculativeSearch(search, _FakeRewriter(latency=0.01, rewrites={'and in 2023?': 'revenue in 2023'}))
+
+    assert speculative(_params('and in 2023?')) == ['node for revenue in 2023']
+    assert sorted(search.calls) == ['and in 2023?', 'revenue in 2023']
+    assert _wait_for(lambda: speculative.stats.wasted == 1)
+    assert speculative.stats.misses == 1 and speculative.stats.wasted_seconds > 0.03
+
+
+def test_turns_without_history_search_directly():
+    search = _FakeSearch()
+    speculative = SpeculativeSearch(search, _FakeRewriter(error=AssertionError('no rewrite expected')),
+                                    should_rewrite=_has_history)
+
+    assert speculative(_params('hello', history=())) == ['node for hello']
+    assert search.calls == ['hello'] and speculative.stats.speculated == 0
+
+
+def test_queued_speculation_is_cancelled_and_saturation_skips():
+    release = threading.Event()
+    search = _FakeSearch()
+    speculative = SpeculativeSearch(search, _FakeRewriter(rewrites={'it?': 'the contract'}), workers=1)
+    speculative._executor.submit(release.wait)
+
+    assert speculative(_params('it?')) == ['node for the contract']
+    assert speculative.stats.cancelled == 1 and search.calls == ['the contract']
+
+    speculative._pending = 2
+    speculative(_params('it?'))
+    assert speculative.stats.skipped == 1
+    release.set()
+
+
+def test_rewrite_failure_propagates_and_speculative_failure_falls_back():
+    search = _FakeSearch(latency=0.02)
+    speculative = SpeculativeSearch(search, _FakeRewriter(error=RuntimeError('llm down')))
+    with pytest.raises(RuntimeError, match='llm down'):
+        speculative(_params('q'))
+    assert _wait_for(lambda: speculative.stats.wasted == 1)
+
+    flaky = _FakeSearch(error=RuntimeError('store down'))
+    speculative = SpeculativeSearch(flaky, _FakeRewriter())
+    with pytest.raises(RuntimeError, match='store down'):
+        speculative(_params('q'))
+    assert flaky.calls == ['q', 'q']
+
+
+@pytest.mark.benchmark
+def test_end_to_end_latency_benchmark():
+    """40 multi-turn turns with a 60-120 ms rewrite LLM and a 40-90 ms search; about half the rewrites are no-ops."""
+    rng = random.Random(11)
+    rewrites, rewrite_latency, search_latency = {}, {}, {}
+    for i in range(40):
+        query = f'question {i} about the travel policy'
+        if rng.random() >= 0.5:
+            rewrites[query] = f'{query} for the sales team in 2024'
+        rewrite_latency[query] = rng.uniform(0.06, 0.12)
+        search_latency[query] = search_latency[rewrites.get(query, query)] = rng.uniform(0.04, 0.09)
+    rewriter = _FakeRewriter(rewrites=rewrites)
+
+    def rewrite(query_params):
+        time.sleep(rewrite_latency[query_params['query']])
+        return rewriter(query_params)
+
+    def search(query_params):
+        time.sleep(search_latency[query_params['query']])
+        return [query_params['query']]
+
+    speculative = SpeculativeSearch(search, rewrite)
+    sequential, speculated = [], []
+    for query in rewrite_latency:
+        start = time.perf_counter()
+        search(rewrite(_params(query)))
+        sequential.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        assert speculative(_params(query)) == [rewrites.get(query, query)]
+        speculated.append(time.perf_counter() - start)
+
+    assert _wait_for(lambda: speculative.stats.wasted == speculative.stats.misses)
+    stats = speculative.stats.as_dict()
+    seq_ms, spec_ms = statistics.mean(sequential) * 1e3, statistics.mean(speculated) * 1e3
+    print(f'[speculative search bench] turns=40 sequential_mean_ms={seq_ms:.1f} speculative_mean_ms={spec_ms:.1f} '
+          f'stats={stats}')
+
+    assert (stats['hits'], stats['misses']) == (40 - len(rewrites), len(rewrites))
+    assert stats['speculated'] == 40 and stats['skipped'] == 0
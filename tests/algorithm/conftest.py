@@ -1,11 +1,23 @@
 """
 Pytest fixtures for algorithm tests.
 Add algorithm and backend paths for imports.
+Tests marked ``benchmark`` only run when LAZYMIND_RUN_BENCHMARKS is set.
 """
 import os
 import sys
 
+import pytest
+
 _root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 _algo = os.path.join(_root, 'algorithm')
 if _algo not in sys.path:
     sys.path.insert(0, _algo)
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.getenv('LAZYMIND_RUN_BENCHMARKS'):
+        return
+    skip = pytest.mark.skip(reason='benchmark; set LAZYMIND_RUN_BENCHMARKS=1 to run')
+    for item in items:
+        if item.get_closest_marker('benchmark'):
+            item.add_marker(skip)
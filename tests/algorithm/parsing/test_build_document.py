@@ -115,6 +115,32 @@ def test_build_pdf_reader_selects_paddleocr(monkeypatch):
     }
 
 
+def test_build_pdf_reader_uses_page_windows_when_configured(monkeypatch):
+    seen = {}
+
+    class FakeWindowReader:
+        def __init__(self, **kwargs):
+            seen.update(kwargs)
+
+    monkeypatch.setattr(build_document, 'PageWindowMineruPDFReader', FakeWindowReader)
+    monkeypatch.setattr(build_document, 'PageWindowPaddleOCRPDFReader', FakeWindowReader)
+    monkeypatch.setitem(build_document._cfg._impl, 'ocr_server_type', 'mineru')
+    monkeypatch.setitem(build_document._cfg._impl, 'ocr_server_url', 'http://mineru:8000/')
+    monkeypatch.setitem(build_document._cfg._impl, 'mineru_upload_mode', '')
+    monkeypatch.setitem(build_document._cfg._impl, 'ocr_page_window', 16)
+    monkeypatch.setitem(build_document._cfg._impl, 'ocr_window_concurrency', 3)
+    monkeypatch.setitem(build_document._cfg._impl, 'ocr_window_timeout', 300)
+
+    assert isinstance(build_document._build_pdf_reader(), FakeWindowReader)
+    assert (seen['window_pages'], seen['max_concurrency'], seen['timeout']) == (16, 3, 300)
+    assert seen['upload_mode'] is False
+
+    seen.clear()
+    monkeypatch.setitem(build_document._cfg._impl, 'ocr_server_type', 'paddleocr')
+    assert isinstance(build_document._build_pdf_reader(), FakeWindowReader)
+    assert seen['images_dir'] == '/app/uploads/.image_cache' and seen['window_pages'] == 16
+
+
 def test_build_pdf_reader_rejects_unknown_ocr_type(monkeypatch):
     monkeypatch.setitem(build_document._cfg._impl, 'ocr_server_type', 'unknown')
 
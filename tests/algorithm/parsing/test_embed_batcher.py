@@ -0,0 +1,198 @@
+import hashlib
+import json
+import pickle
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from lazyllm import ModuleBase
+
+import parsing.embed_batcher as embed_batcher
+from parsing.embed_batcher import EmbeddingBatcher
+
+
+def _vector(text):
+    digest = hashlib.md5(text.encode('utf-8')).digest()
+    return [b / 255 for b in digest[:8]]
+
+
+def _embed(input):
+    return _vector(input) if isinstance(input, str) else [_vector(t) for t in input]
+
+
+class _FakeEmbeddingServer:
+    """Embedding endpoint with ``workers`` concurrent slots, a fixed per-request cost and a small per-text cost."""
+
+    def __init__(self, request_cost=0.008, text_cost=0.0001, workers=2, fail_on=()):
+        self.request_cost = request_cost
+        self.text_cost = text_cost
+        self.fail_on = set(fail_on)
+        self.requests = []
+        self.batch_size = 16
+        self._slots = threading.Semaphore(workers)
+
+    def __call__(self, input, **kwargs):
+        texts = [input] if isinstance(input, str) else list(input)
+        self.requests.append((texts, kwargs))
+        with self._slots:
+            time.sleep(self.request_cost + self.text_cost * len(texts))
+        if self.fail_on.intersection(texts):
+            raise RuntimeError('bad input')
+        vectors = [_vector(t) for t in texts]
+        return vectors[0] if isinstance(input, str) else vectors
+
+
+def _concurrently(fn, inputs):
+    barrier = threading.Barrier(len(inputs))
+
+    def run(item):
+        barrier.wait()
+        return fn(item)
+
+    with ThreadPoolExecutor(max_workers=len(inputs)) as pool:
+        return list(pool.map(run, inputs))
+
+
+def test_concurrent_calls_share_one_request_and_dedupe():
+    server = _FakeEmbeddingServer()
+    embed = EmbeddingBatcher(server, window=0.02)
+    texts = ['refund policy', 'leave policy', 'refund policy', 'travel policy'] * 3
+
+    vectors = _concurrently(embed, texts)
+
+    assert vectors == [_vector(t) for t in texts]
+    assert len(server.requests) == 1
+    assert sorted(server.requests[0][0]) == ['leave policy', 'refund policy', 'travel policy']
+    assert embed.stats.as_dict() == {'requests': 12, 'cache_hits': 0, 'coalesced': 9, 'batches': 1,
+                                     'texts_embedded': 3, 'mean_batch': 3.0}
+
+
+def test_full_batch_is_sent_without_waiting_for_the_window():
+    server = _FakeEmbeddingServer(request_cost=0.001)
+    embed = EmbeddingBatcher(server, window=5.0, max_batch=4, cache_size=0)
+
+    start = time.perf_counter()
+    _concurrently(embed, [f'q{i}' for i in range(8)])
+
+    assert time.perf_counter() - start < 1.0
+    assert sorted(len(texts) for texts, _ in server.requests) == [4, 4]
+
+
+def test_lru_serves_repeats_with_private_copies():
+    server = _FakeEmbeddingServer(request_cost=0)
+    embed = EmbeddingBatcher(server, window=0, cache_size=2)
+
+    first = embed('a')
+    first.append('mutated')
+    assert embed('a') == _vector('a')
+    embed('b')
+    embed('c')
+    embed('a')
+
+    assert [texts for texts, _ in server.requests] == [['a'], ['b'], ['c'], ['a']]
+    assert embed.stats.cache_hits == 1
+
+
+def test_lists_and_keyword_calls_pass_through():
+    server = _FakeEmbeddingServer(request_cost=0)
+    embed = EmbeddingBatcher(server, window=0.01)
+
+    assert embed(['x', 'y']) == [_vector('x'), _vector('y')]
+    embed('img-base64', modality='image')
+
+    assert server.requests == [(['x', 'y'], {}), (['img-base64'], {'modality': 'image'})]
+    assert embed.batch_size == 16 and embed.stats.requests == 0
+
+
+def test_failed_batch_falls_back_to_single_texts():
+    server = _FakeEmbeddingServer(request_cost=0, fail_on={'bad'})
+    embed = EmbeddingBatcher(server, window=0.02)
+
+    def call(text):
+        try:
+            return embed(text)
+        except RuntimeError as exc:
+            return exc
+
+    results = _concurrently(call, ['good', 'bad', 'fine'])
+
+    assert results[0] == _vector('good') and results[2] == _vector('fine')
+    assert isinstance(results[1], RuntimeError)
+    with pytest.raises(RuntimeError):
+        embed('bad')
+
+
+def test_json_string_batches_are_decoded_before_fan_out():
+    server = _FakeEmbeddingServer(request_cost=0)
+    embed = EmbeddingBatcher(lambda input: json.dumps(server(input)) if isinstance(input, list) else server(input),
+                             window=0.02)
+
+    vectors = _concurrently(embed, ['a', 'b', 'c'])
+
+    assert vectors == [_vector(t) for t in 'abc']
+    assert len(server.requests) == 1
+
+
+def test_wrapped_model_stays_a_submodule():
+    class _Model(ModuleBase):
+        def forward(self, input):
+            return _embed(input)
+
+    model = _Model()
+    embed = EmbeddingBatcher(model)
+
+    assert isinstance(embed, ModuleBase) and embed.submodules == [model]
+    assert embed('q') == _vector('q')
+
+
+def test_pickle_round_trip_and_config_switch(monkeypatch):
+    restored = pickle.loads(pickle.dumps(EmbeddingBatcher(_embed, window=0.004, max_batch=8, cache_size=16)))
+    assert (restored.window, restored.max_batch, restored.cache_size) == (0.004, 8, 16)
+    assert restored('q') == _vector('q')
+
+    server = _FakeEmbeddingServer(request_cost=0)
+    monkeypatch.setitem(embed_batcher._cfg._impl, 'embed_batch_window_ms', '0')
+    assert embed_batcher.with_embed_batching(server) is server
+    monkeypatch.setitem(embed_batcher._cfg._impl, 'embed_batch_window_ms', '3')
+    monkeypatch.setitem(embed_batcher._cfg._impl, 'embed_batch_max_size', 32)
+    wrapped = embed_batcher.with_embed_batching(server)
+    assert isinstance(wrapped, EmbeddingBatcher) and wrapped.embed is server
+    assert (wrapped.window, wrapped.max_batch) == (0.003, 32)
+
+
+def _open_loop(embed, queries, qps):
+    # Fire queries at a fixed arrival rate regardless of completions, as independent users would.
+    latencies = [0.0] * len(queries)
+    start = time.perf_counter()
+
+    def run(i):
+        scheduled = start + i / qps
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        embed(queries[i])
+        latencies[i] = time.perf_counter() - scheduled
+
+    with ThreadPoolExecutor(max_workers=min(len(queries), 256)) as pool:
+        list(pool.map(run, range(len(queries))))
+    elapsed = time.perf_counter() - start
+    return len(queries) / elapsed, statistics.median(latencies), sorted(latencies)[int(len(latencies) * 0.99) - 1]
+
+
+@pytest.mark.benchmark
+def test_throughput_benchmark_50_to_500_qps():
+    """Open-loop load against a 2-slot fake server charging 8 ms per request: direct calls vs 3 ms micro-batches."""
+    rng = random.Random(5)
+    pool = [f'question {i} about policy {rng.randrange(1000)}' for i in range(5000)]
+    for qps in (50, 200, 500):
+        queries = rng.sample(pool, int(qps * 0.6))
+        direct = _open_loop(_FakeEmbeddingServer(), queries, qps)
+        batcher = EmbeddingBatcher(_FakeEmbeddingServer(), window=0.003, cache_size=0)
+        batched = _open_loop(batcher, queries, qps)
+        print(f'[embed batch bench] qps={qps} direct: {direct[0]:.0f} q/s p50={direct[1] * 1e3:.1f}ms '
+              f'p99={direct[2] * 1e3:.1f}ms | batched: {batched[0]:.0f} q/s p50={batched[1] * 1e3:.1f}ms '
+              f'p99={batched[2] * 1e3:.1f}ms mean_batch={batcher.stats.mean_batch:.1f}')
+        assert batcher.stats.requests == len(queries) == batcher.stats.texts_embedded
@@ -0,0 +1,199 @@
+import io
+import os
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import PIL.Image
+import pytest
+from lazyllm.tools.rag import DocNode
+
+import parsing.image_cache as image_cache
+import parsing.transform.post_func as post_func
+from parsing.image_cache import ImageMaterializer
+
+
+def _png(seed: int) -> bytes:
+    buf = io.BytesIO()
+    PIL.Image.new('RGB', (16, 16), (seed % 256, 40, 90)).save(buf, format='PNG')
+    return buf.getvalue()
+
+
+class _ImageHandler(BaseHTTPRequestHandler):
+    """Serves a distinct PNG per path after ``server.latency`` seconds."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.stats_lock:
+            server.requests.append(self.path)
+            server.inflight += 1
+            server.max_inflight = max(server.max_inflight, server.inflight)
+        try:
+            time.sleep(server.latency)
+            if self.path.startswith('/missing'):
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            data = _png(sum(self.path.encode('utf-8')))
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/png')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        finally:
+            with server.stats_lock:
+                server.inflight -= 1
+
+
+@pytest.fixture
+def image_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _ImageHandler)
+    server.daemon_threads = True
+    server.stats_lock = threading.Lock()
+    server.requests = []
+    server.inflight = server.max_inflight = 0
+    server.latency = 0.1
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server, f'http://127.0.0.1:{server.server_address[1]}'
+    finally:
+        image_cache.reset_image_materializers()
+        server.shutdown()
+
+
+def test_downloads_run_concurrently_within_limit(image_server, tmp_path):
+    server, url = image_server
+    materializer = ImageMaterializer(str(tmp_path), max_concurrency=4)
+    urls = [f'{url}/images/{i}.png' for i in range(12)]
+
+    futures = [materializer.submit(u, str(tmp_path / f'{i}.png')) for i, u in enumerate(urls)]
+    paths = [f.result() for f in futures]
+
+    assert server.max_inflight == 4
+    assert [os.path.basename(p) for p in paths] == [f'{i}.png' for i in range(12)]
+    assert all(PIL.Image.open(p).size == (16, 16) for p in paths)
+    materializer.close()
+
+
+def test_concurrent_requests_for_same_url_share_one_download(image_server, tmp_path):
+    server, url = image_server
+    materializer = ImageMaterializer(str(tmp_path), max_concurrency=4)
+    target = str(tmp_path / 'same.png')
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        results = list(pool.map(lambda _: materializer.fetch(f'{url}/images/same.png', target), range(20)))
+
+    assert results == [target] * 20
+    assert server.requests == ['/images/same.png']
+    assert materializer.fetch(f'{url}/images/same.png', target) == target
+    assert len(server.requests) == 1
+    materializer.close()
+
+
+def test_index_survives_restart_and_hits_skip_the_filesystem(image_server, tmp_path, monkeypatch):
+    server, url = image_server
+    first = ImageMaterializer(str(tmp_path))
+    first.fetch(f'{url}/images/a.png', str(tmp_path / 'a.png'))
+    first.close()
+
+    probes = []
+    monkeypatch.setattr(image_cache, '_file_size', lambda path: probes.append(path) or 0)
+    second = ImageMaterializer(str(tmp_path))
+
+    assert second.fetch(f'{url}/images/a.png', str(tmp_path / 'a.png')) == str(tmp_path / 'a.png')
+    assert probes == []
+    assert len(server.requests) == 1
+    second.close()
+
+
+def test_files_cached_before_the_index_are_adopted_without_download(image_server, tmp_path):
+    server, url = image_server
+    (tmp_path / 'legacy.png').write_bytes(_png(1))
+    materializer = ImageMaterializer(str(tmp_path))
+
+    assert materializer.fetch(f'{url}/images/legacy.png', str(tmp_path / 'legacy.png'))
+    assert server.requests == []
+    assert materializer.total_bytes == len(_png(1))
+    materializer.close()
+
+
+def test_flush_evicts_least_recently_used_over_budget(image_server, tmp_path):
+    server, url = image_server
+    server.latency = 0
+    size = len(_png(0))
+    materializer = ImageMaterializer(str(tmp_path), max_bytes=size * 3 + size // 2)
+    paths = {}
+    for name in 'abcde':
+        paths[name] = materializer.fetch(f'{url}/images/{name}.png', str(tmp_path / f'{name}.png'))
+        time.sleep(0.01)
+    materializer.fetch(f'{url}/images/a.png', paths['a'])  # touch: a becomes most recent
+
+    materializer.flush()
+
+    assert materializer.total_bytes <= size * 3 + size // 2
+    assert sorted(n for n, p in paths.items() if os.path.exists(p)) == ['a', 'd', 'e']
+    assert len(ImageMaterializer(str(tmp_path))) == 3
+    materializer.close()
+
+
+def test_downloaded_images_get_the_umask_mode(image_server, tmp_path):
+    server, url = image_server
+    server.latency = 0
+    umask = os.umask(0)
+    os.umask(umask)
+    materializer = ImageMaterializer(str(tmp_path))
+
+    path = materializer.fetch(f'{url}/images/mode.png', str(tmp_path / 'mode.png'))
+
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o666 & ~umask
+    materializer.close()
+
+
+def test_failed_download_is_not_cached(image_server, tmp_path):
+    server, url = image_server
+    server.latency = 0
+    materializer = ImageMaterializer(str(tmp_path))
+
+    for _ in range(2):
+        with pytest.raises(Exception):
+            materializer.fetch(f'{url}/missing.png', str(tmp_path / 'missing.png'))
+
+    assert len(server.requests) == 2
+    assert not (tmp_path / 'missing.png').exists()
+    assert [p.name for p in tmp_path.iterdir()] == []
+    materializer.close()
+
+
+def test_image_converter_downloads_in_parallel_and_keeps_order(image_server, tmp_path, monkeypatch):
+    server, url = image_server
+    monkeypatch.setitem(post_func._cfg._impl, 'ocr_server_url', url)
+    monkeypatch.setitem(post_func._cfg._impl, 'rag_image_path_prefix', str(tmp_path / 'images'))
+    monkeypatch.setitem(post_func._cfg._impl, 'shared_upload_dir', str(tmp_path / 'uploads'))
+    monkeypatch.setitem(post_func._cfg._impl, 'image_download_concurrency', 8)
+    nodes = [DocNode(text=f'![fig](images/p{i}.png) ![dup](images/p{i}.png)', metadata={'type': 'image'})
+             for i in range(8)]
+    nodes.append(DocNode(text='![gone](/missing/x.png)', metadata={'type': 'image'}))
+
+    result = post_func.ImageConverterNode()(nodes)
+
+    assert [n.metadata['file_name'] for n in result] == [f'p{i}.png' for i in range(8)]
+    assert result[0].metadata['image_url'] == f'{url}/images/p0.png'
+    assert result[0].metadata['source_path'] == str(tmp_path / 'images' / 'images' / 'p0.png')
+    assert len(server.requests) == 9
+    assert server.max_inflight > 1
+    assert os.path.exists(tmp_path / 'images' / '.image_index.json')
+
+    # Second pass over the same document is served from the index without any HTTP traffic.
+    again = post_func.ImageConverterNode()(nodes[:8])
+    assert [n.metadata['normalized_source_path'] for n in again] == [
+        n.metadata['normalized_source_path'] for n in result]
+    assert len(server.requests) == 9
@@ -0,0 +1,200 @@
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pypdf
+import pytest
+
+from parsing.readers.pageWindowReader import PageWindowMineruPDFReader, PageWindowPaddleOCRPDFReader, WindowProgress
+
+_BASE_WIDTH = 200
+
+
+def _make_pdf(path, pages):
+    # Page i is (200 + i) points wide, so the stub service can tell which original page it got.
+    writer = pypdf.PdfWriter()
+    for index in range(pages):
+        writer.add_blank_page(width=_BASE_WIDTH + index, height=300)
+    with open(path, 'wb') as f:
+        writer.write(f)
+    return str(path)
+
+
+def _page_ids(path):
+    return [int(page.mediabox.width) - _BASE_WIDTH for page in pypdf.PdfReader(path).pages]
+
+
+class _OcrHandler(BaseHTTPRequestHandler):
+    """Local MinerU-style service: ``files=<path>`` in, content list with window-local page_idx out."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body=b''):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server
+        form = parse_qs(self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8'))
+        pages = _page_ids(form['files'][0])
+        with server.lock:
+            server.requests.append(pages[0])
+            server.inflight += 1
+            server.max_inflight = max(server.max_inflight, server.inflight)
+            transient = server.rng.random() < server.fail_rate
+        try:
+            time.sleep(server.page_latency * len(pages))
+            if set(pages) & server.broken_pages:
+                return self._reply(400)
+            if transient:
+                return self._reply(500)
+            content = []
+            for local, page in enumerate(pages):
+                content.append({'type': 'title', 'text_level': 1, 'text': f'page {page} body', 'page_idx': local,
+                                'bbox': [10, 10, 100, 30],
+                                'lines': [{'content': f'page {page} body', 'page': local, 'bbox': [10, 10, 100, 30]}]})
+            self._reply(200, json.dumps({'result': [{'content_list': content}]}).encode('utf-8'))
+        finally:
+            with server.lock:
+                server.inflight -= 1
+
+
+@pytest.fixture
+def ocr_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _OcrHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = []
+    server.inflight = server.max_inflight = 0
+    server.page_latency = 0.0
+    server.fail_rate = 0.0
+    server.rng = random.Random(3)
+    server.broken_pages = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server, f'http://127.0.0.1:{server.server_address[1]}'
+    finally:
+        server.shutdown()
+
+
+def _reader(url, tmp_path, **kwargs):
+    kwargs.setdefault('retry_delay', 0.01)
+    return PageWindowMineruPDFReader(url=url, backend='pipeline', upload_mode=False, timeout=30,
+                                     image_cache_dir=str(tmp_path / 'images'), **kwargs)
+
+
+def _page_of_text(nodes):
+    return [(n.text, n.metadata['page'], [line['page'] for line in n.metadata.get('lines', [])]) for n in nodes]
+
+
+def test_windows_are_parsed_concurrently_and_stitched_page_correct(ocr_server, tmp_path):
+    server, url = ocr_server
+    server.page_latency = 0.02
+    pdf = _make_pdf(tmp_path / 'big.pdf', 40)
+
+    nodes = _reader(url, tmp_path, window_pages=5, max_concurrency=4)._load_data(pdf)
+
+    assert _page_of_text(nodes) == [(f'page {i} body', i, [i]) for i in range(40)]
+    assert sorted(server.requests) == list(range(0, 40, 5))
+    assert server.max_inflight == 4
+    assert not os.path.exists(f'{pdf}.windows')
+
+
+def test_small_pdf_is_sent_whole(ocr_server, tmp_path):
+    server, url = ocr_server
+    pdf = _make_pdf(tmp_path / 'small.pdf', 3)
+
+    nodes = _reader(url, tmp_path, window_pages=5)._load_data(pdf)
+
+    assert [n.metadata['page'] for n in nodes] == [0, 1, 2]
+    assert server.requests == [0]
+    assert not os.path.exists(f'{pdf}.windows')
+
+
+def test_transient_failures_are_retried_per_window(ocr_server, tmp_path):
+    server, url = ocr_server
+    server.fail_rate = 0.4
+    pdf = _make_pdf(tmp_path / 'flaky.pdf', 24)
+
+    nodes = _reader(url, tmp_path, window_pages=3, max_concurrency=3, max_retries=8)._load_data(pdf)
+
+    assert [n.metadata['page'] for n in nodes] == list(range(24))
+    assert len(server.requests) > 8
+
+
+def test_failed_read_resumes_with_only_missing_windows(ocr_server, tmp_path):
+    server, url = ocr_server
+    server.broken_pages = {13}
+    pdf = _make_pdf(tmp_path / 'resume.pdf', 20)
+    reader = _reader(url, tmp_path, window_pages=4, max_concurrency=2)
+
+    with pytest.raises(RuntimeError, match='pages_12-16'):
+        reader._load_data(pdf)
+    assert sorted(n for n in os.listdir(f'{pdf}.windows') if n.endswith('.json') and n != 'manifest.json') == [
+        'pages_0-4.json', 'pages_16-20.json', 'pages_4-8.json', 'pages_8-12.json']
+
+    server.broken_pages = set()
+    server.requests.clear()
+    nodes = reader._load_data(pdf)
+
+    assert server.requests == [12]
+    assert [n.metadata['page'] for n in nodes] == list(range(20))
+    assert not os.path.exists(f'{pdf}.windows')
+
+
+def test_progress_is_discarded_when_file_or_settings_change(tmp_path):
+    pdf = _make_pdf(tmp_path / 'doc.pdf', 6)
+    progress = WindowProgress(pdf, 2, namespace='backend-a')
+    windows = progress.windows()
+    progress.save(windows[0], '{"done": true}')
+
+    again = WindowProgress(pdf, 2, namespace='backend-a')
+    assert again.windows() == windows and again.load(windows[0]) == '{"done": true}'
+
+    other = WindowProgress(pdf, 2, namespace='backend-b')
+    assert other.windows() == windows and other.load(windows[0]) is None
+
+    progress = WindowProgress(pdf, 2, namespace='backend-b')
+    progress.windows()
+    progress.save(windows[0], '{"done": true}')
+    _make_pdf(tmp_path / 'doc.pdf', 6 + 1)
+    changed = WindowProgress(pdf, 2, namespace='backend-b')
+    assert [w.end for w in changed.windows()] == [2, 4, 6, 7]
+    assert changed.load(windows[0]) is None
+
+
+def test_paddleocr_windows_concatenate_positional_pages(tmp_path, monkeypatch):
+    pdf = _make_pdf(tmp_path / 'paddle.pdf', 7)
+    reader = PageWindowPaddleOCRPDFReader(url='http://paddle.test', image_cache_dir=str(tmp_path / 'images'),
+                                          window_pages=3, retry_delay=0.01)
+
+    def fake_job(path):
+        pages = [{'page': page} for page in _page_ids(path)]
+        return json.dumps({'result': {'layoutParsingResults': pages}}), None
+
+    monkeypatch.setattr(reader, '_fetch_job', fake_job)
+    response, task_dir = reader._fetch_async(pdf)
+
+    assert task_dir is None
+    assert json.loads(response)['result']['layoutParsingResults'] == [{'page': page} for page in range(7)]
+
+
+def test_window_pdfs_keep_original_page_order(tmp_path):
+    pdf = _make_pdf(tmp_path / 'order.pdf', 5)
+    windows = WindowProgress(pdf, 2).windows()
+
+    assert [(w.start, w.end) for w in windows] == [(0, 2), (2, 4), (4, 5)]
+    assert [_page_ids(w.path) for w in windows] == [[0, 1], [2, 3], [4]]
+    with open(windows[0].path, 'rb') as f:
+        assert f.read(4) == b'%PDF'
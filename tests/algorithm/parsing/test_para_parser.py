@@ -1,3 +1,8 @@
+import random
+import re
+import time
+
+import pytest
 from lazyllm.tools.rag import DocNode
 
 from parsing.transform.para_parser import (
@@ -5,6 +10,7 @@ from parsing.transform.para_parser import (
     MineruLineSplitter,
     NormalLineSplitter,
     ParagraphSplitter,
+    _Split,
     split_by_regex,
     split_by_char,
     split_by_sep,
@@ -194,3 +200,176 @@ def test_paragraph_splitter_preserves_metadata_per_node():
     assert len(result) >= 2
     for n in result:
         assert n.metadata['file_name'] == 'b.md'
+
+
+class _LegacyParagraphSplitter(ParagraphSplitter):
+    """The pre-prefix-sum split/merge core, kept verbatim as a differential oracle."""
+
+    def _split(self, text, chunk_size, token_size=None):
+        token_size = self._count_tokens(text)
+        if self._count_tokens(text) <= chunk_size:
+            return [_Split(text, is_sentence=True, token_size=token_size)]
+        text_splits_by_fns, is_sentence = self._get_splits_by_fns(text)
+        text_splits = []
+        for text_split_by_fns in text_splits_by_fns:
+            token_size = self._count_tokens(text_split_by_fns)
+            if token_size <= chunk_size:
+                text_splits.append(_Split(text_split_by_fns, is_sentence=is_sentence, token_size=token_size))
+            else:
+                text_splits.extend(self._split(text_split_by_fns, chunk_size=chunk_size))
+        return text_splits
+
+    def _merge(self, splits, chunk_size):
+        chunks = []
+        cur_chunk = []
+        last_chunk = []
+        cur_chunk_len = 0
+        new_chunk = True
+        cur_chunk_size = chunk_size + self.chunk_overlap
+
+        def close_chunk():
+            nonlocal cur_chunk, last_chunk, cur_chunk_len, new_chunk
+            chunks.append(''.join([text for text, length in cur_chunk]))
+            last_chunk = cur_chunk
+            pre_overlap = int(cur_chunk_len / 5)
+            cur_chunk = []
+            cur_chunk_len = 0
+            new_chunk = True
+            if len(last_chunk) > 0:
+                last_index = len(last_chunk) - 1
+                while last_index >= 0:
+                    if cur_chunk_len + last_chunk[last_index][1] <= self.chunk_overlap + pre_overlap:
+                        text, length = last_chunk[last_index]
+                        cur_chunk_len += length
+                        cur_chunk.insert(0, (text, length))
+                        last_index -= 1
+                    else:
+                        if cur_chunk_len < self.chunk_overlap:
+                            text, length = last_chunk[last_index]
+                            text = text[length - (self.chunk_overlap + pre_overlap - cur_chunk_len):]
+                            sub_splits = self._get_sub_split_text(text=text)
+                            text = ''.join(sub_splits[1:]) if len(sub_splits) > 1 else sub_splits[0]
+                            length = len(text)
+                            cur_chunk_len += length
+                            cur_chunk.insert(0, (text, length))
+                            last_index -= 1
+                        break
+
+        while len(splits) > 0:
+            cur_split = splits[0]
+            if cur_split.token_size > cur_chunk_size:
+                raise ValueError('Single token exceeded chunk size')
+            if cur_chunk_len + cur_split.token_size > cur_chunk_size and not new_chunk:
+                close_chunk()
+            else:
+                if cur_split.is_sentence or cur_chunk_len + cur_split.token_size <= cur_chunk_size or new_chunk:
+                    cur_chunk_len += cur_split.token_size
+                    cur_chunk.append((cur_split.text, cur_split.token_size))
+                    splits.pop(0)
+                    new_chunk = False
+                else:
+                    close_chunk()
+        if not new_chunk:
+            chunks.append(''.join([text for text, length in cur_chunk]))
+        return self._postprocess_chunks(chunks)
+
+
+_ZH_WORDS = ['数据', '模型', '检索', '增强', '生成', '文档', '解析', '向量', '索引', '系统', '用户', '问题']
+_EN_WORDS = ['retrieval', 'augmented', 'generation', 'vector', 'index', 'query', 'chunk', 'token', 'RAG', 'LLM']
+_SEPARATORS = ['。', '！', '？', '?', '\n', '、', '）', '》', ' ', ', ', '\n\n\n']
+
+
+def _word_tokenizer(text):
+    return re.findall(r'[一-鿿]|[A-Za-z0-9]+|[^\sA-Za-z0-9一-鿿]', text)
+
+
+def _mixed_text(rng, pieces):
+    out = []
+    for _ in range(pieces):
+        kind = rng.random()
+        if kind < 0.45:
+            out.append(''.join(rng.choice(_ZH_WORDS) for _ in range(rng.randint(1, 30))))
+        elif kind < 0.9:
+            out.append(' '.join(rng.choice(_EN_WORDS) for _ in range(rng.randint(1, 25))))
+        else:
+            out.append(rng.choice(_ZH_WORDS) * rng.randint(20, 80))  # long run without separators
+        out.append(rng.choice(_SEPARATORS))
+    return ''.join(out)
+
+
+def _outcome(splitter, text):
+    try:
+        return splitter.split_text(text)
+    except Exception as exc:
+        return type(exc).__name__
+
+
+def test_paragraph_splitter_matches_legacy_on_random_mixed_text():
+    rng = random.Random(20240611)
+    tokenizers = [None, list, _word_tokenizer]
+    for case in range(300):
+        chunk_size = rng.randint(8, 160)
+        kwargs = dict(chunk_size=chunk_size, chunk_overlap=rng.randint(1, chunk_size),
+                      tokenizer=rng.choice(tokenizers), chunking_tokenizer_fn=lambda text: [text])
+        text = _mixed_text(rng, rng.randint(0, 40))
+
+        expected = _outcome(_LegacyParagraphSplitter(**kwargs), text)
+        assert _outcome(ParagraphSplitter(**kwargs), text) == expected, (case, kwargs, text)
+
+
+def test_paragraph_splitter_splits_fit_chunk_size_and_chunks_are_stripped():
+    rng = random.Random(7)
+    for _ in range(100):
+        chunk_size = rng.randint(20, 120)
+        splitter = ParagraphSplitter(chunk_size=chunk_size, chunk_overlap=rng.randint(1, chunk_size // 2),
+                                     tokenizer=list, chunking_tokenizer_fn=lambda text: [text])
+        text = _mixed_text(rng, rng.randint(1, 30))
+        try:
+            chunks = splitter.split_text(text)
+        except (ValueError, TypeError):
+            continue
+        splits = splitter._split(text, chunk_size)
+        assert all(s.token_size == len(s.text) for s in splits)
+        assert all(s.token_size <= chunk_size for s in splits)
+        assert all(chunk and chunk == chunk.strip() for chunk in chunks)
+        assert bool(chunks) == bool(text.strip())
+
+
+def test_paragraph_splitter_tokenises_each_sentence_once():
+    calls = []
+
+    def tokenizer(text):
+        calls.append(text)
+        return _word_tokenizer(text)
+
+    splitter = ParagraphSplitter(chunk_size=30, chunk_overlap=5, tokenizer=tokenizer,
+                                 chunking_tokenizer_fn=lambda text: [text])
+    sentence = '检索增强生成 retrieval augmented generation。'
+    text = '\n\n\n'.join([sentence * 3] * 50)
+
+    first = splitter.split_text(text)
+    tokenised = len(calls)
+    assert splitter.split_text(text) == first
+    assert len(calls) - tokenised == 1  # only the whole document, too long for the cache
+    assert calls.count(sentence * 3) == 1
+
+
+@pytest.mark.benchmark
+def test_paragraph_splitter_benchmark_10mb_mixed_text():
+    """Split 10 MB of mixed Chinese/English text with the current and the legacy core."""
+    rng = random.Random(42)
+    block = _mixed_text(rng, 4000)
+    text = (block * (10 * 1024 * 1024 // len(block.encode('utf-8')) + 1))
+    kwargs = dict(chunk_size=1024, chunk_overlap=200, tokenizer=_word_tokenizer,
+                  chunking_tokenizer_fn=lambda text: [text])
+
+    start = time.perf_counter()
+    legacy = _LegacyParagraphSplitter(**kwargs).split_text(text)
+    legacy_s = time.perf_counter() - start
+    start = time.perf_counter()
+    chunks = ParagraphSplitter(**kwargs).split_text(text)
+    full_s = time.perf_counter() - start
+    print(f'[paragraph splitter bench] mb={len(text.encode("utf-8")) / 2 ** 20:.1f} chunks={len(chunks)} '
+          f'full_s={full_s:.2f} legacy_s={legacy_s:.2f}')
+
+    assert chunks == legacy
@@ -0,0 +1,105 @@
+import json
+import os
+import random
+import time
+
+import pytest
+from lazyllm.tools.rag import DocNode
+
+import parsing.transform.post_func as post_func
+from parsing.transform.post_func import NodeParser, _schedule_file_chunks
+from parsing.transform.transform_cache import TransformCache
+
+
+@pytest.fixture(autouse=True)
+def _isolated_dirs(monkeypatch, tmp_path):
+    monkeypatch.setitem(post_func._cfg._impl, 'shared_upload_dir', str(tmp_path / 'uploads'))
+    monkeypatch.setitem(post_func._cfg._impl, 'rag_image_path_prefix', str(tmp_path / 'images'))
+    monkeypatch.setitem(post_func._cfg._impl, 'node_transform_cache', False)
+
+
+def _file(name: str, sections: int, rnd: random.Random):
+    nodes = []
+    for section in range(sections):
+        page = section // 3
+        nodes.append(DocNode(text=f'第{section + 1}章 {name} 概述', metadata={
+            'file_name': name, 'type': 'text', 'text_level': 1, 'page': page, 'bbox': [0, 0, 100, 10]}))
+        for line in range(rnd.randrange(2, 8)):
+            text = f'{section + 1}.{line + 1} 条款内容 ＡＢＣ {name} ' + 'body text ' * rnd.randrange(1, 40)
+            nodes.append(DocNode(text=text, metadata={'file_name': name, 'type': 'text', 'page': page,
+                                                      'bbox': [0, line, 100, line + 1]}))
+    return nodes
+
+
+def _corpus(files: int, seed: int = 3):
+    rnd = random.Random(seed)
+    nodes = []
+    for i in range(files):
+        # Heavy-tailed sizes: a few long reports among many short notes.
+        nodes.extend(_file(f'f{i:04d}.pdf', max(1, int(rnd.lognormvariate(1.2, 0.9))), rnd))
+    rnd.shuffle(nodes)  # readers may interleave files; per-file mode must not care
+    return nodes
+
+
+def _snapshot(nodes):
+    # Canonical bytes of everything a node carries downstream (pickle bytes would also encode
+    # incidental object sharing, which is not part of the output).
+    return json.dumps([[n.text, n.metadata, sorted(n.excluded_embed_metadata_keys)] for n in nodes],
+                      sort_keys=True, ensure_ascii=False).encode('utf-8')
+
+
+def test_schedule_starts_largest_files_first_and_covers_every_file():
+    rnd = random.Random(1)
+    files = [_file(f'f{i}.pdf', size, rnd) for i, size in enumerate([1, 30, 2, 1, 12, 1, 1, 3])]
+
+    chunks = _schedule_file_chunks(files, workers=2)
+
+    assert sorted(i for chunk in chunks for i in chunk) == list(range(len(files)))
+    assert chunks[0] == [1]
+    assert len(chunks) < len(files)
+    assert _schedule_file_chunks(files, workers=1, chunks_per_worker=1) == [sorted(
+        range(len(files)), key=lambda i: -post_func._file_cost(files[i]))]
+
+
+def test_per_file_mode_matches_batch_mode_for_single_file():
+    expected = _snapshot(NodeParser(workers=0)(_file('one.pdf', 6, random.Random(0))))
+
+    assert _snapshot(NodeParser(workers=1)(_file('one.pdf', 6, random.Random(0)))) == expected
+    assert _snapshot(NodeParser(workers=2)(_file('one.pdf', 6, random.Random(0)))) == expected
+
+
+def test_process_pool_output_is_byte_identical_to_serial(tmp_path):
+    # One pool for the whole test: starting worker processes dominates the cost of a small corpus.
+    serial = _snapshot(NodeParser(workers=1)(_corpus(24)))
+    other_serial = _snapshot(NodeParser(workers=1)(_corpus(24, seed=4)))
+
+    cache = TransformCache(str(tmp_path / 'cache'))
+    parser = NodeParser(workers=2, transform_cache=cache)
+    assert _snapshot(parser(_corpus(24))) == serial
+    assert _snapshot(parser(_corpus(24))) == serial
+    assert (cache.stats.misses, cache.stats.hits) == (24, 24)
+    assert _snapshot(parser(_corpus(24, seed=4))) == other_serial  # pool is reused across calls
+    parser.close()
+
+
+@pytest.mark.benchmark
+def test_per_file_parallel_benchmark():
+    """500-file corpus: serial per-file transform vs process pool, speedup per worker count."""
+    cores = os.cpu_count() or 1
+    serial_parser = NodeParser(workers=1)
+    serial_parser(_corpus(4))  # compile the stages outside the timed run, as for the pools
+    start = time.perf_counter()
+    serial = _snapshot(serial_parser(_corpus(500)))
+    serial_s = time.perf_counter() - start
+
+    report = {'files': 500, 'cores': cores, 'serial_s': round(serial_s, 2), 'speedup': {}}
+    for workers in sorted(w for w in {2, 4, cores} if 1 < w <= max(2, cores)):
+        parser = NodeParser(workers=workers)
+        parser(_corpus(workers * 2))  # start the pool outside the timed run
+        start = time.perf_counter()
+        result = _snapshot(parser(_corpus(500)))
+        elapsed = time.perf_counter() - start
+        parser.close()
+        report['speedup'][workers] = round(serial_s / elapsed, 2)
+        assert result == serial
+    print(f'[per-file transform bench] {report}')
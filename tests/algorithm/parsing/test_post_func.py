@@ -1,3 +1,7 @@
+import random
+import time
+
+import pytest
 from lazyllm.tools.rag import DocNode
 from processor.table_image_map import normalize_table_image_map, serialize_table_image_map
 
@@ -8,8 +12,11 @@ from parsing.transform.post_func import (
     MergeNodeParser,
     NodeParser,
     NodeTextClear,
+    INDEX_PATTERNS,
+    TIME_PATTERNS,
     ParagraphType,
     TableConverterNode,
+    _LineClassifier,
     _match,
     parser_code_hash,
 )
@@ -339,3 +346,192 @@ def test_node_parser_drops_empty_nodes(monkeypatch, tmp_path):
     texts = [n.text for n in result]
     assert '' not in texts
     assert any('有效内容' in t for t in texts)
+
+
+def _small_nodes(count, per_file=50):
+    return [
+        DocNode(text=f'{i % 7 + 1}.{i % 5 + 1} 条款 {i} ＡＢＣ' if i % 3 else f'正文内容 {i} text body',
+                metadata={'file_name': f'doc{i // per_file}.pdf', 'type': 'text', 'page': (i // 10) % 5,
+                          'bbox': [0, i % 10, 10, i % 10 + 1], 'text_level': 1 if i % 25 == 0 else 0})
+        for i in range(count)
+    ]
+
+
+def _node_snapshot(nodes):
+    return [(n.text, n.metadata, sorted(n.excluded_embed_metadata_keys)) for n in nodes]
+
+
+def _node_parser_env(monkeypatch, tmp_path):
+    import parsing.transform.post_func as post_func_module
+    monkeypatch.setitem(post_func_module._cfg._impl, 'shared_upload_dir', str(tmp_path / 'uploads'))
+    monkeypatch.setitem(post_func_module._cfg._impl, 'rag_image_path_prefix', str(tmp_path / 'images'))
+    monkeypatch.setitem(post_func_module._cfg._impl, 'node_transform_cache', False)
+    return post_func_module
+
+
+def test_node_parser_builds_stages_once_and_rebuilds_on_parameter_change(monkeypatch, tmp_path):
+    post_func_module = _node_parser_env(monkeypatch, tmp_path)
+    built = []
+    real_pipeline = post_func_module.lazyllm.pipeline
+    monkeypatch.setattr(post_func_module.lazyllm, 'pipeline', lambda: built.append(1) or real_pipeline())
+    parser = NodeParser()
+
+    for _ in range(5):
+        parser(_small_nodes(20))
+    converter = parser._image_converter()
+
+    assert len(built) == 2
+    assert parser._image_converter() is converter
+    monkeypatch.setitem(post_func_module._cfg._impl, 'rag_image_path_prefix', str(tmp_path / 'other'))
+    assert parser._image_converter() is not converter
+    assert len(built) == 2
+
+
+_HOOK_CALLS = []
+
+
+def _counting_hook(*args, **kwargs):
+    _HOOK_CALLS.append(1)
+    yield
+
+
+def test_node_parser_fast_path_matches_pipeline_and_honours_hooks(monkeypatch, tmp_path):
+    import pickle
+    _node_parser_env(monkeypatch, tmp_path)
+    parser = NodeParser()
+    fast = _node_snapshot(parser(_small_nodes(200)))
+    assert parser._page_pipeline()._is_plain() and parser._document_pipeline()._is_plain()
+
+    _HOOK_CALLS.clear()
+    hooked = NodeParser()
+    hooked._document_pipeline()._stages[0].register_hook(_counting_hook)
+    assert not hooked._document_pipeline()._is_plain()
+
+    assert _node_snapshot(hooked(_small_nodes(200))) == fast
+    assert _HOOK_CALLS == [1]
+    assert _node_snapshot(pickle.loads(pickle.dumps(parser))(_small_nodes(200))) == fast
+
+
+@pytest.mark.benchmark
+def test_node_parser_setup_overhead_benchmark(monkeypatch, tmp_path):
+    """100k small nodes in 50-node batches: stages compiled once vs built per call (previous behaviour).
+
+    Rebuilding costs tens of milliseconds per call, so it is timed on a 200-batch sample.
+    """
+    _node_parser_env(monkeypatch, tmp_path)
+    batches, sample = 2000, 200
+
+    parser = NodeParser()
+    start = time.perf_counter()
+    compiled = [_node_snapshot(parser(_small_nodes(50))) for _ in range(batches)]
+    compiled_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rebuilt = [_node_snapshot(NodeParser()(_small_nodes(50))) for _ in range(sample)]
+    rebuilt_s = time.perf_counter() - start
+
+    report = {
+        'nodes': 50 * batches,
+        'compiled_ms_per_call': round(compiled_s / batches * 1000, 3),
+        'rebuilt_ms_per_call': round(rebuilt_s / sample * 1000, 3),
+        'compiled_total_s': round(compiled_s, 2),
+        'rebuilt_total_s_est': round(rebuilt_s / sample * batches, 2),
+    }
+    print(f'[node parser setup bench] {report}')
+
+    assert compiled[:sample] == rebuilt
+
+
+# ---------------------------------------------------------------------------
+# _LineClassifier — combined time/index classification
+# ---------------------------------------------------------------------------
+
+_HEADING_CORPUS = [
+    '第一章 总则', '第二章　适用范围', '第 三 章 术语和定义', '第十二条 本办法自发布之日起施行。', '第一百零一条 其他',
+    '第1节 概述', '第２节 设计原则', '第三篇 附则', '第五卷 历史', '第八回 结尾', '第一章', '第 十 条',
+    '一、 总体要求', '二、工作目标', '十一、 附则', '壹、 说明', '1、 范围', '12、 附件', 'a、 选项', 'A、 方案一',
+    '1.1 范围', '1.2适用对象', '2.3.1 一般规定', '3.2.1.4 材料要求', '10.12.3 检测方法', '1.1.1.1.1 过深层级',
+    '1．1 全角点', '4.1 ', '4.1 1', '3.14 是圆周率', '3.14', '2.5kg 的重量', '1.1)', '1.1） 括号', '5.2] 方括号',
+    'B.0.1 本附录适用于', 'A.1.2 检验', 'c.3.4 小写', 'B.0 缺一级', 'B.0.1',
+    '2024年1月2日', '2023年12月31日', ' 2024年1月2日 ', '二〇二四年一月二日', '二零二三年十二月三十一日',
+    '○○二四年一月二日', '二〇二四年十三月三十二日 备注', '2024年1月2日 发布',
+    '关于印发管理办法的通知\n2024年3月15日', '某某公司\n 二〇二四年五月六日 \n', '标题\n\n2024年3月15日\n',
+    '通知\n2024年3月15日\n正文', 'x' * 120 + '\n2024年3月15日',
+    '普通正文段落，没有编号。', 'Introduction', 'Chapter 1 Overview', '1 Scope', '1. Scope', '1.Scope',
+    '(一) 括号编号', '（二）全角括号', '①带圈数字', '- 列表项', '* 星号项', '', '   ', '第', '第一', '一、',
+    '1、', '1.1', '1.1\n正文', '1.1 \n正文', '第一章\n总则', 'Ⅰ、罗马数字', 'i、 小写罗马',
+]
+
+
+def _legacy_label(text):
+    if _match(text, TIME_PATTERNS):
+        return ParagraphType.Time_text
+    if _match(text, INDEX_PATTERNS):
+        return ParagraphType.Index_text
+    return ParagraphType.Text
+
+
+def _fuzz_corpus(count, seed=5):
+    rnd = random.Random(seed)
+    heads = ['第', '第 ', '', ' ', '1', '12', '1.', '1.1', '1.1.', '2.3.4', '一', '十二', 'B.0.1', 'a', 'Z',
+             '2024年', '二〇二四年', '1月', '十二月', '\n', '．', '、', '章', '条', '节', ')', '）', '】']
+    tails = ['', ' ', '  ', '总则', '范围', 'x', '1', '12', '3日', '日', '\n', ' 正文内容', '2日', '一日']
+    return [''.join(rnd.choice(heads) for _ in range(rnd.randint(1, 4))) + ''.join(
+        rnd.choice(tails) for _ in range(rnd.randint(0, 3))) for _ in range(count)]
+
+
+def test_line_classifier_matches_sequential_patterns_on_heading_corpus():
+    classifier = _LineClassifier([
+        (ParagraphType.Time_text, TIME_PATTERNS),
+        (ParagraphType.Index_text, INDEX_PATTERNS),
+    ], cache_size=128)
+
+    corpus = _HEADING_CORPUS + _fuzz_corpus(20000)
+    for text in corpus + corpus:
+        assert (classifier(text) or ParagraphType.Text) == _legacy_label(text), repr(text)
+    labels = {classifier(text) for text in _HEADING_CORPUS}
+    assert labels == {ParagraphType.Time_text, ParagraphType.Index_text, None}
+    assert classifier.cache_info().hits > 0
+
+
+def test_line_classifier_respects_rule_priority():
+    classifier = _LineClassifier([('first', [r'^\d+']), ('second', [r'^\d+\.\d+'])])
+    assert classifier('1.1 x') == 'first'
+    assert _LineClassifier([('second', [r'^\d+\.\d+']), ('first', [r'^\d+'])])('1.1 x') == 'second'
+    assert classifier('abc') is None
+
+
+@pytest.mark.benchmark
+def test_layout_classification_throughput_benchmark():
+    """Nodes per second: sequential per-pattern matching vs the combined cached classifier."""
+    rnd = random.Random(9)
+    body = ['本规范适用于新建、扩建和改建的工程项目的设计与施工。', '检测结果应记录在案并由负责人签字确认。',
+            'The contractor shall submit the test report within 7 days.']
+    texts = [rnd.choice(_HEADING_CORPUS) if rnd.random() < 0.3 else rnd.choice(body) + str(rnd.randrange(50))
+             for _ in range(30000)]
+    classifier = _LineClassifier([
+        (ParagraphType.Time_text, TIME_PATTERNS),
+        (ParagraphType.Index_text, INDEX_PATTERNS),
+    ])
+
+    start = time.perf_counter()
+    legacy = [_legacy_label(text) for text in texts]
+    legacy_s = time.perf_counter() - start
+    start = time.perf_counter()
+    combined = [classifier(text) or ParagraphType.Text for text in texts]
+    combined_s = time.perf_counter() - start
+    classifier._cached_classify.cache_clear()
+    start = time.perf_counter()
+    for text in texts:
+        classifier._classify(text.strip())
+    uncached_s = time.perf_counter() - start
+
+    report = {
+        'nodes': len(texts),
+        'legacy_nodes_per_s': int(len(texts) / legacy_s),
+        'combined_uncached_nodes_per_s': int(len(texts) / uncached_s),
+        'combined_cached_nodes_per_s': int(len(texts) / combined_s),
+    }
+    print(f'[post_func classifier bench] {report}')
+
+    assert combined == legacy
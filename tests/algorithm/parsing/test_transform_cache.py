@@ -0,0 +1,158 @@
+import time
+
+import pytest
+from lazyllm.tools.rag import DocNode
+
+import parsing.transform.post_func as post_func
+from parsing.transform.post_func import NodeParser
+from parsing.transform.transform_cache import TransformCache
+
+
+@pytest.fixture(autouse=True)
+def _isolated_dirs(monkeypatch, tmp_path):
+    monkeypatch.setitem(post_func._cfg._impl, 'shared_upload_dir', str(tmp_path / 'uploads'))
+    monkeypatch.setitem(post_func._cfg._impl, 'rag_image_path_prefix', str(tmp_path / 'images'))
+    monkeypatch.setitem(post_func._cfg._impl, 'node_transform_cache', False)
+
+
+def _document(doc: int, pages: int = 3, lines: int = 8, edit_page: int = -1):
+    nodes = []
+    for page in range(pages):
+        nodes.append(DocNode(text=f'第{page + 1}章 文档{doc}的第{page + 1}部分',
+                             metadata={'file_name': f'doc{doc}.pdf', 'type': 'text', 'text_level': 1,
+                                       'page': page, 'bbox': [0, 0, 100, 20]}))
+        for line in range(lines):
+            body = f'{page + 1}.{line + 1} 条款 {doc}-{page}-{line}：ＡＢＣ 全角内容 ' + 'lorem ipsum ' * (line % 4)
+            if page == edit_page:
+                body += ' (revised)'
+            nodes.append(DocNode(text=body, metadata={'file_name': f'doc{doc}.pdf', 'type': 'text', 'page': page,
+                                                      'bbox': [0, 20 * line, 100, 20 * line + 18]}))
+        nodes.append(DocNode(text='', metadata={'file_name': f'doc{doc}.pdf', 'type': 'text', 'page': page}))
+    return nodes
+
+
+def _snapshot(nodes):
+    return [(n.text, n.metadata, sorted(n.excluded_embed_metadata_keys), sorted(n.excluded_llm_metadata_keys))
+            for n in nodes]
+
+
+class _StageCounter:
+    def __init__(self, monkeypatch):
+        self.calls = 0
+        original = post_func.NodeTextClear._parse_nodes
+
+        def _counted(stage, nodes, **kwargs):
+            self.calls += 1
+            return original(stage, nodes, **kwargs)
+
+        monkeypatch.setattr(post_func.NodeTextClear, '_parse_nodes', _counted)
+
+
+def test_cached_results_match_uncached_exactly(tmp_path):
+    cache = TransformCache(str(tmp_path / 'cache'))
+    for doc in range(3):
+        expected = _snapshot(NodeParser().batch_forward(_document(doc), node_group='block'))
+        first = _snapshot(NodeParser(transform_cache=cache).batch_forward(_document(doc), node_group='block'))
+        second = _snapshot(NodeParser(transform_cache=cache).batch_forward(_document(doc), node_group='block'))
+        assert first == expected
+        assert second == expected
+    assert cache.stats.hits == 3 and cache.stats.misses == 3
+
+
+def test_unchanged_document_skips_every_transform_stage(tmp_path, monkeypatch):
+    cache = TransformCache(str(tmp_path / 'cache'))
+    NodeParser(transform_cache=cache)(_document(0))
+    counter = _StageCounter(monkeypatch)
+
+    result = NodeParser(transform_cache=cache)(_document(0))
+
+    assert counter.calls == 0
+    assert result and result[0].metadata['index'] == 0
+    assert cache.stats.hits == 1
+    assert cache.stats.seconds_saved > 0
+
+
+def test_changed_document_recomputes_only_changed_pages(tmp_path, monkeypatch):
+    cache = TransformCache(str(tmp_path / 'cache'))
+    NodeParser(transform_cache=cache)(_document(0, pages=4))
+    cache.reset_stats()
+    counter = _StageCounter(monkeypatch)
+
+    result = NodeParser(transform_cache=cache)(_document(0, pages=4, edit_page=2))
+
+    assert counter.calls == 1
+    assert (cache.stats.misses, cache.stats.page_hits, cache.stats.page_misses) == (1, 3, 1)
+    assert _snapshot(result) == _snapshot(NodeParser()(_document(0, pages=4, edit_page=2)))
+    assert any('(revised)' in n.text for n in result)
+
+
+def test_key_covers_node_group_and_code_hash(tmp_path, monkeypatch):
+    cache = TransformCache(str(tmp_path / 'cache'))
+    NodeParser(transform_cache=cache).batch_forward(_document(0), node_group='block')
+    NodeParser(transform_cache=cache).batch_forward(_document(0), node_group='other')
+    assert cache.stats.misses == 2
+
+    monkeypatch.setattr(post_func, '_transform_code_hash', lambda: 'edited-parser')
+    NodeParser(transform_cache=cache).batch_forward(_document(0), node_group='block')
+    assert cache.stats.misses == 3 and cache.stats.hits == 0
+
+
+def test_config_enables_shared_cache_and_unwritable_root_falls_back(tmp_path, monkeypatch):
+    monkeypatch.setitem(post_func._cfg._impl, 'node_transform_cache', True)
+    NodeParser()(_document(0))
+    assert list((tmp_path / 'uploads' / '.transform_cache').rglob('*.pkl'))
+
+    blocker = tmp_path / 'blocker'
+    blocker.write_text('not a directory')
+    cache = TransformCache(str(blocker / 'cache'))
+    result = NodeParser(transform_cache=cache)(_document(1))
+    assert _snapshot(result) == _snapshot(NodeParser()(_document(1)))
+
+
+def test_size_cap_evicts_least_recently_used_entries(tmp_path):
+    root = tmp_path / 'cache'
+    unbounded = TransformCache(str(root))
+    NodeParser(transform_cache=unbounded).batch_forward(_document(0), node_group='block')
+    per_document = sum(p.stat().st_size for p in root.rglob('*.pkl'))
+
+    cache = TransformCache(str(root), max_bytes=int(per_document * 3.2))
+    parser = NodeParser(transform_cache=cache)
+    for doc in (1, 2):
+        parser.batch_forward(_document(doc), node_group='block')
+    parser.batch_forward(_document(0), node_group='block')  # hit: document 0 is now the most recent
+    assert cache.stats.hits == 1 and cache.stats.evictions == 0
+
+    parser.batch_forward(_document(3), node_group='block')
+    assert cache.stats.evictions > 0
+    assert sum(p.stat().st_size for p in root.rglob('*.pkl')) <= cache.max_bytes
+    cache.reset_stats()
+    parser.batch_forward(_document(0), node_group='block')
+    parser.batch_forward(_document(1), node_group='block')
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+@pytest.mark.benchmark
+def test_reingest_benchmark_unchanged_corpus(tmp_path):
+    """Re-ingest an unchanged 1000-document corpus: uncached vs warm transform cache."""
+    # Parsing mutates the raw nodes, so every pass reads a fresh copy as a reader would.
+    corpus = [_document(doc, pages=3, lines=10) for doc in range(1000)]
+    cache = TransformCache(str(tmp_path / 'cache'))
+    parser = NodeParser(transform_cache=cache)
+
+    start = time.perf_counter()
+    for nodes in corpus:
+        parser.batch_forward(nodes, node_group='block')
+    cold_s = time.perf_counter() - start
+    cache.reset_stats()
+    corpus = [_document(doc, pages=3, lines=10) for doc in range(1000)]
+
+    start = time.perf_counter()
+    for nodes in corpus:
+        parser.batch_forward(nodes, node_group='block')
+    warm_s = time.perf_counter() - start
+    stats = cache.stats.as_dict()
+    print(f'[transform cache bench] documents=1000 cold_s={cold_s:.2f} warm_s={warm_s:.2f} stats={stats}')
+
+    assert stats['hit_rate'] == 1.0
+    assert stats['page_misses'] == 0
+    assert stats['seconds_saved'] > 0
@@ -1442,3 +1442,133 @@ def test_max_retries_and_force_summary_use_lazymind_env(fake_pipeline, monkeypat
     assert obs['agent_kwargs_max_retries'] == 13
     assert obs['agent_kwargs_force_summarize'] is True
     assert obs['agent_kwargs_force_summarize_context'] == 'hello'
+
+
+def _pooled_memory_queue():
+    """Memory queue with lazyllm's pooled-singleton layout, so stream_bus can hook it."""
+
+    class _PooledQueue:
+        __queue_pool__: dict[str, Any] = {}
+        __queue_pool_lock__ = threading.RLock()
+        enqueued: list[str] = []
+
+        def __new__(cls, *args, klass='__default__', **kwargs):
+            with cls.__queue_pool_lock__:
+                if klass not in cls.__queue_pool__:
+                    inst = super().__new__(cls)
+                    inst._class = klass
+                    inst._items = {}
+                    cls.__queue_pool__[klass] = inst
+                return cls.__queue_pool__[klass]
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        @classmethod
+        def get_instance(cls, klass):
+            return cls(klass=klass)
+
+        @property
+        def sid(self) -> str:
+            return f'{lazyllm.globals._sid}-{self._class}'
+
+        def enqueue(self, message):
+            with type(self).__queue_pool_lock__:
+                type(self).enqueued.append(message)
+                self._items.setdefault(self.sid, []).append(message)
+
+        def dequeue(self, limit=None):
+            del limit
+            with type(self).__queue_pool_lock__:
+                return self._items.pop(self.sid, [])
+
+        def clear(self):
+            with type(self).__queue_pool_lock__:
+                self._items.pop(self.sid, None)
+
+    return _PooledQueue
+
+
+def test_stream_pushes_tokens_in_process_without_monitor(fake_pipeline, monkeypatch):
+    queue_cls = _pooled_memory_queue()
+
+    def _fake_agentic_forward(*, query, history, stream_event_callback=None):
+        del history
+        lazyllm.FileSystemQueue.get_instance('think').enqueue('plan')
+        lazyllm.FileSystemQueue().enqueue('hello')
+        stream_event_callback({'round': 1, 'content': '', 'tool_calls': [], 'tool_results': []})
+        lazyllm.FileSystemQueue().enqueue(' world')
+        return {'text': 'hello world', 'sources': []}
+
+    monkeypatch.setitem(algo_config._impl, 'agentic_stream_channel', 'memory')
+    monkeypatch.setattr(agentic.lazyllm, 'FileSystemQueue', queue_cls)
+    monkeypatch.setattr(agentic, 'agentic_forward', _fake_agentic_forward)
+    monkeypatch.setattr(agentic, '_format_tool_stream_frame', lambda event: {'tool': event['round']})
+    monkeypatch.setattr(agentic, '_stream_frame', lambda **kwargs: kwargs)
+    monitors_before = {t.ident for t in threading.enumerate() if '_stream_monitor' in t.name}
+
+    lazyllm.globals._init_sid(sid='stream-push-session')
+    lazyllm.locals._init_sid(sid='stream-push-session')
+
+    async def _collect():
+        return [item async for item in agentic.agentic_rag({'query': 'hello'}, stream=True)]
+
+    frames = asyncio.run(_collect())
+
+    assert frames == [{'think': 'plan'}, {'text': 'hello'}, {'tool': 1}, {'text': ' world'}]
+    assert queue_cls.enqueued == []
+    assert {t.ident for t in threading.enumerate() if '_stream_monitor' in t.name} <= monitors_before
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+@pytest.mark.benchmark
+def test_stream_push_vs_poll_benchmark_100_concurrent_streams(fake_pipeline, monkeypatch):
+    """TTFT and per-chunk overhead for 100 concurrent streams with a fake LLM."""
+    streams, tokens, token_interval = 100, 20, 0.002
+    monkeypatch.setattr(agentic, '_stream_frame', lambda **kwargs: kwargs)
+
+    def _fake_llm_forward(*, query, history, stream_event_callback=None):
+        del history, stream_event_callback
+        for i in range(tokens):
+            time.sleep(token_interval)
+            lazyllm.FileSystemQueue().enqueue(f'{query}-{i} ')
+        return {'text': '', 'sources': []}
+
+    monkeypatch.setattr(agentic, 'agentic_forward', _fake_llm_forward)
+
+    async def _consume(i: int):
+        session_id = f'stream-bench-{i}'
+        lazyllm.globals._init_sid(sid=session_id)
+        lazyllm.locals._init_sid(sid=session_id)
+        started = time.perf_counter()
+        first, text = None, ''
+        async for frame in agentic.agentic_rag({'query': f'q{i}'}, stream=True):
+            if frame.get('text'):
+                first = first if first is not None else time.perf_counter() - started
+                text += frame['text']
+        return first, time.perf_counter() - started, text
+
+    def _run(channel: str):
+        monkeypatch.setitem(algo_config._impl, 'agentic_stream_channel', channel)
+        monkeypatch.setattr(agentic.lazyllm, 'FileSystemQueue', _pooled_memory_queue())
+
+        async def _all():
+            return await asyncio.gather(*(_consume(i) for i in range(streams)))
+
+        results = asyncio.run(_all())
+        for i, (_, _, text) in enumerate(results):
+            assert text == ''.join(f'q{i}-{n} ' for n in range(tokens))
+        ttft = [first for first, _, _ in results]
+        overhead = [max(0.0, total - tokens * token_interval) / tokens for _, total, _ in results]
+        return {
+            'ttft_p50_ms': _percentile(ttft, 50) * 1000,
+            'ttft_p99_ms': _percentile(ttft, 99) * 1000,
+            'chunk_overhead_p50_ms': _percentile(overhead, 50) * 1000,
+        }
+
+    report = {'fsqueue': _run('fsqueue'), 'memory': _run('memory')}
+    print(f'[agentic stream bench] {report}')
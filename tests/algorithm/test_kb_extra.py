@@ -6,8 +6,11 @@ circular import via vocab.evolution.  We break the cycle with the same
 lightweight stub approach used in test_pipeline_builders_extra.py.
 """
 import sys
+import time
 import types
 
+import pytest
+
 
 def _stub_vocab_and_chat_pipelines():
     """Stub out modules that cause circular imports at collection time.
@@ -36,6 +39,14 @@ _stub_vocab_and_chat_pipelines()
 
 from chat.tools import kb  # noqa: E402  (must come after stubs)
 
+
+@pytest.fixture(autouse=True)
+def _clear_search_ppl_cache():
+    kb.invalidate_search_ppl_cache()
+    yield
+    kb.invalidate_search_ppl_cache()
+
+
 DEFAULT_AGENTIC_CONFIG = {
     'kb_url': 'http://10.119.24.129:8056',
     'kb_name': 'general_algo',
@@ -175,13 +186,121 @@ def test_kb_search_explicit_empty_files_overrides_temp_files(monkeypatch):
     assert captured_payload['files'] == []
 
 
+# ---------------------------------------------------------------------------
+# kb_search — compiled search pipeline cache
+# ---------------------------------------------------------------------------
+
+class _FakeDocumentStore:
+    """Local stand-in for the remote Document: building retrievers over it has a fixed cost."""
+
+    build_cost = 0.005
+
+    def __init__(self):
+        self.builds = 0
+        self.searches = 0
+
+    def get_ppl_search(self, url, retriever_configs=None, topk=20, k_max=10):
+        time.sleep(self.build_cost)
+        self.builds += 1
+
+        def search(payload):
+            self.searches += 1
+            return []
+        return search
+
+
+def _run_kb_search_calls(store, monkeypatch, count, config=None, **kwargs):
+    monkeypatch.setattr(kb, 'get_ppl_search', store.get_ppl_search)
+    original_config = kb.lazyllm.globals.get('agentic_config')
+    kb.lazyllm.globals['agentic_config'] = config or DEFAULT_AGENTIC_CONFIG
+    try:
+        start = time.perf_counter()
+        for i in range(count):
+            kb.kb_search(f'query {i}', **kwargs)
+        return time.perf_counter() - start
+    finally:
+        kb.lazyllm.globals['agentic_config'] = original_config or {}
+
+
+def test_kb_search_reuses_compiled_pipeline_across_tool_calls(monkeypatch):
+    store = _FakeDocumentStore()
+
+    _run_kb_search_calls(store, monkeypatch, 3)
+
+    assert store.builds == 1
+    assert store.searches == 3
+
+
+def test_kb_search_pipeline_cache_key_tracks_topk_but_not_temp_files(monkeypatch):
+    store = _FakeDocumentStore()
+
+    _run_kb_search_calls(store, monkeypatch, 1)
+    _run_kb_search_calls(store, monkeypatch, 1, topk=5)
+    _run_kb_search_calls(store, monkeypatch, 1, files=['file-a'])
+    _run_kb_search_calls(store, monkeypatch, 1, files=['file-b'])
+    _run_kb_search_calls(store, monkeypatch, 1, config=dict(DEFAULT_AGENTIC_CONFIG, kb_id='ds_other'))
+
+    assert store.builds == 3
+
+
+def test_kb_search_pipeline_cache_is_bounded_and_invalidated(monkeypatch):
+    store = _FakeDocumentStore()
+    monkeypatch.setattr(kb, '_SEARCH_PPL_CACHE_SIZE', 2)
+
+    for topk in (1, 2, 3):
+        _run_kb_search_calls(store, monkeypatch, 1, topk=topk)
+    assert len(kb._search_ppl_cache) == 2
+
+    assert kb.invalidate_search_ppl_cache(kb_id=DEFAULT_AGENTIC_CONFIG['kb_id']) == 2
+    _run_kb_search_calls(store, monkeypatch, 1, topk=3)
+    assert store.builds == 4
+
+
+def test_kb_invalidate_route_drops_pipelines_of_one_dataset(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from chat.app.api import kb_routes
+
+    store = _FakeDocumentStore()
+    _run_kb_search_calls(store, monkeypatch, 1)
+    _run_kb_search_calls(store, monkeypatch, 1, config=dict(DEFAULT_AGENTIC_CONFIG, kb_id='ds_other'))
+    app = FastAPI()
+    app.include_router(kb_routes.router)
+    client = TestClient(app)
+
+    resp = client.post('/api/kb/invalidate', json={'kb_id': 'ds_other'})
+
+    assert resp.json() == {'status': 'ok', 'kb_id': 'ds_other', 'removed': 1}
+    assert [key[1] for key in kb._search_ppl_cache] == [DEFAULT_AGENTIC_CONFIG['kb_id']]
+    assert client.post('/api/kb/invalidate').json()['removed'] == 1
+
+
+@pytest.mark.benchmark
+def test_kb_search_pipeline_cache_benchmark_20_calls(monkeypatch):
+    """20 consecutive tool calls: rebuild-per-call vs cached pipeline."""
+    uncached_store = _FakeDocumentStore()
+    monkeypatch.setattr(kb, '_SEARCH_PPL_CACHE_SIZE', 1)
+    uncached = 0.0
+    for i in range(20):
+        kb.invalidate_search_ppl_cache()
+        uncached += _run_kb_search_calls(uncached_store, monkeypatch, 1)
+
+    cached_store = _FakeDocumentStore()
+    kb.invalidate_search_ppl_cache()
+    cached = _run_kb_search_calls(cached_store, monkeypatch, 20)
+    print(f'[kb_search ppl cache bench] 20 calls uncached={uncached * 1000:.1f}ms cached={cached * 1000:.1f}ms')
+
+    assert uncached_store.builds == 20
+    assert cached_store.builds == 1
+
+
 # ---------------------------------------------------------------------------
 # kb_get_parent_node — node without parent returns empty items
 # ---------------------------------------------------------------------------
 
 def test_kb_get_parent_node_returns_empty_when_no_parent(monkeypatch):
-    def fake_opensearch_search(index, body, config):
-        return {
+    def fake_opensearch_msearch(searches, config):
+        return [{
             'hits': {
                 'hits': [{
                     '_id': 'root-node',
@@ -196,9 +315,9 @@ def test_kb_get_parent_node_returns_empty_when_no_parent(monkeypatch):
                     },
                 }]
             }
-        }
+        } for _ in searches]
 
-    monkeypatch.setattr(kb, '_opensearch_search', fake_opensearch_search)
+    monkeypatch.setattr(kb, '_opensearch_msearch', fake_opensearch_msearch)
     original_config = kb.lazyllm.globals.get('agentic_config')
     kb.lazyllm.globals['agentic_config'] = DEFAULT_AGENTIC_CONFIG
     try:
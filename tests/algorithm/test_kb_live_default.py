@@ -1,8 +1,17 @@
 from types import SimpleNamespace
 
+import pytest
+
 from chat.tools import kb
 
 
+@pytest.fixture(autouse=True)
+def _clear_search_ppl_cache():
+    kb.invalidate_search_ppl_cache()
+    yield
+    kb.invalidate_search_ppl_cache()
+
+
 DEFAULT_AGENTIC_CONFIG = {
     'kb_url': 'http://10.119.24.129:8056',
     'kb_name': 'general_algo',
@@ -78,7 +87,6 @@ def test_kb_get_parent_node_by_node_id(monkeypatch):
     calls = []
 
     def fake_opensearch_search(index, body, config):
-        calls.append({'index': index, 'body': body, 'config': config})
         node_id = body['query']['bool']['must'][0]['bool']['should'][0]['ids']['values'][0]
         sources = {
             'child-node': {
@@ -103,7 +111,11 @@ def test_kb_get_parent_node_by_node_id(monkeypatch):
         source = sources.get(node_id)
         return {'hits': {'hits': [{'_id': node_id, '_source': source}] if source else []}}
 
-    monkeypatch.setattr(kb, '_opensearch_search', fake_opensearch_search)
+    def fake_opensearch_msearch(searches, config):
+        calls.append({'indices': [index for index, _ in searches], 'config': config})
+        return [fake_opensearch_search(index, body, config) for index, body in searches]
+
+    monkeypatch.setattr(kb, '_opensearch_msearch', fake_opensearch_msearch)
     original_config = kb.lazyllm.globals.get('agentic_config')
     kb.lazyllm.globals['agentic_config'] = DEFAULT_AGENTIC_CONFIG
     try:
@@ -117,7 +129,8 @@ def test_kb_get_parent_node_by_node_id(monkeypatch):
     assert result['total'] == 1
     assert result['items'][0]['uid'] == 'parent-node'
     assert result['items'][0]['text'] == 'parent text'
-    assert [call['index'] for call in calls] == ['col_block', 'col_block']
+    # One _msearch round trip per node lookup, covering both indices.
+    assert [call['indices'] for call in calls] == [['col_block', 'col_line'], ['col_block', 'col_line']]
 
 
 if __name__ == '__main__':
@@ -1,4 +1,7 @@
+import pytest
+
 from chat.tools import kb
+from chat.utils import opensearch_client
 
 
 class DummyResponse:
@@ -16,20 +19,33 @@ class DummySession:
         self.trust_env = True
         DummySession.last = self
 
+    def mount(self, prefix, adapter):
+        pass
+
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc, tb):
         return False
 
+    def close(self):
+        pass
+
     def post(self, url, **kwargs):
         self.url = url
         self.kwargs = kwargs
         return DummyResponse()
 
 
+@pytest.fixture(autouse=True)
+def _reset_opensearch_clients():
+    opensearch_client.reset_clients()
+    yield
+    opensearch_client.reset_clients()
+
+
 def test_opensearch_search_ignores_environment_proxies(monkeypatch):
-    monkeypatch.setattr(kb.requests.sessions, 'Session', DummySession)
+    monkeypatch.setattr(opensearch_client.requests.sessions, 'Session', DummySession)
     monkeypatch.setenv('LAZYLLM_HTTPS_PROXY', 'http://proxy.example:3128')
 
     result = kb._opensearch_search(
@@ -42,3 +58,15 @@ def test_opensearch_search_ignores_environment_proxies(monkeypatch):
     assert DummySession.last.trust_env is False
     assert DummySession.last.url == 'http://10.0.0.1:9200/idx/_search'
     assert 'proxies' not in DummySession.last.kwargs
+
+
+def test_opensearch_search_reuses_client_per_endpoint(monkeypatch):
+    monkeypatch.setattr(opensearch_client.requests.sessions, 'Session', DummySession)
+    config = {'es_url': 'http://10.0.0.1:9200', 'es_user': 'u', 'es_password': 'p'}
+
+    kb._opensearch_search('idx', {'query': {'match_all': {}}}, config)
+    first = DummySession.last
+    kb._opensearch_search('idx', {'query': {'match_all': {}}}, config)
+
+    assert DummySession.last is first
+    assert first.auth == ('u', 'p')
@@ -373,6 +373,7 @@ def test_vocab_evolution_service_returns_flat_actions():
         fetch_vocab_groups_fn=lambda user_id, **kwargs: {},
         extraction_llm=extraction_llm,
         conflict_llm=FakeLLM([]),
+        user_concurrency=1,  # FakeLLM answers in call order
     )
     actions = service.run({'lookback_days': 7})
 
@@ -0,0 +1,242 @@
+"""Concurrent vocab evolution: LLM budget, prompt packing, failure isolation and resume."""
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+
+import pytest
+
+import vocab.evolution as evo
+from vocab.checkpoint import EvolutionRunJournal
+from vocab.evolution import SynonymExtractionModule, VocabEvolutionRequest, VocabEvolutionService
+
+_LINE_RE = re.compile(r'\[message_id=(\S+)\] remember (\S+) is (\S+)')
+
+
+class ScriptedLLM:
+    """Deterministic fake LLM: every ``remember A is B`` line becomes one synonym pair."""
+
+    def __init__(self, latency: float = 0.0, fail_on: str = ''):
+        self.latency = latency
+        self.fail_on = fail_on
+        self.prompts = []
+        self.inflight = 0
+        self.max_inflight = 0
+        self._lock = threading.Lock()
+
+    def share(self, **kwargs):
+        return self
+
+    def __call__(self, payload, **kwargs):
+        with self._lock:
+            self.prompts.append(payload)
+            self.inflight += 1
+            self.max_inflight = max(self.max_inflight, self.inflight)
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            text = payload['history_segments']
+            if self.fail_on and self.fail_on in text:
+                raise RuntimeError('llm unavailable')
+            return [{'word': word, 'synonym': synonym, 'description': 'ctx', 'reason': 'explicit',
+                     'message_ids': [msg_id]} for msg_id, word, synonym in _LINE_RE.findall(text)]
+        finally:
+            with self._lock:
+                self.inflight -= 1
+
+
+def _histories(users, per_user):
+    data = {
+        f'u{u}': [{'user_id': f'u{u}', 'conversation_id': f'c{u}', 'message_id': f'u{u}-m{i}', 'seq': i,
+                   'raw_content': '', 'content': f'remember w{u}x{i} is s{u}x{i} ' + 'pad ' * 20,
+                   'result': 'ok', 'create_time': None} for i in range(per_user)]
+        for u in range(users)
+    }
+    return data
+
+
+def _service(data, llm, **kwargs):
+    return VocabEvolutionService(
+        fetch_users_fn=lambda **kw: list(data),
+        fetch_histories_fn=lambda user_id, **kw: list(data[user_id]),
+        fetch_vocab_groups_fn=lambda user_id, **kw: {},
+        extraction_llm=llm,
+        conflict_llm=ScriptedLLM(),
+        **kwargs,
+    )
+
+
+def _words(actions):
+    return sorted(tuple(sorted(item['words'])) for item in actions)
+
+
+def test_pack_chunks_respects_token_budget():
+    chunks = [{'chunk_id': f'c{i}', 'message_ids': [f'm{i}'], 'text': 'x' * 400, 'records': [i]} for i in range(5)]
+
+    packs = list(evo._pack_chunks(chunks, 250))
+    assert [p['chunk_count'] for p in packs] == [2, 2, 1]
+    assert packs[0]['message_ids'] == ['m0', 'm1']
+    assert packs[0]['records'] == [0, 1]
+    assert packs[0]['text'] == 'x' * 400 + '\n' + 'x' * 400
+
+    assert [p['chunk_count'] for p in evo._pack_chunks(chunks, 0)] == [1] * 5
+    assert [p['chunk_count'] for p in evo._pack_chunks(chunks[:1], 10)] == [1]
+    assert evo._estimate_tokens('苹果' * 10) == 20
+    assert evo._estimate_tokens('a' * 40) == 10
+
+
+def test_extraction_packs_chunks_and_merges_duplicates_across_prompts(monkeypatch):
+    monkeypatch.setitem(evo._cfg._impl, 'vocab_extraction_max_prompt_tokens', 60)
+    histories = [evo.ChatHistoryRecord.from_dict(row) for row in _histories(1, 6)['u0']]
+    for row in histories[3:]:
+        row.content = 'remember w0x0 is s0x0 again'
+    llm = ScriptedLLM()
+    module = SynonymExtractionModule(llm=llm, max_inflight=3)
+    request = VocabEvolutionRequest(max_chunk_chars=120, max_pairs_per_chunk=2)
+    payload = evo.HistoryChunker().forward({'request': request, 'user_id': 'u0', 'histories': histories})
+
+    result = module.forward(payload)
+
+    assert len(llm.prompts) < len(payload['chunks'])
+    assert sum(int(p['max_pairs']) for p in llm.prompts) == 2 * len(payload['chunks'])
+    merged = {(c.word, c.synonym): c.message_ids for c in result['candidates']}
+    assert merged[('w0x0', 's0x0')] == ['u0-m0', 'u0-m3', 'u0-m4', 'u0-m5']
+    assert len(merged) == 3
+
+
+def test_run_caps_in_flight_llm_calls_across_users():
+    data = _histories(12, 4)
+    llm = ScriptedLLM(latency=0.02)
+    service = _service(data, llm, user_concurrency=6, llm_concurrency=3)
+
+    actions = service.run({'max_chunk_chars': 150})
+
+    assert 2 <= llm.max_inflight <= 3
+    assert len(actions) == 48
+    assert [item['user_id'] for item in actions[::4]] == [f'u{u}' for u in range(12)]
+
+
+def test_failing_user_is_isolated_and_run_resumes_from_journal(tmp_path):
+    data = _histories(5, 3)
+    journal = EvolutionRunJournal(str(tmp_path / 'run.journal'))
+    request = {'lookback_days': 3}
+
+    first = _service(data, ScriptedLLM(fail_on='w3x'), run_journal=journal, user_concurrency=3)
+    first.run({**request, 'extraction_retries': 1})
+    partial = first.run({**request, 'extraction_retries': 1})
+    assert sorted({item['user_id'] for item in partial}) == ['u0', 'u1', 'u2', 'u4']
+
+    # A fresh process picks up the journal and only re-extracts what failed or never ran.
+    data['u3'][0]['content'] = 'remember fixed is better'
+    llm = ScriptedLLM()
+    second = _service(data, llm, run_journal=journal, user_concurrency=3)
+    actions = second.run({**request, 'extraction_retries': 1})
+
+    assert {p['history_segments'].split(']')[0] for p in llm.prompts} == {'[message_id=u3-m0'}
+    assert len(actions) == 15
+    assert ('better', 'fixed') in _words(actions)
+    second.commit_checkpoints()
+    assert not os.path.exists(journal.path)
+
+
+def test_user_failure_outside_llm_does_not_stop_other_users():
+    data = _histories(4, 2)
+
+    def _fetch(user_id, **kwargs):
+        if user_id == 'u1':
+            raise RuntimeError('db down')
+        return data[user_id]
+
+    service = VocabEvolutionService(
+        fetch_users_fn=lambda **kw: list(data),
+        fetch_histories_fn=_fetch,
+        fetch_vocab_groups_fn=lambda user_id, **kw: {},
+        extraction_llm=ScriptedLLM(),
+        conflict_llm=ScriptedLLM(),
+        user_concurrency=4,
+    )
+
+    assert sorted({item['user_id'] for item in service.run({})}) == ['u0', 'u2', 'u3']
+
+
+def test_concurrent_run_waits_for_the_previous_run_to_commit(tmp_path):
+    data = _histories(3, 2)
+    journal = EvolutionRunJournal(str(tmp_path / 'run.journal'))
+    service = _service(data, ScriptedLLM(), run_journal=journal)
+    started = threading.Event()
+    service._fetch_users = lambda **kw: started.set() or list(data)
+    assert len(service.run({})) == 6
+    started.clear()
+    results = []
+    other = threading.Thread(target=lambda: results.append(service.run({'lookback_days': 3})))
+    other.start()
+
+    # The second run must neither reopen the journal nor collect watermarks before this commit.
+    assert not started.wait(0.2)
+    assert journal._load()[1].keys() == set(data)
+    service.commit_checkpoints()
+    other.join(5.0)
+    assert started.is_set() and len(results[0]) == 6
+    service.commit_checkpoints()
+    assert not os.path.exists(journal.path)
+
+
+def test_failed_apply_lets_a_run_from_another_thread_resume(tmp_path):
+    data = _histories(3, 2)
+    journal = EvolutionRunJournal(str(tmp_path / 'run.journal'))
+    llm = ScriptedLLM()
+    service = _service(data, llm, run_journal=journal)
+
+    def _down(url, **kwargs):
+        raise RuntimeError('backend down')
+
+    with pytest.raises(RuntimeError, match='backend down'):
+        evo.run_vocab_evolution({}, service=service, apply_url='http://backend/apply', post_fn=_down)
+    assert journal._load()[1].keys() == set(data)
+
+    posted, results = [], []
+    other = threading.Thread(daemon=True, target=lambda: results.append(evo.run_vocab_evolution(
+        {}, service=service, apply_url='http://backend/apply', post_fn=lambda url, **kw: posted.append(kw))))
+    other.start()
+    other.join(5.0)
+
+    assert not other.is_alive()
+    assert len(results[0]) == 6 and len(posted) == 1
+    assert len(llm.prompts) == 3  # resumed from the journal, not extracted again
+    assert not os.path.exists(journal.path)
+
+
+@pytest.mark.benchmark
+def test_scheduler_benchmark_with_fake_llm_latency(monkeypatch):
+    """Serial one-chunk-per-call run (previous behaviour) vs concurrent users with packed prompts."""
+    users, per_user, latency = 40, 12, 0.01
+    data = _histories(users, per_user)
+    request = {'max_chunk_chars': 250}
+
+    monkeypatch.setitem(evo._cfg._impl, 'vocab_extraction_max_prompt_tokens', 0)
+    serial_llm = ScriptedLLM(latency=latency)
+    start = time.perf_counter()
+    serial = _service(data, serial_llm, user_concurrency=1, llm_concurrency=1).run(request)
+    serial_s = time.perf_counter() - start
+
+    monkeypatch.setitem(evo._cfg._impl, 'vocab_extraction_max_prompt_tokens', 8000)
+    llm = ScriptedLLM(latency=latency)
+    start = time.perf_counter()
+    scheduled = _service(data, llm, user_concurrency=4, llm_concurrency=8).run(request)
+    scheduled_s = time.perf_counter() - start
+
+    report = {
+        'users': users,
+        'serial': {'llm_calls': len(serial_llm.prompts), 'seconds': round(serial_s, 2)},
+        'scheduled': {'llm_calls': len(llm.prompts), 'max_inflight': llm.max_inflight,
+                      'seconds': round(scheduled_s, 2)},
+    }
+    print(f'[vocab evolution scheduler bench] {report}')
+
+    assert _words(scheduled) == _words(serial)
+    assert len(scheduled) == users * per_user
+    assert llm.max_inflight <= 8
+    assert len(llm.prompts) < len(serial_llm.prompts)
+    assert scheduled_s * 5 < serial_s
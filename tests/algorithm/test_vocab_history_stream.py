@@ -0,0 +1,228 @@
+"""Streaming chat-history extraction for vocab evolution, exercised against local SQLite."""
+from __future__ import annotations
+
+import sqlite3
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pytest
+
+import vocab.db as vocab_db
+from vocab.checkpoint import HistoryCheckpointStore, HistoryWatermark
+from vocab.evolution import (
+    HistoryChunker,
+    HistoryCollector,
+    SynonymExtractionModule,
+    VocabEvolutionRequest,
+    VocabEvolutionService,
+)
+
+_T0 = datetime(2026, 1, 1)
+_RANGE = {'start_time': _T0 - timedelta(days=1), 'end_time': _T0 + timedelta(days=365)}
+
+
+class _NullLLM:
+    def __init__(self, record=True):
+        self.record = record
+        self.error = None
+        self.segments = []
+
+    def share(self, **kwargs):
+        return self
+
+    def __call__(self, payload, **kwargs):
+        if self.error is not None:
+            raise self.error
+        if self.record:
+            self.segments.append(payload['history_segments'])
+        return []
+
+    def take(self):
+        seen, self.segments = ' '.join(self.segments), []
+        return seen
+
+
+def _create_schema(conn):
+    conn.executescript(
+        """
+        CREATE TABLE conversations (id TEXT PRIMARY KEY, create_user_id TEXT NOT NULL, deleted_at TEXT);
+        CREATE TABLE chat_histories (
+            id TEXT PRIMARY KEY, seq INTEGER NOT NULL, conversation_id TEXT NOT NULL,
+            raw_content TEXT, content TEXT, result TEXT, create_time TEXT NOT NULL);
+        CREATE INDEX idx_conv_user ON conversations (create_user_id);
+        CREATE INDEX idx_hist_conv_keyset ON chat_histories (conversation_id, create_time, seq, id);
+        CREATE INDEX idx_hist_keyset ON chat_histories (create_time, seq, id);
+        """
+    )
+
+
+def _insert_histories(conn, conversation_id, user_id, count, *, offset=0, same_time_every=1):
+    conn.execute('INSERT OR IGNORE INTO conversations VALUES (?, ?, NULL)', (conversation_id, user_id))
+    conn.executemany(
+        'INSERT INTO chat_histories VALUES (?, ?, ?, ?, ?, ?, ?)',
+        (
+            (f'{conversation_id}-m{i:08d}', i % 3, conversation_id, '', f'{user_id} message {i} 苹果 apple', 'ok',
+             str(_T0 + timedelta(seconds=i // same_time_every)))
+            for i in range(offset, offset + count)
+        ),
+    )
+
+
+@pytest.fixture
+def small_db(tmp_path):
+    path = tmp_path / 'core.db'
+    conn = sqlite3.connect(path)
+    _create_schema(conn)
+    # Three rows share each timestamp, so pages have to break ties on (seq, id).
+    _insert_histories(conn, 'c1', 'u1', 25, same_time_every=3)
+    _insert_histories(conn, 'c2', 'u2', 5)
+    conn.execute("UPDATE conversations SET deleted_at = '2026-01-02' WHERE id = 'c2'")
+    conn.commit()
+    conn.close()
+    return f'sqlite:///{path}'
+
+
+@pytest.fixture(scope='module')
+def large_db(tmp_path_factory):
+    """1M history rows: one heavy user (200k rows over 4 conversations) plus 800 light users."""
+    path = tmp_path_factory.mktemp('vocab_history') / 'core.db'
+    conn = sqlite3.connect(path)
+    _create_schema(conn)
+    for conv in range(4):
+        _insert_histories(conn, f'heavy-c{conv}', 'heavy', 50_000, offset=conv * 50_000)
+    for user in range(800):
+        _insert_histories(conn, f'light-c{user}', f'light{user}', 1000, offset=user * 1000)
+    conn.execute('ANALYZE')
+    conn.commit()
+    conn.close()
+    return f'sqlite:///{path}'
+
+
+def test_iter_histories_pages_with_keyset_and_matches_full_fetch(small_db):
+    paged = list(vocab_db.iter_chat_histories_for_user_id('u1', page_size=4, db_url=small_db, **_RANGE))
+    full = vocab_db.fetch_chat_histories_for_user_id('u1', db_url=small_db, **_RANGE)
+
+    assert [row['message_id'] for row in paged] == [row['message_id'] for row in full]
+    assert len(paged) == 25
+    keys = [(row['create_time'], row['seq'], row['message_id']) for row in paged]
+    assert keys == sorted(keys)
+    assert list(vocab_db.iter_chat_histories_for_user_id('u2', db_url=small_db, **_RANGE)) == []
+
+
+def test_iter_histories_resumes_strictly_after_watermark(small_db):
+    rows = list(vocab_db.iter_chat_histories_for_user_id('u1', page_size=4, db_url=small_db, **_RANGE))
+    mark = (rows[9]['create_time'], rows[9]['seq'], rows[9]['message_id'])
+
+    resumed = list(vocab_db.iter_chat_histories_for_user_id('u1', after=mark, page_size=4, db_url=small_db, **_RANGE))
+
+    assert [row['message_id'] for row in resumed] == [row['message_id'] for row in rows[10:]]
+
+
+def test_checkpoint_store_round_trips_and_replaces_atomically(tmp_path):
+    store = HistoryCheckpointStore(str(tmp_path / 'ckpt' / 'watermarks.json'))
+    store.update({'u1': HistoryWatermark(datetime(2026, 1, 2, 3, 4, 5), 7, 'm1')})
+    store.update({'u2': HistoryWatermark('2026-01-01 00:00:09', 1, 'm9')})
+
+    assert store.get('u1') == HistoryWatermark(datetime(2026, 1, 2, 3, 4, 5), 7, 'm1')
+    assert store.get('u2').as_keyset() == ('2026-01-01 00:00:09', 1, 'm9')
+    assert store.get('missing') is None
+    assert [p.name for p in (tmp_path / 'ckpt').iterdir()] == ['watermarks.json']
+
+
+def test_service_checkpoint_reads_only_newer_histories_on_next_run(small_db, tmp_path):
+    llm = _NullLLM()
+    service = VocabEvolutionService(
+        fetch_users_fn=lambda **kwargs: ['u1'],
+        fetch_vocab_groups_fn=lambda user_id, **kwargs: {},
+        extraction_llm=llm,
+        conflict_llm=_NullLLM(),
+        checkpoint_store=HistoryCheckpointStore(str(tmp_path / 'watermarks.json')),
+    )
+    request = dict(core_db_url=small_db, max_chunk_chars=80, **_RANGE)
+
+    service.run(request)
+    first = llm.take()
+    service.commit_checkpoints()
+    service.run(request)
+    assert llm.take() == ''  # nothing newer than the watermark
+    service.commit_checkpoints()
+
+    conn = sqlite3.connect(small_db[len('sqlite:///'):])
+    _insert_histories(conn, 'c1', 'u1', 2, offset=100)
+    conn.commit()
+    conn.close()
+    service.run(request)
+    service.commit_checkpoints()
+
+    assert 'u1 message 24 ' in first and 'u1 message 0 ' in first
+    latest = llm.take()
+    assert 'u1 message 100 ' in latest and 'u1 message 101 ' in latest
+    assert 'u1 message 24 ' not in latest
+    assert service._checkpoint_store.get('u1').message_id == 'c1-m00000101'
+    service.run({**request, 'use_checkpoint': False})
+    assert 'u1 message 0 ' in llm.take()
+
+
+def test_failed_extraction_keeps_the_watermark_before_unread_histories(small_db, tmp_path):
+    llm = _NullLLM()
+    service = VocabEvolutionService(
+        fetch_users_fn=lambda **kwargs: ['u1'],
+        fetch_vocab_groups_fn=lambda user_id, **kwargs: {},
+        extraction_llm=llm,
+        conflict_llm=_NullLLM(),
+        checkpoint_store=HistoryCheckpointStore(str(tmp_path / 'watermarks.json')),
+    )
+    request = dict(core_db_url=small_db, max_chunk_chars=80, extraction_retries=2, **_RANGE)
+
+    llm.error = RuntimeError('llm down')
+    assert service.run(request) == []
+    service.commit_checkpoints()
+    assert service._checkpoint_store.get('u1') is None
+
+    llm.error = None
+    service.run(request)
+    service.commit_checkpoints()
+    assert 'u1 message 0 ' in llm.take()
+    assert service._checkpoint_store.get('u1').message_id == 'c1-m00000024'
+
+
+def _run_extraction(payload, chunker, extractor):
+    payload = chunker.forward(payload)
+    return extractor.forward(payload)
+
+
+@pytest.mark.benchmark
+def test_streaming_pipeline_bounded_memory_on_large_db(large_db, monkeypatch):
+    """Legacy list fetch + list chunking vs streamed pages, over the 200k rows of one user."""
+    monkeypatch.setitem(vocab_db._cfg._impl, 'vocab_history_page_size', 5000)
+    request = VocabEvolutionRequest(core_db_url=large_db, max_chunk_chars=3200, **_RANGE)
+    chunker = HistoryChunker()
+
+    def _legacy():
+        rows = vocab_db.fetch_chat_histories_for_user_id('heavy', db_url=large_db, **_RANGE)
+        payload = HistoryCollector(fetch_histories_fn=lambda user_id, **kwargs: rows).forward(
+            {'request': request, 'user_id': 'heavy'})
+        payload['histories'] = list(payload['histories'])
+        return _run_extraction(payload, chunker, SynonymExtractionModule(llm=_NullLLM(record=False))), len(rows)
+
+    def _streamed():
+        payload = HistoryCollector().forward({'request': request, 'user_id': 'heavy'})
+        result = _run_extraction(payload, chunker, SynonymExtractionModule(llm=_NullLLM(record=False)))
+        return result, payload['history_progress'].count
+
+    report = {}
+    for name, run in (('legacy', _legacy), ('streamed', _streamed)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            _, count = run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        report[name] = {'rows': count, 'seconds': round(time.perf_counter() - start, 1),
+                        'peak_mb': round(peak / 2 ** 20, 1)}
+    print(f'[vocab history stream bench] {report}')
+
+    assert report['streamed']['rows'] == report['legacy']['rows'] == 200_000
+    assert report['streamed']['peak_mb'] * 10 < report['legacy']['peak_mb']
@@ -0,0 +1,195 @@
+"""Tests for incremental (overlay) vocab automaton updates."""
+from __future__ import annotations
+
+import random
+import time
+from unittest.mock import patch
+
+import pytest
+
+from lazyllm.tools.rag.query_enh_ac import QueryEnhACProcessor
+
+from vocab.incremental import IncrementalACProcessor
+
+
+def _accept_all(query, matches):
+    return matches
+
+
+def _full(rows):
+    proc = QueryEnhACProcessor(data_source=rows)
+    proc._boundary_filter = _accept_all
+    return proc
+
+
+def _incremental(rows):
+    proc = IncrementalACProcessor.build(rows)
+    proc._boundary_filter = _accept_all
+    return proc
+
+
+def _base_rows(groups=60, per_group=4):
+    return [{'word': f'w{g}_{i}', 'cluster_id': f'g{g}'} for g in range(groups) for i in range(per_group)]
+
+
+def _mutate(rows, rnd, step):
+    rows = [dict(r) for r in rows]
+    for _ in range(rnd.randint(1, 6)):
+        op = rnd.choice(['add', 'remove', 'move', 'new_group', 'second_group'])
+        if op == 'add':
+            rows.append({'word': f'add{step}_{rnd.randrange(10 ** 6)}', 'cluster_id': rnd.choice(rows)['cluster_id']})
+        elif op == 'remove' and len(rows) > 10:
+            rows.pop(rnd.randrange(len(rows)))
+        elif op == 'move':
+            rnd.choice(rows)['cluster_id'] = f'g{rnd.randrange(80)}'
+        elif op == 'new_group':
+            rows.extend({'word': f'ng{step}_{i}', 'cluster_id': f'new{step}'} for i in range(3))
+        else:
+            # Same word in two groups: last row wins in word_to_cluster.
+            rows.append({'word': rnd.choice(rows)['word'], 'cluster_id': f'g{rnd.randrange(60)}'})
+    rows.append({'word': None, 'cluster_id': 'ignored'})
+    return rows
+
+
+def _queries(rows, rnd, count=40):
+    words = [r['word'] for r in rows if r['word']]
+    return [' '.join(rnd.sample(words, 3)) + ' tail' for _ in range(count)] + ['nothing here', '']
+
+
+def _assert_same(inc, full, queries):
+    assert inc.word_to_cluster == full.word_to_cluster
+    assert inc.cluster_to_words == full.cluster_to_words
+    for query in queries:
+        assert inc.get_matches(query) == full.get_matches(query)
+        assert inc(query) == full(query)
+
+
+def test_apply_matches_full_rebuild_across_random_edits():
+    rnd = random.Random(7)
+    rows = _base_rows()
+    inc = _incremental(rows)
+    base = inc._base
+
+    for step in range(25):
+        rows = _mutate(rows, rnd, step)
+        inc = inc.apply(rows)
+        _assert_same(inc, _full(rows), _queries(rows, rnd))
+
+    assert inc._base is base
+    assert inc.overlay_size > 0
+
+
+def test_apply_does_not_mutate_previous_snapshot():
+    rows = _base_rows(groups=10)
+    old = _incremental(rows)
+    before = (dict(old.word_to_cluster), {k: list(v) for k, v in old.cluster_to_words.items()}, old('w1_0 x'))
+
+    new_rows = [r for r in rows if r['cluster_id'] != 'g1'] + [{'word': 'w2_0', 'cluster_id': 'g9'}]
+    new = old.apply(new_rows)
+
+    assert (old.word_to_cluster, old.cluster_to_words, old('w1_0 x')) == before
+    assert 'w1_0' not in new.word_to_cluster
+    assert new.word_to_cluster['w2_0'] == 'g9'
+
+
+def test_compact_folds_overlay_into_base_with_same_results():
+    rnd = random.Random(3)
+    rows = _base_rows()
+    inc = _incremental(rows)
+    for step in range(5):
+        rows = _mutate(rows, rnd, step)
+        inc = inc.apply(rows)
+
+    compacted = inc.compact()
+
+    assert compacted.overlay_size == 0
+    assert compacted._base is not inc._base
+    assert compacted.needs_compaction(0.0, 0) is False
+    _assert_same(compacted, _full(rows), _queries(rows, rnd))
+
+
+def test_large_diff_falls_back_to_full_build():
+    inc = _incremental(_base_rows(groups=10))
+    replaced = inc.apply([{'word': f'other{i}', 'cluster_id': 'x'} for i in range(20)])
+
+    assert replaced.overlay_size == 0
+    assert replaced._base is not inc._base
+    assert sorted(replaced.cluster_to_words['x']) == sorted(f'other{i}' for i in range(20))
+
+
+def test_manager_reload_applies_overlay_then_compacts_in_background(monkeypatch):
+    import vocab.vocab_manager as vm
+
+    rows = _base_rows(groups=50)
+    monkeypatch.setattr(vm, '_discriminator', None)
+    monkeypatch.setattr(vm, '_discriminator_loaded', False)
+    with patch('vocab.vocab_manager.get_automodel', return_value=None):
+        mgr = vm.VocabManager(user_id='inc_user', data_source=rows)
+    first = mgr._proc
+
+    monkeypatch.setitem(vm._cfg._impl, 'vocab_overlay_compact_min', 1000)
+    with patch.object(mgr, '_load_from_db', return_value=rows + [{'word': 'fresh', 'cluster_id': 'g1'}]):
+        assert mgr.reload() == len(rows) + 1
+    assert mgr._proc._base is first._base
+    assert mgr._proc.overlay_size == 1
+    assert mgr._compaction_thread is None
+
+    monkeypatch.setitem(vm._cfg._impl, 'vocab_overlay_compact_min', 0)
+    monkeypatch.setitem(vm._cfg._impl, 'vocab_overlay_compact_ratio', '0.0')
+    with patch.object(mgr, '_load_from_db', return_value=rows + [{'word': 'fresher', 'cluster_id': 'g2'}]):
+        mgr.reload()
+    thread = mgr._compaction_thread
+    if thread is not None:
+        thread.join(5)
+
+    assert mgr._proc.overlay_size == 0
+    assert mgr._proc._base is not first._base
+    assert mgr._proc.word_to_cluster['fresher'] == 'g2'
+    assert 'fresh' not in mgr._proc.word_to_cluster
+
+
+@pytest.mark.benchmark
+def test_reload_benchmark_100k_terms():
+    """Full rebuild (previous reload path) vs overlay apply for a 0.5% vocabulary change."""
+    terms = 100000
+    rnd = random.Random(11)
+    rows = [{'word': f'term{i:06d}', 'cluster_id': f'c{i // 5}'} for i in range(terms)]
+    changed = [dict(r) for r in rows]
+    for idx in rnd.sample(range(terms), terms // 400):
+        changed[idx]['cluster_id'] = f'moved{idx}'
+    changed += [{'word': f'new{i}', 'cluster_id': f'c{i}'} for i in range(terms // 400)]
+    del changed[:terms // 400]
+
+    full = _full(rows)
+    inc = _incremental(rows)
+
+    def _timed(fn, repeat=3):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            best = min(best, time.perf_counter() - start)
+        return best, result
+
+    full_s, _ = _timed(lambda: full.update_data_source(changed))
+    inc_s, updated = _timed(lambda: inc.apply(changed))
+    compact_s, compacted = _timed(updated.compact)
+
+    queries = _queries(changed, rnd, count=200)
+    query_s = {}
+    for name, proc in (('full', full), ('overlay', updated), ('compacted', compacted)):
+        start = time.perf_counter()
+        for query in queries:
+            proc(query)
+        query_s[name] = round((time.perf_counter() - start) / len(queries) * 1e6, 1)
+    report = {
+        'terms': terms,
+        'overlay_size': updated.overlay_size,
+        'full_rebuild_ms': round(full_s * 1000, 1),
+        'incremental_ms': round(inc_s * 1000, 1),
+        'background_compact_ms': round(compact_s * 1000, 1),
+        'query_us': query_s,
+    }
+    print(f'[vocab incremental bench] {report}')
+
+    _assert_same(updated, full, queries[:50])
@@ -76,7 +76,10 @@ def _mock_llm_discriminator(*call_returns):
 
 
 @pytest.fixture(autouse=True)
-def _patch_vocab_discriminator():
+def _patch_vocab_discriminator(monkeypatch):
+    import vocab.vocab_manager as vm
+    monkeypatch.setattr(vm, '_discriminator', None)
+    monkeypatch.setattr(vm, '_discriminator_loaded', False)
     model, _ = _mock_llm_discriminator([True])
     with patch('vocab.vocab_manager.get_automodel', return_value=model):
         yield
@@ -311,8 +314,7 @@ class TestVocabManagerThreadSafety:
         def _reload():
             try:
                 for _ in range(20):
-                    with patch.object(mgr, '_load_from_db', return_value=rows):
-                        mgr.reload()
+                    mgr.reload()
             except Exception as exc:  # pragma: no cover
                 errors.append(exc)
 
@@ -325,14 +327,205 @@ class TestVocabManagerThreadSafety:
 
         threads = [threading.Thread(target=_reload) for _ in range(3)]
         threads += [threading.Thread(target=_call) for _ in range(3)]
-        for t in threads:
-            t.start()
-        for t in threads:
-            t.join(timeout=10)
+        # Patch once: entering/exiting patch.object concurrently on one attribute is itself racy.
+        with patch.object(mgr, '_load_from_db', return_value=rows):
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join(timeout=10)
 
         assert errors == [], f'Thread errors: {errors}'
 
 
+# ---------------------------------------------------------------------------
+# TestVocabSnapshots / TestVocabRegistryBounds
+# ---------------------------------------------------------------------------
+
+class TestVocabSnapshots:
+
+    def test_identical_vocab_groups_share_one_processor(self):
+        mgr_a = _make_manager(_SAMPLE_ROWS_USER2, user_id='a')
+        mgr_b = _make_manager(list(reversed(_SAMPLE_ROWS_USER2)), user_id='b')
+        mgr_c = _make_manager(_SAMPLE_ROWS_USER1, user_id='c')
+
+        assert mgr_a._proc is mgr_b._proc
+        assert mgr_a._proc is not mgr_c._proc
+        assert mgr_b('关于民法的问题') == '关于民法（民事法律）的问题'
+
+    def test_last_cluster_wins_is_part_of_the_signature(self):
+        rows = [{'word': 'w', 'cluster_id': 'c1'}, {'word': 'w', 'cluster_id': 'c2'}]
+        mgr_a = _make_manager(rows, user_id='a')
+        mgr_b = _make_manager(list(reversed(rows)), user_id='b')
+
+        assert mgr_a._proc is not mgr_b._proc
+        assert mgr_a._proc.word_to_cluster == {'w': 'c2'}
+
+    def test_managers_share_one_discriminator_and_snapshot(self):
+        from vocab.vocab_manager import VocabManager
+
+        # Like the real factory: every call builds a new model object.
+        with patch('vocab.vocab_manager.get_automodel',
+                   side_effect=lambda role: _mock_llm_discriminator([True])[0]) as mocked:
+            mgr_a = VocabManager(user_id='a', data_source=_SAMPLE_ROWS_USER2)
+            mgr_b = VocabManager(user_id='b', data_source=list(reversed(_SAMPLE_ROWS_USER2)))
+
+        mocked.assert_called_once_with('llm')
+        assert mgr_a._discriminator is mgr_b._discriminator
+        assert mgr_a._proc is mgr_b._proc
+
+    def test_reload_swaps_snapshot_without_touching_shared_one(self):
+        mgr_a = _make_manager(_SAMPLE_ROWS_USER2, user_id='a')
+        mgr_b = _make_manager(_SAMPLE_ROWS_USER2, user_id='b')
+        old = mgr_a._proc
+
+        with patch.object(mgr_a, '_load_from_db', return_value=[{'word': 'alpha', 'cluster_id': 'c1'}]):
+            assert mgr_a.reload() == 1
+
+        assert mgr_a._proc is not old
+        assert mgr_b._proc is old
+        assert '民法' in old.word_to_cluster
+        assert mgr_b('关于民法的问题') == '关于民法（民事法律）的问题'
+
+    def test_reader_does_not_wait_for_a_slow_reload(self):
+        mgr = _make_manager(_SAMPLE_ROWS_USER2, user_id='slow_reload')
+        loading, release = threading.Event(), threading.Event()
+
+        def _slow_load():
+            loading.set()
+            release.wait(5)
+            return []
+
+        with patch.object(mgr, '_load_from_db', side_effect=_slow_load):
+            reloader = threading.Thread(target=mgr.reload)
+            reloader.start()
+            assert loading.wait(5)
+            result = mgr('关于民法的问题')
+            release.set()
+            reloader.join(5)
+
+        assert result == '关于民法（民事法律）的问题'
+        assert mgr.vocab_size == 0
+
+
+class TestVocabRegistryBounds:
+
+    def setup_method(self):
+        _reset_registry()
+
+    def teardown_method(self):
+        _reset_registry()
+
+    def test_registry_evicts_unreferenced_users_beyond_max_users(self, monkeypatch):
+        import vocab.vocab_manager as vm
+
+        monkeypatch.setitem(vm._cfg._impl, 'vocab_registry_max_users', 2)
+        with patch('vocab.vocab_manager.fetch_vocab_for_user_id', return_value=[]):
+            first = vm.get_vocab_manager('u1')
+            vm.get_vocab_manager('u2')
+            assert vm.get_vocab_manager('u1') is first  # hit sets the reference bit
+            vm.get_vocab_manager('u3')
+            stats = vm._registry.stats()
+            assert vm.get_vocab_manager('u1') is first
+
+        assert stats['users'] == 2
+        assert stats['evictions'] == 1
+        assert set(vm._registry._managers) == {'u1', 'u3'}
+
+    def test_registry_evicts_to_stay_under_memory_cap(self, monkeypatch):
+        import vocab.vocab_manager as vm
+
+        monkeypatch.setitem(vm._cfg._impl, 'vocab_registry_max_mb', 1)
+        big = {
+            user: [{'word': f'{user}-{i:05d}', 'cluster_id': f'c{i // 4}'} for i in range(2500)]
+            for user in ('big1', 'big2', 'big3')
+        }
+        with patch('vocab.vocab_manager.fetch_vocab_for_user_id', side_effect=big.get):
+            for user in big:
+                vm.get_vocab_manager(user)
+
+        assert list(vm._registry._managers) == ['big3']
+        assert vm._snapshots.live_bytes <= 2 ** 20
+
+
+class TestVocabRegistryBenchmark:
+
+    @pytest.mark.benchmark
+    def test_concurrency_benchmark_10k_users_64_readers(self):
+        """Legacy per-user processor + RLock vs shared snapshots with lock-free reads."""
+        import gc
+        import random
+        import time
+        from lazyllm.tools.rag.query_enh_ac import QueryEnhACProcessor
+        from vocab.vocab_manager import VocabManager
+
+        users, groups, readers, calls_per_reader = 10000, 50, 64, 400
+        vocabs = [
+            [{'word': f'term{g}x{i}', 'cluster_id': f'g{g}c{i // 2}'} for i in range(40)]
+            for g in range(groups)
+        ]
+        queries = [f'question about nothing {i}' for i in range(16)]
+
+        class _LegacyManager:
+            def __init__(self, rows):
+                self._lock = threading.RLock()
+                self._proc = QueryEnhACProcessor(data_source=rows, discriminator=None)
+
+            def __call__(self, query):
+                with self._lock:
+                    return self._proc(query)
+
+        def _rss_mb():
+            try:
+                with open('/proc/self/statm') as f:
+                    return int(f.read().split()[1]) * _os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+            except (OSError, ValueError):
+                return 0.0
+
+        def _run(factory):
+            gc.collect()
+            base_rss = _rss_mb()
+            start = time.perf_counter()
+            managers = [factory(vocabs[u % groups], u) for u in range(users)]
+            build_s = time.perf_counter() - start
+            rss_growth = _rss_mb() - base_rss
+            automata = len({id(m._proc) for m in managers})
+
+            def _reader(seed):
+                rnd = random.Random(seed)
+                for _ in range(calls_per_reader):
+                    managers[rnd.randrange(users)](rnd.choice(queries))
+
+            threads = [threading.Thread(target=_reader, args=(i,)) for i in range(readers)]
+            start = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - start
+            report = {
+                'build_s': round(build_s, 2),
+                'automata': automata,
+                'rss_growth_mb': round(max(0.0, rss_growth), 1),
+                'qps': round(readers * calls_per_reader / elapsed),
+            }
+            managers.clear()
+            return report
+
+        # Shared first so that memory freed by the legacy run cannot flatter it.
+        quiet_log = type('QuietLog', (), {'info': staticmethod(lambda *args, **kwargs: None)})()
+        with patch('vocab.vocab_manager.get_automodel', return_value=None), \
+                patch('vocab.vocab_manager.LOG', quiet_log):
+            shared = _run(lambda rows, u: VocabManager(user_id=f'u{u}', data_source=rows))
+        legacy = _run(lambda rows, u: _LegacyManager(rows))
+        print(f'[vocab registry bench] legacy={legacy} shared={shared}')
+
+        assert legacy['automata'] == users
+        assert shared['automata'] == groups
+        if legacy['rss_growth_mb']:
+            assert shared['rss_growth_mb'] * 3 < legacy['rss_growth_mb']
+        assert shared['qps'] > 0 and legacy['qps'] > 0
+
+
 class TestVocabDBQueryLayer:
 
     def test_get_vocab_conn_prefers_core_db_url(self):